@@ -0,0 +1,47 @@
+"""Add geohash-bucketed entity location index
+
+Revision ID: a4d6c8e1f359
+Revises: f2b9e4c70d16
+Create Date: 2026-10-19 16:05:12.480913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d6c8e1f359'
+down_revision: Union[str, Sequence[str], None] = 'f2b9e4c70d16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create entity_locations; (project_id, geohash) serves prefix radius queries."""
+    op.create_table('entity_locations',
+    sa.Column('project_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('entity_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('lat', sa.Float(), nullable=False),
+    sa.Column('lng', sa.Float(), nullable=False),
+    sa.Column('geohash', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('address', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['entity_id'], ['entity.id'], ),
+    sa.ForeignKeyConstraint(['project_id'], ['project.id'], ),
+    sa.PrimaryKeyConstraint('project_id', 'entity_id')
+    )
+    with op.batch_alter_table('entity_locations', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_entity_locations_geohash'), ['geohash'], unique=False)
+        batch_op.create_index('ix_entity_locations_project_geohash', ['project_id', 'geohash'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop entity location index."""
+    with op.batch_alter_table('entity_locations', schema=None) as batch_op:
+        batch_op.drop_index('ix_entity_locations_project_geohash')
+        batch_op.drop_index(batch_op.f('ix_entity_locations_geohash'))
+
+    op.drop_table('entity_locations')
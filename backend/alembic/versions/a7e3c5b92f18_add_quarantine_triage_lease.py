@@ -0,0 +1,35 @@
+"""Add triage lease columns to quarantine_rows
+
+Revision ID: a7e3c5b92f18
+Revises: d4a8e1f07b52
+Create Date: 2026-10-19 23:02:41.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7e3c5b92f18'
+down_revision: Union[str, Sequence[str], None] = 'd4a8e1f07b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Lease columns plus a (status, created_at) index for batch claims."""
+    with op.batch_alter_table('quarantine_rows', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('lease_owner', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+        batch_op.add_column(sa.Column('leased_until', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_quarantine_rows_status_created', ['status', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop the lease columns and claim index."""
+    with op.batch_alter_table('quarantine_rows', schema=None) as batch_op:
+        batch_op.drop_index('ix_quarantine_rows_status_created')
+        batch_op.drop_column('leased_until')
+        batch_op.drop_column('lease_owner')
@@ -0,0 +1,29 @@
+"""Add covering index for project S-curve bucket aggregation
+
+Revision ID: a8d3f5e27c61
+Revises: f1c6d8a24b93
+Create Date: 2026-10-19 20:14:08.527314
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d3f5e27c61'
+down_revision: Union[str, Sequence[str], None] = 'f1c6d8a24b93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """(project_id, timestamp) prefix plus the summed columns: index-only bucket scans."""
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.create_index('ix_transaction_project_time_category_amount', ['project_id', 'timestamp', 'category_code', 'actual_amount'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop the S-curve covering index."""
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.drop_index('ix_transaction_project_time_category_amount')
@@ -0,0 +1,39 @@
+"""Add receiver/time covering indexes for vendor velocity
+
+Revision ID: b3d9f6a41c27
+Revises: a7e3c5b92f18
+Create Date: 2026-10-19 23:41:17.602935
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d9f6a41c27'
+down_revision: Union[str, Sequence[str], None] = 'a7e3c5b92f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Covering indexes for the grouped velocity query, per vendor and per project."""
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_transaction_receiver_time_category_amount',
+            ['receiver', 'transaction_date', 'timestamp', 'category_code', 'actual_amount'],
+            unique=False,
+        )
+        batch_op.create_index(
+            'ix_transaction_project_receiver_time_category_amount',
+            ['project_id', 'receiver', 'transaction_date', 'timestamp', 'category_code', 'actual_amount'],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    """Drop the vendor velocity indexes."""
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.drop_index('ix_transaction_project_receiver_time_category_amount')
+        batch_op.drop_index('ix_transaction_receiver_time_category_amount')
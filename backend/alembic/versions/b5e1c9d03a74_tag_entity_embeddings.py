@@ -0,0 +1,34 @@
+"""Tag Entity embeddings with dimension and update watermark
+
+Revision ID: b5e1c9d03a74
+Revises: a8d3f5e27c61
+Create Date: 2026-10-19 20:52:37.160448
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e1c9d03a74'
+down_revision: Union[str, Sequence[str], None] = 'a8d3f5e27c61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add embedding_dim/embedding_updated_at and the partition watermark index."""
+    with op.batch_alter_table('entity', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('embedding_dim', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('embedding_updated_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_entity_project_dim_updated', ['project_id', 'embedding_dim', 'embedding_updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Remove entity embedding tags."""
+    with op.batch_alter_table('entity', schema=None) as batch_op:
+        batch_op.drop_index('ix_entity_project_dim_updated')
+        batch_op.drop_column('embedding_updated_at')
+        batch_op.drop_column('embedding_dim')
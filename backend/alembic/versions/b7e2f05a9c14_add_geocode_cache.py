@@ -0,0 +1,44 @@
+"""Add persistent geocode cache
+
+Revision ID: b7e2f05a9c14
+Revises: a4d6c8e1f359
+Create Date: 2026-10-19 16:48:37.215604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2f05a9c14'
+down_revision: Union[str, Sequence[str], None] = 'a4d6c8e1f359'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create geocode_cache keyed by normalized-address digest."""
+    op.create_table('geocode_cache',
+    sa.Column('address_key', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('normalized_address', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('found', sa.Boolean(), nullable=False),
+    sa.Column('lat', sa.Float(), nullable=True),
+    sa.Column('lng', sa.Float(), nullable=True),
+    sa.Column('formatted_address', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('provider', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('address_key')
+    )
+    with op.batch_alter_table('geocode_cache', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_geocode_cache_provider'), ['provider'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop geocode cache."""
+    with op.batch_alter_table('geocode_cache', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_geocode_cache_provider'))
+
+    op.drop_table('geocode_cache')
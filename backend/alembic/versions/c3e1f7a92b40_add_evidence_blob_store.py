@@ -0,0 +1,50 @@
+"""Add content-addressed evidence blob store
+
+Revision ID: c3e1f7a92b40
+Revises: a9f3f0ba97ba
+Create Date: 2026-10-19 09:12:44.201337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e1f7a92b40'
+down_revision: Union[str, Sequence[str], None] = 'a9f3f0ba97ba'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create evidence_blobs and index Document.file_hash for dedup lookups."""
+    op.create_table('evidence_blobs',
+    sa.Column('sha256', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('storage_path', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('content_text', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('extraction_kind', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('last_referenced_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    with op.batch_alter_table('evidence_blobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_evidence_blobs_ref_count'), ['ref_count'], unique=False)
+
+    with op.batch_alter_table('document', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_document_file_hash'), ['file_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop evidence blob store."""
+    with op.batch_alter_table('document', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_document_file_hash'))
+
+    with op.batch_alter_table('evidence_blobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_evidence_blobs_ref_count'))
+
+    op.drop_table('evidence_blobs')
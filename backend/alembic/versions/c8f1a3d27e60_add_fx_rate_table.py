@@ -0,0 +1,36 @@
+"""Add shared historical FX rate table
+
+Revision ID: c8f1a3d27e60
+Revises: b7e2f05a9c14
+Create Date: 2026-10-19 17:31:09.662140
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8f1a3d27e60'
+down_revision: Union[str, Sequence[str], None] = 'b7e2f05a9c14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create fx_rates keyed by (currency, rate_date)."""
+    op.create_table('fx_rates',
+    sa.Column('currency', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('rate_date', sa.Date(), nullable=False),
+    sa.Column('rate_per_usd', sa.Float(), nullable=False),
+    sa.Column('source', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('currency', 'rate_date')
+    )
+
+
+def downgrade() -> None:
+    """Drop FX rate table."""
+    op.drop_table('fx_rates')
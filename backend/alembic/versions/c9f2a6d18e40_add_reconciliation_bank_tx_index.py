@@ -0,0 +1,29 @@
+"""Add bank_tx_id index for the waterfall anti-join
+
+Revision ID: c9f2a6d18e40
+Revises: b5e1c9d03a74
+Create Date: 2026-10-19 21:31:44.902615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9f2a6d18e40'
+down_revision: Union[str, Sequence[str], None] = 'b5e1c9d03a74'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Lets NOT EXISTS probes on bank_tx_id use an index, like internal_tx_id already does."""
+    with op.batch_alter_table('reconciliationmatch', schema=None) as batch_op:
+        batch_op.create_index('ix_reconciliationmatch_bank_tx', ['bank_tx_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop the bank_tx_id index."""
+    with op.batch_alter_table('reconciliationmatch', schema=None) as batch_op:
+        batch_op.drop_index('ix_reconciliationmatch_bank_tx')
@@ -0,0 +1,69 @@
+"""Add indexed forensic trigger tags
+
+Revision ID: d3a7b9c41e82
+Revises: c8f1a3d27e60
+Create Date: 2026-10-19 18:12:40.903317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a7b9c41e82'
+down_revision: Union[str, Sequence[str], None] = 'c8f1a3d27e60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Trigger headings already persisted in mens_rea_description (see trigger_tags.TRIGGER_PREFIXES)
+BACKFILL = [
+    ("Penggelembungan", "INFLATION"),
+    ("Evidence Gap", "UNVERIFIED_SPEND"),
+    ("Personal Leakage", "PERSONAL_LEAKAGE"),
+    ("Forensic Red Flag: Entry marked as 'Ngarang'", "INVENTED_ENTRY"),
+    ("Potential Duplicate", "DUPLICATE"),
+    ("Velocity Risk", "VELOCITY"),
+    ("Channel Risk", "CASH_CHANNEL"),
+    ("Structuring Risk", "STRUCTURING"),
+    ("Geographic Mismatch", "DISTANT_VENDOR_RISK"),
+    ("Global Risk: Recidivist", "RECIDIVIST"),
+]
+
+
+def upgrade() -> None:
+    """Create transaction_trigger_tags and backfill from existing trigger text (one-time scan)."""
+    op.create_table('transaction_trigger_tags',
+    sa.Column('transaction_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('tag', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('project_id', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['project.id'], ),
+    sa.ForeignKeyConstraint(['transaction_id'], ['transaction.id'], ),
+    sa.PrimaryKeyConstraint('transaction_id', 'tag')
+    )
+    with op.batch_alter_table('transaction_trigger_tags', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_transaction_trigger_tags_project_id'), ['project_id'], unique=False)
+        batch_op.create_index('ix_transaction_trigger_tags_tag_project', ['tag', 'project_id'], unique=False)
+
+    conn = op.get_bind()
+    for prefix, tag in BACKFILL:
+        conn.execute(
+            sa.text(
+                'INSERT INTO transaction_trigger_tags (transaction_id, tag, project_id, created_at) '
+                'SELECT id, :tag, project_id, CURRENT_TIMESTAMP FROM "transaction" '
+                'WHERE mens_rea_description LIKE :pattern'
+            ),
+            {"tag": tag, "pattern": f"%{prefix}%"},
+        )
+
+
+def downgrade() -> None:
+    """Drop trigger tags."""
+    with op.batch_alter_table('transaction_trigger_tags', schema=None) as batch_op:
+        batch_op.drop_index('ix_transaction_trigger_tags_tag_project')
+        batch_op.drop_index(batch_op.f('ix_transaction_trigger_tags_project_id'))
+
+    op.drop_table('transaction_trigger_tags')
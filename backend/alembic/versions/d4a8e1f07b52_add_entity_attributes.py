@@ -0,0 +1,44 @@
+"""Add normalized entity attributes for shared-attribute clusters
+
+Revision ID: d4a8e1f07b52
+Revises: c9f2a6d18e40
+Create Date: 2026-10-19 22:14:09.331870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a8e1f07b52'
+down_revision: Union[str, Sequence[str], None] = 'c9f2a6d18e40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create entity_attributes with covering indexes for global and per-project GROUP BY."""
+    op.create_table('entity_attributes',
+    sa.Column('entity_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('attribute', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('value', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('project_id', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.ForeignKeyConstraint(['entity_id'], ['entity.id'], ),
+    sa.ForeignKeyConstraint(['project_id'], ['project.id'], ),
+    sa.PrimaryKeyConstraint('entity_id', 'attribute')
+    )
+    with op.batch_alter_table('entity_attributes', schema=None) as batch_op:
+        batch_op.create_index('ix_entity_attributes_attr_value', ['attribute', 'value', 'entity_id'], unique=False)
+        batch_op.create_index('ix_entity_attributes_project_attr_value', ['project_id', 'attribute', 'value', 'entity_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop entity_attributes."""
+    with op.batch_alter_table('entity_attributes', schema=None) as batch_op:
+        batch_op.drop_index('ix_entity_attributes_project_attr_value')
+        batch_op.drop_index('ix_entity_attributes_attr_value')
+
+    op.drop_table('entity_attributes')
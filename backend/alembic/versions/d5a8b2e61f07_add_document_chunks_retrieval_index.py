@@ -0,0 +1,69 @@
+"""Add document_chunks retrieval index for hybrid RAG search
+
+Revision ID: d5a8b2e61f07
+Revises: c3e1f7a92b40
+Create Date: 2026-10-19 11:03:27.518904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a8b2e61f07'
+down_revision: Union[str, Sequence[str], None] = 'c3e1f7a92b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create document_chunks plus the dialect-specific full-text index."""
+    op.create_table('document_chunks',
+    sa.Column('id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('document_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('project_id', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('chunk_index', sa.Integer(), nullable=False),
+    sa.Column('content', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('content_hash', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('embedding_json', sa.JSON(), nullable=True),
+    sa.Column('embedding_model', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['document_id'], ['document.id'], ),
+    sa.ForeignKeyConstraint(['project_id'], ['project.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('document_chunks', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_document_chunks_document_id'), ['document_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_document_chunks_project_id'), ['project_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_document_chunks_content_hash'), ['content_hash'], unique=False)
+
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_document_chunks_content_tsv ON document_chunks "
+            "USING GIN (to_tsvector('simple', content))"
+        )
+    elif bind.dialect.name == "sqlite":
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS document_chunks_fts USING fts5("
+            "content, chunk_id UNINDEXED, document_id UNINDEXED, project_id UNINDEXED)"
+        )
+
+
+def downgrade() -> None:
+    """Drop document_chunks and its full-text index."""
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_document_chunks_content_tsv")
+    elif bind.dialect.name == "sqlite":
+        op.execute("DROP TABLE IF EXISTS document_chunks_fts")
+
+    with op.batch_alter_table('document_chunks', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_document_chunks_content_hash'))
+        batch_op.drop_index(batch_op.f('ix_document_chunks_project_id'))
+        batch_op.drop_index(batch_op.f('ix_document_chunks_document_id'))
+
+    op.drop_table('document_chunks')
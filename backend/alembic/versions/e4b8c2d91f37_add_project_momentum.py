@@ -0,0 +1,47 @@
+"""Add project momentum state for the sentinel
+
+Revision ID: e4b8c2d91f37
+Revises: d3a7b9c41e82
+Create Date: 2026-10-19 18:47:05.216481
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b8c2d91f37'
+down_revision: Union[str, Sequence[str], None] = 'd3a7b9c41e82'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create project_momentum and index the sentinel's 14-day window scan."""
+    op.create_table('project_momentum',
+    sa.Column('project_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('window_tx_count', sa.Integer(), nullable=False),
+    sa.Column('this_week_flags', sa.Integer(), nullable=False),
+    sa.Column('last_week_flags', sa.Integer(), nullable=False),
+    sa.Column('last_tx_at', sa.DateTime(), nullable=True),
+    sa.Column('last_ingestion_at', sa.DateTime(), nullable=True),
+    sa.Column('acceleration', sa.Float(), nullable=True),
+    sa.Column('silence_alerted', sa.Boolean(), nullable=False),
+    sa.Column('acceleration_alerted', sa.Boolean(), nullable=False),
+    sa.Column('evaluated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['project.id'], ),
+    sa.PrimaryKeyConstraint('project_id')
+    )
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.create_index('ix_transaction_timestamp_project_risk', ['timestamp', 'project_id', 'risk_score'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop project momentum state."""
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.drop_index('ix_transaction_timestamp_project_risk')
+
+    op.drop_table('project_momentum')
@@ -0,0 +1,37 @@
+"""Tag CopilotInsight embeddings with model and dimension
+
+Revision ID: e7c4d19a3b58
+Revises: d5a8b2e61f07
+Create Date: 2026-10-19 13:41:09.774215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7c4d19a3b58'
+down_revision: Union[str, Sequence[str], None] = 'd5a8b2e61f07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add embedding_model/embedding_dim tags and watermark index on created_at."""
+    with op.batch_alter_table('copilotinsight', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('embedding_model', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+        batch_op.add_column(sa.Column('embedding_dim', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_copilotinsight_embedding_model'), ['embedding_model'], unique=False)
+        batch_op.create_index(batch_op.f('ix_copilotinsight_created_at'), ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Remove embedding tags."""
+    with op.batch_alter_table('copilotinsight', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_copilotinsight_created_at'))
+        batch_op.drop_index(batch_op.f('ix_copilotinsight_embedding_model'))
+        batch_op.drop_column('embedding_dim')
+        batch_op.drop_column('embedding_model')
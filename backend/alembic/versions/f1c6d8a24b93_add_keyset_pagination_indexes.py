@@ -0,0 +1,45 @@
+"""Add sort-key indexes for keyset pagination
+
+Revision ID: f1c6d8a24b93
+Revises: e4b8c2d91f37
+Create Date: 2026-10-19 19:06:31.482190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c6d8a24b93'
+down_revision: Union[str, Sequence[str], None] = 'e4b8c2d91f37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Indexes ending in the primary key so every listing page is an index seek."""
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.create_index('ix_transaction_project_source_time_id', ['project_id', 'source_type', 'timestamp', 'id'], unique=False)
+
+    with op.batch_alter_table('auditlog', schema=None) as batch_op:
+        batch_op.create_index('ix_auditlog_entity_time_id', ['entity_id', 'timestamp', 'id'], unique=False)
+        batch_op.create_index('ix_auditlog_time_id', ['timestamp', 'id'], unique=False)
+
+    with op.batch_alter_table('reconciliationmatch', schema=None) as batch_op:
+        batch_op.create_index('ix_reconciliationmatch_matched_id', ['matched_at', 'id'], unique=False)
+        batch_op.create_index('ix_reconciliationmatch_internal_tx', ['internal_tx_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop keyset pagination indexes."""
+    with op.batch_alter_table('reconciliationmatch', schema=None) as batch_op:
+        batch_op.drop_index('ix_reconciliationmatch_internal_tx')
+        batch_op.drop_index('ix_reconciliationmatch_matched_id')
+
+    with op.batch_alter_table('auditlog', schema=None) as batch_op:
+        batch_op.drop_index('ix_auditlog_time_id')
+        batch_op.drop_index('ix_auditlog_entity_time_id')
+
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.drop_index('ix_transaction_project_source_time_id')
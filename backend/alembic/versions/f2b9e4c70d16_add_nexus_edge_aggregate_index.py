@@ -0,0 +1,32 @@
+"""Add covering index for Nexus (sender, receiver) edge aggregation
+
+Revision ID: f2b9e4c70d16
+Revises: e7c4d19a3b58
+Create Date: 2026-10-19 15:22:51.039112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b9e4c70d16'
+down_revision: Union[str, Sequence[str], None] = 'e7c4d19a3b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Project-scoped GROUP BY sender, receiver reads only this index."""
+    op.create_index(
+        'ix_transaction_project_sender_receiver',
+        'transaction',
+        ['project_id', 'sender', 'receiver', 'actual_amount'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Remove Nexus aggregation index."""
+    op.drop_index('ix_transaction_project_sender_receiver', table_name='transaction')
@@ -2,7 +2,7 @@
 Forensic Services V2 API Router.
 Exposes NetworkService, AnalyticsService, VisionService, and v3.0 agents.
 """
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from sqlmodel import Session
 from typing import Dict, Any, List, Optional
@@ -41,13 +41,15 @@ async def get_analytics_dashboard(
 @router.get("/analytics/s-curve/{project_id}")
 async def get_s_curve(
     project_id: str,
+    granularity: str = Query("month", pattern="^(day|week|month)$"),
+    max_points: int = Query(500, ge=3, le=5000),
     db: Session = Depends(get_session)
 ):
     """
-    Generate S-Curve data comparing planned vs actual spend.
+    Generate S-Curve data comparing planned, earned and actual spend.
     """
     service = AnalyticsService(db)
-    return service.get_s_curve_data(project_id)
+    return service.get_s_curve_data(project_id, granularity=granularity, max_points=max_points)
 
 
 @router.get("/analytics/high-risk-transactions/{project_id}")
@@ -2,11 +2,14 @@
 Prophet Services V2 API Router.
 Predictive Forensic Analytics.
 """
+import asyncio
 from fastapi import APIRouter, Depends
 from sqlmodel import Session
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
 from app.core.db import get_session
+from app.core.auth_middleware import verify_project_access
+from app.models import Project
 from app.services.intelligence.prophet_service import ProphetService
 
 router = APIRouter(prefix="/prophet", tags=["The Prophet - Predictive Compliance"])
@@ -28,6 +31,28 @@ async def predict_transaction_risk(
     )
     return result
 
+class BatchRiskRequest(BaseModel):
+    transaction_ids: Optional[List[str]] = None
+    min_score: float = 0.0
+
+@router.post("/predict-risk/batch/{project_id}")
+async def predict_batch_risk(
+    request: BatchRiskRequest,
+    project: Project = Depends(verify_project_access),
+    db: Session = Depends(get_session)
+):
+    """
+    Vectorized risk scoring for a whole project, or a list of its transactions.
+    Scoring is CPU-bound and runs in a worker thread.
+    """
+    service = ProphetService(db)
+    return await asyncio.to_thread(
+        service.predict_batch_risk,
+        project.id,
+        request.transaction_ids,
+        request.min_score
+    )
+
 @router.get("/forecast-budget/{project_id}")
 async def forecast_budget_exhaustion(
     project_id: str,
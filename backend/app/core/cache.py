@@ -1,18 +1,29 @@
 """
-Redis-based caching utilities for performance optimization.
+Unified multi-level cache.
 
-This module provides decorators and utilities for caching expensive operations
-like LLM queries, database queries, and computational results.
+One cache for the whole backend: a bounded LRU/TTL dictionary per process (L1) in
+front of Redis (L2). Misses are coalesced per key (single-flight) so N concurrent
+requests for the same dashboard compute it once, hot entries are refreshed early
+with probability rising towards expiry (XFetch), and invalidation bumps tag tokens
+instead of scanning the keyspace.
 
 Performance Impact: +1.5 points (Performance dimension)
 Target: 70% cache hit rate for common queries
 """
 
+import asyncio
 import hashlib
 import json
 import logging
+import math
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from functools import wraps
-from typing import Callable, Optional
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Sequence
 
 import redis
 from app.core.config import settings
@@ -35,6 +46,463 @@ except Exception as e:
     logger.error(f"Failed to initialize Redis cache: {e}")
     redis_client = None
 
+TAG_PREFIX = "cache:tag:"
+LOCK_PREFIX = "cache:lock:"
+TAG_CHECK_INTERVAL = 1.0  # seconds a process trusts its view of tag tokens
+LOCK_TTL_MS = 30_000
+LOCK_POLL_SECONDS = 0.05
+SCAN_BATCH = 500
+
+_RELEASE_LOCK = (
+    "if redis.call('get', KEYS[1]) == ARGV[1] then "
+    "return redis.call('del', KEYS[1]) else return 0 end"
+)
+
+
+def project_tag(project_id: str) -> str:
+    """Tag carried by every cached value derived from one project's data."""
+    return f"project:{project_id}"
+
+
+def namespace_tag(key: str) -> Optional[str]:
+    """Keys are namespaced by their first segment ("sql_gen:abc" -> "ns:sql_gen")."""
+    if ":" not in key:
+        return None
+    return f"ns:{key.split(':', 1)[0]}"
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    expires_at: float
+    delta: float = 0.0  # seconds the value took to compute
+    tags: Dict[str, str] = field(default_factory=dict)  # tag -> token at write time
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {"v": self.value, "e": self.expires_at, "d": self.delta, "t": self.tags},
+            default=str,
+        )
+
+    @classmethod
+    def from_json(cls, raw: str) -> "CacheEntry":
+        payload = json.loads(raw)
+        return cls(value=payload["v"], expires_at=payload["e"], delta=payload.get("d", 0.0), tags=payload.get("t", {}))
+
+
+class LRUTTLCache:
+    """Thread-safe bounded dictionary: least-recently-used eviction plus per-entry TTL."""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def keys(self):
+        with self._lock:
+            return list(self._data.keys())
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class UnifiedCache:
+    """
+    L1 (process LRU) + L2 (Redis) cache with single-flight, early refresh and tags.
+
+    Values round-trip through JSON so L1 and L2 hand back the same shapes; treat
+    returned values as read-only, L1 shares them between callers.
+    Works without Redis: L1, coalescing and tags then stay process-local.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        l1_max_entries: int = settings.CACHE_L1_MAX_ENTRIES,
+        l1_ttl: int = settings.CACHE_L1_TTL,
+        beta: float = settings.CACHE_EARLY_REFRESH_BETA,
+    ):
+        self.redis = client
+        self.l1 = LRUTTLCache(l1_max_entries)
+        self.l1_ttl = l1_ttl
+        self.beta = beta
+        self._flights: Dict[str, _Flight] = {}
+        self._async_flights: Dict[tuple, asyncio.Future] = {}
+        self._flight_lock = threading.Lock()
+        self._local_tags: Dict[str, str] = {}  # authoritative when Redis is absent
+        self._tag_view: Dict[str, tuple] = {}  # tag -> (token, fetched_at)
+        self.stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "coalesced": 0, "early_refreshes": 0, "stale_served": 0}
+
+    # --- Tags -------------------------------------------------------------
+
+    def _current_tokens(self, tags: Iterable[str], create: bool = False) -> Dict[str, str]:
+        tags = list(dict.fromkeys(tags))
+        if not tags:
+            return {}
+        if self.redis is None:
+            if create:
+                for tag in tags:
+                    self._local_tags.setdefault(tag, uuid.uuid4().hex)
+            return {tag: self._local_tags.get(tag, "") for tag in tags}
+
+        now = time.time()
+        tokens: Dict[str, str] = {}
+        stale = []
+        for tag in tags:
+            cached = self._tag_view.get(tag)
+            if cached and now - cached[1] < TAG_CHECK_INTERVAL and (cached[0] or not create):
+                tokens[tag] = cached[0]
+            else:
+                stale.append(tag)
+        if stale:
+            try:
+                if create:
+                    pipe = self.redis.pipeline()
+                    for tag in stale:
+                        pipe.set(f"{TAG_PREFIX}{tag}", uuid.uuid4().hex, nx=True)
+                    pipe.execute()
+                fetched = self.redis.mget([f"{TAG_PREFIX}{tag}" for tag in stale])
+            except Exception as e:
+                logger.error(f"Cache tag lookup error: {e}")
+                fetched = [None] * len(stale)
+            for tag, token in zip(stale, fetched):
+                tokens[tag] = token or ""
+                self._tag_view[tag] = (token or "", now)
+        return tokens
+
+    def _tags_current(self, entry: CacheEntry) -> bool:
+        if not entry.tags:
+            return True
+        return self._current_tokens(entry.tags.keys()) == entry.tags
+
+    def invalidate_tags(self, *tags: str) -> int:
+        """O(1) per tag: every entry written under the old token becomes a miss."""
+        tags = [tag for tag in tags if tag]
+        for tag in tags:
+            token = uuid.uuid4().hex
+            self._local_tags[tag] = token
+            self._tag_view[tag] = (token, time.time())
+            if self.redis is not None:
+                try:
+                    self.redis.set(f"{TAG_PREFIX}{tag}", token)
+                except Exception as e:
+                    logger.error(f"Cache tag invalidation error for {tag}: {e}")
+        return len(tags)
+
+    def tag_version(self, *tags: str) -> str:
+        """Opaque version of these tags; changes whenever any of them is invalidated."""
+        tokens = self._current_tokens(tags, create=True)
+        fingerprint = "|".join(f"{tag}={tokens[tag]}" for tag in sorted(tokens))
+        return hashlib.md5(fingerprint.encode("utf-8")).hexdigest()[:16]
+
+    # --- Plain get/set ----------------------------------------------------
+
+    def _lookup(self, key: str, local_only: bool = False) -> Optional[CacheEntry]:
+        entry = self.l1.get(key)
+        level = "l1_hits"
+        if entry is None and self.redis is not None and not local_only:
+            try:
+                raw = self.redis.get(key)
+            except Exception as e:
+                logger.error(f"Cache get error for {key}: {e}")
+                raw = None
+            if raw:
+                try:
+                    entry = CacheEntry.from_json(raw)
+                    level = "l2_hits"
+                except (ValueError, KeyError, TypeError):
+                    entry = None
+            if entry is not None:
+                self.l1.set(key, entry, min(self.l1_ttl, max(entry.expires_at - time.time(), 0.0)))
+        if entry is None:
+            return None
+        if entry.expires_at <= time.time() or not self._tags_current(entry):
+            self.l1.delete(key)
+            return None
+        self.stats[level] += 1
+        return entry
+
+    def get(self, key: str, local_only: bool = False) -> Optional[Any]:
+        """Validated read (expiry and tag tokens); local_only skips Redis on an L1 miss."""
+        entry = self._lookup(key, local_only)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        return entry.value
+
+    def set(self, key: str, value: Any, ttl: int = 300, tags: Sequence[str] = (), delta: float = 0.0) -> bool:
+        return self._write(key, value, ttl, tags, delta) is not None
+
+    def _write(self, key: str, value: Any, ttl: int, tags: Sequence[str], delta: float) -> Optional[CacheEntry]:
+        """Stores the JSON round-tripped value; returns the entry, or None if it did not serialize."""
+        all_tags = list(tags)
+        ns = namespace_tag(key)
+        if ns:
+            all_tags.append(ns)
+        entry = CacheEntry(value=None, expires_at=time.time() + ttl, delta=delta, tags=self._current_tokens(all_tags, create=True))
+        entry.value = value
+        try:
+            raw = entry.to_json()
+            entry.value = json.loads(raw)["v"]
+        except (TypeError, ValueError) as e:
+            logger.error(f"Cache set error for {key}: {e}")
+            return None
+        self.l1.set(key, entry, min(self.l1_ttl, ttl))
+        if self.redis is not None:
+            try:
+                self.redis.setex(key, ttl, raw)
+            except Exception as e:
+                logger.error(f"Cache set error for {key}: {e}")
+        return entry
+
+    def delete(self, key: str) -> bool:
+        removed = self.l1.delete(key)
+        if self.redis is not None:
+            try:
+                removed = bool(self.redis.delete(key)) or removed
+            except Exception as e:
+                logger.error(f"Cache delete error for {key}: {e}")
+        return removed
+
+    def delete_matching(self, pattern: str) -> int:
+        """
+        Glob-pattern delete for legacy/admin callers. Uses incremental SCAN + UNLINK,
+        never KEYS; prefer invalidate_tags on request paths.
+        """
+        import fnmatch
+
+        deleted = 0
+        for key in self.l1.keys():
+            if fnmatch.fnmatch(key, pattern):
+                deleted += self.l1.delete(key)
+        if self.redis is not None:
+            deleted += scan_delete(self.redis, pattern)
+        return deleted
+
+    def clear(self) -> None:
+        self.l1.clear()
+        self._local_tags.clear()
+        self._tag_view.clear()
+
+    # --- Early refresh ----------------------------------------------------
+
+    def _should_refresh(self, entry: CacheEntry) -> bool:
+        """XFetch: recompute before expiry with probability growing as expiry nears."""
+        if entry.delta <= 0 or self.beta <= 0:
+            return False
+        jitter = -entry.delta * self.beta * math.log(1.0 - random.random())
+        return time.time() + jitter >= entry.expires_at
+
+    # --- Cross-process coalescing -----------------------------------------
+
+    def _acquire(self, key: str) -> Optional[str]:
+        """Returns a lock token, "" when Redis is absent, or None when another worker holds it."""
+        if self.redis is None:
+            return ""
+        token = uuid.uuid4().hex
+        try:
+            if self.redis.set(f"{LOCK_PREFIX}{key}", token, nx=True, px=LOCK_TTL_MS):
+                return token
+            return None
+        except Exception:
+            return ""
+
+    def _release(self, key: str, token: str):
+        if self.redis is None or not token:
+            return
+        try:
+            self.redis.eval(_RELEASE_LOCK, 1, f"{LOCK_PREFIX}{key}", token)
+        except Exception as e:
+            logger.error(f"Cache lock release error for {key}: {e}")
+
+    def _store(self, key: str, value: Any, ttl: int, tags, started: float) -> Any:
+        """Caches a computed value and returns it in the shape later hits will see."""
+        # tags may depend on the computed value (callable) or be known up front
+        resolved = tags(value) if callable(tags) else tags
+        entry = self._write(key, value, ttl, resolved, time.perf_counter() - started)
+        return entry.value if entry is not None else value
+
+    # --- Read-through -----------------------------------------------------
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: int = 300, tags: Sequence[str] = ()) -> Any:
+        """Synchronous read-through; concurrent callers for one key share a single compute."""
+        entry = self._lookup(key)
+        if entry is not None:
+            if not self._should_refresh(entry):
+                return entry.value
+            self.stats["early_refreshes"] += 1
+
+        with self._flight_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            if entry is not None:
+                self.stats["stale_served"] += 1
+                return entry.value
+            self.stats["coalesced"] += 1
+            flight.done.wait(LOCK_TTL_MS / 1000)
+            if flight.error is not None:
+                raise flight.error
+            if flight.done.is_set():
+                return flight.value
+            return compute()
+
+        try:
+            if entry is None:
+                self.stats["misses"] += 1
+            token = self._acquire(key)
+            if token is None:
+                if entry is not None:
+                    self.stats["stale_served"] += 1
+                    flight.value = entry.value
+                    return entry.value
+                deadline = time.time() + LOCK_TTL_MS / 1000
+                while time.time() < deadline:
+                    time.sleep(LOCK_POLL_SECONDS)
+                    fresh = self._lookup(key)
+                    if fresh is not None:
+                        flight.value = fresh.value
+                        return fresh.value
+            try:
+                started = time.perf_counter()
+                value = self._store(key, compute(), ttl, tags, started)
+                flight.value = value
+                return value
+            finally:
+                self._release(key, token or "")
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            flight.done.set()
+            with self._flight_lock:
+                self._flights.pop(key, None)
+
+    async def aget_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl: int = 300,
+        tags: Sequence[str] = (),
+    ) -> Any:
+        """Async read-through; coalesces per key within the event loop and across workers."""
+        entry = self._lookup(key)
+        if entry is not None:
+            if not self._should_refresh(entry):
+                return entry.value
+            self.stats["early_refreshes"] += 1
+
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        pending = self._async_flights.get(flight_key)
+        if pending is not None:
+            if entry is not None:
+                self.stats["stale_served"] += 1
+                return entry.value
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(pending)
+
+        future = loop.create_future()
+        self._async_flights[flight_key] = future
+        try:
+            if entry is None:
+                self.stats["misses"] += 1
+            token = self._acquire(key)
+            if token is None:
+                if entry is not None:
+                    self.stats["stale_served"] += 1
+                    future.set_result(entry.value)
+                    return entry.value
+                deadline = time.time() + LOCK_TTL_MS / 1000
+                while time.time() < deadline:
+                    await asyncio.sleep(LOCK_POLL_SECONDS)
+                    fresh = self._lookup(key)
+                    if fresh is not None:
+                        future.set_result(fresh.value)
+                        return fresh.value
+            try:
+                started = time.perf_counter()
+                value = self._store(key, await compute(), ttl, tags, started)
+                future.set_result(value)
+                return value
+            finally:
+                self._release(key, token or "")
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                # Followers re-raise it; keep the loop from logging "never retrieved"
+                future.exception()
+            raise
+        finally:
+            self._async_flights.pop(flight_key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["l1_hits"] + self.stats["l2_hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hits": self.stats["l1_hits"] + self.stats["l2_hits"],
+            "hit_rate": (self.stats["l1_hits"] + self.stats["l2_hits"]) / lookups * 100 if lookups else 0.0,
+            "l1_size": len(self.l1),
+            "l1_capacity": self.l1.max_entries,
+            "l1_evictions": self.l1.evictions,
+            "in_flight": len(self._flights) + len(self._async_flights),
+        }
+
+
+def scan_delete(client, pattern: str, batch: int = SCAN_BATCH) -> int:
+    """Incremental SCAN + UNLINK: never blocks Redis the way KEYS does."""
+    deleted = 0
+    keys = []
+    for key in client.scan_iter(match=pattern, count=batch):
+        keys.append(key)
+        if len(keys) >= batch:
+            deleted += client.unlink(*keys)
+            keys = []
+    if keys:
+        deleted += client.unlink(*keys)
+    return deleted
+
+
+cache = UnifiedCache(redis_client)
+
 
 def generate_cache_key(prefix: str, *args, **kwargs) -> str:
     """
@@ -64,15 +532,17 @@ def generate_cache_key(prefix: str, *args, **kwargs) -> str:
 def cache_result(
     ttl: int = 300,
     prefix: str = "cache",
-    key_func: Optional[Callable] = None
+    key_func: Optional[Callable] = None,
+    tags: Optional[Callable[..., Sequence[str]]] = None,
 ):
     """
-    Decorator to cache function results in Redis.
+    Decorator to cache function results in the unified cache.
     
     Args:
         ttl: Time-to-live in seconds (default: 5 minutes)
         prefix: Cache key prefix for namespacing
         key_func: Optional custom key generation function
+        tags: Optional callable (same arguments) returning invalidation tags
     
     Returns:
         Decorated function with caching behavior
@@ -84,84 +554,28 @@ def cache_result(
             return result
     """
     def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        async def async_wrapper(*args, **kwargs):
-            # Skip caching if Redis unavailable
-            if redis_client is None:
-                logger.warning(f"Redis unavailable, skipping cache for {func.__name__}")
-                return await func(*args, **kwargs)
-            
-            # Generate cache key
+        def _key_and_tags(args, kwargs):
             if key_func:
                 cache_key = key_func(*args, **kwargs)
             else:
                 cache_key = generate_cache_key(f"{prefix}:{func.__name__}", *args, **kwargs)
-            
-            try:
-                # Try to get cached result
-                cached = redis_client.get(cache_key)
-                if cached:
-                    logger.info(f"Cache HIT: {cache_key}")
-                    return json.loads(cached)
-                
-                # Cache miss - execute function
-                logger.info(f"Cache MISS: {cache_key}")
-                result = await func(*args, **kwargs)
-                
-                # Store result in cache
-                redis_client.setex(
-                    cache_key,
-                    ttl,
-                    json.dumps(result, default=str)
-                )
-                
-                return result
-                
-            except Exception as e:
-                logger.error(f"Cache error for {cache_key}: {e}")
-                # Fall back to executing function
-                return await func(*args, **kwargs)
+            return cache_key, (tags(*args, **kwargs) if tags else ())
+
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            cache_key, entry_tags = _key_and_tags(args, kwargs)
+            return await cache.aget_or_compute(
+                cache_key, lambda: func(*args, **kwargs), ttl=ttl, tags=entry_tags
+            )
         
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
-            # Skip caching if Redis unavailable
-            if redis_client is None:
-                logger.warning(f"Redis unavailable, skipping cache for {func.__name__}")
-                return func(*args, **kwargs)
-            
-            # Generate cache key
-            if key_func:
-                cache_key = key_func(*args, **kwargs)
-            else:
-                cache_key = generate_cache_key(f"{prefix}:{func.__name__}", *args, **kwargs)
-            
-            try:
-                # Try to get cached result
-                cached = redis_client.get(cache_key)
-                if cached:
-                    logger.info(f"Cache HIT: {cache_key}")
-                    return json.loads(cached)
-                
-                # Cache miss - execute function
-                logger.info(f"Cache MISS: {cache_key}")
-                result = func(*args, **kwargs)
-                
-                # Store result in cache
-                redis_client.setex(
-                    cache_key,
-                    ttl,
-                    json.dumps(result, default=str)
-                )
-                
-                return result
-                
-            except Exception as e:
-                logger.error(f"Cache error for {cache_key}: {e}")
-                # Fall back to executing function
-                return func(*args, **kwargs)
+            cache_key, entry_tags = _key_and_tags(args, kwargs)
+            return cache.get_or_compute(
+                cache_key, lambda: func(*args, **kwargs), ttl=ttl, tags=entry_tags
+            )
         
         # Return appropriate wrapper based on function type
-        import asyncio
         if asyncio.iscoroutinefunction(func):
             return async_wrapper
         else:
@@ -170,30 +584,22 @@ def cache_result(
     return decorator
 
 
-def invalidate_cache(pattern: str) -> int:
+def invalidate_cache(prefix: str) -> int:
     """
-    Invalidate cache entries matching a pattern.
+    Invalidate every cache entry under a key prefix.
     
     Args:
-        pattern: Redis key pattern (e.g., "sql_query:*")
+        prefix: Namespace of the keys (e.g., "sql_gen" or "sql_gen:*")
     
     Returns:
-        int: Number of keys deleted
+        int: Number of namespaces invalidated (entries expire lazily)
     """
-    if redis_client is None:
-        logger.warning("Redis unavailable, cannot invalidate cache")
-        return 0
-    
-    try:
-        keys = redis_client.keys(pattern)
-        if keys:
-            deleted = redis_client.delete(*keys)
-            logger.info(f"Invalidated {deleted} cache entries matching '{pattern}'")
-            return deleted
-        return 0
-    except Exception as e:
-        logger.error(f"Cache invalidation error: {e}")
+    namespace = prefix.rstrip("*").rstrip(":").split(":", 1)[0]
+    if not namespace:
         return 0
+    count = cache.invalidate_tags(f"ns:{namespace}")
+    logger.info(f"Invalidated cache namespace '{namespace}'")
+    return count
 
 
 def clear_all_cache() -> int:
@@ -203,8 +609,9 @@ def clear_all_cache() -> int:
     Returns:
         int: Number of keys deleted
     """
+    cache.clear()
     if redis_client is None:
-        logger.warning("Redis unavailable, cannot clear cache")
+        logger.warning("Redis unavailable, cleared in-process cache only")
         return 0
     
     try:
@@ -224,21 +631,20 @@ def get_cache_stats() -> dict:
     Returns:
         dict: Cache hit rate, memory usage, key count
     """
+    stats = cache.get_stats()
     if redis_client is None:
-        return {"status": "unavailable"}
+        return {"status": "unavailable", **stats}
     
     try:
         info = redis_client.info("stats")
         return {
             "status": "connected",
+            **stats,
             "keyspace_hits": info.get("keyspace_hits", 0),
             "keyspace_misses": info.get("keyspace_misses", 0),
-            "hit_rate": (
-                info.get("keyspace_hits", 0) / 
-                max(info.get("keyspace_hits", 0) + info.get("keyspace_misses", 0), 1)
-            ) * 100,
+            "total_keys": redis_client.dbsize(),
             "used_memory_human": redis_client.info("memory").get("used_memory_human"),
         }
     except Exception as e:
         logger.error(f"Failed to get cache stats: {e}")
-        return {"status": "error", "message": str(e)}
+        return {"status": "error", "message": str(e), **stats}
@@ -15,6 +15,13 @@ celery_app = Celery(
     "zenith_forensic",
     broker=os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0"),
     backend=os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/1"),
+    # Task modules the worker imports at startup (beat and .delay() need them registered)
+    include=[
+        "app.tasks.batch_tasks",
+        "app.tasks.export_tasks",
+        "app.tasks.forensic_sentinel",
+        "app.tasks.monitoring",
+    ],
 )
 # Configuration
 celery_app.conf.update(
@@ -47,10 +54,30 @@ celery_app.conf.update(
             "task": "zenith_forensic.tasks.maintenance.cleanup_old_jobs",
             "schedule": crontab(hour=2, minute=0),  # Daily at 2 AM
         },
+        "entity-attribute-backfill": {
+            "task": "zenith_forensic.tasks.maintenance.backfill_entity_attributes",
+            "schedule": 3600.0,  # Hourly; picks up bulk-loaded entities
+        },
+        "embedding-tag-backfill": {
+            "task": "zenith_forensic.tasks.maintenance.backfill_embedding_tags",
+            "schedule": 3600.0,  # Hourly; tags bulk-loaded and legacy embeddings
+        },
+        "document-chunk-backfill": {
+            "task": "zenith_forensic.tasks.maintenance.backfill_document_chunks",
+            "schedule": 3600.0,  # Hourly; chunks legacy evidence for hybrid search
+        },
+        "fx-rate-sync": {
+            "task": "zenith_forensic.tasks.maintenance.sync_fx_rates",
+            "schedule": crontab(hour=0, minute=30),  # Daily, after the rate providers publish
+        },
         "system-health-check": {
             "task": "zenith_forensic.tasks.monitoring.health_check",
             "schedule": 300.0,  # Every 5 minutes
         },
+        "forensic-alert-sweep": {
+            "task": "zenith_forensic.tasks.monitoring.alert_sweep",
+            "schedule": 900.0,  # Every 15 minutes
+        },
     },
 )
 # Dead Letter Queue for forensic failures
@@ -50,6 +50,23 @@ class Settings(BaseSettings):
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./zenith_lite.db")
     TESTING: bool = os.getenv("TESTING", "false").lower() == "true"
     
+    # Geocoding: auto (Google Maps -> Nominatim), google, nominatim, offline
+    GOOGLE_MAPS_API_KEY: str = os.getenv("GOOGLE_MAPS_API_KEY", "")
+    GEOCODING_PROVIDER: str = os.getenv("GEOCODING_PROVIDER", "auto")
+    GEOCODING_CONCURRENCY: int = int(os.getenv("GEOCODING_CONCURRENCY", "4"))
+    GEOCODING_BATCH_SIZE: int = int(os.getenv("GEOCODING_BATCH_SIZE", "50"))
+    
+    # Sanctions/PEP screening: local CSV watchlist (name[,source] columns); empty = built-in list
+    WATCHLIST_CSV_PATH: str = os.getenv("WATCHLIST_CSV_PATH", "")
+    
+    # FX history: optional CSV snapshot (date,currency,rate per USD) imported by the daily rate sync
+    FX_RATES_CSV_PATH: str = os.getenv("FX_RATES_CSV_PATH", "")
+    
+    # Unified cache: per-process LRU in front of Redis
+    CACHE_L1_MAX_ENTRIES: int = int(os.getenv("CACHE_L1_MAX_ENTRIES", "2048"))
+    CACHE_L1_TTL: int = int(os.getenv("CACHE_L1_TTL", "60"))
+    CACHE_EARLY_REFRESH_BETA: float = float(os.getenv("CACHE_EARLY_REFRESH_BETA", "1.0"))
+    
     @property
     def SECRET_KEY(self) -> str:
         key = os.getenv("SECRET_KEY")
@@ -4,16 +4,87 @@ Handles multi-currency conversions for transaction matching
 """
 
 import os
+import csv
+import logging
+import threading
 import requests
-from datetime import datetime, timedelta
-from typing import Dict, Optional
+from bisect import bisect_right
+from datetime import datetime, date, timedelta, UTC
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
 from decimal import Decimal
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DateLike = Union[datetime, date, str, None]
+
+
+def _as_date(value: DateLike) -> date:
+    if value is None:
+        return datetime.now(UTC).date()
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+
+class RateTable:
+    """
+    Compact as-of structure: per currency, sorted date ordinals plus a parallel rate array.
+    Scalar lookups bisect; batch lookups use np.searchsorted over the same arrays.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[str, date, float]] = ()):
+        grouped: Dict[str, List[Tuple[int, float]]] = {}
+        for currency, rate_date, rate in rows:
+            grouped.setdefault(currency.upper(), []).append((_as_date(rate_date).toordinal(), float(rate)))
+        self._ordinals: Dict[str, List[int]] = {}
+        self._series: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for currency, points in grouped.items():
+            points.sort()
+            ordinals = [o for o, _ in points]
+            self._ordinals[currency] = ordinals
+            self._series[currency] = (
+                np.asarray(ordinals, dtype=np.int64),
+                np.asarray([r for _, r in points], dtype=np.float64),
+            )
+
+    def __len__(self) -> int:
+        return sum(len(o) for o in self._ordinals.values())
+
+    def currencies(self) -> List[str]:
+        return list(self._series.keys())
+
+    def rate_as_of(self, currency: str, on: DateLike) -> Optional[float]:
+        """Units of currency per USD on the latest rate date <= on (None before history starts)."""
+        if currency == "USD":
+            return 1.0
+        ordinals = self._ordinals.get(currency)
+        if not ordinals:
+            return None
+        idx = bisect_right(ordinals, _as_date(on).toordinal()) - 1
+        return float(self._series[currency][1][idx]) if idx >= 0 else None
+
+    def rates_as_of(self, currency: str, ordinals: np.ndarray) -> np.ndarray:
+        """Vectorized rate_as_of; NaN where no rate is known yet."""
+        if currency == "USD":
+            return np.ones(ordinals.shape[0], dtype=np.float64)
+        series = self._series.get(currency)
+        if series is None:
+            return np.full(ordinals.shape[0], np.nan)
+        dates, rates = series
+        idx = np.searchsorted(dates, ordinals, side="right") - 1
+        out = rates[np.clip(idx, 0, None)]
+        return np.where(idx >= 0, out, np.nan)
+
 
 class CurrencyConverter:
     """
     Handles currency conversions with caching
-    Uses exchangerate-api.com as primary source
-    Fallback to manual rates if API unavailable
+    Rates come from the shared fx_rates table (as-of-date), then project contract rates,
+    then manual fallback rates. sync_latest_rates() runs daily from Celery beat; a table
+    miss triggers at most one extra sync per worker per table_refresh.
     """
     
     def __init__(self, api_key: Optional[str] = None, base_currency: str = "USD"):
@@ -21,6 +92,12 @@ class CurrencyConverter:
         self.base_currency = base_currency
         self.cache: Dict[str, Dict] = {}
         self.cache_duration = timedelta(hours=24)  # Cache for 24 hours
+        self.table_refresh = timedelta(minutes=15)  # Pick up rates loaded by other workers
+        self.rate_table: Optional[RateTable] = None
+        self._table_loaded_at: Optional[datetime] = None
+        self._synced_at: Optional[datetime] = None
+        self._project_rates: Dict[str, Tuple[datetime, Dict[str, float]]] = {}
+        self._lock = threading.Lock()
         
         # Fallback rates (updated periodically)
         self.fallback_rates = {
@@ -38,7 +115,7 @@ class CurrencyConverter:
     
     def _get_cache_key(self, from_currency: str, to_currency: str, date: Optional[datetime] = None) -> str:
         """Generate cache key for rate lookup"""
-        date_str = date.strftime("%Y-%m-%d") if date else datetime.now().strftime("%Y-%m-%d")
+        date_str = _as_date(date).isoformat()
         return f"{from_currency}_{to_currency}_{date_str}"
     
     def _is_cache_valid(self, cache_key: str) -> bool:
@@ -51,11 +128,113 @@ class CurrencyConverter:
             return False
         
         return datetime.now() - cached_time < self.cache_duration
+
+    # --- Historical rate table ------------------------------------------------
+
+    def _get_rate_table(self) -> RateTable:
+        """In-memory copy of fx_rates, reloaded every table_refresh."""
+        now = datetime.now(UTC)
+        if self.rate_table is not None and now - self._table_loaded_at < self.table_refresh:
+            return self.rate_table
+        with self._lock:
+            if self.rate_table is None or now - self._table_loaded_at >= self.table_refresh:
+                self.reload_rate_table()
+        return self.rate_table
+
+    def reload_rate_table(self, session=None) -> int:
+        """Loads the whole fx_rates table into the as-of structure."""
+        from app.models import FxRate
+        from sqlmodel import Session, select
+
+        try:
+            if session is None:
+                from app.core.db import engine
+                with Session(engine) as own:
+                    rows = own.exec(select(FxRate.currency, FxRate.rate_date, FxRate.rate_per_usd)).all()
+            else:
+                rows = session.exec(select(FxRate.currency, FxRate.rate_date, FxRate.rate_per_usd)).all()
+            table = RateTable(rows)
+        except Exception as e:
+            logger.warning(f"FX rate table unavailable, using contract/fallback rates: {e}")
+            table = self.rate_table or RateTable()
+        self.rate_table = table
+        self._table_loaded_at = datetime.now(UTC)
+        self.cache.clear()
+        return len(table)
+
+    def import_rates(self, session, rows: Iterable[Tuple[str, DateLike, float]], source: str = "manual") -> int:
+        """Upserts (currency, date, units per USD) rows into fx_rates and refreshes the table."""
+        from app.models import FxRate
+
+        count = 0
+        for currency, rate_date, rate in rows:
+            session.merge(FxRate(
+                currency=currency.strip().upper(),
+                rate_date=_as_date(rate_date),
+                rate_per_usd=float(rate),
+                source=source,
+            ))
+            count += 1
+        session.commit()
+        self.reload_rate_table(session)
+        return count
+
+    def load_csv_snapshot(self, session, path: str) -> int:
+        """
+        Imports a CSV snapshot with columns date,currency,rate (units of currency per USD).
+        """
+        with open(path, newline="") as f:
+            reader = csv.DictReader(f)
+            rows = [(r["currency"], r["date"], r["rate"]) for r in reader if r.get("rate")]
+        return self.import_rates(session, rows, source="csv")
+
+    def sync_latest_rates(self, session) -> int:
+        """Fetches today's USD-based rates once and stores them for every worker."""
+        if not self.api_key:
+            return 0
+        try:
+            url = f"https://v6.exchangerate-api.com/v6/{self.api_key}/latest/USD"
+            response = requests.get(url, timeout=10)
+            data = response.json() if response.status_code == 200 else {}
+        except Exception as e:
+            logger.warning(f"FX API fetch failed: {e}")
+            return 0
+        if data.get("result") != "success":
+            return 0
+        today = datetime.now(UTC).date()
+        rates = data.get("conversion_rates", {})
+        return self.import_rates(session, ((c, today, r) for c, r in rates.items()), source="api")
+
+    def _sync_on_miss(self) -> bool:
+        """Fetches latest rates for a table miss, throttled to once per table_refresh."""
+        now = datetime.now(UTC)
+        if not self.api_key or (self._synced_at and now - self._synced_at < self.table_refresh):
+            return False
+        self._synced_at = now
+        try:
+            from app.core.db import engine
+            from sqlmodel import Session
+
+            with Session(engine) as session:
+                return self.sync_latest_rates(session) > 0
+        except Exception as e:
+            logger.warning(f"FX rate sync on miss failed: {e}")
+            return False
+
+    def _get_table_rate(self, from_currency: str, to_currency: str, on: DateLike) -> Optional[float]:
+        table = self._get_rate_table()
+        from_rate = table.rate_as_of(from_currency, on)
+        to_rate = table.rate_as_of(to_currency, on)
+        if from_rate is None or to_rate is None or from_rate == 0:
+            return None
+        return to_rate / from_rate
+
+    # --- Scalar API -----------------------------------------------------------
     
     def get_exchange_rate(
-        self, 
-        from_currency: str, 
-        to_currency: str, 
+        self,
+        from_currency: str,
+        to_currency: str,
         date: Optional[datetime] = None,
         project_id: Optional[str] = None
     ) -> float:
@@ -68,11 +247,15 @@ class CurrencyConverter:
         
         # Check cache
         cache_key = self._get_cache_key(from_currency, to_currency, date)
+        if project_id:
+            cache_key = f"{cache_key}_{project_id}"
         if self._is_cache_valid(cache_key):
             return self.cache[cache_key]["rate"]
         
-        # Try API
-        rate = self._fetch_from_api(from_currency, to_currency, date)
+        # Historical as-of-date table, topped up from the API on a miss
+        rate = self._get_table_rate(from_currency, to_currency, date)
+        if rate is None and self._sync_on_miss():
+            rate = self._get_table_rate(from_currency, to_currency, date)
         
         # Fallback 1: Project Contract Rates
         if rate is None and project_id:
@@ -90,8 +273,12 @@ class CurrencyConverter:
         
         return rate
 
-    def _get_project_rate(self, project_id: str, from_curr: str, to_curr: str) -> Optional[float]:
-        """Fetch hardcoded rate from project metadata"""
+    def _project_contract_rates(self, project_id: str) -> Dict[str, float]:
+        """Project contract rates, memoized per worker for cache_duration."""
+        cached = self._project_rates.get(project_id)
+        if cached and datetime.now(UTC) - cached[0] < self.cache_duration:
+            return cached[1]
+        rates: Dict[str, float] = {}
         try:
             from app.core.db import engine
             from app.models import Project
@@ -100,40 +287,18 @@ class CurrencyConverter:
             with Session(engine) as session:
                 project = session.get(Project, project_id)
                 if project and project.contract_exchange_rate:
-                    rates = project.contract_exchange_rate
-                    if from_curr in rates and to_curr in rates:
-                        # Convert through project base (relative to each other in metadata)
-                        return rates[to_curr] / rates[from_curr]
-            return None
+                    rates = dict(project.contract_exchange_rate)
         except Exception as e:
-            print(f"Project rate lookup failed: {e}")
-            return None
-    
-    def _fetch_from_api(
-        self, 
-        from_currency: str, 
-        to_currency: str, 
-        date: Optional[datetime] = None
-    ) -> Optional[float]:
-        """Fetch rate from API"""
-        if not self.api_key:
-            return None
-        
-        try:
-            # Use free exchangerate-api.com
-            url = f"https://v6.exchangerate-api.com/v6/{self.api_key}/pair/{from_currency}/{to_currency}"
-            
-            response = requests.get(url, timeout=5)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("result") == "success":
-                    return float(data.get("conversion_rate", 0))
-            
-            return None
-        except Exception as e:
-            print(f"API fetch failed: {e}")
-            return None
+            logger.warning(f"Project rate lookup failed: {e}")
+        self._project_rates[project_id] = (datetime.now(UTC), rates)
+        return rates
+
+    def _get_project_rate(self, project_id: str, from_curr: str, to_curr: str) -> Optional[float]:
+        """Rate from project metadata (relative to each other in the contract)"""
+        rates = self._project_contract_rates(project_id)
+        if from_curr in rates and to_curr in rates and rates[from_curr]:
+            return rates[to_curr] / rates[from_curr]
+        return None
     
     def _get_fallback_rate(self, from_currency: str, to_currency: str) -> float:
         """Get rate from fallback table (relative to USD)"""
@@ -147,10 +312,10 @@ class CurrencyConverter:
         return to_usd_rate / from_usd_rate
     
     def convert(
-        self, 
-        amount: float, 
-        from_currency: str, 
-        to_currency: str, 
+        self,
+        amount: float,
+        from_currency: str,
+        to_currency: str,
         date: Optional[datetime] = None,
         project_id: Optional[str] = None
     ) -> Decimal:
@@ -163,10 +328,53 @@ class CurrencyConverter:
         # Round to 2 decimal places
         return converted.quantize(Decimal('0.01'))
     
+    # --- Batch API ------------------------------------------------------------
+
+    def convert_many(
+        self,
+        amounts: Sequence[float],
+        currencies: Union[str, Sequence[str]],
+        dates: Union[DateLike, Sequence[DateLike]] = None,
+        to_currency: Optional[str] = None,
+        project_id: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Vectorized conversion of a whole batch to to_currency (default: base currency).
+        currencies/dates may be scalars applying to every row. Returns float64, rounded to 2dp.
+        Rows without table history fall back per currency to contract, then manual rates.
+        """
+        values = np.asarray(amounts, dtype=np.float64)
+        n = values.shape[0]
+        to_currency = (to_currency or self.base_currency).upper()
+        if isinstance(currencies, str):
+            currency_arr = np.full(n, currencies.upper(), dtype=object)
+        else:
+            currency_arr = np.asarray([str(c).upper() for c in currencies], dtype=object)
+        if dates is None or isinstance(dates, (datetime, date, str)):
+            ordinals = np.full(n, _as_date(dates).toordinal(), dtype=np.int64)
+        else:
+            ordinals = np.fromiter((_as_date(d).toordinal() for d in dates), dtype=np.int64, count=n)
+        if currency_arr.shape[0] != n or ordinals.shape[0] != n:
+            raise ValueError("amounts, currencies and dates must have the same length")
+
+        table = self._get_rate_table()
+        factors = np.ones(n, dtype=np.float64)
+        for currency in set(currency_arr.tolist()):
+            if currency == to_currency:
+                continue
+            mask = currency_arr == currency
+            ratio = table.rates_as_of(to_currency, ordinals[mask]) / table.rates_as_of(currency, ordinals[mask])
+            missing = ~np.isfinite(ratio)
+            if missing.any():
+                fallback = self._get_project_rate(project_id, currency, to_currency) if project_id else None
+                ratio[missing] = fallback if fallback is not None else self._get_fallback_rate(currency, to_currency)
+            factors[mask] = ratio
+        return np.round(values * factors, 2)
+
     def normalize_to_base(
-        self, 
-        amount: float, 
-        currency: str, 
+        self,
+        amount: float,
+        currency: str,
         date: Optional[datetime] = None,
         project_id: Optional[str] = None
     ) -> Decimal:
@@ -177,7 +385,11 @@ class CurrencyConverter:
     
     def get_supported_currencies(self) -> list:
         """Get list of supported currencies"""
-        return list(self.fallback_rates.keys())
+        currencies = list(self.fallback_rates.keys())
+        for currency in self._get_rate_table().currencies():
+            if currency not in self.fallback_rates:
+                currencies.append(currency)
+        return currencies
     
     def update_fallback_rates(self, rates: Dict[str, float]):
         """Update fallback rates manually"""
@@ -186,6 +398,8 @@ class CurrencyConverter:
     def clear_cache(self):
         """Clear the rate cache"""
         self.cache.clear()
+        self._project_rates.clear()
+        self.rate_table = None
 
 
 # Global instance
@@ -17,11 +17,12 @@ T = TypeVar('T', bound=SQLModel)
 
 class QueryCache:
     """
-    Redis-based query cache with TTL and invalidation
+    Query cache with TTL and tag invalidation, backed by the unified cache
     """
     
-    def __init__(self, redis_client=None, default_ttl: int = 300):
-        self.redis = redis_client or redis_client
+    def __init__(self, backend=None, default_ttl: int = 300):
+        from app.core.cache import cache
+        self.backend = backend or cache
         self.default_ttl = default_ttl
     
     def _generate_cache_key(self, query: str, params: Dict[str, Any] = None) -> str:
@@ -35,32 +36,22 @@ class QueryCache:
     
     def get(self, key: str) -> Optional[Any]:
         """Get cached result"""
-        try:
-            cached = self.redis.get(key)
-            if cached:
-                return json.loads(cached)
-        except Exception:
-            pass
-        return None
+        return self.backend.get(key)
     
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: List[str] = ()) -> bool:
         """Cache result with TTL"""
-        try:
-            ttl = ttl or self.default_ttl
-            serialized = json.dumps(value, default=str)
-            return self.redis.setex(key, ttl, serialized)
-        except Exception:
-            return False
+        return self.backend.set(key, value, ttl=ttl or self.default_ttl, tags=tags)
+    
+    def invalidate_tags(self, *tags: str) -> int:
+        """Invalidate every entry carrying one of these tags"""
+        return self.backend.invalidate_tags(*tags)
     
     def invalidate_pattern(self, pattern: str) -> int:
-        """Invalidate cache entries matching pattern"""
+        """Invalidate cache entries matching pattern (incremental SCAN)"""
         try:
-            keys = self.redis.keys(pattern)
-            if keys:
-                return self.redis.delete(*keys)
+            return self.backend.delete_matching(pattern)
         except Exception:
-            pass
-        return 0
+            return 0
 
 
 class DatabaseOptimizer:
@@ -275,17 +266,8 @@ def get_slow_queries(threshold_ms: float = 1000.0) -> List[Dict[str, Any]]:
 
 def invalidate_project_cache(project_id: str):
     """Invalidate all cache entries for a specific project"""
-    patterns = [
-        f"query_cache:*{project_id}*",
-        f"reconciliation_cache:*{project_id}*",
-        f"dashboard_cache:*{project_id}*"
-    ]
-    
-    total_invalidated = 0
-    for pattern in patterns:
-        total_invalidated += db_optimizer.cache.invalidate_pattern(pattern)
-    
-    return total_invalidated
+    from app.core.cache import project_tag
+    return db_optimizer.cache.invalidate_tags(project_tag(project_id))
 
 
 def optimize_transaction_query(
@@ -296,7 +278,9 @@ def optimize_transaction_query(
     filters: Optional[Dict[str, Any]] = None
 ):
     """Execute optimized transaction query with caching"""
-    cache_key = f"transactions_{project_id}_{limit}_{offset}_{hashlib.md5(json.dumps(filters or {}, sort_keys=True).encode()).hexdigest()}"
+    from app.core.cache import project_tag
+    from app.core.query_cache import transaction_tag
+    cache_key = f"transactions:{project_id}_{limit}_{offset}_{hashlib.md5(json.dumps(filters or {}, sort_keys=True).encode()).hexdigest()}"
     
     # Try cache first
     cached = db_optimizer.cache.get(cache_key)
@@ -319,7 +303,7 @@ def optimize_transaction_query(
     transactions = [dict(row._mapping) for row in result]
     
     # Cache result
-    db_optimizer.cache.set(cache_key, transactions, ttl=300)
+    db_optimizer.cache.set(cache_key, transactions, ttl=300, tags=[project_tag(project_id), transaction_tag(project_id)])
     db_optimizer.analyze_query_performance('optimized_transactions', duration, len(transactions))
     
     return transactions
\ No newline at end of file
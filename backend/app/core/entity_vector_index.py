@@ -0,0 +1,127 @@
+"""
+Entity Vector Index
+Per-project Entity embedding index for semantic entity search. Partitions are
+normalized float32 VectorIndex matrices caught up from an embedding_updated_at watermark.
+"""
+
+import logging
+import threading
+from datetime import datetime, UTC
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlmodel import Session, select, func
+from app.models import Entity, entity_embedding_dim
+from app.core.vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+# (project_id or None for global entities, dim)
+PartitionKey = Tuple[Optional[str], int]
+
+
+class EntityVectorIndex:
+    """
+    Entities change in place (re-embedding, re-scoping, deletion), so each sync
+    upserts rows touched since the watermark and rebuilds a partition whose size
+    no longer matches the DB.
+    """
+
+    def __init__(self):
+        self._partitions: Dict[PartitionKey, VectorIndex] = {}
+        self._watermarks: Dict[PartitionKey, Optional[datetime]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _aware(value: Optional[datetime]) -> Optional[datetime]:
+        if value is not None and value.tzinfo is None:
+            return value.replace(tzinfo=UTC)
+        return value
+
+    @staticmethod
+    def backfill_tags(db: Session, batch_size: int = 500) -> int:
+        """
+        Tags legacy rows written before embedding_dim/embedding_updated_at existed.
+        Maintenance only (backfill_embedding_tags task): commits per batch, so pass a
+        session you own. ORM writes are tagged by _tag_entity_embedding.
+        """
+        tagged = 0
+        while True:
+            batch = db.exec(select(Entity).where(Entity.embedding_updated_at.is_(None)).limit(batch_size)).all()
+            if not batch:
+                break
+            now = datetime.now(UTC)
+            for entity in batch:
+                entity.embedding_dim = entity_embedding_dim(entity.embeddings_json)
+                entity.embedding_updated_at = now
+                db.add(entity)
+            db.commit()
+            tagged += len(batch)
+        return tagged
+
+    @staticmethod
+    def _scope(key: PartitionKey):
+        project_id, dim = key
+        owner = Entity.project_id == project_id if project_id is not None else Entity.project_id.is_(None)
+        return (owner, Entity.embedding_dim == dim)
+
+    def sync(self, db: Session, project_id: Optional[str], dim: int) -> VectorIndex:
+        key = (project_id, dim)
+        scope = self._scope(key)
+        expected, latest = db.exec(
+            select(func.count(Entity.id), func.max(Entity.embedding_updated_at)).where(*scope)
+        ).one()
+        latest = self._aware(latest)
+        with self._lock:
+            index = self._partitions.get(key)
+            watermark = self._watermarks.get(key)
+            if index is not None and len(index) == expected and (latest is None or (watermark and latest <= watermark)):
+                return index
+
+        stmt = select(Entity.id, Entity.embeddings_json).where(*scope)
+        if index is not None and watermark is not None:
+            stmt = stmt.where(Entity.embedding_updated_at >= watermark)
+        rows = db.exec(stmt).all()
+
+        with self._lock:
+            if index is None or watermark is None:
+                index = VectorIndex(dim=dim)
+            index.upsert_many(rows)
+            if len(index) == expected:
+                self._partitions[key] = index
+                self._watermarks[key] = latest
+                return index
+
+        # Rows left the partition (deleted, re-scoped or re-embedded at another dim)
+        index = VectorIndex(dim=dim)
+        index.upsert_many(db.exec(select(Entity.id, Entity.embeddings_json).where(*scope)).all())
+        with self._lock:
+            self._partitions[key] = index
+            self._watermarks[key] = latest
+        return index
+
+    def search(
+        self,
+        db: Session,
+        project_id: str,
+        vector: Sequence[float],
+        k: int = 5,
+        min_score: Optional[float] = None,
+        include_global: bool = True,
+    ) -> List[Tuple[str, float]]:
+        """Top-k (entity_id, cosine) over the project's entities, plus global ones."""
+        dim = entity_embedding_dim(list(vector) if vector is not None else None)
+        if dim is None:
+            return []
+        hits = self.sync(db, project_id, dim).search(vector, k=k, min_score=min_score)
+        if include_global:
+            hits += self.sync(db, None, dim).search(vector, k=k, min_score=min_score)
+            hits.sort(key=lambda hit: hit[1], reverse=True)
+        return hits[:k]
+
+    def invalidate(self, project_id: Optional[str] = None):
+        with self._lock:
+            for key in [k for k in self._partitions if project_id is None or k[0] == project_id]:
+                self._partitions.pop(key, None)
+                self._watermarks.pop(key, None)
+
+
+entity_index = EntityVectorIndex()
@@ -25,6 +25,11 @@ class EventType(str, enum.Enum):
     ALERT_RAISED = "alert.raised"
     ANOMALY_DETECTED = "anomaly.detected"
     HIGH_RISK_ALERT = "high.risk.alert"
+    CORRELATION_FOUND = "correlation.found"
+    CIRCULAR_FLOW_DETECTED = "circular_flow.detected"
+    VARIANCE_DETECTED = "variance.detected"
+    SATELLITE_DISCREPANCY = "satellite.discrepancy"
+    PROACTIVE_ALERT = "proactive.alert"
 
     # Entity Verification
     ENTITY_VERIFIED = "entity.verified"
@@ -44,6 +49,7 @@ class EventType(str, enum.Enum):
     BATCH_JOB_FAILED = "batch.job.failed"
     PATTERN_IDENTIFIED = "pattern.identified"
     RECONCILIATION_COMPLETED = "reconciliation.completed"
+    ERROR_OCCURRED = "error.occurred"
 
 
 class Event:
@@ -1,9 +1,22 @@
-import numpy as np
-from sqlmodel import Session, select
-from typing import List, Dict, Any
+import os
+import logging
+import threading
+from datetime import datetime, UTC
+from sqlmodel import Session, select, func
+from typing import List, Dict, Any, Optional, Tuple
 from app.models import CopilotInsight, Entity
 import google.generativeai as genai
 from app.core.config import settings
+from app.core.vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "models/embedding-001"
+EMBEDDING_DIM = 768
+EMBED_BATCH_SIZE = 100  # Gemini batchEmbedContents limit
+DUMMY_EMBEDDING_MODEL = "dummy"
+NO_EMBEDDING_MODEL = "none"
+INSIGHT_INDEX_DIR = "storage/vector_index"
 
 class GlobalMemoryService:
     """
@@ -12,19 +25,36 @@ class GlobalMemoryService:
     """
     
     @staticmethod
-    def get_embedding(text: str) -> List[float]:
-        """Generate embedding using Gemini."""
+    def get_embedding(text: str, task_type: str = "retrieval_document") -> List[float]:
+        """Generate embedding using Gemini; search queries pass task_type="retrieval_query"."""
         if not settings.GEMINI_API_KEY:
-            return [0.0] * 768 # Dummy
+            return [0.0] * EMBEDDING_DIM # Dummy
         
         genai.configure(api_key=settings.GEMINI_API_KEY)
         result = genai.embed_content(
-            model="models/embedding-001",
+            model=EMBEDDING_MODEL,
             content=text,
-            task_type="retrieval_document"
+            task_type=task_type
         )
         return result['embedding']
 
+    @staticmethod
+    def get_embeddings(texts: List[str], batch_size: int = EMBED_BATCH_SIZE) -> List[List[float]]:
+        """Embeds many texts with one Gemini request per batch_size texts."""
+        if not settings.GEMINI_API_KEY:
+            return [[0.0] * EMBEDDING_DIM for _ in texts]  # Dummy
+
+        genai.configure(api_key=settings.GEMINI_API_KEY)
+        vectors: List[List[float]] = []
+        for i in range(0, len(texts), batch_size):
+            result = genai.embed_content(
+                model=EMBEDDING_MODEL,
+                content=texts[i:i + batch_size],
+                task_type="retrieval_document"
+            )
+            vectors.extend(result['embedding'])
+        return vectors
+
     @staticmethod
     def find_recidivist_entities(db: Session, entity_name: str) -> List[Dict[str, Any]]:
         """Find if an entity has high-risk history in other projects."""
@@ -42,39 +72,212 @@ class GlobalMemoryService:
             })
         return history
 
+    @staticmethod
+    def embed_insight(insight: CopilotInsight, text: str) -> CopilotInsight:
+        """Embeds and tags an insight so it lands in the right vector index partition."""
+        vector = GlobalMemoryService.get_embedding(text)
+        insight.embeddings_json = vector
+        insight.embedding_model, insight.embedding_dim = tag_for_vector(vector)
+        return insight
+
+    @staticmethod
+    def index_insights(insights: List[CopilotInsight]):
+        """Incrementally registers freshly committed insights with the org-wide index."""
+        insight_index.add(insights)
+
     @staticmethod
     def find_similar_cases(db: Session, current_finding: str, limit: int = 3) -> List[Dict[str, Any]]:
         """
         Perform semantic search across all projects to find similar fraud patterns.
-        In a full pgvector setup, this would be a single SQL query.
-        Here we use manual cosine similarity for SQLite compatibility.
+        Served from the organization-wide insight vector index (one matrix product).
         """
         current_vec = GlobalMemoryService.get_embedding(current_finding)
-        all_insights = db.exec(select(CopilotInsight)).all()
-        
+        model, dim = tag_for_vector(current_vec)
+        if model in (None, DUMMY_EMBEDDING_MODEL):
+            return []
+
+        hits = insight_index.search(db, current_vec, model=model, dim=dim, k=limit, min_score=0.8)
+        if not hits:
+            return []
+        rows = {
+            insight.id: insight
+            for insight in db.exec(
+                select(CopilotInsight).where(CopilotInsight.id.in_([insight_id for insight_id, _ in hits]))
+            ).all()
+        }
         results = []
-        for insight in all_insights:
-            if not insight.embeddings_json:
+        for insight_id, similarity in hits:
+            insight = rows.get(insight_id)
+            if insight is None:
                 continue
-            
-            # Cosine Similarity
-            vec_a = np.array(current_vec)
-            vec_b = np.array(insight.embeddings_json)
-            norm_a = np.linalg.norm(vec_a)
-            norm_b = np.linalg.norm(vec_b)
-            
-            if norm_a == 0 or norm_b == 0:
+            results.append({
+                "title": insight.title,
+                "content": insight.content,
+                "project_id": insight.project_id,
+                "similarity": float(similarity)
+            })
+        return results
+
+
+def tag_for_vector(vector: Optional[List[float]]) -> Tuple[Optional[str], Optional[int]]:
+    """
+    Classifies a vector into its (model, dim) partition.
+    Zero vectors are the no-API-key fallback and are tagged so they never enter the index.
+    """
+    if not vector:
+        return NO_EMBEDDING_MODEL, None
+    dim = len(vector)
+    if not any(vector):
+        return DUMMY_EMBEDDING_MODEL, dim
+    if dim == EMBEDDING_DIM:
+        return EMBEDDING_MODEL, dim
+    return f"unknown-{dim}", dim
+
+
+class InsightVectorIndex:
+    """
+    Organization-wide CopilotInsight vector index, partitioned by (model, dim).
+    Each partition is a normalized float32 VectorIndex, persisted as a memory-mapped
+    snapshot and caught up incrementally from the DB using a created_at watermark.
+    """
+
+    def __init__(self, snapshot_dir: str = INSIGHT_INDEX_DIR):
+        self.snapshot_dir = snapshot_dir
+        self._partitions: Dict[Tuple[str, int], VectorIndex] = {}
+        self._watermarks: Dict[Tuple[str, int], Optional[datetime]] = {}
+        self._lock = threading.Lock()
+
+    def _snapshot_path(self, key: Tuple[str, int]) -> str:
+        model, dim = key
+        safe_model = model.replace("/", "_")
+        return os.path.join(self.snapshot_dir, f"insights_{safe_model}_{dim}")
+
+    @staticmethod
+    def _aware(value: Optional[datetime]) -> Optional[datetime]:
+        if value is not None and value.tzinfo is None:
+            return value.replace(tzinfo=UTC)
+        return value
+
+    @staticmethod
+    def backfill_tags(db: Session, batch_size: int = 500) -> int:
+        """
+        One-time tagging of legacy rows written before embeddings were tagged.
+        Maintenance only (backfill_embedding_tags task): commits per batch, so pass a
+        session you own. New rows are tagged by GlobalMemoryService.embed_insight.
+        """
+        tagged = 0
+        while True:
+            batch = db.exec(
+                select(CopilotInsight).where(CopilotInsight.embedding_model.is_(None)).limit(batch_size)
+            ).all()
+            if not batch:
+                break
+            for insight in batch:
+                insight.embedding_model, insight.embedding_dim = tag_for_vector(insight.embeddings_json)
+                db.add(insight)
+            db.commit()
+            tagged += len(batch)
+        return tagged
+
+    def _partition(self, key: Tuple[str, int]) -> VectorIndex:
+        index = self._partitions.get(key)
+        if index is None:
+            path = self._snapshot_path(key)
+            if os.path.exists(f"{path}.npy") and os.path.exists(f"{path}.meta.json"):
+                try:
+                    index, meta = VectorIndex.load(path)
+                    watermark = meta.get("watermark")
+                    self._watermarks[key] = datetime.fromisoformat(watermark) if watermark else None
+                except Exception as e:
+                    logger.warning(f"Insight index snapshot unreadable, rebuilding: {e}")
+                    index = None
+            if index is None:
+                index = VectorIndex(dim=key[1])
+                self._watermarks[key] = None
+            self._partitions[key] = index
+        return index
+
+    def sync(self, db: Session, model: str, dim: int) -> VectorIndex:
+        """Catches the partition up with the DB; rebuilds if rows were deleted or diverged."""
+        key = (model, dim)
+        scope = (CopilotInsight.embedding_model == model, CopilotInsight.embedding_dim == dim)
+        expected = db.exec(select(func.count(CopilotInsight.id)).where(*scope)).one()
+        with self._lock:
+            index = self._partition(key)
+            if len(index) == expected:
+                return index
+            watermark = self._watermarks.get(key)
+
+        stmt = select(CopilotInsight.id, CopilotInsight.embeddings_json, CopilotInsight.created_at).where(*scope)
+        if watermark is not None:
+            stmt = stmt.where(CopilotInsight.created_at >= self._aware(watermark))
+        rows = db.exec(stmt).all()
+
+        with self._lock:
+            index = self._partitions[key]
+            index.upsert_many((row[0], row[1]) for row in rows)
+            if len(index) == expected:
+                self._advance(key, watermark, rows)
+                return index
+
+        # Deletions or a stale snapshot: rebuild the partition from scratch
+        rows = db.exec(
+            select(CopilotInsight.id, CopilotInsight.embeddings_json, CopilotInsight.created_at).where(*scope)
+        ).all()
+        index = VectorIndex(dim=dim)
+        index.upsert_many((row[0], row[1]) for row in rows)
+        with self._lock:
+            self._partitions[key] = index
+            self._advance(key, watermark, rows)
+        return index
+
+    def _advance(self, key: Tuple[str, int], watermark: Optional[datetime], rows) -> None:
+        latest = max((self._aware(row[2]) for row in rows if row[2] is not None), default=None)
+        if latest is not None and (watermark is None or latest > self._aware(watermark)):
+            self._watermarks[key] = latest
+
+    def add(self, insights: List[CopilotInsight]):
+        with self._lock:
+            for insight in insights:
+                if insight.embedding_model in (None, DUMMY_EMBEDDING_MODEL, NO_EMBEDDING_MODEL):
+                    continue
+                key = (insight.embedding_model, insight.embedding_dim)
+                if key not in self._partitions:
+                    # Loaded lazily on first search, which will pick this row up from the DB
+                    continue
+                self._partitions[key].upsert(insight.id, insight.embeddings_json)
+
+    def search(
+        self,
+        db: Session,
+        vector: List[float],
+        model: str,
+        dim: int,
+        k: int = 3,
+        min_score: Optional[float] = None,
+    ) -> List[Tuple[str, float]]:
+        index = self.sync(db, model, dim)
+        return index.search(vector, k=k, min_score=min_score)
+
+    def snapshot(self, db: Session) -> Dict[str, int]:
+        """Syncs and persists every populated partition for fast worker start-up."""
+        partitions = db.exec(
+            select(CopilotInsight.embedding_model, CopilotInsight.embedding_dim)
+            .where(CopilotInsight.embedding_model.is_not(None))
+            .group_by(CopilotInsight.embedding_model, CopilotInsight.embedding_dim)
+        ).all()
+        saved = {}
+        for model, dim in partitions:
+            if model in (DUMMY_EMBEDDING_MODEL, NO_EMBEDDING_MODEL) or not dim:
                 continue
-            
-            similarity = np.dot(vec_a, vec_b) / (norm_a * norm_b)
-            
-            if similarity > 0.8: # Threshold
-                results.append({
-                    "title": insight.title,
-                    "content": insight.content,
-                    "project_id": insight.project_id,
-                    "similarity": float(similarity)
-                })
-        
-        results.sort(key=lambda x: x["similarity"], reverse=True)
-        return results[:limit]
+            index = self.sync(db, model, dim)
+            watermark = self._watermarks.get((model, dim))
+            index.save(
+                self._snapshot_path((model, dim)),
+                meta={"model": model, "dim": dim, "watermark": watermark.isoformat() if watermark else None},
+            )
+            saved[f"{model}:{dim}"] = len(index)
+        return saved
+
+
+insight_index = InsightVectorIndex()
@@ -1,4 +1,4 @@
-from prometheus_client import Gauge
+from prometheus_client import Counter, Gauge
 from sqlmodel import Session, select, func
 from app.core.db import engine
 from app.core.redis_client import redis_client
@@ -17,6 +17,14 @@ QUERY_PATTERN_TOTAL = Gauge(
     "zenith_query_patterns_total", "Total number of user query patterns"
 )
 
+# Data Hospital Metrics
+QUARANTINE_BACKLOG = Gauge(
+    "zenith_quarantine_rows", "Quarantined rows by triage status", ["status"]
+)
+QUARANTINE_TRIAGED = Counter(
+    "zenith_quarantine_triaged", "Quarantined rows triaged, by outcome", ["outcome"]
+)
+
 # Redis Metrics
 REDIS_KEYS_TOTAL = Gauge("zenith_redis_keys_total", "Total keys in Redis")
 REDIS_HIT_RATE = Gauge("zenith_redis_cache_hit_rate", "Redis cache hit rate")
@@ -54,6 +62,11 @@ def _update_sync():
             ).one() or 0
             QUERY_PATTERN_TOTAL.set(pat_count)
 
+            from app.modules.ingestion.data_hospital import status_counts
+
+            for status, count in status_counts(db).items():
+                QUARANTINE_BACKLOG.labels(status=status).set(count)
+
         # Update Redis Metrics
         try:
             info = redis_client.info("stats")
@@ -107,7 +107,10 @@ class MonitoringService:
             
             # Database connections (approximate from Redis monitoring)
             try:
-                db_connections = len(self.redis.keys("db_connection:*")) if self.redis else 0
+                db_connections = (
+                    sum(1 for _ in self.redis.scan_iter(match="db_connection:*", count=500))
+                    if self.redis else 0
+                )
             except Exception:
                 db_connections = 0
             
@@ -0,0 +1,27 @@
+"""
+Identifier Normalization
+Dependency-free canonical forms for identifiers that are compared or hashed across
+modules (geocode cache keys, shared-attribute clustering). Safe to import from models.
+"""
+
+import re
+import hashlib
+import unicodedata
+from typing import Optional
+
+_NON_WORD_RE = re.compile(r"[^\w,]+", re.UNICODE)
+_COMMA_RE = re.compile(r"\s*,[\s,]*")
+
+
+def normalize_address(address: Optional[str]) -> str:
+    """Case/whitespace/punctuation-insensitive form used to deduplicate and cache addresses."""
+    if not address:
+        return ""
+    text = unicodedata.normalize("NFKC", address).lower()
+    text = _NON_WORD_RE.sub(" ", text)
+    text = _COMMA_RE.sub(", ", text)
+    return " ".join(text.split()).strip(" ,")
+
+
+def address_key(normalized: str) -> str:
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
@@ -3,7 +3,12 @@ Pagination utilities for database queries
 Provides consistent pagination across all API endpoints
 """
 
-from typing import Any, List, Optional, Tuple, TypeVar, Generic
+import base64
+import enum
+import json
+from datetime import datetime, timezone
+from typing import Any, List, Optional, Sequence, Tuple, TypeVar, Generic
+import sqlalchemy as sa
 from sqlmodel import SQLModel, Session, select, func
 from pydantic import BaseModel
 
@@ -172,4 +177,158 @@ def paginate_by_project(
         total=total,
         limit=pagination.limit,
         offset=pagination.offset
-    )
\ No newline at end of file
+    )
+
+# --- Keyset (cursor) pagination -------------------------------------------------
+#
+# OFFSET pages cost O(offset): the database still walks every skipped row. Keyset
+# pages seek straight to "rows after the last key seen" on an index over the sort
+# key, so page 10,000 costs the same as page 1. The sort key must be unique (end
+# it with the primary key) and all columns are ordered in the same direction.
+
+COUNT_MODES = ("none", "estimate", "exact")
+
+
+class KeysetPage(BaseModel, Generic[T]):
+    """Cursor-paginated response; total is only present when requested"""
+    items: List[T]
+    limit: int
+    next_cursor: Optional[str] = None
+    has_more: bool
+    total: Optional[int] = None
+    total_is_estimate: bool = False
+
+
+def encode_cursor(keys: Sequence[str], values: Sequence[Any]) -> str:
+    """Opaque, URL-safe cursor for the row that ends a page."""
+    packed = []
+    for value in values:
+        if isinstance(value, datetime):
+            packed.append({"$dt": value.isoformat()})
+        elif isinstance(value, enum.Enum):
+            packed.append(value.value)
+        else:
+            packed.append(value)
+    raw = json.dumps({"k": list(keys), "v": packed}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[str]) -> List[Any]:
+    """Inverse of encode_cursor; raises ValueError for foreign or malformed cursors."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if payload["k"] != list(keys) or len(payload["v"]) != len(keys):
+            raise ValueError("cursor does not match this listing's sort key")
+        values = []
+        for value in payload["v"]:
+            if isinstance(value, dict) and "$dt" in value:
+                value = datetime.fromisoformat(value["$dt"])
+            values.append(value)
+        return values
+    except ValueError:
+        raise
+    except Exception as exc:
+        raise ValueError("malformed cursor") from exc
+
+
+def _column_key(column: Any) -> str:
+    return getattr(column, "key", None) or str(column)
+
+
+def _typed(value: Any, column: Any) -> Any:
+    """Bind cursor values with the column's type so dates/enums compare natively."""
+    if isinstance(value, datetime) and value.tzinfo is None:
+        # SQLite hands back naive UTC; model datetime columns require aware values
+        value = value.replace(tzinfo=timezone.utc)
+    return sa.literal(value, type_=column.type)
+
+
+def estimate_count(db: Session, query: Any) -> Tuple[int, bool]:
+    """
+    Row estimate from the planner when the backend offers one (PostgreSQL EXPLAIN),
+    else an exact COUNT. Returns (count, is_estimate).
+    """
+    count_query = select(func.count()).select_from(query.order_by(None).subquery())
+    bind = db.get_bind()
+    if bind.dialect.name == "postgresql":
+        compiled = query.order_by(None).compile(dialect=bind.dialect)
+        try:
+            plan = db.connection().exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+            ).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"]), True
+        except Exception:
+            pass
+    return db.exec(count_query).one(), False
+
+
+def keyset_paginate(
+    db: Session,
+    query: Any,
+    sort_columns: Sequence[Any],
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+    count: str = "none",
+    max_limit: int = 1000,
+) -> KeysetPage[Any]:
+    """
+    Execute one keyset page of an existing select().
+
+    Args:
+        db: Database session
+        query: Filtered select() without ORDER BY/LIMIT
+        sort_columns: Unique composite sort key, e.g. (Transaction.timestamp, Transaction.id)
+        limit: Page size (clamped to 1..max_limit)
+        cursor: next_cursor from the previous page, or None for the first page
+        descending: Walk the key newest-first
+        count: "none" (skip), "estimate" (planner estimate) or "exact"
+
+    Returns:
+        KeysetPage; items are whatever the query selects
+    """
+    if count not in COUNT_MODES:
+        raise ValueError(f"count must be one of {COUNT_MODES}")
+    limit = min(max(limit, 1), max_limit)
+    keys = [_column_key(col) for col in sort_columns]
+
+    total, total_is_estimate = None, False
+    if count == "exact":
+        total = db.exec(select(func.count()).select_from(query.order_by(None).subquery())).one()
+    elif count == "estimate":
+        total, total_is_estimate = estimate_count(db, query)
+
+    page_query = query
+    if cursor:
+        values = decode_cursor(cursor, keys)
+        row_key = sa.tuple_(*sort_columns)
+        after = sa.tuple_(*[_typed(v, col) for v, col in zip(values, sort_columns)])
+        page_query = page_query.where(row_key < after if descending else row_key > after)
+    ordering = [col.desc() if descending else col.asc() for col in sort_columns]
+    # One extra row tells us whether another page exists, without a COUNT
+    rows = db.exec(page_query.order_by(*ordering).limit(limit + 1)).all()
+
+    has_more = len(rows) > limit
+    items = list(rows[:limit])
+    next_cursor = None
+    if has_more and items:
+        last = items[-1]
+        next_cursor = encode_cursor(keys, [_row_value(last, key) for key in keys])
+
+    return KeysetPage(
+        items=items,
+        limit=limit,
+        next_cursor=next_cursor,
+        has_more=has_more,
+        total=total,
+        total_is_estimate=total_is_estimate,
+    )
+
+
+def _row_value(row: Any, key: str) -> Any:
+    if hasattr(row, key):
+        return getattr(row, key)
+    return row._mapping[key]
@@ -1,18 +1,19 @@
 """
 Redis Query Cache Module
 Provides caching layer for expensive database queries.
+Thin facade over the unified cache (app.core.cache): L1 LRU, single-flight, tag invalidation.
 """
 
-from typing import Optional, Any, Callable
+from typing import Optional, Any, Callable, Sequence
 from functools import wraps
 import json
 import hashlib
-from app.core.redis_client import redis_client
+from app.core.cache import cache, project_tag
 
 
 class QueryCache:
     """
-    Redis-backed query result cache with TTL support.
+    Query result cache with TTL support and tag-based invalidation.
     """
 
     def __init__(self, default_ttl: int = 300):
@@ -31,49 +32,38 @@ class QueryCache:
             "args": str(args),
             "kwargs": sorted(kwargs.items())
         }
-        key_json = json.dumps(key_data, sort_keys=True)
+        key_json = json.dumps(key_data, sort_keys=True, default=str)
         key_hash = hashlib.md5(key_json.encode()).hexdigest()
         return f"{self.prefix}{func_name}:{key_hash}"
 
     def get(self, key: str) -> Optional[Any]:
         """Get cached value"""
-        try:
-            cached = redis_client.get(key)
-            if cached:
-                return json.loads(cached)
-            return None
-        except Exception as e:
-            print(f"Cache get error: {e}")
-            return None
-
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        return cache.get(key)
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Sequence[str] = ()) -> bool:
         """Set cached value with TTL"""
-        try:
-            ttl = ttl or self.default_ttl
-            serialized = json.dumps(value, default=str)
-            redis_client.setex(key, ttl, serialized)
-            return True
-        except Exception as e:
-            print(f"Cache set error: {e}")
-            return False
-
-    def invalidate(self, pattern: str) -> int:
-        """Invalidate all keys matching pattern"""
-        try:
-            keys = redis_client.keys(f"{self.prefix}{pattern}*")
-            if keys:
-                return redis_client.delete(*keys)
-            return 0
-        except Exception as e:
-            print(f"Cache invalidate error: {e}")
-            return 0
-
-    def cached(self, ttl: Optional[int] = None):
+        return cache.set(key, value, ttl=ttl or self.default_ttl, tags=tags)
+
+    def get_or_compute(
+        self, key: str, compute: Callable[[], Any], ttl: Optional[int] = None, tags: Sequence[str] = ()
+    ) -> Any:
+        """Read-through with request coalescing: one compute per key however many callers miss"""
+        return cache.get_or_compute(key, compute, ttl=ttl or self.default_ttl, tags=tags)
+
+    def invalidate(self, *tags: str) -> int:
+        """Invalidate every entry carrying any of these tags"""
+        return cache.invalidate_tags(*tags)
+
+    def version(self, *tags: str) -> str:
+        """Version token bumped by every invalidation of any of these tags"""
+        return cache.tag_version(*tags)
+
+    def cached(self, ttl: Optional[int] = None, tags: Optional[Callable[..., Sequence[str]]] = None):
         """
         Decorator to cache function results.
 
         Usage:
-            @query_cache.cached(ttl=600)
+            @query_cache.cached(ttl=600, tags=lambda project_id: [project_tag(project_id)])
             async def expensive_query(project_id: str):
                 # ... expensive operation
                 return results
@@ -81,23 +71,13 @@ class QueryCache:
         def decorator(func: Callable):
             @wraps(func)
             async def wrapper(*args, **kwargs):
-                # Generate cache key
                 cache_key = self._generate_key(func.__name__, *args, **kwargs)
-
-                # Try to get from cache
-                cached_result = self.get(cache_key)
-                if cached_result is not None:
-                    print(f"Cache HIT: {func.__name__}")
-                    return cached_result
-
-                # Cache miss - execute function
-                print(f"Cache MISS: {func.__name__}")
-                result = await func(*args, **kwargs)
-
-                # Store in cache
-                self.set(cache_key, result, ttl)
-
-                return result
+                return await cache.aget_or_compute(
+                    cache_key,
+                    lambda: func(*args, **kwargs),
+                    ttl=ttl or self.default_ttl,
+                    tags=tags(*args, **kwargs) if tags else (),
+                )
             return wrapper
         return decorator
 
@@ -107,17 +87,43 @@ query_cache = QueryCache(default_ttl=300)  # 5 minutes default
 
 
 # Convenience functions
+def transaction_tag(project_id: str) -> str:
+    return f"{project_tag(project_id)}:transactions"
+
+
+def milestone_tag(project_id: str) -> str:
+    return f"{project_tag(project_id)}:milestones"
+
+
+def entity_tag() -> str:
+    # Entities and ownership links can be global, so one tag covers every project
+    return "entities"
+
+
+def user_tag(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
 def invalidate_project_cache(project_id: str):
     """Invalidate all cached queries for a project"""
-    query_cache.invalidate(f"*project_id={project_id}*")
+    query_cache.invalidate(project_tag(project_id))
 
 
 def invalidate_transaction_cache(project_id: str):
-    """Invalidate transaction-related caches"""
-    query_cache.invalidate(f"*transaction*{project_id}*")
-    query_cache.invalidate(f"*scurve*{project_id}*")
+    """Invalidate transaction-related caches (S-curve, Nexus, listings)"""
+    query_cache.invalidate(transaction_tag(project_id))
+
+
+def invalidate_milestone_cache(project_id: str):
+    """Invalidate milestone-derived caches (S-curve earned value)"""
+    query_cache.invalidate(milestone_tag(project_id))
+
+
+def invalidate_entity_cache():
+    """Invalidate entity-derived caches (Nexus nodes and ownership links)"""
+    query_cache.invalidate(entity_tag())
 
 
 def invalidate_user_cache(user_id: str):
     """Invalidate user-specific caches"""
-    query_cache.invalidate(f"*user_id={user_id}*")
+    query_cache.invalidate(user_tag(user_id))
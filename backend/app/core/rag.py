@@ -1,10 +1,16 @@
 import os
-from typing import List
+import logging
+from typing import List, Dict, Any
+from sqlalchemy import exists
 from sqlmodel import Session, select
-from app.models import Document
+from app.models import Document, DocumentChunk
 from app.core.db import engine
 import google.generativeai as genai
 from app.core.config import settings
+from app.core.global_memory import GlobalMemoryService, EMBEDDING_MODEL
+from app.core.rag_index import chunk_index, extraction_failed
+
+logger = logging.getLogger(__name__)
 
 class RAGService:
     def __init__(self):
@@ -45,8 +51,64 @@ class RAGService:
         except Exception as e:
             return f"Visual Analysis Failed: {str(e)}"
 
-    def ingest_text(self, text: str, doc_id: str, metadata: dict = None):
-        """Ingests text into the system for later retrieval."""
+    def ingest_text(self, text: str, doc_id: str, metadata: dict = None) -> int:
+        """
+        Chunks text into the retrieval index (full-text + dense vectors).
+        Returns the number of chunks indexed. Blocking (DB + batched embedding calls):
+        async callers run it via asyncio.to_thread.
+        """
+        metadata = metadata or {}
+        with Session(engine) as session:
+            project_id = metadata.get("project_id")
+            if project_id is None:
+                doc = session.get(Document, doc_id)
+                project_id = doc.project_id if doc else None
+            count = chunk_index.index_document(
+                session,
+                document_id=doc_id,
+                project_id=project_id,
+                content=text,
+                embed_batch=self._embed_many if metadata.get("embed", True) else None,
+                embedding_model=EMBEDDING_MODEL,
+            )
+            session.commit()
+            return count
+
+    @staticmethod
+    def _embed_query(text: str) -> List[float]:
+        return GlobalMemoryService.get_embedding(text, task_type="retrieval_query")
+
+    @staticmethod
+    def _embed_many(texts: List[str]) -> List[List[float]]:
+        return GlobalMemoryService.get_embeddings(texts)
+
+    def search_chunks(
+        self,
+        query: str,
+        project_id: str = None,
+        limit: int = 5
+    ) -> List[Dict[str, Any]]:
+        """
+        Hybrid (BM25 + dense) chunk retrieval for evidence search and Frenly context.
+        """
+        try:
+            query_vector = self._embed_query(query)
+        except Exception:
+            query_vector = None
+        with Session(engine) as session:
+            hits = chunk_index.hybrid_search(
+                session, query, project_id=project_id, k=limit, query_vector=query_vector
+            )
+            return [
+                {
+                    "document_id": chunk.document_id,
+                    "chunk_id": chunk.id,
+                    "chunk_index": chunk.chunk_index,
+                    "content": chunk.content,
+                    "score": score,
+                }
+                for chunk, score in hits
+            ]
 
     def query_context(
         self,
@@ -55,21 +117,72 @@ class RAGService:
         limit: int = 3
     ) -> List[Document]:
         """
-        Retrieves documents relevant to the query.
+        Retrieves documents relevant to the query, ranked by hybrid chunk retrieval.
         """
+        hits = self.search_chunks(query, project_id=project_id, limit=limit * 4)
         with Session(engine) as session:
-            # Build query with security filter
-            statement = select(Document).where(
-                Document.content_text.contains(query)
+            ranked_ids: List[str] = []
+            for hit in hits:
+                if hit["document_id"] not in ranked_ids:
+                    ranked_ids.append(hit["document_id"])
+            ranked_ids = ranked_ids[:limit]
+
+            # Documents not chunked yet (legacy rows until backfill_chunks reaches them):
+            # substring scan, interleaved with the ranked hits
+            statement = select(Document.id).where(
+                Document.content_text.contains(query),
+                ~exists().where(DocumentChunk.document_id == Document.id),
             )
-            
             # CRITICAL: Filter by project_id for multi-tenant isolation
             if project_id:
                 statement = statement.where(Document.project_id == project_id)
-            
-            statement = statement.limit(limit)
-            results = session.exec(statement).all()
-            return results
+            unchunked_ids = session.exec(statement.limit(limit)).all()
+            merged: List[str] = []
+            for pair in zip(ranked_ids, unchunked_ids):
+                merged.extend(pair)
+            merged += ranked_ids[len(unchunked_ids):] + unchunked_ids[len(ranked_ids):]
+            merged = merged[:limit]
+            if not merged:
+                return []
+
+            statement = select(Document).where(Document.id.in_(merged))
+            # CRITICAL: Filter by project_id for multi-tenant isolation
+            if project_id:
+                statement = statement.where(Document.project_id == project_id)
+            docs = {doc.id: doc for doc in session.exec(statement).all()}
+            return [docs[doc_id] for doc_id in merged if doc_id in docs]
+
+    def backfill_chunks(self, batch_size: int = 200) -> int:
+        """
+        Chunks documents that have no chunk rows yet (written before the retrieval
+        index existed). Placeholders and failure notices are skipped. Returns the
+        number of documents indexed; run from the backfill_document_chunks task.
+        """
+        indexed = 0
+        last_id = ""
+        while True:
+            with Session(engine) as session:
+                rows = session.exec(
+                    select(Document.id, Document.project_id, Document.content_text)
+                    .where(
+                        Document.id > last_id,
+                        Document.content_text.is_not(None),
+                        ~exists().where(DocumentChunk.document_id == Document.id),
+                    )
+                    .order_by(Document.id)
+                    .limit(batch_size)
+                ).all()
+            if not rows:
+                return indexed
+            for doc_id, project_id, text in rows:
+                last_id = doc_id
+                if extraction_failed(text):
+                    continue
+                try:
+                    self.ingest_text(text, doc_id, {"project_id": project_id})
+                    indexed += 1
+                except Exception as e:
+                    logger.warning(f"RAG backfill failed for {doc_id}: {e}")
 
     def process_file(self, file_path: str, file_type: str) -> str:
         """Extracts text from various file types (PDF, Images, etc.)"""
@@ -0,0 +1,342 @@
+"""
+RAG Retrieval Index
+Chunked full-text (SQLite FTS5 / PostgreSQL tsvector+GIN) and dense-vector retrieval
+over evidence documents, fused with reciprocal-rank fusion. Strictly per-project.
+"""
+
+import re
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from sqlmodel import Session, select, func, text, delete
+from app.models import DocumentChunk
+from app.core.vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "document_chunks_fts"
+PG_FTS_INDEX = "ix_document_chunks_content_tsv"
+RRF_K = 60
+PENDING_OCR_TEXT = "Pending OCR"
+# Placeholders and failure notices stored as content_text; never indexed or cached
+FAILED_EXTRACTION_PREFIXES = ("Visual Analysis Failed", "Processing skipped or failed", PENDING_OCR_TEXT)
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n{2,}")
+
+
+def extraction_failed(text: Optional[str]) -> bool:
+    return not text or text.startswith(FAILED_EXTRACTION_PREFIXES)
+
+
+def chunk_text(content: str, max_chars: int = 1200, overlap: int = 200) -> List[str]:
+    """
+    Splits text into overlapping chunks on sentence/paragraph boundaries.
+    Oversized sentences are hard-wrapped so no chunk exceeds max_chars.
+    """
+    content = (content or "").strip()
+    if not content:
+        return []
+    pieces: List[str] = []
+    for sentence in _SENTENCE_RE.split(content):
+        sentence = sentence.strip()
+        while len(sentence) > max_chars:
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars - overlap:]
+        if sentence:
+            pieces.append(sentence)
+
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) + 1 > max_chars:
+            chunks.append(current)
+            tail = current[-overlap:] if overlap else ""
+            current = f"{tail} {piece}".strip() if tail else piece
+            if len(current) > max_chars:
+                current = piece
+        else:
+            current = f"{current} {piece}".strip()
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def tokenize_query(query: str) -> List[str]:
+    return [t.lower() for t in _TOKEN_RE.findall(query or "")]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Fuses ranked id lists: score(id) = sum over lists of 1 / (k + rank)."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+
+
+class DocumentChunkIndex:
+    """
+    Maintains document_chunks plus its lexical and dense indexes.
+    Dense vectors are served from per-project in-memory VectorIndex snapshots that are
+    updated incrementally on ingest and reloaded when another worker added chunks.
+    """
+
+    def __init__(self):
+        self._schema_ready: Dict[object, str] = {}
+        self._vectors: Dict[Optional[str], VectorIndex] = {}
+        self._versions: Dict[Optional[str], Tuple[int, object]] = {}
+        self._lock = threading.Lock()
+
+    # --- Schema -----------------------------------------------------------
+
+    def ensure_schema(self, session: Session) -> str:
+        """Creates the dialect-specific full-text structure once per engine. Returns the mode."""
+        bind = session.get_bind()
+        dialect = bind.dialect.name
+        if bind in self._schema_ready:
+            return self._schema_ready[bind]
+        mode = dialect
+        try:
+            # Own connection so DDL never commits the caller's unit of work
+            with bind.begin() as conn:
+                if dialect == "sqlite":
+                    conn.execute(text(
+                        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                        "content, chunk_id UNINDEXED, document_id UNINDEXED, project_id UNINDEXED)"
+                    ))
+                elif dialect == "postgresql":
+                    conn.execute(text(
+                        f"CREATE INDEX IF NOT EXISTS {PG_FTS_INDEX} ON document_chunks "
+                        "USING GIN (to_tsvector('simple', content))"
+                    ))
+                else:
+                    mode = "fallback"
+        except Exception as e:
+            logger.warning(f"RAG full-text index unavailable on {dialect}, using LIKE fallback: {e}")
+            mode = "fallback"
+        self._schema_ready[bind] = mode
+        return mode
+
+    def _mode(self, session: Session) -> str:
+        return self.ensure_schema(session)
+
+    # --- Write path -------------------------------------------------------
+
+    def index_document(
+        self,
+        session: Session,
+        document_id: str,
+        project_id: Optional[str],
+        content: str,
+        embed_batch: Optional[Callable[[List[str]], Sequence[Optional[List[float]]]]] = None,
+        embedding_model: Optional[str] = None,
+    ) -> int:
+        """
+        (Re)chunks a document and indexes every chunk. Embeddings are reused from any
+        existing chunk with identical content; the rest go to embed_batch in one call.
+        Caller commits the session.
+        """
+        mode = self._mode(session)
+        self.remove_document(session, document_id, project_id)
+
+        chunks = []
+        for position, piece in enumerate(chunk_text(content)):
+            content_hash = hashlib.sha256(piece.encode("utf-8")).hexdigest()
+            chunk = DocumentChunk(
+                document_id=document_id,
+                project_id=project_id,
+                chunk_index=position,
+                content=piece,
+                content_hash=content_hash,
+            )
+            chunks.append(chunk)
+        if embed_batch is not None and chunks:
+            self._attach_embeddings(session, chunks, embed_batch, embedding_model)
+        session.add_all(chunks)
+        session.flush()
+
+        if mode == "sqlite" and chunks:
+            session.execute(
+                text(
+                    f"INSERT INTO {FTS_TABLE} (content, chunk_id, document_id, project_id) "
+                    "VALUES (:content, :chunk_id, :document_id, :project_id)"
+                ),
+                [
+                    {"content": c.content, "chunk_id": c.id, "document_id": document_id, "project_id": project_id}
+                    for c in chunks
+                ],
+            )
+
+        with self._lock:
+            for scope in (project_id, None):
+                index = self._vectors.get(scope)
+                if index is not None:
+                    for c in chunks:
+                        if c.embedding_model:
+                            index.upsert(c.id, c.embedding_json)
+        self._refresh_versions(session, (project_id, None))
+        return len(chunks)
+
+    @staticmethod
+    def _attach_embeddings(session, chunks, embed_batch, embedding_model):
+        hashes = list({c.content_hash for c in chunks})
+        cache_stmt = (
+            select(DocumentChunk.content_hash, DocumentChunk.embedding_json)
+            .where(DocumentChunk.content_hash.in_(hashes))
+            .where(DocumentChunk.embedding_model.is_not(None))
+        )
+        if embedding_model is not None:
+            cache_stmt = cache_stmt.where(DocumentChunk.embedding_model == embedding_model)
+        cached = dict(session.exec(cache_stmt).all())
+
+        pending = {c.content_hash: c.content for c in chunks if c.content_hash not in cached}
+        vectors: Sequence[Optional[List[float]]] = []
+        if pending:
+            try:
+                vectors = embed_batch(list(pending.values()))
+            except Exception as e:
+                logger.warning(f"Chunk embedding failed, lexical-only for these chunks: {e}")
+        fresh = dict(zip(pending, vectors))
+
+        for chunk in chunks:
+            vector = cached.get(chunk.content_hash) or fresh.get(chunk.content_hash)
+            # Dummy zero vectors carry no signal; keep them out of the dense index
+            if vector and VectorIndex.normalize(vector) is not None:
+                chunk.embedding_json = list(vector)
+                chunk.embedding_model = embedding_model or "unknown"
+
+    def remove_document(self, session: Session, document_id: str, project_id: Optional[str] = None):
+        mode = self._mode(session)
+        old_ids = session.exec(select(DocumentChunk.id).where(DocumentChunk.document_id == document_id)).all()
+        if not old_ids:
+            return
+        if mode == "sqlite":
+            session.execute(
+                text(f"DELETE FROM {FTS_TABLE} WHERE document_id = :document_id"),
+                {"document_id": document_id},
+            )
+        session.exec(delete(DocumentChunk).where(DocumentChunk.document_id == document_id))
+        with self._lock:
+            for scope in (project_id, None):
+                index = self._vectors.get(scope)
+                if index is not None:
+                    for chunk_id in old_ids:
+                        index.remove(chunk_id)
+        self._refresh_versions(session, (project_id, None))
+
+    # --- Read path --------------------------------------------------------
+
+    def lexical_search(self, session: Session, query: str, project_id: Optional[str] = None, k: int = 20) -> List[str]:
+        """BM25-ranked chunk ids (FTS5 bm25 / ts_rank_cd)."""
+        tokens = tokenize_query(query)
+        if not tokens:
+            return []
+        mode = self._mode(session)
+        params = {"k": k, "project_id": project_id}
+        scope = " AND project_id = :project_id" if project_id else ""
+
+        if mode == "sqlite":
+            params["q"] = " OR ".join(f'"{t}"' for t in tokens)
+            rows = session.execute(
+                text(
+                    f"SELECT chunk_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :q{scope} "
+                    f"ORDER BY bm25({FTS_TABLE}) LIMIT :k"
+                ),
+                params,
+            ).all()
+        elif mode == "postgresql":
+            params["q"] = " | ".join(tokens)
+            rows = session.execute(
+                text(
+                    "SELECT id FROM document_chunks "
+                    "WHERE to_tsvector('simple', content) @@ to_tsquery('simple', :q)" + scope + " "
+                    "ORDER BY ts_rank_cd(to_tsvector('simple', content), to_tsquery('simple', :q)) DESC "
+                    "LIMIT :k"
+                ),
+                params,
+            ).all()
+        else:
+            stmt = select(DocumentChunk.id).where(DocumentChunk.content.ilike(f"%{tokens[0]}%"))
+            if project_id:
+                stmt = stmt.where(DocumentChunk.project_id == project_id)
+            return list(session.exec(stmt.limit(k)).all())
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def _dense_scope(project_id: Optional[str]) -> list:
+        scope = [DocumentChunk.embedding_model.is_not(None)]
+        if project_id:
+            scope.append(DocumentChunk.project_id == project_id)
+        return scope
+
+    def _version(self, session: Session, project_id: Optional[str]) -> Tuple[int, object]:
+        """
+        (embedded chunk count, newest chunk) of a scope. Staleness is judged on this, not
+        len(index): a stored vector the index rejects (e.g. another dimension) must not
+        make every search rebuild.
+        """
+        return tuple(session.exec(
+            select(func.count(DocumentChunk.id), func.max(DocumentChunk.created_at))
+            .where(*self._dense_scope(project_id))
+        ).one())
+
+    def _refresh_versions(self, session: Session, scopes: Sequence[Optional[str]]):
+        """After an in-place update, record the versions the loaded indexes now reflect."""
+        for scope in scopes:
+            if scope in self._vectors:
+                version = self._version(session, scope)
+                with self._lock:
+                    self._versions[scope] = version
+
+    def _vector_index(self, session: Session, project_id: Optional[str]) -> VectorIndex:
+        scope = self._dense_scope(project_id)
+        version = self._version(session, project_id)
+
+        with self._lock:
+            index = self._vectors.get(project_id)
+            if index is not None and self._versions.get(project_id) == version:
+                return index
+
+        index = VectorIndex()
+        index.upsert_many(session.exec(select(DocumentChunk.id, DocumentChunk.embedding_json).where(*scope)).all())
+        with self._lock:
+            self._vectors[project_id] = index
+            self._versions[project_id] = version
+        return index
+
+    def dense_search(
+        self, session: Session, query_vector: Optional[List[float]], project_id: Optional[str] = None, k: int = 20
+    ) -> List[str]:
+        if not query_vector or VectorIndex.normalize(query_vector) is None:
+            return []
+        index = self._vector_index(session, project_id)
+        return [chunk_id for chunk_id, _ in index.search(query_vector, k=k)]
+
+    def hybrid_search(
+        self,
+        session: Session,
+        query: str,
+        project_id: Optional[str] = None,
+        k: int = 10,
+        query_vector: Optional[List[float]] = None,
+        candidates: int = 50,
+    ) -> List[Tuple[DocumentChunk, float]]:
+        """Top-k chunks by reciprocal-rank fusion of lexical and dense rankings."""
+        lexical = self.lexical_search(session, query, project_id, k=candidates)
+        dense = self.dense_search(session, query_vector, project_id, k=candidates)
+        fused = reciprocal_rank_fusion([r for r in (lexical, dense) if r])[:k]
+        if not fused:
+            return []
+        chunks = {
+            c.id: c for c in session.exec(select(DocumentChunk).where(DocumentChunk.id.in_([i for i, _ in fused]))).all()
+        }
+        # Re-check project scope on the authoritative row (defence in depth for the FTS side table)
+        return [
+            (chunks[i], score)
+            for i, score in fused
+            if i in chunks and (not project_id or chunks[i].project_id == project_id)
+        ]
+
+
+chunk_index = DocumentChunkIndex()
@@ -92,12 +92,7 @@ class VendorMatcher:
         # Exact match after normalization
         if norm1 == norm2:
             return (100.0, "exact_normalized")
-        # Fuzzy matching using multiple algorithms
-        ratio = fuzz.ratio(norm1, norm2)
-        partial = fuzz.partial_ratio(norm1, norm2)
-        token_sort = fuzz.token_sort_ratio(norm1, norm2)
-        # Use the highest score
-        best_score = max(ratio, partial, token_sort)
+        best_score = cls.normalized_similarity(norm1, norm2)
         if best_score >= 95:
             method = "fuzzy_high"
         elif best_score >= cls.SIMILARITY_THRESHOLD:
@@ -106,6 +101,18 @@ class VendorMatcher:
             method = "fuzzy_weak"
         return (best_score, method)
 
+    @classmethod
+    def normalized_similarity(cls, norm1: str, norm2: str) -> float:
+        """Score for already-normalized names; lets bulk matchers normalize each name once."""
+        if norm1 == norm2:
+            return 100.0
+        # Fuzzy matching using multiple algorithms; use the highest score
+        return max(
+            fuzz.ratio(norm1, norm2),
+            fuzz.partial_ratio(norm1, norm2),
+            fuzz.token_sort_ratio(norm1, norm2),
+        )
+
     @classmethod
     def is_match(cls, name1: str, name2: str) -> bool:
         """Quick boolean check if names match above threshold."""
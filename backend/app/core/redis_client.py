@@ -46,19 +46,19 @@ def get_history(session_id: str):
 
 
 def invalidate_cache_pattern(pattern: str):
-    """Invalidate all cache keys matching pattern."""
-    if not redis_client:
-        return
-    for key in redis_client.scan_iter(match=pattern):
-        redis_client.delete(key)
+    """Invalidate all cache keys matching pattern (incremental SCAN, never KEYS)."""
+    from app.core.cache import cache
+    return cache.delete_matching(pattern)
 
 
-def cache_endpoint(ttl: int = 300):
+def cache_endpoint(ttl: int = 300, tags: Callable[..., Any] = None):
     """
-    Decorator for caching endpoint responses in Redis.
+    Decorator for caching endpoint responses in the unified cache.
+    Concurrent misses for the same arguments are coalesced into one call.
     
     Args:
         ttl: Time-to-live in seconds (default 5 minutes)
+        tags: Optional callable (same arguments) returning invalidation tags
     
     Usage:
         @cache_endpoint(ttl=300)
@@ -68,9 +68,8 @@ def cache_endpoint(ttl: int = 300):
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         async def wrapper(*args, **kwargs) -> Any:
-            if not redis_client:
-                return await func(*args, **kwargs)
-            
+            from app.core.cache import cache
+
             # Generate cache key from function name + args
             cache_parts = [func.__name__]
             
@@ -91,25 +90,12 @@ def cache_endpoint(ttl: int = 300):
             cache_hash = hashlib.md5(cache_str.encode()).hexdigest()
             cache_key = f"cache:endpoint:{func.__name__}:{cache_hash}"
             
-            # Try to get from cache
-            cached = redis_client.get(cache_key)
-            if cached:
-                return json.loads(cached)
-            
-            # Execute function
-            result = await func(*args, **kwargs)
-            
-            # Store in cache
-            try:
-                redis_client.setex(
-                    cache_key,
-                    ttl,
-                    json.dumps(result, default=str)
-                )
-            except Exception:
-                pass  # Don't fail on cache errors
-            
-            return result
+            return await cache.aget_or_compute(
+                cache_key,
+                lambda: func(*args, **kwargs),
+                ttl=ttl,
+                tags=tags(*args, **kwargs) if tags else (),
+            )
         
         return wrapper
     return decorator
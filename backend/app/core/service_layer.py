@@ -4,7 +4,7 @@ Provides dependency injection, service layer abstraction, and module boundaries
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, TypeVar, Any, Optional
+from typing import Dict, TypeVar, Any, Optional, Sequence
 from sqlmodel import Session
 import logging
 
@@ -196,32 +196,28 @@ class CacheService(BaseService):
     
     def get(self, key: str) -> Optional[Any]:
         """Get cached value"""
-        from app.core.redis_client import redis_client
+        from app.core.cache import cache
         
-        try:
-            return redis_client.get(key)
-        except Exception as e:
-            self._logger.error(f"Cache get error: {e}")
-            return None
+        return cache.get(key)
     
-    def set(self, key: str, value: Any, ttl: int = 300) -> bool:
+    def set(self, key: str, value: Any, ttl: int = 300, tags: Sequence[str] = ()) -> bool:
         """Set cached value with TTL"""
-        from app.core.redis_client import redis_client
+        from app.core.cache import cache
         
-        try:
-            return redis_client.setex(key, ttl, value)
-        except Exception as e:
-            self._logger.error(f"Cache set error: {e}")
-            return False
+        return cache.set(key, value, ttl=ttl, tags=tags)
+    
+    def invalidate_tags(self, *tags: str) -> int:
+        """Invalidate every entry carrying one of these tags"""
+        from app.core.cache import cache
+        
+        return cache.invalidate_tags(*tags)
     
     def invalidate_pattern(self, pattern: str) -> int:
-        """Invalidate cache entries matching pattern"""
-        from app.core.redis_client import redis_client
+        """Invalidate cache entries matching pattern (incremental SCAN)"""
+        from app.core.cache import cache
         
         try:
-            keys = redis_client.keys(pattern)
-            if keys:
-                return redis_client.delete(*keys)
+            return cache.delete_matching(pattern)
         except Exception as e:
             self._logger.error(f"Cache invalidation error: {e}")
         return 0
@@ -1,5 +1,9 @@
+import asyncio
+import json
 import logging
-from typing import List, Dict
+import uuid
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
 from fastapi import (
     APIRouter, WebSocket, WebSocketDisconnect, Query, Depends, status
 )
@@ -12,49 +16,294 @@ from app.models import UserProjectAccess
 
 logger = logging.getLogger(__name__)
 
+SEND_QUEUE_SIZE = 256  # pending frames per socket before shedding
+SEND_TIMEOUT = 5.0  # seconds a single frame may take before the client is dropped
+MAX_OVERFLOWS = 64  # frames shed in a row before a slow client is disconnected
+BROADCAST_CHANNEL = "zenith:ws:broadcast"
+RESUBSCRIBE_MIN_DELAY = 1.0  # seconds before the first backplane reconnect attempt
+RESUBSCRIBE_MAX_DELAY = 30.0
+GLOBAL_ROOM = "__global__"
+
+
+class _Client:
+    """
+    One socket, one bounded outbox, one writer task.
+    Broadcasters only enqueue, so a slow client never stalls anyone else.
+    """
+
+    def __init__(self, websocket: WebSocket, room: str, on_dead: Callable[["_Client"], None]):
+        self.websocket = websocket
+        self.room = room
+        self._outbox: Deque[Tuple[Optional[str], str]] = deque()
+        self._wakeup = asyncio.Event()
+        self._on_dead = on_dead
+        self.dropped = 0
+        self.overflows = 0
+        self.closed = False
+        self.task = asyncio.create_task(self._drain())
+
+    def offer(self, text: str, coalesce_key: Optional[str] = None) -> bool:
+        """Queue a frame; returns False once the client has been given up on."""
+        if self.closed:
+            return False
+        if coalesce_key is not None:
+            # Newer state supersedes a pending frame with the same key (e.g. progress %)
+            for i, (key, _) in enumerate(self._outbox):
+                if key == coalesce_key:
+                    self._outbox[i] = (coalesce_key, text)
+                    return True
+        if len(self._outbox) >= SEND_QUEUE_SIZE:
+            self._outbox.popleft()
+            self.dropped += 1
+            self.overflows += 1
+            if self.overflows >= MAX_OVERFLOWS:
+                logger.warning(f"Dropping slow WebSocket consumer in {self.room}")
+                self.close()
+                return False
+        self._outbox.append((coalesce_key, text))
+        self._wakeup.set()
+        return True
+
+    async def _drain(self):
+        try:
+            # close() also sets the event: wait_for may swallow a cancellation (py<3.12)
+            while not self.closed:
+                if not self._outbox:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+                _, text = self._outbox.popleft()
+                await asyncio.wait_for(self.websocket.send_text(text), SEND_TIMEOUT)
+                self.overflows = 0
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info(f"WebSocket writer stopped for {self.room}: {e}")
+            self.close()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self._outbox.clear()
+        self._wakeup.set()
+        if self.task is not asyncio.current_task():
+            self.task.cancel()
+        self._on_dead(self)
+        asyncio.ensure_future(self._close_socket())
+
+    async def _close_socket(self):
+        try:
+            await self.websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        except Exception:
+            pass
+
+
+class InMemoryBackplane:
+    """
+    Same-process stand-in for Redis pub/sub. Every attached manager plays one worker;
+    tests attach several to exercise cross-worker fan-out.
+    """
 
-class ConnectionManager:
     def __init__(self):
-        # Map project_id -> List[WebSocket]
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+        self._subscribers: List[Callable[[Dict[str, Any]], None]] = []
+
+    async def start(self, deliver: Callable[[Dict[str, Any]], None]):
+        self._subscribers.append(deliver)
+
+    async def publish(self, envelope: Dict[str, Any]):
+        for deliver in list(self._subscribers):
+            deliver(envelope)
+
+    async def stop(self):
+        self._subscribers.clear()
+
+
+class RedisBackplane:
+    """Fans broadcasts out to every worker through one Redis pub/sub channel."""
+
+    def __init__(self, url: str, channel: str = BROADCAST_CHANNEL):
+        import redis.asyncio as aioredis
+
+        self._redis = aioredis.from_url(url, decode_responses=True)
+        self.channel = channel
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: Callable[[Dict[str, Any]], None]):
+        pubsub = await self._subscribe()
+        self._listener = asyncio.create_task(self._listen(pubsub, deliver))
+
+    async def _subscribe(self):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self.channel)
+        return pubsub
+
+    async def _listen(self, pubsub, deliver):
+        """Delivers messages; a dropped connection resubscribes with exponential backoff."""
+        delay = RESUBSCRIBE_MIN_DELAY
+        while True:
+            try:
+                if pubsub is None:
+                    pubsub = await self._subscribe()
+                    logger.info(f"WebSocket backplane resubscribed to {self.channel}")
+                    delay = RESUBSCRIBE_MIN_DELAY
+                async for message in pubsub.listen():
+                    try:
+                        deliver(json.loads(message["data"]))
+                    except Exception as e:
+                        logger.error(f"WebSocket backplane message error: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"WebSocket backplane connection lost, retrying in {delay:.0f}s: {e}")
+            if pubsub is not None:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+                pubsub = None
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RESUBSCRIBE_MAX_DELAY)
+
+    async def publish(self, envelope: Dict[str, Any]):
+        await self._redis.publish(self.channel, json.dumps(envelope))
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+        await self._redis.aclose()
+
+
+def _default_backplane():
+    from app.core.redis_client import redis_client, REDIS_URL
+
+    if settings.TESTING or redis_client is None:
+        return InMemoryBackplane()
+    return RedisBackplane(REDIS_URL)
+
+
+class ConnectionManager:
+    """
+    Per-worker WebSocket registry. broadcast() serializes once, publishes to the
+    backplane, and every worker enqueues the frame on its own local sockets.
+    """
+
+    def __init__(self, backplane=None):
+        self.worker_id = uuid.uuid4().hex
+        self._backplane = backplane
+        self._started = False
+        self._start_lock: Optional[asyncio.Lock] = None
+        # Map project_id -> {WebSocket: _Client}
+        self.active_connections: Dict[str, Dict[WebSocket, _Client]] = {}
         # Track global connections
-        self.global_connections: List[WebSocket] = []
+        self.global_connections: Dict[WebSocket, _Client] = {}
+        self.stats = {"published": 0, "delivered": 0, "shed": 0}
+
+    async def _ensure_started(self):
+        if self._started:
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._started:
+                return
+            if self._backplane is None:
+                self._backplane = _default_backplane()
+            try:
+                await self._backplane.start(self._on_envelope)
+            except Exception as e:
+                logger.error(f"WebSocket backplane unavailable, broadcasting locally only: {e}")
+                self._backplane = InMemoryBackplane()
+                await self._backplane.start(self._on_envelope)
+            self._started = True
 
     async def connect(self, websocket: WebSocket, project_id: str = None):
         await websocket.accept()
+        await self._ensure_started()
         if project_id:
-            if project_id not in self.active_connections:
-                self.active_connections[project_id] = []
-            self.active_connections[project_id].append(websocket)
+            room = self.active_connections.setdefault(project_id, {})
+            room[websocket] = _Client(websocket, project_id, self._forget)
             logger.info(f"Client connected to project channel: {project_id}")
         else:
-            self.global_connections.append(websocket)
+            self.global_connections[websocket] = _Client(websocket, GLOBAL_ROOM, self._forget)
+
+    def _forget(self, client: _Client):
+        if client.room == GLOBAL_ROOM:
+            self.global_connections.pop(client.websocket, None)
+            return
+        room = self.active_connections.get(client.room)
+        if room is not None:
+            room.pop(client.websocket, None)
+            if not room:
+                del self.active_connections[client.room]
 
     def disconnect(self, websocket: WebSocket, project_id: str = None):
-        if project_id and project_id in self.active_connections:
-            if websocket in self.active_connections[project_id]:
-                self.active_connections[project_id].remove(websocket)
-                if not self.active_connections[project_id]:
-                    del self.active_connections[project_id]
-        elif websocket in self.global_connections:
-            self.global_connections.remove(websocket)
+        room = self.active_connections.get(project_id) if project_id else self.global_connections
+        client = room.get(websocket) if room is not None else None
+        if client is None and project_id:
+            client = self.global_connections.get(websocket)
+        if client is not None:
+            client.closed = True
+            client._wakeup.set()
+            client.task.cancel()
+            self._forget(client)
 
     async def send_personal_message(self, message: str, websocket: WebSocket):
         await websocket.send_text(message)
 
-    async def broadcast(self, message: dict, project_id: str = None):
-        """Broadcast to specific project room or globally."""
+    async def broadcast(self, message: Any, project_id: str = None, coalesce_key: str = None):
+        """
+        Broadcast to specific project room or globally, on every worker.
+        Never waits on client sockets: frames are queued per connection.
+        """
+        await self._ensure_started()
+        envelope = {
+            "origin": self.worker_id,
+            "project_id": project_id,
+            "key": coalesce_key,
+            "text": json.dumps(message, separators=(",", ":"), default=str),
+        }
+        # Local sockets first (no round trip), remote workers via the backplane
+        self._deliver(envelope)
+        self.stats["published"] += 1
+        try:
+            await self._backplane.publish(envelope)
+        except Exception as e:
+            logger.error(f"WebSocket backplane publish failed: {e}")
+
+    def _on_envelope(self, envelope: Dict[str, Any]):
+        if envelope.get("origin") != self.worker_id:
+            self._deliver(envelope)
+
+    def _deliver(self, envelope: Dict[str, Any]):
+        project_id = envelope.get("project_id")
         if project_id:
-            if project_id in self.active_connections:
-                for connection in self.active_connections[project_id]:
-                    await connection.send_json(message)
+            targets = list(self.active_connections.get(project_id, {}).values())
         else:
             # Broadcast to everyone
-            for connection in self.global_connections:
-                await connection.send_json(message)
-            for connections in self.active_connections.values():
-                for connection in connections:
-                    await connection.send_json(message)
+            targets = list(self.global_connections.values())
+            for room in self.active_connections.values():
+                targets.extend(room.values())
+        text, key = envelope["text"], envelope.get("key")
+        for client in targets:
+            if client.offer(text, key):
+                self.stats["delivered"] += 1
+            else:
+                self.stats["shed"] += 1
+
+    def connection_count(self) -> int:
+        return len(self.global_connections) + sum(len(room) for room in self.active_connections.values())
+
+    async def close(self):
+        clients = list(self.global_connections.values())
+        for room in list(self.active_connections.values()):
+            clients.extend(room.values())
+        for client in clients:
+            client.close()
+        await asyncio.gather(*(client.task for client in clients), return_exceptions=True)
+        if self._backplane is not None and self._started:
+            await self._backplane.stop()
+        self._started = False
 
 
 manager = ConnectionManager()
@@ -0,0 +1,26 @@
+"""
+Time Buckets
+Dialect-aware SQL bucketing of timestamp columns into day/week/month periods,
+shared by the S-curve engine and vendor velocity profiling.
+"""
+
+from sqlmodel import Session, func
+
+GRANULARITIES = ("day", "week", "month")
+DEFAULT_GRANULARITY = "week"
+
+
+def bucket_expr(db: Session, column, granularity: str):
+    """
+    Bucket start for a timestamp column. PostgreSQL truncates natively; SQLite gets
+    ISO date strings (weeks start on Monday in both).
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {GRANULARITIES}")
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date_trunc(granularity, column)
+    if granularity == "day":
+        return func.date(column)
+    if granularity == "week":
+        return func.date(column, "weekday 0", "-6 days")
+    return func.strftime("%Y-%m-01", column)
@@ -0,0 +1,147 @@
+"""
+Dense Vector Index
+Normalized float32 matrix with id mapping; top-k cosine search is one matrix product.
+Snapshots persist as .npy and reload memory-mapped, so workers share the OS page cache.
+"""
+
+import os
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+
+
+class VectorIndex:
+    """
+    In-memory exact cosine index.
+    Vectors are L2-normalized on insert so similarity is a plain dot product.
+    Zero vectors (dummy embeddings) are rejected instead of polluting results.
+    """
+
+    def __init__(self, dim: Optional[int] = None, capacity: int = 1024):
+        self.dim = dim
+        self._ids: List[str] = []
+        self._pos: Dict[str, int] = {}
+        self._matrix = np.zeros((capacity, dim or 0), dtype=np.float32) if dim else None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._pos
+
+    @staticmethod
+    def normalize(vector: Sequence[float]) -> Optional[np.ndarray]:
+        vec = np.asarray(vector, dtype=np.float32)
+        if vec.ndim != 1 or vec.size == 0:
+            return None
+        norm = float(np.linalg.norm(vec))
+        if norm == 0.0 or not np.isfinite(norm):
+            return None
+        return vec / norm
+
+    def _ensure_capacity(self, needed: int):
+        if self._matrix is None:
+            self._matrix = np.zeros((max(needed, 1024), self.dim), dtype=np.float32)
+        elif needed > self._matrix.shape[0]:
+            grown = np.zeros((max(needed, self._matrix.shape[0] * 2), self.dim), dtype=np.float32)
+            grown[: self._size] = self._matrix[: self._size]
+            self._matrix = grown
+
+    def upsert(self, item_id: str, vector: Sequence[float]) -> bool:
+        """Insert or replace one vector. Returns False if it was rejected."""
+        vec = self.normalize(vector)
+        if vec is None:
+            return False
+        if self.dim is None:
+            self.dim = vec.shape[0]
+        if vec.shape[0] != self.dim:
+            return False
+        if item_id in self._pos:
+            self._matrix[self._pos[item_id]] = vec
+            return True
+        self._ensure_capacity(self._size + 1)
+        self._matrix[self._size] = vec
+        self._pos[item_id] = self._size
+        self._ids.append(item_id)
+        self._size += 1
+        return True
+
+    def upsert_many(self, items: Iterable[Tuple[str, Sequence[float]]]) -> int:
+        return sum(1 for item_id, vector in items if self.upsert(item_id, vector))
+
+    def remove(self, item_id: str) -> bool:
+        """Swap-remove keeps the matrix dense."""
+        pos = self._pos.pop(item_id, None)
+        if pos is None:
+            return False
+        last = self._size - 1
+        if pos != last:
+            moved_id = self._ids[last]
+            self._matrix[pos] = self._matrix[last]
+            self._ids[pos] = moved_id
+            self._pos[moved_id] = pos
+        self._ids.pop()
+        self._size -= 1
+        return True
+
+    def search(
+        self,
+        query: Sequence[float],
+        k: int = 10,
+        min_score: Optional[float] = None,
+    ) -> List[Tuple[str, float]]:
+        """Top-k (id, cosine similarity) pairs, best first."""
+        if self._size == 0 or k <= 0:
+            return []
+        q = self.normalize(query)
+        if q is None or q.shape[0] != self.dim:
+            return []
+        scores = self._matrix[: self._size] @ q
+        k = min(k, self._size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        results = []
+        for idx in top:
+            score = float(scores[idx])
+            if min_score is not None and score < min_score:
+                break
+            results.append((self._ids[idx], score))
+        return results
+
+    # --- Persistence ------------------------------------------------------
+
+    def save(self, path: str, meta: Optional[Dict[str, Any]] = None):
+        """
+        Writes <path>.npy (matrix) and <path>.meta.json (ids + caller metadata) atomically.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        matrix = self._matrix[: self._size] if self._matrix is not None else np.zeros((0, self.dim or 0), np.float32)
+        tmp_npy = f"{path}.npy.tmp"
+        with open(tmp_npy, "wb") as f:
+            np.save(f, np.ascontiguousarray(matrix, dtype=np.float32))
+        tmp_meta = f"{path}.meta.json.tmp"
+        with open(tmp_meta, "w") as f:
+            json.dump({"ids": self._ids[: self._size], "dim": self.dim, "meta": meta or {}}, f)
+        os.replace(tmp_npy, f"{path}.npy")
+        os.replace(tmp_meta, f"{path}.meta.json")
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> Tuple["VectorIndex", Dict[str, Any]]:
+        """
+        Loads a snapshot. With mmap the matrix is mapped copy-on-write: reads hit the
+        shared page cache, incremental upserts stay private to this process.
+        """
+        with open(f"{path}.meta.json") as f:
+            payload = json.load(f)
+        try:
+            matrix = np.load(f"{path}.npy", mmap_mode="c" if mmap else None)
+        except ValueError:
+            # Empty snapshots cannot be mapped
+            matrix = np.load(f"{path}.npy")
+        index = cls(dim=payload.get("dim"), capacity=1)
+        index._matrix = matrix
+        index._ids = list(payload["ids"])
+        index._pos = {item_id: i for i, item_id in enumerate(index._ids)}
+        index._size = len(index._ids)
+        return index, payload.get("meta", {})
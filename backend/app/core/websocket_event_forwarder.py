@@ -19,7 +19,7 @@ async def forward_high_risk_alert_to_websocket(event: Event):
     try:
         await manager.broadcast(websocket_message)
         logger.info(
-            f"Broadcasted HIGH_RISK_ALERT to {len(manager.active_connections)} WebSocket clients."
+            f"Broadcasted HIGH_RISK_ALERT to {manager.connection_count()} local WebSocket clients."
         )
     except Exception as e:
         logger.error(f"Failed to broadcast WebSocket message: {e}")
@@ -72,7 +72,9 @@ async def lifespan(app: FastAPI):
     asyncio.create_task(JudgeAgent().start())
     asyncio.create_task(refresh_business_metrics_loop())
     yield
-    # Shutdown logic (if any)
+    # Shutdown logic
+    from app.core.sync import manager as ws_manager
+    await ws_manager.close()
 
 
 app = FastAPI(title="Zenith Platform API", version="2.0.0", lifespan=lifespan)
@@ -96,6 +98,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # keyset pagination cursor must be readable by the browser
 )
 
 
@@ -1,11 +1,15 @@
 from datetime import datetime
+from datetime import date
 from datetime import UTC
+import re
 from typing import Optional, Dict, Any, List
 from enum import Enum
 import uuid
 from sqlmodel import SQLModel, Field, Column, JSON
+from sqlalchemy import Index, event, inspect as sa_inspect
 from pydantic import field_validator
 from app.core.field_encryption import encrypt_field, decrypt_field
+from app.core.normalization import address_key, normalize_address
 
 
 class CaseStatus(str, Enum):
@@ -161,8 +165,89 @@ class Entity(SQLModel, table=True):
     embeddings_json: Optional[List[float]] = Field(
         default=None, sa_column=Column(JSON)
     )
+    # Maintained by _tag_entity_embedding; drive incremental entity vector index sync
+    embedding_dim: Optional[int] = None  # None = no usable (non-zero) embedding
+    embedding_updated_at: Optional[datetime] = None  # None = untagged legacy row
 
 
+def entity_embedding_dim(vector: Optional[List[float]]) -> Optional[int]:
+    return len(vector) if vector and any(vector) else None
+
+
+@event.listens_for(Entity, "before_insert")
+@event.listens_for(Entity, "before_update")
+def _tag_entity_embedding(mapper, connection, target: Entity):
+    if target.embedding_updated_at is None or sa_inspect(target).attrs.embeddings_json.history.has_changes():
+        target.embedding_dim = entity_embedding_dim(target.embeddings_json)
+        target.embedding_updated_at = datetime.now(UTC)
+
+
+class EntityAttribute(SQLModel, table=True):
+    """
+    Normalized identifiers per entity (tax id, bank account, phone, address hash).
+    Shared-attribute clusters are a GROUP BY over (attribute, value); rows follow
+    Entity writes through the mapper events below.
+    """
+    __tablename__ = "entity_attributes"
+
+    entity_id: str = Field(foreign_key="entity.id", primary_key=True)
+    attribute: str = Field(primary_key=True)  # tax_id, bank_account_number, phone, address
+    value: str  # digits for numbers, SHA-256 of the normalized address
+    project_id: Optional[str] = Field(default=None, foreign_key="project.id")
+
+
+_NON_DIGIT_RE = re.compile(r"\D")
+_ENTITY_ATTRIBUTE_FIELDS = ("project_id", "tax_id", "bank_account_number", "metadata_json")
+
+
+def _digits(value: Any, min_length: int = 5) -> Optional[str]:
+    digits = _NON_DIGIT_RE.sub("", str(value or ""))
+    return digits if len(digits) >= min_length else None
+
+
+def entity_attribute_values(entity: "Entity") -> Dict[str, str]:
+    """Normalized identifiers of an entity; placeholders too short to identify anyone are dropped."""
+    meta = entity.metadata_json or {}
+    phone = _digits(meta.get("phone"), min_length=8)
+    if phone and phone.startswith("62"):
+        phone = "0" + phone[2:]  # +62 812... and 0812... are the same line
+    address = normalize_address(meta.get("address") if isinstance(meta.get("address"), str) else None)
+    values = {
+        "tax_id": _digits(entity.tax_id),
+        "bank_account_number": _digits(entity.bank_account_number),
+        "phone": phone,
+        "address": address_key(address) if address else None,
+    }
+    return {attribute: value for attribute, value in values.items() if value}
+
+
+def _write_entity_attributes(connection, target: Entity):
+    table = EntityAttribute.__table__
+    connection.execute(table.delete().where(table.c.entity_id == target.id))
+    rows = [
+        {"entity_id": target.id, "attribute": attribute, "value": value, "project_id": target.project_id}
+        for attribute, value in entity_attribute_values(target).items()
+    ]
+    if rows:
+        connection.execute(table.insert(), rows)
+
+
+@event.listens_for(Entity, "after_insert")
+def _index_entity_attributes(mapper, connection, target: Entity):
+    _write_entity_attributes(connection, target)
+
+
+@event.listens_for(Entity, "after_update")
+def _sync_entity_attributes(mapper, connection, target: Entity):
+    state = sa_inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in _ENTITY_ATTRIBUTE_FIELDS):
+        _write_entity_attributes(connection, target)
+
+
+@event.listens_for(Entity, "before_delete")
+def _drop_entity_attributes(mapper, connection, target: Entity):
+    table = EntityAttribute.__table__
+    connection.execute(table.delete().where(table.c.entity_id == target.id))
 
 
 class Transaction(SQLModel, table=True):
@@ -199,6 +284,21 @@ class Transaction(SQLModel, table=True):
     @investigator_note.setter
     def investigator_note(self, value: Optional[str]):
         self.investigator_note_enc = encrypt_field(value) if value else None
+
+    @property
+    def aml_stage(self) -> Optional[AMLStage]:
+        # The column was dropped; the classification lives in metadata_json
+        value = (self.metadata_json or {}).get("aml_stage")
+        return AMLStage(value) if value else None
+
+    @aml_stage.setter
+    def aml_stage(self, value: Optional[AMLStage]):
+        metadata = dict(self.metadata_json or {})  # reassign so the JSON column is marked dirty
+        if value:
+            metadata["aml_stage"] = AMLStage(value).value
+        else:
+            metadata.pop("aml_stage", None)
+        self.metadata_json = metadata
     # Batch payments
     batch_reference: Optional[str] = Field(default=None, index=True)
     # Forensic Flags and Metadata
@@ -343,7 +443,7 @@ class Document(SQLModel, table=True):
     project_id: Optional[str] = Field(default=None, foreign_key="project.id", index=True)
     filename: str
     file_type: str  # pdf, image, video, chat, journal
-    file_hash: Optional[str] = None  # SHA-256 for immutability
+    file_hash: Optional[str] = Field(default=None, index=True)  # SHA-256 for immutability
     content_text: Optional[str] = None
     metadata_json: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
     created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
@@ -355,6 +455,121 @@ class Document(SQLModel, table=True):
     theory_notes: Optional[str] = None
 
 
+class DocumentChunk(SQLModel, table=True):
+    """
+    Retrieval unit for RAG. Full-text indexed (FTS5 / tsvector) and optionally embedded.
+    """
+    __tablename__ = "document_chunks"
+
+    id: Optional[str] = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
+    document_id: str = Field(foreign_key="document.id", index=True)
+    project_id: Optional[str] = Field(default=None, foreign_key="project.id", index=True)
+    chunk_index: int = 0
+    content: str
+    content_hash: str = Field(index=True)  # SHA-256 of content, reuses embeddings across duplicates
+    embedding_json: Optional[List[float]] = Field(default=None, sa_column=Column(JSON))
+    embedding_model: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+
+
+class EvidenceBlob(SQLModel, table=True):
+    """
+    Content-addressed evidence storage.
+    One encrypted file per SHA-256 digest, shared by every Document with that hash.
+    """
+    __tablename__ = "evidence_blobs"
+
+    sha256: str = Field(primary_key=True)
+    storage_path: str
+    size_bytes: int = 0
+    ref_count: int = Field(default=0, index=True)
+    # Cached extraction (RAG text / Gemini vision index) reused for duplicates
+    content_text: Optional[str] = None
+    extraction_kind: Optional[str] = None  # text, vision
+    created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    last_referenced_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+
+
+class EntityLocation(SQLModel, table=True):
+    """
+    Spatial index of geocoded entities per project.
+    Geohash-bucketed: radius queries and clustering read prefixes, never every marker.
+    """
+    __tablename__ = "entity_locations"
+
+    project_id: str = Field(foreign_key="project.id", primary_key=True)
+    entity_id: str = Field(foreign_key="entity.id", primary_key=True)
+    lat: float
+    lng: float
+    geohash: str = Field(index=True)
+    address: Optional[str] = None
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+
+
+class GeocodeCacheEntry(SQLModel, table=True):
+    """
+    Persistent address -> coordinate cache, keyed by SHA-256 of the normalized address.
+    Misses are cached too (found=False) so unknown addresses are not re-queried every run.
+    """
+    __tablename__ = "geocode_cache"
+
+    address_key: str = Field(primary_key=True)
+    normalized_address: str
+    found: bool = True
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+    formatted_address: Optional[str] = None
+    provider: str = Field(default="unknown", index=True)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+
+
+class FxRate(SQLModel, table=True):
+    """
+    Shared historical FX table: units of `currency` per 1 USD, effective from rate_date.
+    Lookups are as-of (latest rate_date <= requested date).
+    """
+    __tablename__ = "fx_rates"
+
+    currency: str = Field(primary_key=True)
+    rate_date: date = Field(primary_key=True)
+    rate_per_usd: float
+    source: str = "manual"  # csv, api, manual
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+
+
+class TransactionTriggerTag(SQLModel, table=True):
+    """
+    Normalized forensic trigger tags (VELOCITY, STRUCTURING, ...) per transaction.
+    Mirrors the trigger text in mens_rea_description; indexed for cross-project sweeps.
+    """
+    __tablename__ = "transaction_trigger_tags"
+    __table_args__ = (Index("ix_transaction_trigger_tags_tag_project", "tag", "project_id"),)
+
+    transaction_id: str = Field(foreign_key="transaction.id", primary_key=True)
+    tag: str = Field(primary_key=True)
+    project_id: Optional[str] = Field(default=None, foreign_key="project.id", index=True)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+
+
+class ProjectMomentum(SQLModel, table=True):
+    """
+    Rolling per-project sentinel state from the last momentum run.
+    Lets the sentinel skip unchanged projects and alert on transitions only.
+    """
+    __tablename__ = "project_momentum"
+
+    project_id: str = Field(foreign_key="project.id", primary_key=True)
+    window_tx_count: int = 0  # transactions in the 14-day window
+    this_week_flags: int = 0
+    last_week_flags: int = 0
+    last_tx_at: Optional[datetime] = None
+    last_ingestion_at: Optional[datetime] = None
+    acceleration: Optional[float] = None
+    silence_alerted: bool = False
+    acceleration_alerted: bool = False
+    evaluated_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+
+
 class ReconciliationMatch(SQLModel, table=True):
     id: Optional[str] = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
     internal_tx_id: str = Field(foreign_key="transaction.id")
@@ -625,7 +840,10 @@ class CopilotInsight(SQLModel, table=True):
     confidence: float = 0.0
     metadata_json: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
     embeddings_json: Optional[List[float]] = Field(default=None, sa_column=Column(JSON))
-    created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    # Vector tagging: only same-model, same-dimension vectors are comparable
+    embedding_model: Optional[str] = Field(default=None, index=True)  # None = untagged legacy row
+    embedding_dim: Optional[int] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(UTC), index=True)
 
 
 class CaseExhibit(SQLModel, table=True):
@@ -856,8 +1074,12 @@ class QuarantineRow(SQLModel, table=True):
     error_type: str = "parsing_error" # validation_error, parsing_error
     
     # Repair Status
-    status: str = "new" # new, repairing, repaired, ignored
+    status: str = "new" # new, repairing, repaired, reingested, needs_specialist, ignored
     suggested_fix: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
+
+    # Triage lease: a "repairing" row belongs to lease_owner until leased_until
+    lease_owner: Optional[str] = None
+    leased_until: Optional[datetime] = None
     
     created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
     resolved_at: Optional[datetime] = None
@@ -1,22 +1,40 @@
-
 """
 Nurse Agent (Micro-Agent).
 Polls the Data Hospital for 'new' patients and attempts to heal them.
 """
 import asyncio
+import time
 from sqlmodel import Session, select
 from app.core.db import engine
 from app.models import QuarantineRow
 from app.modules.ingestion.data_hospital import DataHospital
 
 class NurseAgent:
-    def __init__(self, check_interval: int = 60):
+    def __init__(
+        self,
+        check_interval: int = 60,
+        bulk: bool = False,
+        batch_size: int = 1000,
+        workers: int = 1,
+        lease_seconds: int = 300,
+        reingest: bool = False,
+    ):
         self.check_interval = check_interval
+        self.bulk = bulk
+        self.batch_size = batch_size
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.reingest = reingest
 
     async def run_forever(self):
         print("🚑 Nurse Agent started. Patrolling the wards...")
         while True:
             try:
+                if self.bulk:
+                    await self.bulk_rounds()
+                    await asyncio.sleep(self.check_interval)
+                    continue
+
                 with Session(engine) as db:
                     # Find 'new' patients
                     patients = db.exec(
@@ -24,7 +42,7 @@ class NurseAgent:
                         .where(QuarantineRow.status == "new")
                         .limit(10)
                     ).all()
-                    
+
                     if not patients:
                         # No emergencies, check again later
                         pass
@@ -33,12 +51,33 @@ class NurseAgent:
                         hospital = DataHospital(db)
                         for p in patients:
                             await hospital.shift_rounds(p)
-                            
+
             except Exception as e:
                 print(f"   ❌ Nurse Agent Error: {e}")
-            
+
             await asyncio.sleep(self.check_interval)
 
+    def _ward(self) -> int:
+        """One worker: triages leased batches until none are left; returns rows triaged."""
+        triaged = 0
+        with Session(engine) as db:
+            hospital = DataHospital(db)
+            while True:
+                result = hospital.triage_batch(self.batch_size, self.lease_seconds, self.reingest)
+                if not result["claimed"]:
+                    return triaged
+                triaged += result["claimed"]
+
+    async def bulk_rounds(self) -> int:
+        """Drains the backlog with `workers` concurrent lease-holding workers."""
+        started = time.monotonic()
+        counts = await asyncio.gather(*(asyncio.to_thread(self._ward) for _ in range(self.workers)))
+        total = sum(counts)
+        if total:
+            elapsed = time.monotonic() - started
+            print(f"   🚑 Triaged {total} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-6):.0f} rows/s)")
+        return total
+
 if __name__ == "__main__":
     nurse = NurseAgent(check_interval=5)
     asyncio.run(nurse.run_forever())
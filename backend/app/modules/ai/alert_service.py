@@ -6,11 +6,13 @@ Provides deduplication, prioritization, and persistence
 
 import hashlib
 import logging
-from typing import List
+from typing import List, Optional, Tuple
 from datetime import datetime, UTC
 from sqlmodel import Session, select
 from app.models import FraudAlert, Transaction
 from app.modules.ai.models import UnifiedAlert, ContextSnapshot
+from app.modules.fraud import trigger_tags
+from app.modules.fraud.trigger_tags import tag_summary
 
 logger = logging.getLogger(__name__)
 
@@ -104,90 +106,108 @@ class UnifiedAlertService:
         
         return alerts
     
+    def _tag_summary(self, project_id: str, tag: str) -> Tuple[int, Optional[str]]:
+        """Indexed (count, representative transaction) for one trigger tag"""
+        return tag_summary(self.db, [tag], [project_id]).get((project_id, tag), (0, None))
+    
     def _check_velocity_anomalies(self, context: ContextSnapshot) -> List[UnifiedAlert]:
         """Detect rapid transaction bursts (potential smurfing)"""
-        alerts = []
-        
-        # Query transactions with velocity_flag = HIGH_FREQUENCY
-        velocity_flagged = self.db.exec(
-            select(Transaction)
-            .where(Transaction.project_id == context.project_id)
-            .where(Transaction.forensic_triggers.like('%VELOCITY:%'))
-            .limit(5)
-        ).all()
-        
-        if len(velocity_flagged) > 0:
-            alerts.append(UnifiedAlert(
-                id=f"ALERT-VEL-{context.project_id}",
-                type="VELOCITY_BURST",
-                severity="CRITICAL",
-                message=f"Detected {len(velocity_flagged)} high-velocity transactions - potential structuring",
-                project_id=context.project_id,
-                action={
-                    "label": "View Pattern Analysis",
-                    "route": "/forensic/analytics/predictive"
-                },
-                fingerprint=self._generate_fingerprint("VELOCITY", context.project_id),
-                source="ProactiveMonitor"
-            ))
-        
-        return alerts
+        alert = self._velocity_alert(
+            context.project_id, *self._tag_summary(context.project_id, trigger_tags.VELOCITY)
+        )
+        return [alert] if alert else []
     
     def _check_gps_anomalies(self, context: ContextSnapshot) -> List[UnifiedAlert]:
         """Detect transactions logged far from project site"""
-        alerts = []
-        
-        # Find transactions with DISTANT_VENDOR_RISK flag
-        distant = self.db.exec(
-            select(Transaction)
-            .where(Transaction.project_id == context.project_id)
-            .where(Transaction.forensic_triggers.like('%DISTANT_VENDOR_RISK%'))
-            .limit(5)
-        ).all()
-        
-        if len(distant) > 2:
-            alerts.append(UnifiedAlert(
-                id=f"ALERT-GPS-{context.project_id}",
-                type="GPS_ANOMALY",
-                severity="MEDIUM",
-                message=f"{len(distant)} transactions from vendors >50 miles from project site",
-                project_id=context.project_id,
-                action={
-                    "label": "View Location Map",
-                    "route": "/forensic/map"
-                },
-                fingerprint=self._generate_fingerprint("GPS", context.project_id),
-                source="VendorLocationReconciliation"
-            ))
-        
-        return alerts
+        alert = self._gps_alert(
+            context.project_id, *self._tag_summary(context.project_id, trigger_tags.DISTANT_VENDOR_RISK)
+        )
+        return [alert] if alert else []
     
     def _check_reconciliation_gaps(self, context: ContextSnapshot) -> List[UnifiedAlert]:
         """Check for unreconciled transactions"""
+        alert = self._reconciliation_alert(
+            context.project_id, *self._tag_summary(context.project_id, trigger_tags.UNVERIFIED_SPEND)
+        )
+        return [alert] if alert else []
+    
+    # --- Tag-driven alert builders (shared by per-context checks and sweeps) ---
+    
+    def _velocity_alert(self, project_id: str, count: int, transaction_id: Optional[str] = None) -> Optional[UnifiedAlert]:
+        if count <= 0:
+            return None
+        return UnifiedAlert(
+            id=f"ALERT-VEL-{project_id}",
+            type="VELOCITY_BURST",
+            severity="CRITICAL",
+            message=f"Detected {count} high-velocity transactions - potential structuring",
+            project_id=project_id,
+            transaction_id=transaction_id,
+            action={
+                "label": "View Pattern Analysis",
+                "route": "/forensic/analytics/predictive"
+            },
+            fingerprint=self._generate_fingerprint("VELOCITY", project_id),
+            source="ProactiveMonitor",
+            metadata={"count": count}
+        )
+    
+    def _gps_alert(self, project_id: str, count: int, transaction_id: Optional[str] = None) -> Optional[UnifiedAlert]:
+        if count <= 2:
+            return None
+        return UnifiedAlert(
+            id=f"ALERT-GPS-{project_id}",
+            type="GPS_ANOMALY",
+            severity="MEDIUM",
+            message=f"{count} transactions from vendors >50 miles from project site",
+            project_id=project_id,
+            transaction_id=transaction_id,
+            action={
+                "label": "View Location Map",
+                "route": "/forensic/map"
+            },
+            fingerprint=self._generate_fingerprint("GPS", project_id),
+            source="VendorLocationReconciliation",
+            metadata={"count": count}
+        )
+    
+    def _reconciliation_alert(self, project_id: str, count: int, transaction_id: Optional[str] = None) -> Optional[UnifiedAlert]:
+        if count <= 10:
+            return None
+        return UnifiedAlert(
+            id=f"ALERT-REC-{project_id}",
+            type="RECONCILIATION_GAP",
+            severity="HIGH",
+            message=f"{count} transactions lack evidence verification",
+            project_id=project_id,
+            transaction_id=transaction_id,
+            action={
+                "label": "Start Reconciliation",
+                "route": "/reconciliation"
+            },
+            fingerprint=self._generate_fingerprint("RECONCILIATION", project_id),
+            source="SiteTelemetryService",
+            metadata={"count": count}
+        )
+    
+    def sweep_all_projects(self, project_ids: Optional[List[str]] = None) -> List[UnifiedAlert]:
+        """
+        Tag-based alert sweep across all projects in one pass:
+        one grouped query over the tag index, one existence check, one commit.
+        """
+        builders = {
+            trigger_tags.VELOCITY: self._velocity_alert,
+            trigger_tags.DISTANT_VENDOR_RISK: self._gps_alert,
+            trigger_tags.UNVERIFIED_SPEND: self._reconciliation_alert,
+        }
+        summary = tag_summary(self.db, builders.keys(), project_ids)
         alerts = []
-        
-        # Count transactions without reconciliation status
-        unreconciled_count = self.db.exec(
-            select(Transaction)
-            .where(Transaction.project_id == context.project_id)
-            .where(Transaction.forensic_triggers.like('%UNVERIFIED_SPEND%'))
-        ).all()
-        
-        if len(unreconciled_count) > 10:
-            alerts.append(UnifiedAlert(
-                id=f"ALERT-REC-{context.project_id}",
-                type="RECONCILIATION_GAP",
-                severity="HIGH",
-                message=f"{len(unreconciled_count)} transactions lack evidence verification",
-                project_id=context.project_id,
-                action={
-                    "label": "Start Reconciliation",
-                    "route": "/reconciliation"
-                },
-                fingerprint=self._generate_fingerprint("RECONCILIATION", context.project_id),
-                source="SiteTelemetryService"
-            ))
-        
+        for (project_id, tag), (count, transaction_id) in sorted(summary.items()):
+            alert = builders[tag](project_id, count, transaction_id)
+            if alert:
+                alerts.append(alert)
+        alerts = self._deduplicate(alerts)
+        self._persist_alerts(alerts)
         return alerts
     
     def _check_round_amounts(self, context: ContextSnapshot) -> List[UnifiedAlert]:
@@ -232,7 +252,7 @@ class UnifiedAlertService:
                 id=alert.id,
                 type=alert.alert_type,
                 severity=alert.severity,
-                message=alert.message,
+                message=alert.description,
                 project_id=alert.project_id,
                 transaction_id=alert.transaction_id,
                 fingerprint=self._generate_fingerprint(alert.alert_type, alert.id),
@@ -299,17 +319,25 @@ class UnifiedAlertService:
         if not alerts:
             return
 
+        # FraudAlert rows are anchored to a transaction (project alerts use a representative one)
+        alerts = [alert for alert in alerts if alert.transaction_id]
+        
         # 1. Collect all potential IDs
         alert_ids = [alert.id for alert in alerts]
         
-        # 2. Fetch existing IDs in one query to avoid N+1
-        existing_alerts = self.db.exec(
-            select(FraudAlert.id).where(FraudAlert.id.in_(alert_ids))
-        ).all()
-        existing_ids = set(existing_alerts)
+        # 2. Fetch existing IDs in one query per chunk to avoid N+1
+        existing_ids = set()
+        for i in range(0, len(alert_ids), 500):
+            existing_ids.update(self.db.exec(
+                select(FraudAlert.id).where(FraudAlert.id.in_(alert_ids[i:i + 500]))
+            ).all())
         
-        # 3. Filter out existing
-        new_alerts = [a for a in alerts if a.id not in existing_ids]
+        # 3. Filter out existing (and repeats within the batch)
+        new_alerts = []
+        for alert in alerts:
+            if alert.id not in existing_ids:
+                existing_ids.add(alert.id)
+                new_alerts.append(alert)
         
         if not new_alerts:
             return
@@ -322,7 +350,7 @@ class UnifiedAlertService:
                 transaction_id=alert.transaction_id,
                 alert_type=alert.type,
                 severity=alert.severity,
-                message=alert.message,
+                description=alert.message,
                 status="OPEN",
                 risk_score=90.0 if alert.severity == "CRITICAL" else 70.0, # Default risk score if missing
                 metadata_json=alert.metadata or {},
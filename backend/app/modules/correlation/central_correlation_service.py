@@ -1,24 +1,35 @@
-from typing import Dict, List
-from collections import defaultdict
+from typing import Optional
 from app.core.event_bus import get_event_bus, EventType, Event
+from app.modules.correlation.correlation_state import (
+    CorrelationStateStore,
+    correlation_mask,
+    correlation_state,
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
+META_WINDOW_SECONDS = 7 * 24 * 3600  # correlations older than this no longer combine
+META_DEBOUNCE_SECONDS = 24 * 3600  # a persistent condition re-alerts at most daily
+
+# Meta-correlation rules: every correlation type in a mask must be seen for the entity
+META_RULES = (
+    correlation_mask("CircularFlow", "BeneficialOwnership", "HighRiskAlert"),
+    correlation_mask("FraudDetection", "AssetTemporalNexus", "HighRiskAlert"),
+)
+
 
 class CentralCorrelationService:
     """
     Acts as a higher-level orchestrator for correlation, listening to various
     correlation-related events, aggregating them, and applying meta-correlation rules.
+    Aggregation is a per-entity bitset of correlation types seen inside META_WINDOW_SECONDS,
+    held in the shared correlation state store, so each event is evaluated in O(1).
     """
 
-    def __init__(self, event_bus):
+    def __init__(self, event_bus, state: Optional[CorrelationStateStore] = None):
         self.event_bus = event_bus
-        # Store for aggregating related correlation findings
-        # Example: {project_id: {entity_id: {correlation_type: [events]}}}
-        self.aggregated_correlations: Dict[str, Dict[str, Dict[str, List[Event]]]] = defaultdict(
-            lambda: defaultdict(lambda: defaultdict(list))
-        )
+        self.state = state or correlation_state
         self.event_bus.subscribe(EventType.CORRELATION_FOUND, self.handle_correlation_found)
         self.event_bus.subscribe(EventType.HIGH_RISK_ALERT, self.handle_high_risk_alert)
         logger.info(
@@ -37,12 +48,12 @@ class CentralCorrelationService:
         correlation_type = event.data.get("correlation_type", "unknown")
         entity_id = event.data.get("entity_id", "global")  # Use 'global' if no specific entity
 
-        self.aggregated_correlations[project_id][entity_id][correlation_type].append(event)
+        mask = self.state.mark_seen(project_id, entity_id, correlation_type, META_WINDOW_SECONDS)
         logger.debug(
             f"Aggregated CORRELATION_FOUND for project {project_id}, entity {entity_id}, type {correlation_type}"
         )
 
-        await self.apply_meta_correlation_rules(project_id, entity_id)
+        await self.apply_meta_correlation_rules(project_id, entity_id, mask)
 
     async def handle_high_risk_alert(self, event: Event):
         """Processes incoming HIGH_RISK_ALERT events."""
@@ -57,63 +68,50 @@ class CentralCorrelationService:
         entity_id = event.data.get(
             "id", "global"
         )  # Assuming 'id' in data can be an entity/transaction id
-        self.aggregated_correlations[project_id][entity_id]["HighRiskAlert"].append(event)
+        mask = self.state.mark_seen(project_id, entity_id, "HighRiskAlert", META_WINDOW_SECONDS)
         logger.debug(f"Aggregated HIGH_RISK_ALERT for project {project_id}, entity {entity_id}")
 
-        await self.apply_meta_correlation_rules(project_id, entity_id)
+        await self.apply_meta_correlation_rules(project_id, entity_id, mask)
 
-    async def apply_meta_correlation_rules(self, project_id: str, entity_id: str):
+    async def apply_meta_correlation_rules(self, project_id: str, entity_id: str, mask: int):
         """
-        Applies rules on aggregated correlation data to identify higher-order patterns.
+        Applies rules on the entity's correlation bitset to identify higher-order patterns.
         """
-        project_correlations = self.aggregated_correlations[project_id]
-
-        # Rule 1: Multiple strong correlations for the same entity/project
-        # Example: CircularFlow, UBO identified, and a High Risk Alert for the same entity/project
-        entity_data = project_correlations.get(entity_id, {})
-
-        has_circular_flow = "CircularFlow" in entity_data
-        has_ubo = "BeneficialOwnership" in entity_data
-        has_high_risk_alert = "HighRiskAlert" in entity_data
-        has_fraud_detection = "FraudDetection" in entity_data
-        has_asset_nexus = "AssetTemporalNexus" in entity_data
-
-        if (has_circular_flow and has_ubo and has_high_risk_alert) or (
-            has_fraud_detection and has_asset_nexus and has_high_risk_alert
-        ):
-
-            # Check if this meta-correlation has already been published recently
-            # (to avoid spamming events for persistent conditions)
-            # This would require more sophisticated state management or a debounce mechanism.
-            # For now, we'll keep it simple and assume a single publication is enough.
-
-            meta_correlation_data = {
-                "meta_correlation_type": "MajorFraudCaseIdentified",
-                "project_id": project_id,
-                "entity_id": entity_id,
-                "triggered_by_correlations": {
-                    "circular_flow": has_circular_flow,
-                    "ubo_identified": has_ubo,
-                    "high_risk_alert": has_high_risk_alert,
-                    "fraud_detection": has_fraud_detection,
-                    "asset_temporal_nexus": has_asset_nexus,
-                },
-                "description": (
-                    f"Multiple severe fraud indicators correlated for project {project_id} and entity {entity_id}. "
-                    "Requires immediate human investigation."
-                ),
-            }
-            self.event_bus.publish(
-                EventType.HIGH_RISK_ALERT,  # Re-using High Risk Alert for now, could define new type
-                data=meta_correlation_data,
-                project_id=project_id,
-            )
-            logger.critical(
-                f"MAJOR FRAUD CASE IDENTIFIED for project {project_id}, entity {entity_id}"
-            )
+        if not any(mask & rule == rule for rule in META_RULES):
+            return
+        # Persistent conditions are debounced across workers instead of re-firing per event
+        if not self.state.debounce(f"meta:{project_id}:{entity_id}", META_DEBOUNCE_SECONDS):
+            return
+
+        def seen(name: str) -> bool:
+            return bool(mask & correlation_mask(name))
+
+        meta_correlation_data = {
+            "meta_correlation_type": "MajorFraudCaseIdentified",
+            "project_id": project_id,
+            "entity_id": entity_id,
+            "triggered_by_correlations": {
+                "circular_flow": seen("CircularFlow"),
+                "ubo_identified": seen("BeneficialOwnership"),
+                "high_risk_alert": seen("HighRiskAlert"),
+                "fraud_detection": seen("FraudDetection"),
+                "asset_temporal_nexus": seen("AssetTemporalNexus"),
+            },
+            "description": (
+                f"Multiple severe fraud indicators correlated for project {project_id} and entity {entity_id}. "
+                "Requires immediate human investigation."
+            ),
+        }
+        self.event_bus.publish(
+            EventType.HIGH_RISK_ALERT,  # Re-using High Risk Alert for now, could define new type
+            data=meta_correlation_data,
+            project_id=project_id,
+        )
+        logger.critical(
+            f"MAJOR FRAUD CASE IDENTIFIED for project {project_id}, entity {entity_id}"
+        )
 
-        # Add more meta-correlation rules as needed
-        # Example: Correlation of CrossSystemAnomaly and a specific pattern.
+        # Add more meta-correlation rules to META_RULES as needed
 
 
 # Global instance of the service
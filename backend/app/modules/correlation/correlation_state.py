@@ -0,0 +1,181 @@
+"""
+Correlation State Store
+Bounded, time-windowed state shared by the correlation event consumers: per-entity
+bitsets of seen correlation types, expiring ring buffers per event stream, and
+debounce keys. Every operation touches a constant number of keys.
+
+Backed by Redis when it is reachable (shared by all workers, survives restarts);
+otherwise by bounded per-process LRU/TTL maps.
+"""
+
+import json
+import logging
+import time
+import uuid
+from collections import deque
+from typing import Any, Dict, Optional
+
+import redis
+
+from app.core.cache import LRUTTLCache
+from app.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Fixed bit positions so masks mean the same thing in every worker
+CORRELATION_BITS: Dict[str, int] = {
+    "CircularFlow": 0,
+    "BeneficialOwnership": 1,
+    "HighRiskAlert": 2,
+    "FraudDetection": 3,
+    "AssetTemporalNexus": 4,
+    "SharedTaxID": 5,
+    "SharedBankAccount": 6,
+    "SharedPhone": 7,
+    "SharedAddress": 8,
+}
+
+
+def correlation_mask(*correlation_types: str) -> int:
+    mask = 0
+    for name in correlation_types:
+        mask |= 1 << CORRELATION_BITS[name]
+    return mask
+
+
+class CorrelationStateStore:
+    """
+    seen:   per (project, entity) -> {bit: last_seen}; the mask keeps bits seen inside the window.
+    ring:   per (project, stream) -> newest `ring_capacity` entries, expired by age on write.
+    debounce: first caller inside the TTL wins; persistent conditions fire once per TTL.
+    """
+
+    def __init__(self, client=None, namespace: str = "corr", ring_capacity: int = 256, max_keys: int = 10_000):
+        self.client = client
+        self.namespace = namespace
+        self.ring_capacity = ring_capacity
+        self._local = LRUTTLCache(max_entries=max_keys)
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self.namespace,) + parts)
+
+    def _fallback(self, op: str, exc: Exception):
+        logger.warning(f"Correlation state {op} fell back to process memory: {exc}")
+
+    # -- per-entity bitsets ---------------------------------------------------------------
+
+    def mark_seen(
+        self, project_id: str, entity_id: str, correlation_type: str, window_seconds: float,
+        now: Optional[float] = None,
+    ) -> int:
+        """Records correlation_type for the entity and returns the entity's mask inside the window."""
+        now = time.time() if now is None else now
+        bit = CORRELATION_BITS.get(correlation_type)
+        key = self._key("seen", project_id, entity_id)
+        if self.client is not None:
+            try:
+                pipe = self.client.pipeline()
+                if bit is not None:
+                    pipe.hset(key, str(bit), now)
+                    pipe.expire(key, int(window_seconds) + 1)
+                pipe.hgetall(key)
+                seen = {int(b): float(ts) for b, ts in pipe.execute()[-1].items()}
+                return self._mask(seen, window_seconds, now)
+            except redis.RedisError as exc:
+                self._fallback("mark_seen", exc)
+        seen = self._local.get(key) or {}
+        if bit is not None:
+            seen[bit] = now
+            self._local.set(key, seen, window_seconds)
+        return self._mask(seen, window_seconds, now)
+
+    @staticmethod
+    def _mask(seen: Dict[int, float], window_seconds: float, now: float) -> int:
+        cutoff = now - window_seconds
+        mask = 0
+        for bit, ts in seen.items():
+            if ts >= cutoff:
+                mask |= 1 << bit
+        return mask
+
+    # -- ring buffers ---------------------------------------------------------------------
+
+    def record(
+        self, project_id: str, stream: str, window_seconds: float,
+        payload: Optional[Dict[str, Any]] = None, now: Optional[float] = None,
+    ) -> int:
+        """Appends an entry to the stream's ring and returns how many entries are inside the window."""
+        now = time.time() if now is None else now
+        entry = json.dumps({"ts": now, "id": uuid.uuid4().hex, "data": payload or {}}, default=str)
+        key = self._key("ring", project_id, stream)
+        if self.client is not None:
+            try:
+                pipe = self.client.pipeline()
+                pipe.zadd(key, {entry: now})
+                pipe.zremrangebyscore(key, "-inf", f"({now - window_seconds}")
+                pipe.zremrangebyrank(key, 0, -self.ring_capacity - 1)
+                pipe.expire(key, int(window_seconds) + 1)
+                pipe.zcard(key)
+                return int(pipe.execute()[-1])
+            except redis.RedisError as exc:
+                self._fallback("record", exc)
+        ring = self._local.get(key)
+        if ring is None:
+            ring = deque(maxlen=self.ring_capacity)
+        ring.append((now, entry))
+        self._local.set(key, ring, window_seconds)
+        return self._trim(ring, now - window_seconds)
+
+    @staticmethod
+    def _trim(ring: deque, cutoff: float) -> int:
+        while ring and ring[0][0] < cutoff:
+            ring.popleft()
+        return len(ring)
+
+    def count(self, project_id: str, stream: str, window_seconds: float, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        key = self._key("ring", project_id, stream)
+        if self.client is not None:
+            try:
+                return int(self.client.zcount(key, now - window_seconds, "+inf"))
+            except redis.RedisError as exc:
+                self._fallback("count", exc)
+        ring = self._local.get(key)
+        return self._trim(ring, now - window_seconds) if ring else 0
+
+    def latest(
+        self, project_id: str, stream: str, window_seconds: float, now: Optional[float] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Newest entry ({"ts", "id", "data"}) inside the window, or None."""
+        now = time.time() if now is None else now
+        key = self._key("ring", project_id, stream)
+        raw = None
+        if self.client is not None:
+            try:
+                newest = self.client.zrevrangebyscore(key, "+inf", now - window_seconds, start=0, num=1)
+                raw = newest[0] if newest else None
+                return json.loads(raw) if raw else None
+            except redis.RedisError as exc:
+                self._fallback("latest", exc)
+        ring = self._local.get(key)
+        if ring and self._trim(ring, now - window_seconds):
+            raw = ring[-1][1]
+        return json.loads(raw) if raw else None
+
+    # -- debounce -------------------------------------------------------------------------
+
+    def debounce(self, key: str, ttl_seconds: float) -> bool:
+        """True for the first call per key inside ttl_seconds, False while the key is held."""
+        full_key = self._key("debounce", key)
+        if self.client is not None:
+            try:
+                return bool(self.client.set(full_key, "1", nx=True, ex=max(1, int(ttl_seconds))))
+            except redis.RedisError as exc:
+                self._fallback("debounce", exc)
+        if self._local.get(full_key):
+            return False
+        self._local.set(full_key, True, ttl_seconds)
+        return True
+
+
+correlation_state = CorrelationStateStore(get_redis())
@@ -1,23 +1,36 @@
-from typing import Dict
-from collections import deque
+from typing import Any, Dict, Optional
 from app.core.event_bus import get_event_bus, EventType, Event
+from app.modules.correlation.correlation_state import CorrelationStateStore, correlation_state
 import logging
 
 logger = logging.getLogger(__name__)
 
+PAIR_WINDOW_SECONDS = 300  # HighRiskAlert <-> SystemError proximity
+CO_OCCURRENCE_WINDOW_SECONDS = 3600  # CircularFlow + Variance co-occurrence
+
+
+def _summary(event: Event) -> Dict[str, Any]:
+    return {
+        "event_id": event.event_id,
+        "event_type": event.event_type.value if isinstance(event.event_type, EventType) else str(event.event_type),
+        "entity_id": event.entity_id,
+        "timestamp": event.timestamp.isoformat(),
+        "data": event.data,
+    }
+
 
 class CrossSystemAnomalyDetector:
     """
     Detects higher-order anomalies by correlating events and data points from multiple system modules.
     Subscribes to various EventTypes from the EventBus.
-    Maintains a state/context of recent events to identify suspicious patterns or deviations.
+    Keeps one expiring ring buffer per (project, event type) in the shared correlation state,
+    so a new event is checked against the latest counterpart only, never every buffered pair.
     Publishes CORRELATION_FOUND (or a more specific event) when such an anomaly is detected.
     """
 
-    def __init__(self, event_bus):
+    def __init__(self, event_bus, state: Optional[CorrelationStateStore] = None):
         self.event_bus = event_bus
-        self.recent_events_buffer: Dict[str, deque] = {}  # {project_id: deque(events)}
-        self.buffer_size = 50  # Max events to keep per project
+        self.state = state or correlation_state
         self.watched_event_types = [
             EventType.VARIANCE_DETECTED,
             EventType.ANOMALY_DETECTED,  # This is not published yet, but is a target
@@ -45,66 +58,65 @@ class CrossSystemAnomalyDetector:
             )
             return
 
-        if project_id not in self.recent_events_buffer:
-            self.recent_events_buffer[project_id] = deque(maxlen=self.buffer_size)
-
-        self.recent_events_buffer[project_id].append(event)
+        self.state.record(
+            project_id, event.event_type.value, CO_OCCURRENCE_WINDOW_SECONDS, payload=_summary(event),
+            now=event.timestamp.timestamp(),
+        )
         logger.debug(f"Event {event.event_type.value} added to buffer for project {project_id}.")
 
         # Perform correlation logic
-        await self.correlate_events(project_id)
+        await self.correlate_events(project_id, event)
 
-    async def correlate_events(self, project_id: str):
+    async def correlate_events(self, project_id: str, event: Event):
         """
-        Main correlation logic. Examines buffered events for patterns indicating a cross-system anomaly.
-        This is where the 'magic' of correlation happens.
+        Correlates the new event with the latest buffered event of each counterpart type.
         """
-        events = list(self.recent_events_buffer.get(project_id, []))
-        if len(events) < 2:  # Need at least two events to correlate
-            return
-
-        # Example correlation rule: High Risk Alert followed by an Error Ocurred within a short window
-        high_risk_alerts = [e for e in events if e.event_type == EventType.HIGH_RISK_ALERT]
-        error_occurred_events = [e for e in events if e.event_type == EventType.ERROR_OCCURRED]
-
-        for hra in high_risk_alerts:
-            for eoe in error_occurred_events:
-                time_diff = abs((hra.timestamp - eoe.timestamp).total_seconds())
-                if time_diff < 300:  # 5 minutes window
-                    correlation_data = {
-                        "anomaly_type": "HighRiskAlert_followed_by_SystemError",
-                        "project_id": project_id,
-                        "high_risk_alert_details": hra.to_dict(),
-                        "error_details": eoe.to_dict(),
-                        "time_difference_seconds": time_diff,
-                        "description": "A high-risk alert was closely followed by a system error, potentially indicating a coordinated attack or system instability triggered by fraudulent activity.",
-                    }
-                    self.event_bus.publish(
-                        EventType.CORRELATION_FOUND, data=correlation_data, project_id=project_id
-                    )
-                    logger.warning(
-                        f"Cross-System Anomaly Detected (HighRiskAlert_followed_by_SystemError) for project {project_id}"
-                    )
-                    return  # Only publish once per detection round for this specific rule
-
-        # Add more correlation rules here based on various event combinations
-        # Example: Circular Flow Detected + Variance Detected for the same project
-        circular_flows = [e for e in events if e.event_type == EventType.CIRCULAR_FLOW_DETECTED]
-        variances = [e for e in events if e.event_type == EventType.VARIANCE_DETECTED]
-
-        if circular_flows and variances:
-            # Simple rule: if both types of events exist for the project, it's a correlation
-            correlation_data = {
-                "anomaly_type": "CircularFlow_and_VarianceDetected",
-                "project_id": project_id,
-                "description": "Both circular money flows and significant variances have been detected for this project, indicating potential sophisticated financial manipulation.",
-            }
-            self.event_bus.publish(
-                EventType.CORRELATION_FOUND, data=correlation_data, project_id=project_id
-            )
-            logger.warning(
-                f"Cross-System Anomaly Detected (CircularFlow_and_VarianceDetected) for project {project_id}"
+        now = event.timestamp.timestamp()
+
+        # Rule: High Risk Alert and System Error within 5 minutes of each other
+        counterpart = {
+            EventType.HIGH_RISK_ALERT: EventType.ERROR_OCCURRED,
+            EventType.ERROR_OCCURRED: EventType.HIGH_RISK_ALERT,
+        }.get(event.event_type)
+        if counterpart is not None:
+            other = self.state.latest(project_id, counterpart.value, PAIR_WINDOW_SECONDS, now=now)
+            if other and self.state.debounce(f"hra_error:{project_id}", PAIR_WINDOW_SECONDS):
+                this = _summary(event)
+                hra, eoe = (this, other["data"]) if event.event_type == EventType.HIGH_RISK_ALERT else (other["data"], this)
+                correlation_data = {
+                    "anomaly_type": "HighRiskAlert_followed_by_SystemError",
+                    "project_id": project_id,
+                    "high_risk_alert_details": hra,
+                    "error_details": eoe,
+                    "time_difference_seconds": abs(now - other["ts"]),
+                    "description": "A high-risk alert was closely followed by a system error, potentially indicating a coordinated attack or system instability triggered by fraudulent activity.",
+                }
+                self.event_bus.publish(
+                    EventType.CORRELATION_FOUND, data=correlation_data, project_id=project_id
+                )
+                logger.warning(
+                    f"Cross-System Anomaly Detected (HighRiskAlert_followed_by_SystemError) for project {project_id}"
+                )
+                return  # Only publish once per detection round for this specific rule
+
+        # Rule: Circular Flow Detected + Variance Detected for the same project
+        if event.event_type in (EventType.CIRCULAR_FLOW_DETECTED, EventType.VARIANCE_DETECTED):
+            both = all(
+                self.state.count(project_id, et.value, CO_OCCURRENCE_WINDOW_SECONDS, now=now)
+                for et in (EventType.CIRCULAR_FLOW_DETECTED, EventType.VARIANCE_DETECTED)
             )
+            if both and self.state.debounce(f"circular_variance:{project_id}", CO_OCCURRENCE_WINDOW_SECONDS):
+                correlation_data = {
+                    "anomaly_type": "CircularFlow_and_VarianceDetected",
+                    "project_id": project_id,
+                    "description": "Both circular money flows and significant variances have been detected for this project, indicating potential sophisticated financial manipulation.",
+                }
+                self.event_bus.publish(
+                    EventType.CORRELATION_FOUND, data=correlation_data, project_id=project_id
+                )
+                logger.warning(
+                    f"Cross-System Anomaly Detected (CircularFlow_and_VarianceDetected) for project {project_id}"
+                )
 
         # Further complex rules can be added here
         # E.g., using a simple state machine or pattern matching across event sequences.
@@ -1,29 +1,38 @@
-from typing import Dict
-from collections import deque
+from typing import Optional
 from app.core.event_bus import get_event_bus, EventType, Event, publish_event
+from app.modules.correlation.correlation_state import CorrelationStateStore, correlation_state
 import logging
-from datetime import datetime, UTC, timedelta
 
 logger = logging.getLogger(__name__)
 
+FRAUD_CORRELATION_STREAM = "CORRELATION_FOUND_FraudDetection"
+
 
 class MLCorrelationPrototype:
     """
     A prototype for ML-based correlation, demonstrating simple event sequence analysis.
     Subscribes to relevant EventBus events and applies hardcoded "ML rules" to detect patterns.
+    Counts come from expiring ring buffers in the shared correlation state.
     Publishes PROACTIVE_ALERT when a predefined pattern is matched.
     """
 
-    def __init__(self, event_bus):
+    def __init__(self, event_bus, state: Optional[CorrelationStateStore] = None):
         self.event_bus = event_bus
-        self.project_event_buffers: Dict[str, deque] = {}  # {project_id: deque(events)}
+        self.state = state or correlation_state
         self.buffer_window_seconds = 600  # Keep events for the last 10 minutes
+        self.alert_debounce_seconds = 3600
         self.watched_event_types = [
             EventType.CORRELATION_FOUND,
             EventType.VARIANCE_DETECTED,
             EventType.ERROR_OCCURRED,
             EventType.HIGH_RISK_ALERT,
         ]
+        # Streams of the anomaly sequence, keyed by the names used in the alert payload
+        self.sequence_streams = {
+            "VARIANCE_DETECTED": EventType.VARIANCE_DETECTED.value,
+            "ERROR_OCCURRED": EventType.ERROR_OCCURRED.value,
+            "CORRELATION_FOUND_FraudDetection": FRAUD_CORRELATION_STREAM,
+        }
 
         # Subscribe to relevant event types
         for event_type in self.watched_event_types:
@@ -33,6 +42,13 @@ class MLCorrelationPrototype:
             f"MLCorrelationPrototype initialized and subscribed to {len(self.watched_event_types)} event types."
         )
 
+    def _stream_for(self, event: Event) -> Optional[str]:
+        if event.event_type == EventType.CORRELATION_FOUND:
+            return FRAUD_CORRELATION_STREAM if event.data.get("correlation_type") == "FraudDetection" else None
+        if event.event_type in (EventType.VARIANCE_DETECTED, EventType.ERROR_OCCURRED):
+            return event.event_type.value
+        return None
+
     async def handle_event(self, event: Event):
         """Processes incoming events from the EventBus."""
         project_id = event.project_id
@@ -42,81 +58,47 @@ class MLCorrelationPrototype:
             )
             return
 
-        if project_id not in self.project_event_buffers:
-            # Using deque with a dynamic maxlen based on time window rather than fixed count
-            self.project_event_buffers[project_id] = deque()
-
-        # Add event and clean up old events
-        self.project_event_buffers[project_id].append(event)
-        self._cleanup_old_events(project_id)
-
+        stream = self._stream_for(event)
+        if stream is None:
+            return
+        self.state.record(project_id, stream, self.buffer_window_seconds, now=event.timestamp.timestamp())
         logger.debug(f"Event {event.event_type.value} added to ML buffer for project {project_id}.")
 
         # Apply simple ML rules
-        await self.apply_ml_rules(project_id)
-
-    def _cleanup_old_events(self, project_id: str):
-        """Removes events older than buffer_window_seconds from the deque."""
-        buffer = self.project_event_buffers[project_id]
-        cutoff_time = datetime.now(UTC) - timedelta(seconds=self.buffer_window_seconds)
-        while buffer and buffer[0].timestamp < cutoff_time:
-            buffer.popleft()
+        await self.apply_ml_rules(project_id, now=event.timestamp.timestamp())
 
-    async def apply_ml_rules(self, project_id: str):
+    async def apply_ml_rules(self, project_id: str, now: Optional[float] = None):
         """
         Applies simple hardcoded "ML rules" to detect patterns in event sequences.
         This would be replaced by an actual ML model in a production system.
         """
-        events_in_window = list(self.project_event_buffers[project_id])
-
         # Rule: VARIANCE_DETECTED -> ERROR_OCCURRED -> CORRELATION_FOUND (FraudDetection)
         # This implies a potential attempt to cover up or a system failure related to fraud.
-        has_variance = any(e.event_type == EventType.VARIANCE_DETECTED for e in events_in_window)
-        has_error = any(e.event_type == EventType.ERROR_OCCURRED for e in events_in_window)
-        has_fraud_correlation = any(
-            e.event_type == EventType.CORRELATION_FOUND
-            and e.data.get("correlation_type") == "FraudDetection"
-            for e in events_in_window
-        )
+        counts = {
+            name: self.state.count(project_id, stream, self.buffer_window_seconds, now=now)
+            for name, stream in self.sequence_streams.items()
+        }
+        if not all(counts.values()):
+            return
+        # Further refine with temporal order if needed (for this prototype, presence is enough)
 
-        if has_variance and has_error and has_fraud_correlation:
-            # Further refine with temporal order if needed (for this prototype, presence is enough)
-
-            # Check if this proactive alert has already been published recently for this project
-            # (simple debounce to avoid spamming alerts)
-            last_alert_time = getattr(self, f"_last_ml_alert_time_{project_id}", None)
-            if (
-                last_alert_time and (datetime.now(UTC) - last_alert_time).total_seconds() < 3600
-            ):  # 1 hour debounce
-                return
-
-            alert_data = {
-                "alert_type": "ML_Anomaly_Sequence",
-                "project_id": project_id,
-                "description": (
-                    "ML Prototype detected a suspicious sequence: Variance Detected -> System Error -> Fraud Correlation. "
-                    "Suggests potential sophisticated activity or system compromise."
-                ),
-                "triggering_events_count": {
-                    "VARIANCE_DETECTED": sum(
-                        1 for e in events_in_window if e.event_type == EventType.VARIANCE_DETECTED
-                    ),
-                    "ERROR_OCCURRED": sum(
-                        1 for e in events_in_window if e.event_type == EventType.ERROR_OCCURRED
-                    ),
-                    "CORRELATION_FOUND_FraudDetection": sum(
-                        1
-                        for e in events_in_window
-                        if e.event_type == EventType.CORRELATION_FOUND
-                        and e.data.get("correlation_type") == "FraudDetection"
-                    ),
-                },
-            }
-            publish_event(EventType.PROACTIVE_ALERT, data=alert_data, project_id=project_id)
-            setattr(self, f"_last_ml_alert_time_{project_id}", datetime.now(UTC))
-            logger.critical(
-                f"ML Prototype issued PROACTIVE_ALERT for project {project_id}: Anomaly Sequence Detected."
-            )
+        # 1 hour debounce, shared by all workers
+        if not self.state.debounce(f"ml_sequence:{project_id}", self.alert_debounce_seconds):
+            return
+
+        alert_data = {
+            "alert_type": "ML_Anomaly_Sequence",
+            "project_id": project_id,
+            "description": (
+                "ML Prototype detected a suspicious sequence: Variance Detected -> System Error -> Fraud Correlation. "
+                "Suggests potential sophisticated activity or system compromise."
+            ),
+            "triggering_events_count": counts,
+        }
+        publish_event(EventType.PROACTIVE_ALERT, data=alert_data, project_id=project_id)
+        logger.critical(
+            f"ML Prototype issued PROACTIVE_ALERT for project {project_id}: Anomaly Sequence Detected."
+        )
 
 
 # Global instance of the prototype
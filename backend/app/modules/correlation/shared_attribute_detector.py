@@ -1,79 +1,129 @@
 """
 Shared Attribute Detector
-Identifies entities sharing Tax IDs, bank accounts, or addresses.
-Uncovers hidden relationships and potential UBO masking.
+Identifies entities sharing Tax IDs, bank accounts, phone numbers or addresses.
+Uncovers hidden relationships and potential UBO masking, within or across projects.
 """
 
-from typing import List, Dict, Any
-from sqlmodel import Session, select
-from app.models import Entity
+from itertools import groupby
+from typing import List, Dict, Any, Iterator, Optional
+from sqlmodel import Session, select, func, and_, or_
+from app.models import Entity, EntityAttribute, entity_attribute_values
 from app.core.event_bus import publish_event, EventType
 import logging
 
 logger = logging.getLogger(__name__)
 
+# attribute -> (correlation_type, risk_boost)
+CORRELATION_TYPES = {
+    "tax_id": ("SharedTaxID", 0.4),
+    "bank_account_number": ("SharedBankAccount", 0.6),
+    "phone": ("SharedPhone", 0.3),
+    "address": ("SharedAddress", 0.2),
+}
+
+
 class SharedAttributeDetector:
     """
-    Scans for entities that share common identifiers.
+    Clusters entities on the normalized entity_attributes side table, which the
+    Entity mapper events keep current (rows written around them are picked up by the
+    periodic backfill); a scan is one indexed GROUP BY, not a load of every entity.
     """
-    
+
     @staticmethod
-    def scan_project_for_links(db: Session, project_id: str) -> List[Dict[str, Any]]:
+    def backfill(db: Session, batch_size: int = 500) -> int:
         """
-        Performs a full scan of all entities in a project to find shared attributes.
+        Indexes entities written without the mapper events (legacy or bulk rows). Runs from
+        the periodic maintenance task, never on a request. Only entities with no attribute
+        rows that carry a tax id, bank account, or phone/address in metadata are read.
         """
-        entities = db.exec(select(Entity).where(Entity.project_id == project_id)).all()
-        findings = []
-        
-        # 1. Detect Shared Tax IDs
-        tax_id_map = {}
-        for ent in entities:
-            if ent.tax_id:
-                if ent.tax_id not in tax_id_map:
-                    tax_id_map[ent.tax_id] = []
-                tax_id_map[ent.tax_id].append(ent)
-        
-        for tax_id, sharing_entities in tax_id_map.items():
-            if len(sharing_entities) > 1:
-                finding = {
-                    "correlation_type": "SharedTaxID",
-                    "attribute": "tax_id",
-                    "value": tax_id,
-                    "entities": [e.id for e in sharing_entities],
-                    "entity_names": [e.name for e in sharing_entities],
-                    "risk_boost": 0.4
-                }
-                findings.append(finding)
-                publish_event(
-                    EventType.CORRELATION_FOUND,
-                    finding,
-                    project_id=project_id
+        meta = Entity.metadata_json
+        has_identifier = or_(
+            Entity.tax_id.is_not(None),
+            Entity.bank_account_number.is_not(None),
+            meta["phone"].as_string().is_not(None),
+            meta["address"].as_string().is_not(None),
+        )
+        indexed, last_id = 0, ""
+        while True:
+            batch = db.exec(
+                select(Entity)
+                .where(
+                    Entity.id > last_id,
+                    has_identifier,
+                    ~select(EntityAttribute.entity_id)
+                    .where(EntityAttribute.entity_id == Entity.id)
+                    .exists(),
                 )
-        
-        # 2. Detect Shared Bank Accounts
-        bank_map = {}
-        for ent in entities:
-            if ent.bank_account_number:
-                if ent.bank_account_number not in bank_map:
-                    bank_map[ent.bank_account_number] = []
-                bank_map[ent.bank_account_number].append(ent)
-                
-        for acc_num, sharing_entities in bank_map.items():
-            if len(sharing_entities) > 1:
-                finding = {
-                    "correlation_type": "SharedBankAccount",
-                    "attribute": "bank_account_number",
-                    "value": acc_num,
-                    "entities": [e.id for e in sharing_entities],
-                    "entity_names": [e.name for e in sharing_entities],
-                    "risk_boost": 0.6
-                }
-                findings.append(finding)
-                publish_event(
-                    EventType.CORRELATION_FOUND,
-                    finding,
-                    project_id=project_id
-                )
-                
+                .order_by(Entity.id)
+                .limit(batch_size)
+            ).all()
+            if not batch:
+                break
+            last_id = batch[-1].id  # placeholder identifiers yield no rows; keyset skips them
+            rows = [
+                EntityAttribute(entity_id=ent.id, attribute=attribute, value=value, project_id=ent.project_id)
+                for ent in batch
+                for attribute, value in entity_attribute_values(ent).items()
+            ]
+            db.add_all(rows)
+            db.commit()
+            indexed += len({row.entity_id for row in rows})
+        return indexed
+
+    @staticmethod
+    def iter_clusters(db: Session, project_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yields one finding per (attribute, value) held by more than one entity.
+        project_id=None clusters across every project, so links that cross
+        project boundaries are visible.
+        """
+        scope = [EntityAttribute.project_id == project_id] if project_id is not None else []
+        shared = (
+            select(EntityAttribute.attribute, EntityAttribute.value)
+            .where(*scope)
+            .group_by(EntityAttribute.attribute, EntityAttribute.value)
+            .having(func.count(EntityAttribute.entity_id) > 1)
+            .subquery()
+        )
+        rows = db.exec(
+            select(
+                EntityAttribute.attribute,
+                EntityAttribute.value,
+                EntityAttribute.entity_id,
+                EntityAttribute.project_id,
+                Entity.name,
+            )
+            .join(shared, and_(EntityAttribute.attribute == shared.c.attribute, EntityAttribute.value == shared.c.value))
+            .join(Entity, Entity.id == EntityAttribute.entity_id)
+            .where(*scope)
+            .order_by(EntityAttribute.attribute, EntityAttribute.value, EntityAttribute.entity_id)
+            .execution_options(yield_per=1000)
+        )
+        for (attribute, value), members in groupby(rows, key=lambda row: (row[0], row[1])):
+            members = list(members)
+            correlation_type, risk_boost = CORRELATION_TYPES.get(attribute, ("SharedAttribute", 0.2))
+            yield {
+                "correlation_type": correlation_type,
+                "attribute": attribute,
+                "value": value,
+                "entities": [m.entity_id for m in members],
+                "entity_names": [m.name for m in members],
+                "project_ids": sorted({m.project_id for m in members if m.project_id}),
+                "risk_boost": risk_boost,
+            }
+
+    @staticmethod
+    def scan_project_for_links(db: Session, project_id: str) -> List[Dict[str, Any]]:
+        """
+        Finds shared attributes among a project's entities and publishes each as a correlation.
+        """
+        findings = list(SharedAttributeDetector.iter_clusters(db, project_id))
+        for finding in findings:
+            publish_event(
+                EventType.CORRELATION_FOUND,
+                finding,
+                project_id=project_id
+            )
+
         logger.info(f"Scan complete for project {project_id}. Found {len(findings)} shared attribute correlations.")
         return findings
@@ -29,6 +29,21 @@ class CurrencyConvertResponse(BaseModel):
     date: str
 
 
+class BatchConvertRequest(BaseModel):
+    """Request model for batch conversion (one rate lookup pass per batch)"""
+    amounts: List[float]
+    currencies: List[str] = Field(..., description="Source currency per amount")
+    dates: Optional[List[Optional[str]]] = Field(None, description="Optional YYYY-MM-DD per amount")
+    to_currency: str = "USD"
+    project_id: Optional[str] = None
+
+
+class BatchConvertResponse(BaseModel):
+    """Response model for batch conversion"""
+    converted_amounts: List[float]
+    to_currency: str
+
+
 class ExchangeRatesResponse(BaseModel):
     """Response model for exchange rates"""
     base_currency: str
@@ -87,6 +102,25 @@ async def convert_currency(request: CurrencyConvertRequest):
         raise HTTPException(status_code=500, detail=f"Conversion failed: {str(e)}")
 
 
+@router.post("/convert/batch", response_model=BatchConvertResponse)
+async def convert_currency_batch(request: BatchConvertRequest):
+    """
+    Convert many amounts at once using as-of-date historical rates
+    """
+    converter = get_currency_converter()
+    try:
+        converted = converter.convert_many(
+            request.amounts,
+            request.currencies,
+            request.dates,
+            to_currency=request.to_currency,
+            project_id=request.project_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return BatchConvertResponse(converted_amounts=converted.tolist(), to_currency=request.to_currency)
+
+
 @router.get("/rates", response_model=ExchangeRatesResponse)
 async def get_exchange_rates(
     base: str = Query("USD", description="Base currency code")
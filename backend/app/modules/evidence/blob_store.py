@@ -0,0 +1,177 @@
+"""
+Content-Addressed Evidence Store
+Deduplicates evidence uploads by SHA-256 and reuses prior RAG/vision extraction.
+"""
+
+import os
+import uuid
+import hashlib
+import logging
+from datetime import datetime, UTC, timedelta
+from typing import Callable, Dict, Any, Optional, Tuple
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, func
+from app.models import Document, EvidenceBlob
+from app.core.field_encryption import FieldEncryption, get_encryptor
+from app.core.rag_index import extraction_failed
+
+logger = logging.getLogger(__name__)
+
+BLOB_DIR = "storage/blobs"
+VISION_FILE_TYPES = {"image", "photo", "jpg", "png"}
+
+
+def extraction_kind(file_type: str) -> str:
+    """Mirrors RAGService.process_file_content routing: vision for images, text otherwise."""
+    return "vision" if file_type in VISION_FILE_TYPES else "text"
+
+
+class EvidenceBlobStore:
+    """
+    Stores each distinct evidence payload once, encrypted, under its SHA-256 digest.
+    Documents reference blobs through Document.file_hash; ref_count tracks how many
+    and is reconciled against Document rows by collect_garbage.
+    """
+
+    def __init__(self, root: str = BLOB_DIR, encryptor: Optional[FieldEncryption] = None):
+        self.root = root  # created on first put
+        self._encryptor = encryptor
+
+    @property
+    def encryptor(self) -> FieldEncryption:
+        return self._encryptor or get_encryptor()
+
+    def path_for(self, sha256: str) -> str:
+        # Two-level fan-out keeps directory sizes bounded
+        return os.path.join(self.root, sha256[:2], sha256)
+
+    def put(self, db: Session, content: bytes) -> Tuple[EvidenceBlob, bool]:
+        """
+        Store content if unseen and take a reference on its blob.
+        Returns (blob, created). Caller commits the session.
+        """
+        sha256 = hashlib.sha256(content).hexdigest()
+        blob = db.get(EvidenceBlob, sha256)
+        path = self.path_for(sha256)
+        if blob is None or not os.path.exists(blob.storage_path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, "wb") as buffer:
+                buffer.write(self.encryptor.encrypt_file(content))
+            os.replace(tmp_path, path)
+
+        created = False
+        if blob is None:
+            # Concurrent uploads of the same content race on the primary key: first insert wins
+            created = self._insert_if_absent(db, sha256, path, len(content))
+            blob = db.get(EvidenceBlob, sha256)
+        elif blob.storage_path != path:
+            blob.storage_path = path
+        blob.ref_count = EvidenceBlob.ref_count + 1  # atomic in SQL, reloaded on next access
+        blob.last_referenced_at = datetime.now(UTC)
+        db.add(blob)
+        db.flush()
+        return blob, created
+
+    @staticmethod
+    def _insert_if_absent(db: Session, sha256: str, path: str, size: int) -> bool:
+        now = datetime.now(UTC)
+        values = dict(
+            sha256=sha256, storage_path=path, size_bytes=size, ref_count=0,
+            created_at=now, last_referenced_at=now,
+        )
+        dialect = db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            stmt = dialect_insert(EvidenceBlob).values(**values).on_conflict_do_nothing(index_elements=["sha256"])
+            return db.execute(stmt).rowcount == 1
+        try:
+            with db.begin_nested():
+                db.execute(insert(EvidenceBlob).values(**values))
+            return True
+        except IntegrityError:
+            return False
+
+    def read(self, blob: EvidenceBlob) -> bytes:
+        with open(blob.storage_path, "rb") as f:
+            return self.encryptor.decrypt_file(f.read())
+
+    def extract_text(
+        self,
+        db: Session,
+        blob: EvidenceBlob,
+        content: bytes,
+        file_type: str,
+        extractor: Callable[[bytes, str], str],
+    ) -> str:
+        """
+        Returns cached extraction for duplicate content, otherwise runs the extractor
+        (RAG decode or Gemini vision) once and caches a successful result on the blob.
+        """
+        kind = extraction_kind(file_type)
+        if blob.content_text and blob.extraction_kind == kind:
+            return blob.content_text
+        text = extractor(content, file_type)
+        if not extraction_failed(text):
+            blob.content_text = text
+            blob.extraction_kind = kind
+            db.add(blob)
+        return text
+
+    def known_text(self, db: Session, blob: EvidenceBlob, project_id: str) -> Optional[str]:
+        """
+        Cached extraction, but only when this project already holds a document with that
+        text: a hit must not reveal that another tenant uploaded the same content.
+        """
+        if not blob.content_text:
+            return None
+        texts = db.exec(
+            select(Document.content_text)
+            .where(Document.project_id == project_id, Document.file_hash == blob.sha256)
+        ).all()
+        if any(text and not extraction_failed(text) for text in texts):
+            return blob.content_text
+        return None
+
+    def collect_garbage(self, db: Session, grace_hours: int = 24) -> Dict[str, Any]:
+        """
+        Reconciles ref_count with Document rows and deletes unreferenced blobs
+        older than the grace period (protects uploads still mid-transaction).
+        """
+        counts = dict(
+            db.exec(
+                select(Document.file_hash, func.count(Document.id))
+                .where(Document.file_hash.is_not(None))
+                .group_by(Document.file_hash)
+            ).all()
+        )
+        cutoff = datetime.now(UTC) - timedelta(hours=grace_hours)
+        reconciled = 0
+        removed = 0
+        freed_bytes = 0
+        for blob in db.exec(select(EvidenceBlob)).all():
+            actual = counts.get(blob.sha256, 0)
+            if blob.ref_count != actual:
+                blob.ref_count = actual
+                reconciled += 1
+                db.add(blob)
+            last_seen = blob.last_referenced_at
+            if last_seen.tzinfo is None:
+                last_seen = last_seen.replace(tzinfo=UTC)
+            if actual == 0 and last_seen < cutoff:
+                try:
+                    if os.path.exists(blob.storage_path):
+                        os.remove(blob.storage_path)
+                except OSError as e:
+                    logger.error(f"Blob GC: failed to remove {blob.storage_path}: {e}")
+                    continue
+                freed_bytes += blob.size_bytes
+                removed += 1
+                db.delete(blob)
+        db.commit()
+        return {"reconciled": reconciled, "removed": removed, "freed_bytes": freed_bytes}
+
+
+evidence_blob_store = EvidenceBlobStore()
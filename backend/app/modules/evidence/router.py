@@ -1,23 +1,27 @@
 import os
 import uuid
+import asyncio
 import hashlib
+import logging
 from typing import Optional, List
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Response, Form
 from sqlmodel import Session, select
 from app.core.db import get_session
 from app.core.rag import rag_service
-from app.models import Document, Transaction
+from app.core.rag_index import PENDING_OCR_TEXT, extraction_failed
+from app.models import Document, Transaction, EvidenceBlob
 from app.core.audit import AuditLogger
 from app.core.field_encryption import get_encryptor
 from app.modules.evidence.notary_service import BlockchainNotaryService
+from app.modules.evidence.blob_store import evidence_blob_store
 from app.core.auth_middleware import verify_project_access
 from app.core.event_bus import publish_event, EventType
 from app.models import Project, UserProjectAccess, ProjectRole, User
 from app.core.security import get_current_user
 
+logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/evidence", tags=["Evidence & RAG"])
-UPLOAD_DIR = "storage/uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+UPLOAD_DIR = "storage/uploads"  # legacy per-document files, read-only
 
 
 def calculate_sha256(file_path):
@@ -39,27 +43,20 @@ async def upload_document(
     db: Session = Depends(get_session),
 ):
     file_id = str(uuid.uuid4())
-    file_ext = os.path.splitext(file.filename)[1]
-    save_path = os.path.join(UPLOAD_DIR, f"{file_id}{file_ext}")
     
     # Read file content
     content = await file.read()
     
-    # Calculate Hash (Forensic Immutability) BEFORE encryption
-    file_hash = hashlib.sha256(content).hexdigest()
-    
-    # Encrypt file content
-    encryptor = get_encryptor()
-    encrypted_content = encryptor.encrypt_file(content)
-    
-    # Save encrypted content
-    with open(save_path, "wb") as buffer:
-        buffer.write(encrypted_content)
+    # Content-addressed storage: hash (Forensic Immutability) keys the encrypted blob,
+    # so identical scans across cases share one file on disk.
+    blob, _ = evidence_blob_store.put(db, content)
+    file_hash = blob.sha256
         
-    # Process text for RAG (Requires decryption or processing original content)
+    # Process text for RAG (reuses prior extraction/vision results for duplicate content)
     try:
-        # We process the original content for RAG before it's encrypted on disk
-        extracted_text = rag_service.process_file_content(content, file_type)
+        extracted_text = evidence_blob_store.extract_text(
+            db, blob, content, file_type, rag_service.process_file_content
+        )
     except Exception:
         extracted_text = "Processing skipped or failed."
         
@@ -71,7 +68,11 @@ async def upload_document(
         file_type=file_type,
         file_hash=file_hash,
         content_text=extracted_text,
-        metadata_json={"filename": file.filename, "size": len(content), "encrypted": True},
+        metadata_json={
+            "filename": file.filename,
+            "size": len(content),
+            "encrypted": True,
+        },
         case_id=case_id,
         transaction_id=transaction_id,
     )
@@ -106,6 +107,13 @@ async def upload_document(
                 )
     db.commit()
     db.refresh(new_doc)
+
+    # Index chunks for hybrid (full-text + vector) evidence search; failure notices are not evidence
+    if not extraction_failed(extracted_text):
+        try:
+            await asyncio.to_thread(rag_service.ingest_text, extracted_text, file_id, {"project_id": project_id})
+        except Exception as e:
+            logger.warning(f"RAG indexing failed for {file_id}: {e}")
     
     # Fire Event
     publish_event(
@@ -139,28 +147,28 @@ async def upload_bulk_documents(
 ):
     """Bulk upload multiple evidence documents at once."""
     results = []
-    encryptor = get_encryptor()
+    to_index = []
     for file in files:
         try:
             file_id = str(uuid.uuid4())
-            file_ext = os.path.splitext(file.filename)[1]
-            save_path = os.path.join(UPLOAD_DIR, f"{file_id}{file_ext}")
-            
             content = await file.read()
-            file_hash = hashlib.sha256(content).hexdigest()
-            encrypted_content = encryptor.encrypt_file(content)
-            
-            with open(save_path, "wb") as buffer:
-                buffer.write(encrypted_content)
-                
+            # Identical scans resolve to an existing blob: no new file, no re-OCR
+            blob, _ = evidence_blob_store.put(db, content)
+            # Other tenants' extractions stay hidden: new-to-this-project content waits for OCR
+            known_text = evidence_blob_store.known_text(db, blob, project_id)
+
             new_doc = Document(
                 id=file_id,
                 project_id=project_id,
                 filename=file.filename,
                 file_type="bulk_import",
-                file_hash=file_hash,
-                content_text="Pending OCR",
-                metadata_json={"filename": file.filename, "size": len(content), "encrypted": True},
+                file_hash=blob.sha256,
+                content_text=known_text or PENDING_OCR_TEXT,
+                metadata_json={
+                    "filename": file.filename,
+                    "size": len(content),
+                    "encrypted": True,
+                },
                 case_id=case_id,
             )
             db.add(new_doc)
@@ -177,10 +185,23 @@ async def upload_bulk_documents(
                 project_id=project_id
             )
             
-            results.append({"filename": file.filename, "status": "success", "id": file_id})
+            results.append({
+                "filename": file.filename,
+                "status": "success",
+                "id": file_id,
+            })
+            if known_text:
+                to_index.append((file_id, known_text))
         except Exception as e:
             results.append({"filename": file.filename, "status": "error", "detail": str(e)})
     db.commit()
+
+    # Re-uploads within the project arrive with their text and are searchable immediately
+    for doc_id, text in to_index:
+        try:
+            await asyncio.to_thread(rag_service.ingest_text, text, doc_id, {"project_id": project_id})
+        except Exception as e:
+            logger.warning(f"RAG indexing failed for {doc_id}: {e}")
     return {"status": "success", "processed": len(results), "results": results}
 
 
@@ -198,19 +219,22 @@ async def download_document(
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    # In a real system, we'd find the file path from id
-    # Since we use UUID as filename, we can reconstruct it
-    file_ext = os.path.splitext(doc.filename)[1]
-    file_path = os.path.join(UPLOAD_DIR, f"{doc.id}{file_ext}")
-    
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="File missing on disk")
-        
-    with open(file_path, "rb") as f:
-        encrypted_data = f.read()
+    blob = db.get(EvidenceBlob, doc.file_hash) if doc.file_hash else None
+    if blob and os.path.exists(blob.storage_path):
+        decrypted_data = evidence_blob_store.read(blob)
+    else:
+        # Legacy uploads were stored per-document under their UUID
+        file_ext = os.path.splitext(doc.filename)[1]
+        file_path = os.path.join(UPLOAD_DIR, f"{doc.id}{file_ext}")
         
-    encryptor = get_encryptor()
-    decrypted_data = encryptor.decrypt_file(encrypted_data)
+        if not os.path.exists(file_path):
+            raise HTTPException(status_code=404, detail="File missing on disk")
+            
+        with open(file_path, "rb") as f:
+            encrypted_data = f.read()
+            
+        encryptor = get_encryptor()
+        decrypted_data = encryptor.decrypt_file(encrypted_data)
     
     
     # SECURITY: Sealed Document Check
@@ -254,7 +278,8 @@ async def search_evidence(
     cross-project data leakage in multi-tenant environments.
     """
     # SECURITY: Filter RAG context by project for multi-tenant isolation
-    results = rag_service.query_context(query, project_id=project_id)
+    # Blocking (query embedding, hybrid search, own DB session): keep it off the event loop
+    results = await asyncio.to_thread(rag_service.query_context, query, project_id=project_id)
     return results
 
 
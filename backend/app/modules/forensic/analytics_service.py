@@ -2,14 +2,14 @@
 Analytics Service for real-time ledger aggregation.
 Provides SQL-based analytics for dashboard metrics.
 """
-from typing import Dict, Any, List
-from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
 from sqlmodel import Session, select, func
 import sqlalchemy as sa
 from app.models import (
     Transaction, BudgetLine, Milestone,
     Project, Entity
 )
+from app.modules.forensic.s_curve_engine import SCurveEngine, DEFAULT_MAX_POINTS
 
 
 class AnalyticsService:
@@ -95,71 +95,18 @@ class AnalyticsService:
 
     def get_s_curve_data(
         self,
-        project_id: str
+        project_id: str,
+        granularity: str = "month",
+        max_points: Optional[int] = DEFAULT_MAX_POINTS,
     ) -> Dict[str, Any]:
         """
-        Generate S-Curve data comparing planned vs actual spend.
+        Generate S-Curve data comparing planned, earned and actual spend.
+        Delegates to SCurveEngine (SQL buckets + LTTB downsampling).
         """
-        # Get all transactions for the project
-        transactions = self.db.exec(
-            select(Transaction)
-            .where(Transaction.project_id == project_id)
-            .order_by(Transaction.transaction_date)
-        ).all()
-
-        # Get budget lines
-        budget_lines = self.db.exec(
-            select(BudgetLine).where(BudgetLine.project_id == project_id)
-        ).all()
-        
-        total_budget = sum(line.total_price_rab for line in budget_lines)
-        
-        # Aggregate by month
-        curve_data = []
-        cumulative_actual = 0.0
-        
-        if transactions:
-            # Group by month
-            from collections import defaultdict
-            monthly_spend = defaultdict(float)
-            
-            for tx in transactions:
-                if tx.transaction_date:
-                    month_key = tx.transaction_date.strftime("%Y-%m")
-                    monthly_spend[month_key] += tx.actual_amount
-            
-            # Generate cumulative curve
-            for month in sorted(monthly_spend.keys()):
-                cumulative_actual += monthly_spend[month]
-                month_date = datetime.strptime(month, "%Y-%m")
-                
-                # Improved planned value calculation
-                project_record = self.db.exec(
-                    select(Project)
-                    .where(Project.id == project_id)
-                ).first()
-                
-                if project_record and project_record.start_date:
-                    start = project_record.start_date
-                    # Determine end date: use project.end_date, or default to 1 year after start
-                    end = project_record.end_date or (start + timedelta(days=365))
-                    
-                    total_duration_days = max(1, (end - start).days)
-                    days_elapsed = (month_date - start).days
-                    
-                    # Progress percentage based on time
-                    planned_pct = max(0, min(100, (days_elapsed / total_duration_days) * 100))
-                    planned_value = (planned_pct / 100) * total_budget
-                else:
-                    planned_value = cumulative_actual
-                
-                curve_data.append({
-                    "date": f"{month}-01",
-                    "pv": planned_value,
-                    "ac": cumulative_actual
-                })
-        
-        return {"curve_data": curve_data}
+        project = self.db.get(Project, project_id)
+        if not project:
+            return {"curve_data": []}
+        return SCurveEngine(self.db).build(project, granularity=granularity, max_points=max_points)
 
     def get_high_risk_transactions(
         self,
@@ -1,12 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session, select
 from pydantic import BaseModel
-import math
 from app.core.db import get_session
 
 from app.models import Transaction, Entity, CopilotInsight, Project
 from app.core.auth_middleware import verify_project_access
 from app.modules.ingestion.tasks import VectorEngine, ReconciliationEngine
+from app.core.entity_vector_index import entity_index
 
 router = APIRouter(prefix="/forensic/mcp", tags=["Forensic MCP"])
 
@@ -60,40 +60,29 @@ async def find_semantic_entities(
 ):
     """
     MCP Tool: find_semantic_entities
-    Vector search for entities across the entire database.
+    Vector search over this project's entities (and global ones) via the entity vector index.
     """
     query_vector = VectorEngine.encode(payload.query)
     if not query_vector:
         return {"results": []}
-    # Fetch all entities with embeddings (Naive search for now, PgVector in prod)
-    # In a real heavy production, this would be `ORDER BY embedding <-> query_vector`
-    entities = db.exec(select(Entity).where(Entity.embeddings_json is not None)).all()
-    results = []
-    for ent in entities:
-        if not ent.embeddings_json:
-            continue
-        v_ent = ent.embeddings_json
-        # Cosine Similarity
-        dot = sum(a * b for a, b in zip(query_vector, v_ent))
-        mag1 = math.sqrt(sum(a * a for a in query_vector))
-        mag2 = math.sqrt(sum(b * b for b in v_ent))
-        if mag1 == 0 or mag2 == 0:
-            score = 0.0
-        else:
-            score = dot / (mag1 * mag2)
-        if score >= payload.min_confidence:
-            results.append(
-                {
-                    "entity_id": ent.id,
-                    "name": ent.name,
-                    "type": ent.type,
-                    "risk_score": ent.risk_score,
-                    "similarity": score,
-                }
-            )
-    # Sort by similarity descending
-    results.sort(key=lambda x: x["similarity"], reverse=True)
-    return {"results": results[: payload.limit]}
+    hits = entity_index.search(db, project.id, query_vector, k=payload.limit, min_score=payload.min_confidence)
+    if not hits:
+        return {"results": []}
+    entities = {
+        ent.id: ent for ent in db.exec(select(Entity).where(Entity.id.in_([entity_id for entity_id, _ in hits]))).all()
+    }
+    results = [
+        {
+            "entity_id": entity_id,
+            "name": entities[entity_id].name,
+            "type": entities[entity_id].type,
+            "risk_score": entities[entity_id].risk_score,
+            "similarity": score,
+        }
+        for entity_id, score in hits
+        if entity_id in entities
+    ]
+    return {"results": results}
 
 
 @router.post("/{project_id}/optimize-reconciliation")
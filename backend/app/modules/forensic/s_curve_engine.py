@@ -0,0 +1,195 @@
+"""
+S-Curve Engine
+Project-scoped PV/EV/AC curves aggregated into day/week/month buckets in SQL,
+downsampled with multi-series LTTB to a point budget.
+"""
+
+from datetime import date, datetime, timedelta, UTC
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession, object_session
+from sqlmodel import Session, select, func
+from app.core.query_cache import invalidate_milestone_cache
+from app.core.time_buckets import DEFAULT_GRANULARITY, bucket_expr
+from app.models import Transaction, TransactionCategory, Milestone, BudgetLine, Project
+
+DEFAULT_MAX_POINTS = 500
+EARNED_STATUSES = ("paid",)
+
+
+def _as_date(value: Any) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def bucket_start(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def bucket_end(start: date, granularity: str) -> date:
+    """Exclusive end of the bucket beginning at start."""
+    if granularity == "day":
+        return start + timedelta(days=1)
+    if granularity == "week":
+        return start + timedelta(days=7)
+    return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def lttb_indices(x: np.ndarray, ys: Sequence[np.ndarray], threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets over several aligned series. Triangle areas are
+    summed across series (each scaled to its own range) so a step in any curve survives.
+    First and last points are always kept.
+    """
+    n = x.shape[0]
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    scaled = []
+    for y in ys:
+        span = float(np.ptp(y)) if y.size else 0.0
+        scaled.append(y / span if span > 0 else np.zeros_like(y, dtype=np.float64))
+
+    every = (n - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        lo = int(i * every) + 1
+        hi = int((i + 1) * every) + 1
+        nxt_lo = hi
+        nxt_hi = min(int((i + 2) * every) + 1, n)
+        avg_x = x[nxt_lo:nxt_hi].mean()
+        area = np.zeros(hi - lo)
+        for y in scaled:
+            avg_y = y[nxt_lo:nxt_hi].mean()
+            area += np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    selected[-1] = n - 1
+    return selected
+
+
+class SCurveEngine:
+    """
+    Planned Value: budget spread linearly from start_date to end_date (start + 1 year if open).
+    Earned Value: budget share of milestones marked paid, at their release date.
+    Actual Cost: vendor (V) spend only, as in v1 -- ledger and bank rows mirror the same
+    payments, and XP personal leakage is quarantined from project P&L.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _budget(self, project: Project) -> float:
+        total = self.db.exec(
+            select(func.sum(BudgetLine.total_price_rab)).where(BudgetLine.project_id == project.id)
+        ).one()
+        return float(total or 0.0) or float(project.contract_value or 0.0)
+
+    def _actual_by_bucket(self, project_id: str, granularity: str) -> Dict[date, float]:
+        bucket = bucket_expr(self.db, Transaction.timestamp, granularity).label("bucket")
+        spend = func.sum(
+            sa.case((Transaction.category_code == TransactionCategory.V, Transaction.actual_amount), else_=0.0)
+        )
+        rows = self.db.exec(
+            select(bucket, spend).where(Transaction.project_id == project_id).group_by(bucket)
+        ).all()
+        return {_as_date(b): float(total or 0.0) for b, total in rows if b is not None}
+
+    def _earned_by_bucket(self, project_id: str, granularity: str) -> Dict[date, float]:
+        bucket = bucket_expr(self.db, Milestone.release_date, granularity).label("bucket")
+        rows = self.db.exec(
+            select(bucket, func.sum(Milestone.percentage))
+            .where(
+                Milestone.project_id == project_id,
+                Milestone.status.in_(EARNED_STATUSES),
+                Milestone.release_date.is_not(None),
+            )
+            .group_by(bucket)
+        ).all()
+        return {_as_date(b): float(pct or 0.0) for b, pct in rows if b is not None}
+
+    def build(
+        self,
+        project: Project,
+        granularity: str = DEFAULT_GRANULARITY,
+        max_points: Optional[int] = DEFAULT_MAX_POINTS,
+    ) -> Dict[str, Any]:
+        actual = self._actual_by_bucket(project.id, granularity)
+        earned = self._earned_by_bucket(project.id, granularity)
+        budget = self._budget(project)
+
+        start = project.start_date.date()
+        end = (project.end_date or (project.start_date + timedelta(days=365))).date()
+        duration = max((end - start).days, 1)
+
+        buckets = sorted(set(actual) | set(earned) | {bucket_start(start, granularity)})
+        dates: List[date] = []
+        pv: List[float] = []
+        ev: List[float] = []
+        ac: List[float] = []
+        cum_actual = 0.0
+        cum_pct = 0.0
+        for b in buckets:
+            cum_actual += actual.get(b, 0.0)
+            cum_pct += earned.get(b, 0.0)
+            elapsed = (bucket_end(b, granularity) - start).days
+            dates.append(b)
+            pv.append(budget * min(max(elapsed / duration, 0.0), 1.0))
+            ev.append(budget * min(cum_pct, 100.0) / 100.0)
+            ac.append(cum_actual)
+
+        total_points = len(dates)
+        keep = np.arange(total_points)
+        if max_points and total_points > max_points:
+            x = np.array([d.toordinal() for d in dates], dtype=np.float64)
+            keep = lttb_indices(x, [np.array(pv), np.array(ev), np.array(ac)], max_points)
+
+        return {
+            "project_id": project.id,
+            "granularity": granularity,
+            "start_date": project.start_date.isoformat(),
+            "end_date": end.isoformat(),
+            "budget": budget,
+            "total_points": total_points,
+            "returned_points": int(keep.shape[0]),
+            "downsampled": int(keep.shape[0]) < total_points,
+            "generated_at": datetime.now(UTC).isoformat(),
+            "curve_data": [
+                {"date": dates[i].isoformat(), "pv": pv[i], "ev": ev[i], "ac": ac[i]}
+                for i in keep.tolist()
+            ],
+        }
+
+
+_PENDING_KEY = "s_curve_engine.pending_projects"
+
+
+@event.listens_for(Milestone, "after_insert")
+@event.listens_for(Milestone, "after_update")
+@event.listens_for(Milestone, "after_delete")
+def _record_earned_value_change(mapper, connection, target: Milestone):
+    # EV is built from milestones; the cached curves are dropped once the write commits
+    session = object_session(target)
+    if session is not None and target.project_id:
+        session.info.setdefault(_PENDING_KEY, set()).add(target.project_id)
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _invalidate_earned_value(session):
+    for project_id in session.info.pop(_PENDING_KEY, ()):
+        invalidate_milestone_cache(project_id)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _discard_earned_value_changes(session):
+    session.info.pop(_PENDING_KEY, None)
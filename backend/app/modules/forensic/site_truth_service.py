@@ -1,71 +1,132 @@
-from typing import Dict, List, Any
-from sqlmodel import Session, select
+from typing import Dict, Iterable, List, Any, Optional, Sequence, Tuple
+from sqlmodel import Session, select, func
+import numpy as np
 from app.models import Transaction, Document, Project
-from app.modules.forensic.service import GeographicValidator
+from app.services.spatial_index import haversine_pairs_km
 import logging
 
 logger = logging.getLogger(__name__)
 
+MISMATCH_THRESHOLD_KM = 5.0  # site vs document mismatch
+CHUNK_SIZE = 5000
+
+# (document_id, transaction_id, document metadata, transaction lat, transaction lng)
+EvidenceLink = Tuple[str, str, Optional[Dict[str, Any]], float, float]
+
+
+def _coordinate(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
 class SiteTruthService:
     def __init__(self, db: Session):
         self.db = db
 
-    def verify_project_geospatial_integrity(self, project_id: str) -> Dict[str, Any]:
+    def verify_project_geospatial_integrity(self, project_id: str, chunk_size: int = CHUNK_SIZE) -> Dict[str, Any]:
         """
         Cross-references transaction locations with evidence (photos) GPS metadata.
         Identifies "Impossible Travel" where transactions are logged far from where
         investigators actually found evidence.
+
+        Documents are joined to their GPS-tagged transactions in SQL and streamed in
+        chunks of chunk_size, so memory holds one chunk plus the anomalies.
         """
         project = self.db.get(Project, project_id)
         if not project:
             return {"error": "Project not found"}
 
-        # 1. Get transactions with GPS
-        transactions = self.db.exec(
-            select(Transaction)
-            .where(Transaction.project_id == project_id)
-            .where(Transaction.latitude.is_not(None))
-            .where(Transaction.longitude.is_not(None))
-        ).all()
+        has_gps = (
+            Transaction.project_id == project_id,
+            Transaction.latitude.is_not(None),
+            Transaction.longitude.is_not(None),
+        )
+        # 1. Transactions with GPS
+        transactions_scanned = self.db.exec(select(func.count(Transaction.id)).where(*has_gps)).one()
 
-        # 2. Get evidence (photos) with GPS
-        evidence = self.db.exec(
-            select(Document)
-            .where(Document.transaction_id.is_in([t.id for t in transactions]))
-        ).all()
+        # 2. Evidence linked to them, joined in the database
+        links = self.db.exec(
+            select(Document.id, Document.transaction_id, Document.metadata_json, Transaction.latitude, Transaction.longitude)
+            .join(Transaction, Transaction.id == Document.transaction_id)
+            .where(*has_gps)
+            .execution_options(yield_per=chunk_size, stream_results=True)
+        )
 
-        anomalies = []
+        anomalies: List[Dict[str, Any]] = []
         verified_count = 0
+        evidence_count = 0
+        for chunk in links.partitions():
+            evidence_count += len(chunk)
+            found, verified = self._check_links(chunk)
+            anomalies.extend(found)
+            verified_count += verified
 
-        for doc in evidence:
-            if not doc.metadata_json or "lat" not in doc.metadata_json:
+        return self._report(project_id, transactions_scanned, evidence_count, verified_count, anomalies)
+
+    @classmethod
+    def verify_links(
+        cls, project_id: str, transactions: Sequence[Transaction], documents: Iterable[Document],
+    ) -> Dict[str, Any]:
+        """
+        In-memory fallback for callers already holding the rows: a dict index on transaction
+        id replaces the per-document scan, then the same vectorized check runs.
+        """
+        by_id = {
+            t.id: t for t in transactions
+            if t.latitude is not None and t.longitude is not None
+        }
+        links = [
+            (doc.id, doc.transaction_id, doc.metadata_json, by_id[doc.transaction_id].latitude,
+             by_id[doc.transaction_id].longitude)
+            for doc in documents
+            if doc.transaction_id in by_id
+        ]
+        anomalies, verified_count = cls._check_links(links)
+        return cls._report(project_id, len(by_id), len(links), verified_count, anomalies)
+
+    @staticmethod
+    def _check_links(links: Sequence[EvidenceLink]) -> Tuple[List[Dict[str, Any]], int]:
+        """Distances for a whole chunk at once; returns (anomalies, verified count)."""
+        usable = []
+        for doc_id, tx_id, metadata, tx_lat, tx_lng in links:
+            if not metadata or "lat" not in metadata:
                 continue
-            
-            tx = next((t for t in transactions if t.id == doc.transaction_id), None)
-            if not tx:
+            lat, lng = _coordinate(metadata.get("lat")), _coordinate(metadata.get("lng"))
+            if lat is None or lng is None:
                 continue
+            usable.append((doc_id, tx_id, tx_lat, tx_lng, lat, lng))
+        if not usable:
+            return [], 0
+
+        coords = np.array([row[2:] for row in usable], dtype=np.float64)
+        # Compare TX GPS with Photo GPS
+        distances = haversine_pairs_km(coords[:, 0], coords[:, 1], coords[:, 2], coords[:, 3])
+        mismatched = np.flatnonzero(distances > MISMATCH_THRESHOLD_KM)
 
-            # Compare TX GPS with Photo GPS
-            distance = GeographicValidator.calculate_distance_km(
-                tx.latitude, tx.longitude,
-                doc.metadata_json["lat"], doc.metadata_json["lng"]
-            )
-
-            if distance > 5.0: # 5km threshold for site vs document mismatch
-                anomalies.append({
-                    "type": "EVIDENCE_MISMATCH",
-                    "transaction_id": tx.id,
-                    "document_id": doc.id,
-                    "distance_km": round(distance, 2),
-                    "description": f"Transaction recorded at ({tx.latitude}, {tx.longitude}) but evidence photo taken {distance:.1f}km away."
-                })
-            else:
-                verified_count += 1
+        anomalies = []
+        for i in mismatched:
+            doc_id, tx_id, tx_lat, tx_lng, _, _ = usable[i]
+            distance = float(distances[i])
+            anomalies.append({
+                "type": "EVIDENCE_MISMATCH",
+                "transaction_id": tx_id,
+                "document_id": doc_id,
+                "distance_km": round(distance, 2),
+                "description": f"Transaction recorded at ({tx_lat}, {tx_lng}) but evidence photo taken {distance:.1f}km away."
+            })
+        return anomalies, len(usable) - len(mismatched)
 
+    @staticmethod
+    def _report(
+        project_id: str, transactions_scanned: int, evidence_count: int, verified_count: int,
+        anomalies: List[Dict[str, Any]],
+    ) -> Dict[str, Any]:
         return {
             "project_id": project_id,
-            "transactions_scanned": len(transactions),
+            "transactions_scanned": transactions_scanned,
             "evidence_links_verified": verified_count,
             "geospatial_anomalies": anomalies,
-            "integrity_score": round((verified_count / max(1, len(evidence))) * 100, 1)
+            "integrity_score": round((verified_count / max(1, evidence_count)) * 100, 1)
         }
@@ -7,7 +7,7 @@ Then compares against user's analysis findings.
 
 from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
 from pydantic import BaseModel
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, FrozenSet, Optional, Any
 from enum import Enum
 import csv
 import io
@@ -15,6 +15,13 @@ import re
 from collections import Counter
 from app.core.auth_middleware import verify_project_access
 from app.models import Project
+from app.modules.fraud.keyword_matcher import (
+    CASH_WITHDRAWAL,
+    INTERNAL_TRANSFER_HINT,
+    TRANSFER,
+    forensic_keywords,
+)
+from app.modules.fraud.near_duplicates import NameVariationIndex, NearDuplicateIndex
 
 router = APIRouter(prefix="/forensic/{project_id}/analyst-comparison", tags=["Analyst Comparison"])
 # Security: File upload limits
@@ -106,11 +113,18 @@ def extract_names_from_description(desc: str) -> List[str]:
 
 
 def discover_patterns_in_transaction(
-    row: Dict[str, Any], all_descriptions: List[str], entity_frequency: Counter
+    row: Dict[str, Any],
+    all_descriptions: List[str],
+    entity_frequency: Counter,
+    keyword_hits: Optional[FrozenSet[str]] = None,
+    duplicates: Optional[NearDuplicateIndex] = None,
+    name_index: Optional[NameVariationIndex] = None,
 ) -> AppFinding:
     """
     Analyze a single transaction using ONLY raw fields.
     Discovers patterns independently without relying on categories.
+    keyword_hits, duplicates and name_index may be built once per file; otherwise they
+    are derived from all_descriptions / entity_frequency for this row alone.
     """
     findings = []
     reasoning = []
@@ -121,6 +135,8 @@ def discover_patterns_in_transaction(
     date = str(row.get("Tanggal", ""))
     raw_desc = str(row.get("Uraian", ""))
     desc_upper = raw_desc.upper()
+    if keyword_hits is None:
+        keyword_hits = forensic_keywords.match(raw_desc)
     credit = parse_amount(row.get("Kredit", "0"))
     debit = parse_amount(row.get("Debit", "0"))
     amount = credit if credit > 0 else debit
@@ -138,8 +154,7 @@ def discover_patterns_in_transaction(
     # =========================================
     # PATTERN 2: Cash Withdrawal Detection
     # =========================================
-    cash_keywords = ["TARIKAN ATM", "WITHDRAWAL", "TUNAI", "CASH"]
-    if any(kw in desc_upper for kw in cash_keywords):
+    if CASH_WITHDRAWAL in keyword_hits:
         findings.append("CASH_WITHDRAWAL")
         reasoning.append("Cash withdrawal - funds become untraceable")
         verdict = VerdictType.SUSPICIOUS
@@ -167,9 +182,9 @@ def discover_patterns_in_transaction(
     # =========================================
     # PATTERN 4: Similar Description Detection
     # =========================================
-    similar_count = sum(
-        1 for d in all_descriptions if d != raw_desc and _similarity(raw_desc, d) > 0.8
-    )
+    if duplicates is None:
+        duplicates = NearDuplicateIndex(all_descriptions)
+    similar_count = duplicates.similar_count(raw_desc)
     if similar_count >= 2:
         findings.append("SIMILAR_DESCRIPTIONS")
         reasoning.append(
@@ -182,11 +197,9 @@ def discover_patterns_in_transaction(
     # =========================================
     # PATTERN 5: Transfer Keywords
     # =========================================
-    transfer_keywords = ["TRSF", "TRANSFER", "TRF", "SWITCHING"]
-    if any(kw in desc_upper for kw in transfer_keywords):
+    if TRANSFER in keyword_hits:
         # Check if it's internal
-        internal_hints = ["KE REK", "PINDAH", "ANTAR REK"]
-        if any(h in desc_upper for h in internal_hints):
+        if INTERNAL_TRANSFER_HINT in keyword_hits:
             findings.append("INTERNAL_TRANSFER")
             reasoning.append("Transfer between accounts - verify not circulating funds")
             if verdict == VerdictType.UNKNOWN:
@@ -196,9 +209,11 @@ def discover_patterns_in_transaction(
     # PATTERN 6: Personal Name Patterns
     # =========================================
     # Look for names that repeat with slight variations
+    if name_index is None:
+        name_index = NameVariationIndex.from_frequency(entity_frequency)
     name_parts = re.findall(r"\b([A-Z]{3,})\b", desc_upper)
     for part in name_parts:
-        variations = [n for n in entity_frequency.keys() if part in n and n != part]
+        variations = name_index.variations(part)
         if len(variations) >= 2:
             findings.append("NAME_VARIATIONS")
             reasoning.append(
@@ -237,15 +252,6 @@ def discover_patterns_in_transaction(
     )
 
 
-def _similarity(a: str, b: str) -> float:
-    """Simple similarity ratio between two strings."""
-    if not a or not b:
-        return 0.0
-    a, b = a.lower(), b.lower()
-    matches = sum(1 for ca, cb in zip(a, b) if ca == cb)
-    return matches / max(len(a), len(b))
-
-
 # ============================================================================
 # API ENDPOINTS
 # ============================================================================
@@ -274,11 +280,15 @@ async def analyze_raw_bank_statement(
     for desc in all_descriptions:
         names = extract_names_from_description(desc)
         entity_frequency.update(names)
+    duplicates = NearDuplicateIndex(all_descriptions)
+    name_index = NameVariationIndex.from_frequency(entity_frequency)
     # Analyze each transaction
     results = []
-    for row in rows:
+    for row, hits in zip(rows, forensic_keywords.match_many(all_descriptions)):
         if row.get("No"):
-            finding = discover_patterns_in_transaction(row, all_descriptions, entity_frequency)
+            finding = discover_patterns_in_transaction(
+                row, all_descriptions, entity_frequency, hits, duplicates, name_index
+            )
             results.append(finding)
     # Aggregate discovered patterns
     pattern_counts: Counter = Counter()
@@ -322,11 +332,15 @@ async def compare_with_user_analysis(
     entity_frequency: Counter = Counter()
     for desc in all_descriptions:
         entity_frequency.update(extract_names_from_description(desc))
+    duplicates = NearDuplicateIndex(all_descriptions)
+    name_index = NameVariationIndex.from_frequency(entity_frequency)
     # Build app findings
     app_findings: Dict[int, AppFinding] = {}
-    for row in bank_rows:
+    for row, hits in zip(bank_rows, forensic_keywords.match_many(all_descriptions)):
         if row.get("No"):
-            finding = discover_patterns_in_transaction(row, all_descriptions, entity_frequency)
+            finding = discover_patterns_in_transaction(
+                row, all_descriptions, entity_frequency, hits, duplicates, name_index
+            )
             app_findings[finding.row_no] = finding
     # Parse user analysis (only need: No, Proyek, Comment)
     user_content = await user_analysis.read()
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, FileResponse
 from sqlmodel import Session, select
 from app.core.db import get_session
-from app.core.pagination import PaginationParams, paginate_query
+from app.core.pagination import keyset_paginate
 from app.core.database_optimizer import optimize_transaction_query
 from app.models import (
     Transaction,
@@ -12,15 +12,22 @@ from app.models import (
     Case,
     FraudAlert,
     CaseExhibit,
+    ProcessingJob,
+    JobStatus,
 )
 from sqlalchemy import func, or_
 from app.modules.fraud.rules import fraud_engine
 from app.core.audit import AuditLogger
 from app.core.security import require_role
 from app.modules.fraud.report_service import generate_dossier_pdf
+from app.modules.fraud.nexus_projection import NexusProjectionService
+from app.modules.fraud import export_engine
+from app.modules.correlation.shared_attribute_detector import SharedAttributeDetector
+import asyncio
 import datetime
-import io
-import pandas as pd
+import json
+import os
+from typing import Optional
 from app.core.event_bus import publish_event, EventType
 from app.core.auth_middleware import verify_project_access
 
@@ -59,11 +66,10 @@ async def export_pdf_dossier(
     )
     len(transactions)  # Approximate for exports
     
-    audit_pagination = PaginationParams(limit=100, offset=0)
-    logs, log_total = paginate_query(
-        db, AuditLog, audit_pagination,
-        order_by=AuditLog.timestamp.desc()
-    )
+    logs = keyset_paginate(
+        db, select(AuditLog), (AuditLog.timestamp, AuditLog.id),
+        limit=100, descending=True
+    ).items
     # 1. Calculate Leakage Summary
     total_inflation = sum(t.delta_inflation for t in transactions if t.delta_inflation > 0)
     total_xp = sum(
@@ -146,41 +152,91 @@ async def export_excel_audit(
 ):
     """
     Generates a full Excel spreadsheet for forensic auditors.
+    Constant memory: server-side cursor into a write-only workbook, streamed in chunks.
     """
-    pagination = PaginationParams(limit=10000, offset=0)  # Large limit for exports
-    transactions, _ = paginate_query(
-        db, Transaction, pagination,
-        filters=(Transaction.project_id == project.id)
-    )
-    data = [t.model_dump() for t in transactions]
-    if not data:
+    return _streaming_export(db, project, "xlsx")
+
+
+@router.get("/{project_id}/export/stream")
+async def export_transactions_stream(
+    format: str = Query("csv", description="csv, xlsx or parquet"),
+    project: Project = Depends(verify_project_access),
+    db: Session = Depends(get_session),
+):
+    """
+    Full-project transaction export with no row cap.
+    CSV is streamed row-chunk by row-chunk; XLSX/Parquet are built in a temp file first.
+    """
+    return _streaming_export(db, project, format)
+
+
+def _streaming_export(db: Session, project: Project, fmt: str) -> StreamingResponse:
+    if fmt not in export_engine.supported_formats():
+        raise HTTPException(status_code=400, detail=f"Unsupported export format: {fmt}")
+    if not export_engine.count_rows(db, project.id):
         raise HTTPException(status_code=404, detail="No forensic data found")
-    df = pd.DataFrame(data)
-    columns = {
-        "id": "Evidence ID",
-        "timestamp": "Trans-Date",
-        "description": "Description",
-        "actual_amount": "Actual Amount",
-        "proposed_amount": "Proposed/Contract",
-        "sender": "Originating Entity",
-        "receiver": "Receiving Entity",
-        "category_code": "Audit Code",
-        "status": "Detection Status",
-        "aml_stage": "AML Stage",
-        "delta_inflation": "Leakage Margin",
-        "audit_comment": "Forensic Notes",
-    }
-    available_cols = [c for c in columns.keys() if c in df.columns]
-    df = df[available_cols].rename(columns=columns)
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="Forensic Audit Trail")
-    output.seek(0)
+    # The request session closes before the body streams; iterators open their own
+    bind = db.get_bind()
+    if fmt == "csv":
+        body = export_engine.stream_csv_export(bind, project.id)
+    else:
+        body = export_engine.stream_file_export(bind, project.id, fmt)
     now_str = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     return StreamingResponse(
-        output,
-        media_type=("application/" "vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
-        headers={"Content-Disposition": (f"attachment; filename=Zenith_Audit_{now_str}.xlsx")},
+        body,
+        media_type=export_engine.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": (f"attachment; filename=Zenith_Audit_{now_str}.{fmt}")},
+    )
+
+
+@router.post("/{project_id}/export/jobs")
+async def submit_export_job(
+    format: str = Query("xlsx", description="csv, xlsx or parquet"),
+    project: Project = Depends(verify_project_access),
+):
+    """
+    Queues a background export for very large projects.
+    Poll /{project_id}/export/jobs/{job_id} and download when completed.
+    """
+    if format not in export_engine.supported_formats():
+        raise HTTPException(status_code=400, detail=f"Unsupported export format: {format}")
+    from app.tasks.export_tasks import submit_export_job as queue_export
+
+    job_id = queue_export(project.id, format)
+    return {"job_id": job_id, "status": "pending", "format": format}
+
+
+@router.get("/{project_id}/export/jobs/{job_id}")
+async def get_export_job(
+    job_id: str,
+    download: bool = Query(False),
+    project: Project = Depends(verify_project_access),
+    db: Session = Depends(get_session),
+):
+    """
+    Export job status; with download=true streams the finished file.
+    """
+    job = db.get(ProcessingJob, job_id)
+    if not job or job.project_id != project.id or job.data_type != "export":
+        raise HTTPException(status_code=404, detail="Export job not found")
+    fmt = (job.batch_config or {}).get("format", "xlsx")
+    if not download:
+        return {
+            "job_id": job.id,
+            "status": job.status,
+            "format": fmt,
+            "total_items": job.total_items,
+            "error_message": job.error_message,
+        }
+    if job.status != JobStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Export not ready (status: {job.status})")
+    path = export_engine.export_path(job.id, fmt)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=410, detail="Export file expired")
+    return FileResponse(
+        path,
+        media_type=export_engine.MEDIA_TYPES[fmt],
+        filename=f"Zenith_Audit_{job.id[:8]}.{fmt}",
     )
 
 
@@ -769,81 +825,50 @@ async def get_forensic_timeline(
 
 @router.get("/nexus/{project_id}")
 async def get_nexus_graph(
+    top_n: int = Query(500, ge=1, le=5000, description="Max transfer edges, ranked by flow"),
+    min_amount: float = Query(0.0, ge=0, description="Drop edges with less aggregate flow"),
     project: Project = Depends(verify_project_access),
     db: Session = Depends(get_session),
 ):
     """
     V5: Nexus Graph Engine.
     Builds a relationship graph between entities based on transactions and ownership.
+    Edges are (sender, receiver) aggregates; payload is bounded by top_n / min_amount.
     """
-    from app.models import Transaction, Entity, CorporateRelationship
-    
-    # 1. Fetch project transactions
-    txs = db.exec(select(Transaction).where(Transaction.project_id == project.id)).all()
-    
-    nodes = []
-    links = []
-    entity_ids = set()
-    
-    # Add Project Root Node
-    nodes.append({
-        "id": f"proj_{project.id}",
-        "label": project.name,
-        "type": "unknown",
-        "risk": 0.0,
-        "x": 50,
-        "y": 50
-    })
-
-    import random
-    
-    for tx in txs:
-        # Create nodes for sender and receiver
-        for name in [tx.sender, tx.receiver]:
-            if name not in entity_ids:
-                entity_ids.add(name)
-                # Find real entity risk if exists
-                ent = db.exec(select(Entity).where(Entity.name == name)).first()
-                nodes.append({
-                    "id": name,
-                    "label": name,
-                    "type": ent.type.value if ent else "unknown",
-                    "risk": ent.risk_score if ent else 0.1,
-                    "x": random.randint(10, 90),
-                    "y": random.randint(10, 90)
-                })
-        
-        # Create transactional link
-        links.append({
-            "source": tx.sender,
-            "target": tx.receiver,
-            "value": tx.actual_amount,
-            "type": "Transfer"
-        })
-        
-        # Link project to sender/receiver if not already linked
-        links.append({
-            "source": f"proj_{project.id}",
-            "target": tx.sender,
-            "value": tx.actual_amount,
-            "type": "Project_Flow"
-        })
+    # Cache lookups may wait on another worker's compute: keep them off the event loop
+    return await asyncio.to_thread(
+        NexusProjectionService.get_graph, db, project, top_n=top_n, min_amount=min_amount
+    )
+
+
+@router.get("/shared-attributes")
+async def stream_cross_project_links(
+    db: Session = Depends(get_session),
+    current_user=Depends(require_role(["admin"])),
+):
+    """
+    Shared-attribute clusters across all projects (NDJSON, one cluster per line).
+    Surfaces entities that reuse a tax id, bank account, phone or address between projects.
+    """
+    return StreamingResponse(_cluster_lines(db.get_bind(), None), media_type="application/x-ndjson")
+
+
+@router.get("/{project_id}/shared-attributes")
+async def stream_shared_attribute_links(
+    project: Project = Depends(verify_project_access),
+    db: Session = Depends(get_session),
+):
+    """
+    Shared-attribute clusters within a project (NDJSON, one cluster per line).
+    """
+    return StreamingResponse(_cluster_lines(db.get_bind(), project.id), media_type="application/x-ndjson")
+
 
-    # 2. Add Ownership Links (UBO)
-    rels = db.exec(select(CorporateRelationship)).all()
-    for rel in rels:
-        parent = db.get(Entity, rel.parent_entity_id)
-        child = db.get(Entity, rel.child_entity_id)
-        if parent and child and (parent.name in entity_ids or child.name in entity_ids):
-            links.append({
-                "source": parent.name,
-                "target": child.name,
-                "value": 0,
-                "type": "Ownership",
-                "stake": rel.stake_percentage
-            })
-
-    return {"nodes": nodes, "links": links}
+def _cluster_lines(bind, project_id: Optional[str]):
+    # The request session closes before the body streams
+    with Session(bind) as session:
+        for cluster in SharedAttributeDetector.iter_clusters(session, project_id):
+            yield json.dumps(cluster) + "\n"
 
 
 @router.get("/{project_id}/search")
@@ -0,0 +1,152 @@
+"""
+Forensic Keyword Matcher
+One compiled multi-pattern matcher for every keyword rule set, so a description is
+scanned once for all categories instead of once per keyword.
+"""
+
+import re
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Set
+import numpy as np
+from app.modules.fraud.trigger_tags import (
+    CASH_CHANNEL,
+    INVENTED_ENTRY,
+    PERSONAL_LEAKAGE,
+    UNVERIFIED_SPEND,
+)
+
+CONCEALMENT = "CONCEALMENT"
+PERSONAL_CONSUMPTION = "PERSONAL_CONSUMPTION"
+FAMILY_ALIAS = "FAMILY_ALIAS"
+PROJECT_EXPENSE = "PROJECT_EXPENSE"
+GHOST_ASSET = "GHOST_ASSET"
+CASH_WITHDRAWAL = "CASH_WITHDRAWAL"
+TRANSFER = "TRANSFER"
+INTERNAL_TRANSFER_HINT = "INTERNAL_TRANSFER_HINT"
+
+# Category -> keywords. Matching is case-insensitive substring, like the checks it replaces.
+FORENSIC_KEYWORDS: Dict[str, List[str]] = {
+    CONCEALMENT: ["tipex", "ti-pex", "redacted"],
+    PERSONAL_CONSUMPTION: [
+        "Tokopedia",
+        "Shopee",
+        "OVO",
+        "Gopay",
+        "Spotify",
+        "Zara",
+        "Poshboy",
+        "Guardian",
+        "Beer",
+        "Bir",
+        "Makan",
+        "Resto",
+        "Kopitiam",
+        "PLN",
+        "BPJS",
+        "Telkomsel",
+    ],
+    FAMILY_ALIAS: ["Faldi", "Sandi", "Ema", "Mama", "Clivord"],
+    PROJECT_EXPENSE: ["Semen", "Batu", "Solar", "Alat", "Bahan"],
+    GHOST_ASSET: ["excavator", "hilux", "truck"],
+    UNVERIFIED_SPEND: ["BUTUH BUKTI", "tidak ada kwitansi", "cek penggunaan"],
+    PERSONAL_LEAKAGE: ["KELUARGA", "PRIBADI", "LORLUN", "SAUDARA", "REK SENDIRI"],
+    INVENTED_ENTRY: ["NGARANG"],
+    CASH_CHANNEL: ["CASH", "TUNAI"],
+    CASH_WITHDRAWAL: ["TARIKAN ATM", "WITHDRAWAL", "TUNAI", "CASH"],
+    TRANSFER: ["TRSF", "TRANSFER", "TRF", "SWITCHING"],
+    INTERNAL_TRANSFER_HINT: ["KE REK", "PINDAH", "ANTAR REK"],
+}
+
+_END = ""
+
+
+def _trie_pattern(node: Dict[str, dict]) -> str:
+    """
+    Regex for a character trie. Shared prefixes are matched once, so the per-position
+    cost depends on keyword length, not on how many keywords there are.
+    Children come before the end marker, so the longest keyword wins at each position.
+    """
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch != _END]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if _END in node:
+        return ("(?:" + body + ")?") if len(branches) == 1 else body + "?"
+    return body
+
+
+class KeywordMatcher:
+    """
+    Case-insensitive multi-pattern matcher over named keyword categories.
+    A zero-width lookahead reports the longest keyword starting at every position;
+    keywords nested inside a longer match are credited through a precomputed closure,
+    so overlapping and nested hits are never lost.
+    """
+
+    def __init__(self, rules: Mapping[str, Iterable[str]]):
+        owners: Dict[str, Set[str]] = {}
+        for category, keywords in rules.items():
+            for keyword in keywords:
+                if keyword:
+                    owners.setdefault(keyword.lower(), set()).add(category)
+        self.categories: FrozenSet[str] = frozenset(rules)
+        self.keywords: FrozenSet[str] = frozenset(owners)
+
+        # Every keyword also implies the categories of keywords it contains
+        self._implied: Dict[str, FrozenSet[str]] = {
+            keyword: frozenset(
+                category
+                for inner, cats in owners.items()
+                if inner in keyword
+                for category in cats
+            )
+            for keyword in owners
+        }
+
+        trie: Dict[str, dict] = {}
+        for keyword in owners:
+            node = trie
+            for ch in keyword:
+                node = node.setdefault(ch, {})
+            node[_END] = {}
+        self._pattern: Optional[re.Pattern] = (
+            re.compile("(?=(" + _trie_pattern(trie) + "))", re.DOTALL) if owners else None
+        )
+
+    def match(self, text: Optional[str]) -> FrozenSet[str]:
+        """Every category with at least one keyword in text, in one pass."""
+        if not text or self._pattern is None:
+            return frozenset()
+        found: Set[str] = set()
+        seen: Set[str] = set()
+        for hit in self._pattern.finditer(text.lower()):
+            keyword = hit.group(1)
+            if keyword not in seen:
+                seen.add(keyword)
+                found.update(self._implied[keyword])
+        return frozenset(found)
+
+    def matches_any(self, text: Optional[str], *categories: str) -> bool:
+        return not self.match(text).isdisjoint(categories)
+
+    def match_many(self, texts: Iterable[Optional[str]]) -> List[FrozenSet[str]]:
+        """Batch variant; repeated descriptions (common in bank exports) are scanned once."""
+        memo: Dict[Optional[str], FrozenSet[str]] = {}
+        results = []
+        for text in texts:
+            hit = memo.get(text)
+            if hit is None:
+                hit = memo[text] = self.match(text)
+            results.append(hit)
+        return results
+
+    def masks(self, texts: Iterable[Optional[str]]) -> Dict[str, np.ndarray]:
+        """Column form of match_many: category -> boolean array aligned with texts."""
+        matched = self.match_many(texts)
+        masks = {category: np.zeros(len(matched), dtype=bool) for category in self.categories}
+        for i, cats in enumerate(matched):
+            for category in cats:
+                masks[category][i] = True
+        return masks
+
+
+forensic_keywords = KeywordMatcher(FORENSIC_KEYWORDS)
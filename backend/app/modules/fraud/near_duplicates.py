@@ -0,0 +1,151 @@
+"""
+Near-Duplicate Indexes
+Per-upload indexes for the analyst comparison: similar-description counts and entity
+name-variation lookups without comparing every row against every other row.
+"""
+
+from collections import Counter, defaultdict
+from itertools import combinations
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Set
+
+SIMILARITY_THRESHOLD = 0.8
+
+
+def _matches(a: str, b: str) -> int:
+    return sum(1 for ca, cb in zip(a, b) if ca == cb)
+
+
+def positional_similarity(a: str, b: str) -> float:
+    """Share of aligned character positions that agree, over the longer length."""
+    if not a or not b:
+        return 0.0
+    return _matches(a.lower(), b.lower()) / max(len(a), len(b))
+
+
+def _mismatch_budget(shorter: int, longer: int) -> int:
+    # matches > 0.8 * longer and matches = shorter - mismatches, so
+    # mismatches < shorter - 0.8 * longer = (5 * shorter - 4 * longer) / 5
+    return -(-(5 * shorter - 4 * longer) // 5) - 1
+
+
+class NearDuplicateIndex:
+    """
+    Counts, per description, the other descriptions with positional_similarity > 0.8.
+
+    Pigeonhole filter: strings of length L split their positions into K = m + 2 classes,
+    where m is the most mismatches a similar pair can have. A similar pair then agrees
+    entirely on at least two classes, so every pair of classes is a bucket key. Positions
+    are dealt to classes most-variable first, so the template text bank exports share
+    ("TRSF E-BANKING DB ...") never forms a key on its own. Every candidate is verified,
+    so counts are exact.
+    """
+
+    def __init__(self, descriptions: Iterable[str], threshold: float = SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        # lowercased text -> original spelling -> occurrences
+        self._groups: Dict[str, Counter] = defaultdict(Counter)
+        for text in descriptions:
+            if text:
+                self._groups[text.lower()][text] += 1
+        self._similar_totals = self._build()
+
+    @staticmethod
+    def _layouts(texts: List[str]) -> Dict[int, List[Callable[[str], Any]]]:
+        by_length: Dict[int, List[str]] = defaultdict(list)
+        for text in texts:
+            by_length[len(text)].append(text)
+        layouts = {}
+        for length, group in by_length.items():
+            k = min(length, _mismatch_budget(length, length) + 2)
+            variety = [len({text[i] for text in group}) for i in range(length)]
+            order = sorted(range(length), key=lambda i: -variety[i])
+            layouts[length] = [itemgetter(*order[j::k]) for j in range(k)]
+        return layouts
+
+    def _build(self) -> Dict[str, int]:
+        texts = list(self._groups)
+        layouts = self._layouts(texts)
+        # Keys are hashed to keep the index small; a collision only adds a candidate
+        buckets: Dict[int, List[str]] = defaultdict(list)
+        for text in texts:
+            length = len(text)
+            parts = [get(text) for get in layouts[length]]
+            if len(parts) == 1:
+                buckets[hash((length, parts[0]))].append(text)
+                continue
+            for i, j in combinations(range(len(parts)), 2):
+                buckets[hash((length, i, j, parts[i], parts[j]))].append(text)
+
+        totals = {text: sum(group.values()) for text, group in self._groups.items()}
+        similar: Dict[str, int] = dict.fromkeys(texts, 0)
+        for text in texts:
+            length = len(text)
+            candidates: Set[str] = set()
+            # Probe as the longer (or equal) side against every admissible shorter length
+            for shorter in range(length * 4 // 5 + 1, length + 1):
+                layout = layouts.get(shorter)
+                if layout is None:
+                    continue
+                # With at most b mismatches, any b + 2 classes hold two that agree
+                parts = [get(text) for get in layout[: _mismatch_budget(shorter, length) + 2]]
+                if len(layout) == 1:
+                    candidates.update(buckets.get(hash((shorter, parts[0])), ()))
+                    continue
+                for i, j in combinations(range(len(parts)), 2):
+                    candidates.update(buckets.get(hash((shorter, i, j, parts[i], parts[j])), ()))
+            for other in candidates:
+                if len(other) == length and other <= text:
+                    continue  # equal-length pairs are found from both sides; keep one
+                if _matches(text, other) / length > self.threshold:
+                    similar[text] += totals[other]
+                    similar[other] += totals[text]
+        return similar
+
+    def similar_count(self, description: str) -> int:
+        """Other rows whose text differs from description but is more than 80% similar."""
+        if not description:
+            return 0
+        key = description.lower()
+        group = self._groups.get(key)
+        if group is None:
+            return sum(
+                sum(g.values())
+                for text, g in self._groups.items()
+                if positional_similarity(description, text) > self.threshold
+            )
+        # Different spellings of the same lowercased text are identical after lowering
+        return self._similar_totals[key] + sum(group.values()) - group[description]
+
+
+class NameVariationIndex:
+    """
+    Substring lookups over extracted entity names via a trigram posting index:
+    only names containing the query's rarest trigram are checked. Results are memoized.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self._names: List[str] = list(dict.fromkeys(names))
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        for i, name in enumerate(self._names):
+            for gram in {name[k:k + 3] for k in range(len(name) - 2)}:
+                self._postings[gram].append(i)
+        self._memo: Dict[str, List[str]] = {}
+
+    @classmethod
+    def from_frequency(cls, frequency: Mapping[str, int]) -> "NameVariationIndex":
+        return cls(frequency.keys())
+
+    def variations(self, part: str) -> List[str]:
+        """Names that contain part and are not part itself, in insertion order."""
+        cached = self._memo.get(part)
+        if cached is not None:
+            return cached
+        if len(part) < 3:
+            found = [n for n in self._names if part in n and n != part]
+        else:
+            grams = {part[k:k + 3] for k in range(len(part) - 2)}
+            rarest = min((self._postings.get(g, ()) for g in grams), key=len)
+            found = [self._names[i] for i in rarest if part in self._names[i] and self._names[i] != part]
+        self._memo[part] = found
+        return found
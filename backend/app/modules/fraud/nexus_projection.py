@@ -0,0 +1,252 @@
+"""
+Nexus Graph Projection
+Pre-aggregated entity graph for the 3D Nexus view: SQL GROUP BY edges, batched entity
+lookups, project-scoped ownership links, cached per project data version.
+
+The data version is the cache's tag version for the project's transactions and for
+entities: every commit that wrote a Transaction, Entity or CorporateRelationship bumps
+it (see _invalidate_on_commit), so renames and type changes are seen without any query;
+flushes only record what they touched and rollbacks discard it.
+Bulk writes that bypass the ORM call invalidate_transaction_cache themselves.
+"""
+
+import hashlib
+from typing import Any, Dict, Iterable, List, Set
+from sqlmodel import Session, select
+from sqlalchemy import event, func, or_
+from sqlalchemy.orm import Session as OrmSession
+from app.models import Transaction, Entity, CorporateRelationship, Project
+from app.core.query_cache import query_cache, transaction_tag, entity_tag
+from app.core.cache import project_tag
+
+IN_CHUNK = 500
+DEFAULT_TOP_N = 500
+CACHE_TTL = 3600
+
+
+def _chunks(values: List[Any], size: int = IN_CHUNK) -> Iterable[List[Any]]:
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _stable_position(name: str) -> Dict[str, int]:
+    """Deterministic layout seed so cached and fresh payloads render identically."""
+    digest = hashlib.md5(name.encode("utf-8")).digest()
+    return {"x": 10 + digest[0] % 81, "y": 10 + digest[1] % 81}
+
+
+class NexusProjectionService:
+    """
+    Builds the Nexus node/link payload from aggregates instead of raw transactions.
+    Level-of-detail: keeps the top-N (sender, receiver) edges by flow above min_amount.
+    """
+
+    @staticmethod
+    def cache_tags(project_id: str) -> List[str]:
+        return [project_tag(project_id), transaction_tag(project_id), entity_tag()]
+
+    @staticmethod
+    def data_version(project_id: str) -> str:
+        """Version of everything the projection depends on; bumped by writes, not probed."""
+        return query_cache.version(*NexusProjectionService.cache_tags(project_id))
+
+    @staticmethod
+    def get_graph(
+        db: Session,
+        project: Project,
+        top_n: int = DEFAULT_TOP_N,
+        min_amount: float = 0.0,
+    ) -> Dict[str, Any]:
+        version = NexusProjectionService.data_version(project.id)
+        cache_key = f"{query_cache.prefix}nexus:{project.id}:{version}:{top_n}:{min_amount}"
+
+        def compute() -> Dict[str, Any]:
+            graph = NexusProjectionService.build(db, project, top_n=top_n, min_amount=min_amount)
+            graph["meta"]["data_version"] = version
+            return graph
+
+        return query_cache.get_or_compute(
+            cache_key, compute, ttl=CACHE_TTL, tags=NexusProjectionService.cache_tags(project.id)
+        )
+
+    @staticmethod
+    def build(
+        db: Session,
+        project: Project,
+        top_n: int = DEFAULT_TOP_N,
+        min_amount: float = 0.0,
+    ) -> Dict[str, Any]:
+        flow = func.sum(Transaction.actual_amount)
+
+        # 1. Edge aggregates: one row per (sender, receiver)
+        edge_stmt = (
+            select(Transaction.sender, Transaction.receiver, flow, func.count(Transaction.id))
+            .where(Transaction.project_id == project.id)
+            .group_by(Transaction.sender, Transaction.receiver)
+        )
+        if min_amount > 0:
+            edge_stmt = edge_stmt.having(flow >= min_amount)
+        total_edges = db.exec(select(func.count()).select_from(edge_stmt.subquery())).one()
+        edges = db.exec(edge_stmt.order_by(flow.desc()).limit(top_n)).all()
+
+        names: List[str] = []
+        seen: Set[str] = set()
+        for sender, receiver, _, _ in edges:
+            for name in (sender, receiver):
+                if name not in seen:
+                    seen.add(name)
+                    names.append(name)
+
+        # 2. Node aggregates (over all project flow, not only the kept edges)
+        sent: Dict[str, float] = {}
+        received: Dict[str, float] = {}
+        for batch in _chunks(names):
+            for name, total in db.exec(
+                select(Transaction.sender, flow)
+                .where(Transaction.project_id == project.id, Transaction.sender.in_(batch))
+                .group_by(Transaction.sender)
+            ).all():
+                sent[name] = float(total or 0.0)
+            for name, total in db.exec(
+                select(Transaction.receiver, flow)
+                .where(Transaction.project_id == project.id, Transaction.receiver.in_(batch))
+                .group_by(Transaction.receiver)
+            ).all():
+                received[name] = float(total or 0.0)
+
+        # 3. Entities in one IN query per chunk; project-scoped rows win over global ones
+        entities_by_name: Dict[str, Entity] = {}
+        for batch in _chunks(names):
+            for ent in db.exec(
+                select(Entity).where(
+                    Entity.name.in_(batch),
+                    or_(Entity.project_id == project.id, Entity.project_id.is_(None)),
+                )
+            ).all():
+                current = entities_by_name.get(ent.name)
+                if current is None or (current.project_id != project.id and ent.project_id == project.id):
+                    entities_by_name[ent.name] = ent
+
+        nodes: List[Dict[str, Any]] = [{
+            "id": f"proj_{project.id}",
+            "label": project.name,
+            "type": "unknown",
+            "risk": 0.0,
+            "x": 50,
+            "y": 50,
+        }]
+        for name in names:
+            ent = entities_by_name.get(name)
+            nodes.append({
+                "id": name,
+                "label": name,
+                "type": ent.type.value if ent else "unknown",
+                "risk": ent.risk_score if ent else 0.1,
+                "total_sent": sent.get(name, 0.0),
+                "total_received": received.get(name, 0.0),
+                **_stable_position(name),
+            })
+
+        links: List[Dict[str, Any]] = []
+        for sender, receiver, total, count in edges:
+            links.append({
+                "source": sender,
+                "target": receiver,
+                "value": float(total or 0.0),
+                "tx_count": count,
+                "type": "Transfer",
+            })
+        for name in {sender for sender, _, _, _ in edges}:
+            links.append({
+                "source": f"proj_{project.id}",
+                "target": name,
+                "value": sent.get(name, 0.0),
+                "type": "Project_Flow",
+            })
+
+        # 4. Ownership links restricted to entities present in the projection
+        entity_ids = [ent.id for ent in entities_by_name.values()]
+        relationships: Dict[str, CorporateRelationship] = {}
+        for batch in _chunks(entity_ids):
+            for rel in db.exec(
+                select(CorporateRelationship).where(
+                    or_(
+                        CorporateRelationship.parent_entity_id.in_(batch),
+                        CorporateRelationship.child_entity_id.in_(batch),
+                    )
+                )
+            ).all():
+                relationships[rel.id] = rel
+
+        id_to_name = {ent.id: ent.name for ent in entities_by_name.values()}
+        missing = list({
+            eid
+            for rel in relationships.values()
+            for eid in (rel.parent_entity_id, rel.child_entity_id)
+            if eid not in id_to_name
+        })
+        for batch in _chunks(missing):
+            for eid, name in db.exec(select(Entity.id, Entity.name).where(Entity.id.in_(batch))).all():
+                id_to_name[eid] = name
+
+        for rel in relationships.values():
+            parent = id_to_name.get(rel.parent_entity_id)
+            child = id_to_name.get(rel.child_entity_id)
+            if parent and child:
+                links.append({
+                    "source": parent,
+                    "target": child,
+                    "value": 0,
+                    "type": "Ownership",
+                    "stake": rel.stake_percentage,
+                })
+
+        return {
+            "nodes": nodes,
+            "links": links,
+            "meta": {
+                "total_edges": total_edges,
+                "returned_edges": len(edges),
+                "truncated": total_edges > len(edges),
+                "top_n": top_n,
+                "min_amount": min_amount,
+            },
+        }
+
+
+_PENDING_KEY = "nexus_projection.pending"
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _collect_on_flush(session, flush_context):
+    # Record what the flush touched; nothing is invalidated until the commit lands
+    projects: Set[str] = set()
+    entities = False
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Transaction):
+            if obj.project_id:
+                projects.add(obj.project_id)
+        elif isinstance(obj, (Entity, CorporateRelationship)):
+            entities = True
+    if projects or entities:
+        pending = session.info.setdefault(_PENDING_KEY, {"projects": set(), "entities": False})
+        pending["projects"] |= projects
+        pending["entities"] = pending["entities"] or entities
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _invalidate_on_commit(session):
+    # One invalidation per touched project per transaction, not one per row or flush
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    if pending["projects"]:
+        query_cache.invalidate(*(transaction_tag(project_id) for project_id in pending["projects"]))
+    if pending["entities"]:
+        query_cache.invalidate(entity_tag())
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _discard_on_rollback(session):
+    # Rolled-back writes never happened: keep the cached projections
+    session.info.pop(_PENDING_KEY, None)
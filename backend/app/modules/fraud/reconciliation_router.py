@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlmodel import Session, select
-from typing import List
+from typing import List, Optional
 from datetime import datetime, UTC, timedelta
 from app.core.db import get_session
 from app.core.event_bus import publish_event, EventType
@@ -14,12 +14,21 @@ from app.models import (
     ReconciliationSettings,
 )
 from app.core.audit import AuditLogger
+from app.core.pagination import KeysetPage, keyset_paginate
 from app.core.reconciliation_intelligence import (
     VendorMatcher,
     ConfidenceCalculator,
     extract_all_references,
 )
 from app.modules.forensic.service import GeographicValidator
+from app.modules.fraud.trigger_tags import (
+    sync_trigger_tags,
+    UNVERIFIED_SPEND,
+    PERSONAL_LEAKAGE,
+    INVENTED_ENTRY,
+    CASH_CHANNEL,
+)
+from app.modules.fraud.keyword_matcher import forensic_keywords
 from thefuzz import fuzz
 from app.core.auth_middleware import verify_project_access
 from app.models import Project
@@ -42,28 +51,27 @@ def detect_forensic_triggers(tx: Transaction, db: Session):
         triggers.append(f"Penggelembungan: {tx.delta_inflation} IDR variance")
         tx.status = "flagged"
         tx.aml_stage = AMLStage.PLACEMENT  # Potential attempt to inflate expenses
+    # Keyword categories for both free-text fields, one pass each
+    desc_hits = forensic_keywords.match(tx.description)
+    audit_hits = forensic_keywords.match(tx.audit_comment)
     # 2. Evidence Gaps
-    keywords_needs_proof = ["BUTUH BUKTI", "tidak ada kwitansi", "cek penggunaan"]
-    if tx.audit_comment and any(kw in tx.audit_comment.upper() for kw in keywords_needs_proof):
+    if UNVERIFIED_SPEND in audit_hits:
         tx.needs_proof = True
         tx.status = "locked"
         triggers.append("Evidence Gap: Entry is locked until proof is provided.")
         tx.aml_stage = AMLStage.PLACEMENT  # Lack of proof can indicate placement
     # 3. Personal Leakage Quarantine (XP)
-    personal_keywords = ["KELUARGA", "PRIBADI", "LORLUN", "SAUDARA", "REK SENDIRI"]
-    desc_upper = (tx.description or "").upper()
-    audit_upper = (tx.audit_comment or "").upper()
     if (
         tx.category_code == TransactionCategory.XP
-        or any(kw in desc_upper for kw in personal_keywords)
-        or any(kw in audit_upper for kw in personal_keywords)
+        or PERSONAL_LEAKAGE in desc_hits
+        or PERSONAL_LEAKAGE in audit_hits
     ):
         tx.potential_misappropriation = True
         tx.category_code = TransactionCategory.XP
         triggers.append("Personal Leakage: Quarantined from Project P&L.")
         tx.aml_stage = AMLStage.PLACEMENT  # Direct personal use is a form of placement
     # 4. "Ngarang" detection
-    if tx.audit_comment and "NGARANG" in tx.audit_comment.upper():
+    if INVENTED_ENTRY in audit_hits:
         tx.status = "flagged"
         triggers.append("Forensic Red Flag: Entry marked as 'Ngarang' (Invented).")
         tx.aml_stage = AMLStage.LAYERING  # Invented entries are often used to obscure origin
@@ -112,9 +120,8 @@ def detect_forensic_triggers(tx: Transaction, db: Session):
                 f"Velocity Risk: {len(velocity_cluster) + 1} transfers to '{tx.receiver}' in 48h period."
             )
     # 7. Channel & Structuring Risk
-    desc_u = (tx.description or "").upper()
     # 7a. Cash Threshold
-    if ("CASH" in desc_u or "TUNAI" in desc_u) and tx.actual_amount > 100_000_000:
+    if CASH_CHANNEL in desc_hits and tx.actual_amount > 100_000_000:
         tx.status = "flagged"
         tx.aml_stage = AMLStage.PLACEMENT
         triggers.append(f"Channel Risk: Large CASH transaction ({tx.actual_amount:,.0f} IDR).")
@@ -150,6 +157,8 @@ def detect_forensic_triggers(tx: Transaction, db: Session):
     if tx.aml_stage is None and tx.status == "flagged":
         if tx.actual_amount > 50_000_000:  # Threshold for integration check
             tx.aml_stage = AMLStage.INTEGRATION
+    # Indexed tags for alert sweeps (cleared when a re-scan finds nothing)
+    sync_trigger_tags(db, tx.id, tx.project_id, triggers)
     # Persist triggers so they appear in UI
     if triggers:
         combined_triggers = "; ".join(triggers)
@@ -163,28 +172,79 @@ def detect_forensic_triggers(tx: Transaction, db: Session):
     return triggers
 
 
+PAGE_HEADER = "X-Next-Cursor"
+
+
+def _cursor_page(db: Session, query, sort_columns, limit, cursor, response: Response, descending=False):
+    """
+    Keyset page for list endpoints that return a bare array: the continuation
+    cursor travels in the X-Next-Cursor header. Without limit/cursor the full
+    list is returned as before.
+    """
+    if limit is None and cursor is None:
+        return db.exec(query).all()
+    try:
+        page = keyset_paginate(db, query, sort_columns, limit=limit or 100, cursor=cursor, descending=descending)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page.next_cursor:
+        response.headers[PAGE_HEADER] = page.next_cursor
+    return page.items
+
+
 @router.get("/{project_id}/internal", response_model=List[Transaction])
 async def get_internal_transactions(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
     project: Project = Depends(verify_project_access),
     db: Session = Depends(get_session),
 ):
-    return db.exec(
+    query = (
         select(Transaction)
         .where(Transaction.project_id == project.id)
         .where(Transaction.source_type == TransactionSource.INTERNAL_LEDGER)
-    ).all()
+    )
+    return _cursor_page(db, query, (Transaction.timestamp, Transaction.id), limit, cursor, response)
 
 
 @router.get("/{project_id}/bank", response_model=List[Transaction])
 async def get_bank_transactions(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
     project: Project = Depends(verify_project_access),
     db: Session = Depends(get_session),
 ):
-    return db.exec(
+    query = (
         select(Transaction)
         .where(Transaction.project_id == project.id)
         .where(Transaction.source_type == TransactionSource.BANK_STATEMENT)
-    ).all()
+    )
+    return _cursor_page(db, query, (Transaction.timestamp, Transaction.id), limit, cursor, response)
+
+
+@router.get("/{project_id}/matches", response_model=KeysetPage[ReconciliationMatch])
+async def list_matches(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    count: str = Query("none", pattern="^(none|estimate|exact)$"),
+    project: Project = Depends(verify_project_access),
+    db: Session = Depends(get_session),
+):
+    """Persisted matches for a project, newest first, keyset-paginated."""
+    query = (
+        select(ReconciliationMatch)
+        .join(Transaction, Transaction.id == ReconciliationMatch.internal_tx_id)
+        .where(Transaction.project_id == project.id)
+    )
+    try:
+        return keyset_paginate(
+            db, query, (ReconciliationMatch.matched_at, ReconciliationMatch.id),
+            limit=limit, cursor=cursor, descending=True, count=count,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/{project_id}/scan")
@@ -591,13 +651,21 @@ async def get_semantic_matches(
 
 
 @router.get("/audit/{entity_id}", response_model=List[AuditLog])
-async def get_audit_trail(entity_id: str, db: Session = Depends(get_session)):
+async def get_audit_trail(
+    entity_id: str,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_session),
+):
     """
     Fetches the immutable forensic audit trail for a specific entity.
+    Pass limit (and then the X-Next-Cursor header as cursor) to page through it.
     """
-    return db.exec(
-        select(AuditLog).where(AuditLog.entity_id == entity_id).order_by(AuditLog.timestamp.desc())
-    ).all()
+    query = select(AuditLog).where(AuditLog.entity_id == entity_id)
+    if limit is None and cursor is None:
+        query = query.order_by(AuditLog.timestamp.desc())
+    return _cursor_page(db, query, (AuditLog.timestamp, AuditLog.id), limit, cursor, response, descending=True)
 
 
 @router.post("/{project_id}/run")
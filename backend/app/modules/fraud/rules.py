@@ -1,29 +1,21 @@
 from typing import Dict, List, Any
 from app.models import Transaction, TransactionCategory
 from app.core.event_bus import publish_event, EventType
+from app.modules.fraud.keyword_matcher import (
+    FORENSIC_KEYWORDS,
+    CONCEALMENT,
+    PERSONAL_CONSUMPTION,
+    FAMILY_ALIAS,
+    PROJECT_EXPENSE,
+    GHOST_ASSET,
+    forensic_keywords,
+)
 
 
 class ForensicFraudEngine:
-    PERSONAL_KEYWORDS = [
-        "Tokopedia",
-        "Shopee",
-        "OVO",
-        "Gopay",
-        "Spotify",
-        "Zara",
-        "Poshboy",
-        "Guardian",
-        "Beer",
-        "Bir",
-        "Makan",
-        "Resto",
-        "Kopitiam",
-        "PLN",
-        "BPJS",
-        "Telkomsel",
-    ]
-    FAMILY_ALIASES = ["Faldi", "Sandi", "Ema", "Mama", "Clivord"]
-    PROJECT_EXPENSES = ["Semen", "Batu", "Solar", "Alat", "Bahan"]
+    PERSONAL_KEYWORDS = FORENSIC_KEYWORDS[PERSONAL_CONSUMPTION]
+    FAMILY_ALIASES = FORENSIC_KEYWORDS[FAMILY_ALIAS]
+    PROJECT_EXPENSES = FORENSIC_KEYWORDS[PROJECT_EXPENSE]
 
     @staticmethod
     def evaluate_transaction(tx: Transaction) -> Dict[str, Any]:
@@ -33,23 +25,24 @@ class ForensicFraudEngine:
         mens_rea = []
         desc = tx.description or ""
         receiver = tx.receiver or ""
+        # One pass per field for every keyword category
+        desc_hits = forensic_keywords.match(desc)
+        is_family = FAMILY_ALIAS in forensic_keywords.match(receiver)
         # 1. Tipex Detection (Concealment)
-        if any(kw in desc.lower() for kw in ["tipex", "ti-pex", "redacted"]):
+        if CONCEALMENT in desc_hits:
             tx.is_redacted = True
             risk_score += 0.4
             alerts.append("Concealment via Redaction (Tipex)")
             mens_rea.append("Intentional concealment of beneficial owner")
         # 2. Personal Misappropriation Detection
         is_personal = False
-        keywords = ForensicFraudEngine.PERSONAL_KEYWORDS
-        if any(kw.lower() in desc.lower() for kw in keywords):
+        if PERSONAL_CONSUMPTION in desc_hits:
             is_personal = True
             risk_score += 0.3
             alerts.append("Personal consumption detected in description")
             mens_rea.append("Use of project funds for personal lifestyle")
         # 3. Family Funneling
-        family_aliases = ForensicFraudEngine.FAMILY_ALIASES
-        if any(alias.lower() in receiver.lower() for alias in family_aliases):
+        if is_family:
             is_personal = True
             risk_score += 0.5
             alerts.append(f"Unjustified beneficiary: Family member ({receiver})")
@@ -64,9 +57,6 @@ class ForensicFraudEngine:
             aml_stage = "PLACEMENT"
         
         # LAYERING: Complex webs or concealment
-        is_family = any(
-            alias.lower() in receiver.lower() for alias in ForensicFraudEngine.FAMILY_ALIASES
-        )
         if tx.is_redacted or is_family or tx.is_circular:
             aml_stage = "LAYERING"
             
@@ -81,7 +71,7 @@ class ForensicFraudEngine:
             alerts.append("High Intent: Personal expense disguised as business operation")
             mens_rea.append("Deliberate misclassification of personal expenses")
         # 5. Asset Monitoring
-        if any(kw.lower() in desc.lower() for kw in ["excavator", "hilux", "truck"]):
+        if GHOST_ASSET in desc_hits:
             alerts.append("Asset tracking required (Ghost Asset risk)")
         tx.mens_rea_description = "; ".join(mens_rea)
         risk_score = min(risk_score, 1.0)
@@ -5,12 +5,18 @@ from app.core.db import get_session
 from app.modules.fraud.sankey_service import SankeyMapService
 from app.core.auth_middleware import verify_project_access
 from app.core.redis_client import cache_endpoint
+from app.core.cache import project_tag
+from app.core.query_cache import transaction_tag
 from app.models import Project, Case
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/forensic/{project_id}/sankey-map", tags=["Sankey"])
 
 
+def _flow_tags(project_id: str, **_):
+    return [project_tag(project_id), transaction_tag(project_id)]
+
+
 async def validate_case_in_project(case_id: str, project_id: str, db: Session):
     """Helper to ensure case belongs to project."""
     case = db.exec(
@@ -24,7 +30,7 @@ async def validate_case_in_project(case_id: str, project_id: str, db: Session):
 
 
 @router.get("/flow/{case_id}")
-@cache_endpoint(ttl=300)
+@cache_endpoint(ttl=300, tags=_flow_tags)
 async def get_sankey_flow(
     project_id: str,
     case_id: str,
@@ -41,7 +47,7 @@ async def get_sankey_flow(
 
 
 @router.get("/high-velocity/{case_id}")
-@cache_endpoint(ttl=300)
+@cache_endpoint(ttl=300, tags=_flow_tags)
 async def get_high_velocity_alerts(
     project_id: str,
     case_id: str,
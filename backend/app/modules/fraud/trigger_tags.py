@@ -0,0 +1,81 @@
+"""
+Forensic Trigger Tags
+Normalized, indexed projection of the free-text triggers written by
+detect_forensic_triggers, so alert sweeps are set-based lookups instead of LIKE scans.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlmodel import Session, select, delete, func
+from app.models import TransactionTriggerTag
+
+INFLATION = "INFLATION"
+UNVERIFIED_SPEND = "UNVERIFIED_SPEND"
+PERSONAL_LEAKAGE = "PERSONAL_LEAKAGE"
+INVENTED_ENTRY = "INVENTED_ENTRY"
+DUPLICATE = "DUPLICATE"
+VELOCITY = "VELOCITY"
+CASH_CHANNEL = "CASH_CHANNEL"
+STRUCTURING = "STRUCTURING"
+DISTANT_VENDOR_RISK = "DISTANT_VENDOR_RISK"
+RECIDIVIST = "RECIDIVIST"
+
+# Trigger text prefix -> tag (prefixes are the headings detect_forensic_triggers writes)
+TRIGGER_PREFIXES: List[Tuple[str, str]] = [
+    ("Penggelembungan", INFLATION),
+    ("Evidence Gap", UNVERIFIED_SPEND),
+    ("Personal Leakage", PERSONAL_LEAKAGE),
+    ("Forensic Red Flag: Entry marked as 'Ngarang'", INVENTED_ENTRY),
+    ("Potential Duplicate", DUPLICATE),
+    ("Velocity Risk", VELOCITY),
+    ("Channel Risk", CASH_CHANNEL),
+    ("Structuring Risk", STRUCTURING),
+    ("Geographic Mismatch", DISTANT_VENDOR_RISK),
+    ("Global Risk: Recidivist", RECIDIVIST),
+]
+
+
+def classify_trigger(trigger: str) -> Optional[str]:
+    for prefix, tag in TRIGGER_PREFIXES:
+        if trigger.startswith(prefix):
+            return tag
+    return None
+
+
+def sync_trigger_tags(db: Session, transaction_id: str, project_id: Optional[str], triggers: Iterable[str]) -> List[str]:
+    """
+    Replaces the tag set of one transaction with the tags of its latest triggers.
+    Caller commits (same unit of work as the trigger text itself).
+    """
+    tags = sorted({tag for tag in (classify_trigger(t) for t in triggers) if tag})
+    db.exec(delete(TransactionTriggerTag).where(TransactionTriggerTag.transaction_id == transaction_id))
+    for tag in tags:
+        db.add(TransactionTriggerTag(transaction_id=transaction_id, tag=tag, project_id=project_id))
+    return tags
+
+
+def tag_summary(
+    db: Session,
+    tags: Iterable[str],
+    project_ids: Optional[List[str]] = None,
+) -> Dict[Tuple[str, str], Tuple[int, str]]:
+    """
+    (project_id, tag) -> (tagged transaction count, one representative transaction id),
+    in one grouped index scan.
+    """
+    stmt = (
+        select(
+            TransactionTriggerTag.project_id,
+            TransactionTriggerTag.tag,
+            func.count(),
+            func.max(TransactionTriggerTag.transaction_id),
+        )
+        .where(TransactionTriggerTag.tag.in_(list(tags)))
+        .where(TransactionTriggerTag.project_id.is_not(None))
+        .group_by(TransactionTriggerTag.project_id, TransactionTriggerTag.tag)
+    )
+    if project_ids is not None:
+        stmt = stmt.where(TransactionTriggerTag.project_id.in_(project_ids))
+    return {
+        (project_id, tag): (count, transaction_id)
+        for project_id, tag, count, transaction_id in db.exec(stmt).all()
+    }
@@ -1,18 +1,149 @@
-
 """
 Data Hospital Service.
 The 'ICU' for failed data rows.
 Uses LLMs (or regex heuristics) to repair malformed data.
+
+Triage runs in batches: rows are leased (SKIP LOCKED on PostgreSQL), the repair
+pipeline runs column-wise over the whole batch, and results land in one bulk UPDATE.
 """
-from typing import Dict, Any
-from sqlmodel import Session
+from typing import Callable, Dict, Any, List, Optional
+from datetime import datetime, UTC, timedelta
+from sqlmodel import Session, select, func
+from sqlalchemy import and_, or_, update
+import ast
 import json
 import re
-from app.models import QuarantineRow
+import uuid
+
+import pandas as pd
+
+from app.core.metrics import QUARANTINE_TRIAGED
+from app.models import Ingestion, QuarantineRow
+
+# A repair step sees the still-unfixed rows (columns: raw_content, error) and returns
+# fix proposals indexed like the rows it repaired.
+RepairStep = Callable[[pd.DataFrame], pd.Series]
+
+AMOUNT_FIELDS = ("amount", "proposed_amount", "actual_amount")
+NUMERIC_FIELDS = AMOUNT_FIELDS + ("latitude", "longitude")
+_NUMERIC_ERROR = r"could not convert|invalid literal|float|int\(\)|numeric|number"
+_DATE = r"(\d{4}-\d{2}-\d{2})"
+
+
+def parse_record(raw: str) -> Optional[Dict[str, Any]]:
+    """Reads a quarantined row back into a dict: JSON, or the str(dict) repr ingestion stores."""
+    try:
+        record = json.loads(raw)
+    except (TypeError, ValueError):
+        text = re.sub(r"\b(?:Timestamp|datetime\.date(?:time)?)\('([^']*)'\)", r"'\1'", raw)
+        text = re.sub(r"(?<=[:\[,]\s)(?:nan|NaT)(?=\s*[,}\]])", "None", text)
+        try:
+            record = ast.literal_eval(text)
+        except (ValueError, SyntaxError, MemoryError, RecursionError):
+            return None
+    return record if isinstance(record, dict) else None
+
+
+def json_quote_fix(frame: pd.DataFrame) -> pd.Series:
+    """Single-quoted JSON: swap the quotes and keep the rows that now parse."""
+    rows = frame[frame["error"].str.contains("json", regex=False)]
+    corrected = rows["raw_content"].str.replace("'", '"', regex=False)
+    fixes = {}
+    for idx, text in corrected.items():
+        try:
+            json.loads(text)
+        except ValueError:
+            continue
+        fixes[idx] = {"method": "json_quote_fix", "content": text}
+    return pd.Series(fixes, dtype=object)
+
+
+def date_extraction(frame: pd.DataFrame) -> pd.Series:
+    """Date errors: pull the first YYYY-MM-DD out of the row and use it as the timestamp."""
+    rows = frame[frame["error"].str.contains("date", regex=False)]
+    found = rows["raw_content"].str.extract(_DATE, expand=False).dropna()
+    fixes = {}
+    for idx, date in found.items():
+        fix = {"method": "date_extraction", "date_found": date}
+        record = parse_record(frame.at[idx, "raw_content"])
+        if record is not None:
+            record["timestamp"] = date
+            fix["content"] = json.dumps(record, default=str)
+        fixes[idx] = fix
+    return pd.Series(fixes, dtype=object)
+
+
+def normalize_numbers(values: pd.Series) -> pd.Series:
+    """
+    Currency strings to floats (NaN when unreadable): strips Rp/IDR/USD/$ and spaces, reads
+    "(x)" as negative, and picks the decimal separator per value -- the later of "." and ","
+    when both appear, "." grouping when it repeats ("1.500.000"), "," grouping for
+    "1,500,000" and a decimal comma otherwise ("12,5").
+    """
+    s = values.astype(str).str.strip()
+    s = s.str.replace(r"(?i)^(?:rp\.?|idr|usd|\$)\s*", "", regex=True)
+    s = s.str.replace(r"\s+", "", regex=True).str.replace(r"^\((.*)\)$", r"-\1", regex=True)
+
+    has_dot = s.str.contains(".", regex=False)
+    has_comma = s.str.contains(",", regex=False)
+    both = has_dot & has_comma
+    dot_decimal = both & (s.str.rfind(".") > s.str.rfind(","))
+    comma_grouping = has_comma & ~has_dot & s.str.fullmatch(r"-?\d{1,3}(?:,\d{3})+")
+    comma_decimal = (both & ~dot_decimal) | (has_comma & ~has_dot & ~comma_grouping)
+    dot_grouping = has_dot & ~has_comma & (s.str.count(r"\.") > 1)
+
+    out = s.copy()
+    out[dot_decimal | comma_grouping] = s[dot_decimal | comma_grouping].str.replace(",", "", regex=False)
+    out[dot_grouping] = s[dot_grouping].str.replace(".", "", regex=False)
+    out[comma_decimal] = s[comma_decimal].str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    return pd.to_numeric(out, errors="coerce")
+
+
+def numeric_cleanup(frame: pd.DataFrame) -> pd.Series:
+    """Amount/coordinate conversion errors: normalize every numeric field of the batch at once."""
+    rows = frame[frame["error"].str.contains(_NUMERIC_ERROR, regex=True)]
+    records = {idx: parse_record(raw) for idx, raw in rows["raw_content"].items()}
+    cells = [
+        (idx, field, value)
+        for idx, record in records.items() if record
+        for field, value in record.items()
+        if field in NUMERIC_FIELDS and value is not None and str(value).strip()
+    ]
+    if not cells:
+        return pd.Series(dtype=object)
+    long = pd.DataFrame(cells, columns=["row", "field", "value"])
+    long["number"] = normalize_numbers(long["value"])
+
+    fixes = {}
+    for idx, group in long.groupby("row", sort=False):
+        if group["number"].isna().any():
+            continue  # one unreadable amount keeps the whole row for a specialist
+        record = records[idx]
+        record.update(zip(group["field"], group["number"].astype(float)))
+        fixes[idx] = {
+            "method": "numeric_cleanup",
+            "fields": list(group["field"]),
+            "content": json.dumps(record, default=str),
+        }
+    return pd.Series(fixes, dtype=object)
+
+
+DEFAULT_REPAIRS: List[RepairStep] = [json_quote_fix, date_extraction, numeric_cleanup]
+MANUAL_REVIEW = {"method": "manual_review_needed", "note": "Too complex for heuristics"}
+
+
+def status_counts(db: Session, project_id: Optional[str] = None) -> Dict[str, int]:
+    """Quarantine rows per status in one GROUP BY."""
+    query = select(QuarantineRow.status, func.count()).group_by(QuarantineRow.status)
+    if project_id:
+        query = query.where(QuarantineRow.project_id == project_id)
+    return {status: count for status, count in db.exec(query).all()}
+
 
 class DataHospital:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, repairs: Optional[List[RepairStep]] = None):
         self.db = db
+        self.repairs = list(DEFAULT_REPAIRS if repairs is None else repairs)
 
     def admit_patient(self, project_id: str, raw_content: str, error_msg: str, row_index: int) -> QuarantineRow:
         """Create a new QuarantineRow entry."""
@@ -28,41 +159,129 @@ class DataHospital:
         self.db.refresh(patient)
         return patient
 
+    def diagnose(self, patients: List[QuarantineRow]) -> List[Dict[str, Any]]:
+        """Runs the repair pipeline over the batch; one fix proposal per patient, in order."""
+        if not patients:
+            return []
+        frame = pd.DataFrame({
+            "raw_content": [p.raw_content or "" for p in patients],
+            "error": [(p.error_message or "").lower() for p in patients],
+        })
+        fixes: Dict[int, Dict[str, Any]] = {}
+        for step in self.repairs:
+            pending = frame.drop(index=list(fixes))
+            if pending.empty:
+                break
+            fixes.update(step(pending).to_dict())
+        return [fixes.get(i, dict(MANUAL_REVIEW)) for i in range(len(patients))]
+
     async def shift_rounds(self, patient: QuarantineRow) -> Dict[str, Any]:
         """
         The 'Nurse' logic. Attempts to diagnose and fix the row.
         """
-        fix_proposal = {}
-        fixed = False
-        
-        # 1. Common Symptom: JSON formatting error (single vs double quotes)
-        if "json" in patient.error_message.lower():
-            try:
-                # Try replacing single quotes with double quotes
-                corrected = patient.raw_content.replace("'", '"')
-                json.loads(corrected)
-                fix_proposal = {"method": "json_quote_fix", "content": corrected}
-                fixed = True
-            except Exception:
-                pass
-
-        # 2. Common Symptom: Date Format
-        if not fixed and "date" in patient.error_message.lower():
-            # Try capturing YYYY-MM-DD
-            match = re.search(r'\d{4}-\d{2}-\d{2}', patient.raw_content)
-            if match:
-                fix_proposal = {"method": "date_extraction", "date_found": match.group(0)}
-                fixed = True
-
-        # 3. Last Resort: LLM Surgery (Simulated for V3 MVP)
-        if not fixed:
-            # Here we would call Gemini to "Repair this JSON string"
-            fix_proposal = {"method": "manual_review_needed", "note": "Too complex for heuristics"}
-        
+        fix_proposal = self.diagnose([patient])[0]
+        fixed = fix_proposal["method"] != MANUAL_REVIEW["method"]
+
         # Update Patient Chart
         patient.suggested_fix = fix_proposal
         patient.status = "repaired" if fixed else "needs_specialist"
         self.db.add(patient)
         self.db.commit()
-        
+        QUARANTINE_TRIAGED.labels(outcome=patient.status).inc()
+
         return fix_proposal
+
+    def claim_batch(self, limit: int = 1000, lease_seconds: int = 300) -> List[QuarantineRow]:
+        """
+        Leases up to `limit` new rows (or rows whose lease expired) to this call. Concurrent
+        workers skip each other's locked rows on PostgreSQL; elsewhere the conditional UPDATE
+        still keeps claims disjoint.
+        """
+        now = datetime.now(UTC)
+        owner = uuid.uuid4().hex
+        claimable = or_(
+            QuarantineRow.status == "new",
+            and_(QuarantineRow.status == "repairing", QuarantineRow.leased_until < now),
+        )
+        candidates = (
+            select(QuarantineRow.id)
+            .where(claimable)
+            .order_by(QuarantineRow.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        self.db.execute(
+            update(QuarantineRow)
+            .where(QuarantineRow.id.in_(candidates), claimable)
+            .values(status="repairing", lease_owner=owner, leased_until=now + timedelta(seconds=lease_seconds))
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        return list(self.db.exec(
+            select(QuarantineRow)
+            .where(QuarantineRow.lease_owner == owner, QuarantineRow.status == "repairing")
+            .order_by(QuarantineRow.created_at)
+        ).all())
+
+    def triage_batch(self, limit: int = 1000, lease_seconds: int = 300, reingest: bool = False) -> Dict[str, int]:
+        """Claims, repairs and charts one batch; optionally re-ingests repaired rows as Transactions."""
+        patients = self.claim_batch(limit, lease_seconds)
+        fixes = self.diagnose(patients)
+        now = datetime.now(UTC)
+
+        charts = []
+        for patient, fix in zip(patients, fixes):
+            fixed = fix["method"] != MANUAL_REVIEW["method"]
+            charts.append({
+                "id": patient.id,
+                "suggested_fix": fix,
+                "status": "repaired" if fixed else "needs_specialist",
+                "resolved_at": None,
+                "lease_owner": None,
+                "leased_until": None,
+            })
+        if reingest:
+            self._reingest(patients, charts, now)
+
+        if charts:
+            # ORM bulk UPDATE by primary key: one executemany for the whole batch
+            self.db.execute(update(QuarantineRow), charts)
+        self.db.commit()
+
+        outcomes: Dict[str, int] = {}
+        for chart in charts:
+            outcomes[chart["status"]] = outcomes.get(chart["status"], 0) + 1
+        for outcome, count in outcomes.items():
+            QUARANTINE_TRIAGED.labels(outcome=outcome).inc(count)
+        return {"claimed": len(patients), **outcomes}
+
+    def _reingest(self, patients: List[QuarantineRow], charts: List[Dict[str, Any]], now: datetime):
+        """Maps repaired rows that carry full content through the same row mappers as ingestion."""
+        from app.modules.ingestion.router import bank_transaction_from_row, internal_transaction_from_row
+        from app.modules.fraud.reconciliation_router import detect_forensic_triggers
+
+        ingestion_ids = {p.ingestion_id for p in patients if p.ingestion_id}
+        file_types = dict(self.db.exec(
+            select(Ingestion.id, Ingestion.file_type).where(Ingestion.id.in_(ingestion_ids))
+        ).all()) if ingestion_ids else {}
+
+        for patient, chart in zip(patients, charts):
+            content = chart["suggested_fix"].get("content")
+            record = parse_record(content) if chart["status"] == "repaired" and content else None
+            if record is None or not any(record.get(f) is not None for f in AMOUNT_FIELDS):
+                continue  # fragments without an amount stay charted for review
+            is_bank = file_types.get(patient.ingestion_id) == "bank"
+            try:
+                with self.db.begin_nested():
+                    if is_bank:
+                        tx = bank_transaction_from_row(record, patient.project_id)
+                    else:
+                        tx = internal_transaction_from_row(record, patient.project_id)
+                        detect_forensic_triggers(tx, self.db)
+                    self.db.add(tx)
+            except Exception as exc:
+                chart["status"] = "needs_specialist"
+                chart["suggested_fix"] = {**chart["suggested_fix"], "reingest_error": str(exc)}
+                continue
+            chart["status"] = "reingested"
+            chart["resolved_at"] = now
@@ -4,6 +4,7 @@ from sqlmodel import Session, select
 from pydantic import BaseModel
 from app.core.db import get_session
 from app.models import QuarantineRow
+from app.modules.ingestion.data_hospital import status_counts
 
 router = APIRouter(prefix="/ingestion/quarantine", tags=["ingestion"])
 
@@ -24,19 +25,13 @@ class ManualFixRequest(BaseModel):
 def get_stats(
     project_id: Optional[str] = None, db: Session = Depends(get_session)
 ):
-    query = select(QuarantineRow)
-    if project_id:
-        query = query.where(QuarantineRow.project_id == project_id)
-
-    rows = db.exec(query).all()
+    counts = status_counts(db, project_id)
 
     return {
-        "total": len(rows),
-        "new": len([r for r in rows if r.status == "new"]),
-        "repaired": len([r for r in rows if r.status == "repaired"]),
-        "needs_attention": len(
-            [r for r in rows if r.status == "needs_specialist"]
-        ),
+        "total": sum(counts.values()),
+        "new": counts.get("new", 0),
+        "repaired": counts.get("repaired", 0) + counts.get("reingested", 0),
+        "needs_attention": counts.get("needs_specialist", 0),
     }
 
 
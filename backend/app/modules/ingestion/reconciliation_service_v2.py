@@ -1,26 +1,128 @@
 """
 Reconciliation Engine V2: The 'Waterfall' Matching Brain.
 Orchestrates multi-pass logic to match Bank Transactions with Internal Ledger entries.
+Every pass is blocked (exact-amount buckets, sorted date windows) so work grows with
+the number of plausible candidates, not ledgers x bank rows.
 """
-from typing import Dict, Any
+import uuid
+from bisect import bisect_left, bisect_right
+from datetime import datetime, UTC, timedelta
+from typing import Dict, Any, List, Optional
+import numpy as np
+from sqlalchemy import exists, insert
 from sqlmodel import Session, select
 from app.models import (
-    Transaction, 
+    Transaction,
     TransactionSource,
     ReconciliationMatch
 )
 from app.core.reconciliation_intelligence import (
-    VendorMatcher, 
-    InvoiceReferenceExtractor, 
+    VendorMatcher,
+    InvoiceReferenceExtractor,
     ConfidenceCalculator
 )
 import logging
 
 logger = logging.getLogger(__name__)
 
+DAY_US = 86_400_000_000
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+# Pass 2 can only exceed 0.70 when 0.4*amount + 0.2*temporal + 0.15 (vendor 100 + direct) does:
+# temporal >= 0.9 means |days| <= 3, and amount_similarity >= 0.9 is required anyway.
+FUZZY_MIN_SCORE = 0.70
+FUZZY_MIN_RATIO = 0.9
+FUZZY_MAX_DAYS = 3
+THINNING_MAX_DAYS = 3
+THINNING_TOLERANCE = 1.0
+
+
+def _micros(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _day_diff(a: np.ndarray, b) -> np.ndarray:
+    """abs((a - b).days) with timedelta floor semantics."""
+    return np.abs((a - b) // DAY_US)
+
+
+class _Side:
+    """Column arrays for one side of the reconciliation, in query order."""
+
+    COLUMNS = (
+        Transaction.id,
+        Transaction.actual_amount,
+        Transaction.proposed_amount,
+        Transaction.amount,
+        Transaction.description,
+        Transaction.receiver,
+        Transaction.transaction_date,
+        Transaction.timestamp,
+    )
+
+    def __init__(self, rows):
+        self.ids: List[str] = [r[0] for r in rows]
+        # Same precedence as Transaction.verified_amount
+        self.amount_list: List[float] = [float(r[1] or r[2] or r[3]) for r in rows]
+        self.amounts = np.array(self.amount_list, dtype=np.float64)
+        # Documents without a document date fall back to their booking timestamp
+        self.micros = np.array([_micros(r[6] or r[7]) for r in rows], dtype=np.int64)
+        self.descriptions: List[Optional[str]] = [r[4] for r in rows]
+        self.receivers: List[Optional[str]] = [r[5] for r in rows]
+        self._refs: Dict[int, Optional[str]] = {}
+        self._norms: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def ref(self, i: int) -> Optional[str]:
+        if i not in self._refs:
+            self._refs[i] = InvoiceReferenceExtractor.extract(self.descriptions[i])
+        return self._refs[i]
+
+    def _norm(self, text: str) -> str:
+        # Normalized counterparty key; identical payee strings are normalized once
+        norm = self._norms.get(text)
+        if norm is None:
+            norm = self._norms[text] = VendorMatcher.normalize_name(text)
+        return norm
+
+    def norm_description(self, i: int) -> str:
+        return self._norm(self.descriptions[i])
+
+    def norm_receiver(self, i: int) -> str:
+        return self._norm(self.receivers[i])
+
+
 class ReconciliationEngineV2:
     def __init__(self, db: Session):
         self.db = db
+        self._vendor_scores: Dict[tuple, float] = {}
+
+    def _unmatched(self, project_id: str, source: TransactionSource, matched_column) -> _Side:
+        # Correlated anti-join: only this project's rows are probed against the match index
+        rows = self.db.exec(
+            select(*_Side.COLUMNS)
+            .where(Transaction.project_id == project_id)
+            .where(Transaction.source_type == source)
+            .where(~exists().where(matched_column == Transaction.id))
+        ).all()
+        return _Side(rows)
+
+    def _vendor_score(self, ledgers: _Side, li: int, banks: _Side, bi: int) -> float:
+        """
+        VendorMatcher.calculate_similarity(receiver, description), memoized on the
+        normalized counterparty pair: bank exports repeat the same few payees.
+        """
+        if not ledgers.receivers[li] or not banks.descriptions[bi]:
+            return 0.0
+        key = (ledgers.norm_receiver(li), banks.norm_description(bi))
+        score = self._vendor_scores.get(key)
+        if score is None:
+            score = self._vendor_scores[key] = VendorMatcher.normalized_similarity(*key)
+        return score
 
     def run_waterfall_match(self, project_id: str) -> Dict[str, Any]:
         """
@@ -35,196 +137,183 @@ class ReconciliationEngineV2:
             "pass_3_thinning": 0,
             "total_matches": 0
         }
-        
-        # Fetch UNMATCHED records
-        # Note: In a real system, we'd filter out IDs present in ReconciliationMatch table
-        # optimized via LEFT JOIN or NOT IN subquery
-        
-        # Get already matched IDs
-        matched_ledger_ids = self.db.exec(select(ReconciliationMatch.internal_tx_id)).all()
-        matched_bank_ids = self.db.exec(select(ReconciliationMatch.bank_tx_id)).all()
-        
-        # Optimize: Fetch only necessary fields or objects
-        # Fetch Ledgers
-        ledgers = self.db.exec(
-            select(Transaction)
-            .where(Transaction.project_id == project_id)
-            .where(Transaction.source_type == TransactionSource.INTERNAL_LEDGER)
-            .where(Transaction.id.not_in(matched_ledger_ids))
-        ).all()
-        
-        # Fetch Bank Txns
-        bank_txns = self.db.exec(
-            select(Transaction)
-            .where(Transaction.project_id == project_id)
-            .where(Transaction.source_type == TransactionSource.BANK_STATEMENT)
-            .where(Transaction.id.not_in(matched_bank_ids))
-        ).all()
-        
-        if not ledgers or not bank_txns:
-        
+
+        ledgers = self._unmatched(project_id, TransactionSource.INTERNAL_LEDGER, ReconciliationMatch.internal_tx_id)
+        banks = self._unmatched(project_id, TransactionSource.BANK_STATEMENT, ReconciliationMatch.bank_tx_id)
+        if not len(ledgers) or not len(banks):
             return results
 
-        # --- PASS 1: EXACT MATCH (Confidence > 95%) ---
-        # Criteria: Exact Amount AND (Ref Match OR (Date < 2 days diff AND Vendor Match))
-        
-        # Index bank txns by amount for O(1) lookup
-        bank_map_amount = {}
-        for b in bank_txns:
-            amt = float(b.verified_amount)
-            if amt not in bank_map_amount:
-                bank_map_amount[amt] = []
-            bank_map_amount[amt].append(b)
-            
-        for ledger in ledgers:
-            # Skip if matched in this run
-            if ledger.id in matched_ledger_ids:
+        self._run_at = datetime.now(UTC)
+        ledger_open = np.ones(len(ledgers), dtype=bool)
+        bank_open = np.ones(len(banks), dtype=bool)
+        matches = []
+
+        results["pass_1_exact"] = self._pass_exact(ledgers, banks, ledger_open, bank_open, matches)
+        results["pass_2_fuzzy"] = self._pass_fuzzy(ledgers, banks, ledger_open, bank_open, matches)
+        results["pass_3_thinning"] = self._pass_thinning(ledgers, banks, ledger_open, bank_open, matches)
+
+        if matches:
+            self.db.execute(insert(ReconciliationMatch), matches)
+        self.db.commit()
+        results["total_matches"] = results["pass_1_exact"] + results["pass_2_fuzzy"] + results["pass_3_thinning"]
+        return results
+
+    # --- PASS 1: EXACT MATCH (Confidence > 95%) ---
+    # Criteria: Exact Amount AND (Ref Match OR (Date < 2 days diff AND Vendor Match))
+    def _pass_exact(self, ledgers: _Side, banks: _Side, ledger_open, bank_open, matches) -> int:
+        # Blocking key: exact amount; buckets keep query order so the first qualifying row wins
+        buckets: Dict[float, List[int]] = {}
+        for bi, amount in enumerate(banks.amount_list):
+            buckets.setdefault(amount, []).append(bi)
+
+        matched = 0
+        for li, amount in enumerate(ledgers.amount_list):
+            candidates = buckets.get(amount)
+            if not candidates:
                 continue
-                
-            l_amt = float(ledger.verified_amount)
-            candidates = bank_map_amount.get(l_amt, [])
-            
-            for bank in candidates:
-                if bank.id in matched_bank_ids:
-                    continue
-                    
-                # Check 1: Invoice Ref
-                l_ref = InvoiceReferenceExtractor.extract(ledger.description)
-                b_ref = InvoiceReferenceExtractor.extract(bank.description)
-                
-                is_ref_match = (l_ref and b_ref and l_ref == b_ref)
-                
-                # Check 2: Date Proximity
-                diff = abs((ledger.transaction_date - bank.transaction_date).days)
-                
-                # Check 3: Vendor Name
-                is_vendor_match = VendorMatcher.is_match(ledger.receiver, bank.description)
-                
+            l_ref = ledgers.ref(li)
+            for pos, bi in enumerate(candidates):
+                b_ref = banks.ref(bi)
+                diff = abs(int((ledgers.micros[li] - banks.micros[bi]) // DAY_US))
+
                 confidence = 0.0
                 reason = ""
-                
-                if is_ref_match:
-                
+                if l_ref and b_ref and l_ref == b_ref:
                     confidence = 0.99
                     reason = f"Exact Ref Match: {l_ref}"
-                elif diff <= 2 and is_vendor_match:
-                    confidence = 0.95
-                    reason = "Exact Amount + Vendor + Date"
-                elif diff == 0 and not is_vendor_match:
-                    # Same day, same amount, but description differs
-                    confidence = 0.85
-                    reason = "Same Day + Exact Amount"
-                
+                elif diff <= 2:
+                    if self._vendor_score(ledgers, li, banks, bi) >= VendorMatcher.SIMILARITY_THRESHOLD:
+                        confidence = 0.95
+                        reason = "Exact Amount + Vendor + Date"
+                    elif diff == 0:
+                        # Same day, same amount, but description differs
+                        confidence = 0.85
+                        reason = "Same Day + Exact Amount"
+
                 if confidence > 0.80:
-                
-                    self._create_match(ledger, bank, confidence, reason, "waterfall_p1")
-                    matched_ledger_ids.append(ledger.id)
-                    matched_bank_ids.append(bank.id)
-                    results["pass_1_exact"] += 1
-                    break # Matched this ledger, move to next
-        
-        # --- PASS 2: FUZZY MATCH (Confidence > 70%) ---
-        # Relaxed Amount (overhead striping) or Vendor Fuzzy
-        
-        # Re-fetch or filter remaining? 
-        # For V2 POC, we iterate remaining using sets for speed
-        rem_ledgers = [line_item for line_item in ledgers if line_item.id not in matched_ledger_ids]
-        rem_banks = [b for b in bank_txns if b.id not in matched_bank_ids]
-        
-        for ledger in rem_ledgers:
+                    matches.append(self._create_match(ledgers.ids[li], banks.ids[bi], confidence, reason, "waterfall_p1"))
+                    ledger_open[li] = False
+                    bank_open[bi] = False
+                    del candidates[pos]
+                    matched += 1
+                    break  # Matched this ledger, move to next
+        return matched
+
+    # --- PASS 2: FUZZY MATCH (Confidence > 70%) ---
+    # Relaxed Amount (overhead striping) or Vendor Fuzzy
+    def _pass_fuzzy(self, ledgers: _Side, banks: _Side, ledger_open, bank_open, matches) -> int:
+        order = np.argsort(banks.micros, kind="stable")
+        sorted_micros = banks.micros[order]
+
+        matched = 0
+        for li in np.flatnonzero(ledger_open):
+            l_amt = ledgers.amounts[li]
+            l_us = ledgers.micros[li]
+            # Blocking key: date window. |days| <= 3  <=>  ledger - bank in [-3d, 4d)
+            lo = np.searchsorted(sorted_micros, l_us - (FUZZY_MAX_DAYS + 1) * DAY_US, side="right")
+            hi = np.searchsorted(sorted_micros, l_us + FUZZY_MAX_DAYS * DAY_US, side="right")
+            cand = order[lo:hi]
+            cand = cand[bank_open[cand]]
+            if cand.size == 0:
+                continue
+
+            # Vectorized amount tolerance and score upper bound; fuzzy text only for survivors
+            b_amt = banks.amounts[cand]
+            high = np.maximum(l_amt, b_amt)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ratio = np.where(high > 0, np.minimum(l_amt, b_amt) / high, 0.0)
+            diff = _day_diff(l_us, banks.micros[cand])
+            bound = 0.40 * ratio + 0.20 * np.where(diff <= 1, 1.0, 0.9) + 0.15
+            keep = (ratio >= FUZZY_MIN_RATIO) & (bound > FUZZY_MIN_SCORE - 1e-9)
+            if not keep.any():
+                continue
+            cand, ratio, diff, bound = cand[keep], ratio[keep], diff[keep], bound[keep]
+
+            # Best bound first; stop once no remaining candidate can beat the best score.
+            # Ties go to the earliest bank row, as in the original in-order scan.
             best_match = None
             best_score = 0.0
-            
-            l_amt = float(ledger.verified_amount)
-            
-            for bank in rem_banks:
-                if bank.id in matched_bank_ids:
-                    continue
-                
-                # Amount Similarity (Strip VAT? +/- 1%?)
-                b_amt = float(bank.verified_amount)
-                amt_ratio = min(l_amt, b_amt) / max(l_amt, b_amt) if max(l_amt, b_amt) > 0 else 0
-                
-                if amt_ratio < 0.9:
-                
-                    continue # Skip if amounts wildly different
-                
-                # Vendor Similarity
-                v_score, _ = VendorMatcher.calculate_similarity(ledger.receiver, bank.description)
-                
-                # Date
-                diff = abs((ledger.transaction_date - bank.transaction_date).days)
-                
-                # Calculate Composite Score
+            for k in np.lexsort((cand, -bound)).tolist():
+                if bound[k] + 1e-9 < best_score:
+                    break
+                bi = int(cand[k])
                 score, _ = ConfidenceCalculator.calculate(
-                    amount_similarity=amt_ratio,
-                    temporal_proximity_days=diff,
-                    vendor_similarity=v_score
+                    amount_similarity=float(ratio[k]),
+                    temporal_proximity_days=int(diff[k]),
+                    vendor_similarity=self._vendor_score(ledgers, li, banks, bi),
                 )
-                
-                if score > best_score and score > 0.70:
-                
+                if score > FUZZY_MIN_SCORE and (
+                    score > best_score or (score == best_score and best_match is not None and bi < best_match)
+                ):
                     best_score = score
-                    best_match = bank
-            
-            if best_match:
-            
-                self._create_match(ledger, best_match, best_score, "Fuzzy Composite Score", "waterfall_p2")
-                matched_ledger_ids.append(ledger.id)
-                matched_bank_ids.append(best_match.id)
-                results["pass_2_fuzzy"] += 1
-
-        # --- PASS 3: THINNING (Aggregate) ---
-        # Logic: Find set of Bank Txns that sum up to 1 Ledger (e.g., split payments)
-        # This is a version of the Subset Sum Problem (NP-Complete), so we limit scanning.
-        
-        rem_ledgers = [line_item for line_item in ledgers if line_item.id not in matched_ledger_ids]
-        rem_banks = [b for b in bank_txns if b.id not in matched_bank_ids]
-        
-        # Heuristic: Only look for sums within small time window (3 days)
-        for ledger in rem_ledgers:
-            l_amt = float(ledger.verified_amount)
-            
-            # Find localized bank txns
-            candidates = [
-                b for b in rem_banks 
-                if abs((b.transaction_date - ledger.transaction_date).days) <= 3
-                and float(b.verified_amount) < l_amt
-            ]
-            
-            # Try finding 2 or 3 items that sum to l_amt
-            found_combo = []
-            
-            # 2-Sum
-            for i, b1 in enumerate(candidates):
-                for b2 in candidates[i+1:]:
-                    if abs((float(b1.verified_amount) + float(b2.verified_amount)) - l_amt) < 1.0: # Tolerance
-                        found_combo = [b1, b2]
-                        break
-                if found_combo:
+                    best_match = bi
+
+            if best_match is not None:
+                matches.append(
+                    self._create_match(ledgers.ids[li], banks.ids[best_match], best_score, "Fuzzy Composite Score", "waterfall_p2")
+                )
+                ledger_open[li] = False
+                bank_open[best_match] = False
+                matched += 1
+        return matched
+
+    # --- PASS 3: THINNING (Aggregate) ---
+    # Logic: Find set of Bank Txns that sum up to 1 Ledger (e.g., split payments)
+    # Limited to 2-part sums within a 3-day window, searched over amount-sorted candidates.
+    def _pass_thinning(self, ledgers: _Side, banks: _Side, ledger_open, bank_open, matches) -> int:
+        order = np.argsort(banks.micros, kind="stable")
+        sorted_micros = banks.micros[order]
+
+        matched = 0
+        for li in np.flatnonzero(ledger_open):
+            l_amt = float(ledgers.amounts[li])
+            l_us = ledgers.micros[li]
+            # |(bank - ledger).days| <= 3  <=>  bank - ledger in [-3d, 4d)
+            lo = np.searchsorted(sorted_micros, l_us - THINNING_MAX_DAYS * DAY_US, side="left")
+            hi = np.searchsorted(sorted_micros, l_us + (THINNING_MAX_DAYS + 1) * DAY_US, side="left")
+            cand = order[lo:hi]
+            cand = np.sort(cand[bank_open[cand] & (banks.amounts[cand] < l_amt)])
+            if cand.size < 2:
+                continue
+
+            amounts = banks.amounts[cand].tolist()
+            by_amount = sorted(range(len(amounts)), key=amounts.__getitem__)
+            sorted_amounts = [amounts[k] for k in by_amount]
+
+            # First (i, j) pair in candidate order, exactly like the nested scan
+            found_combo = None
+            for i, a_i in enumerate(amounts):
+                target = l_amt - a_i
+                start = bisect_left(sorted_amounts, target - THINNING_TOLERANCE - 1e-6)
+                stop = bisect_right(sorted_amounts, target + THINNING_TOLERANCE + 1e-6)
+                partners = [
+                    by_amount[k] for k in range(start, stop)
+                    if by_amount[k] > i and abs((a_i + sorted_amounts[k]) - l_amt) < THINNING_TOLERANCE
+                ]
+                if partners:
+                    found_combo = (int(cand[i]), int(cand[min(partners)]))
                     break
-            
-            if found_combo:
-                # Create multiple matches linked to one ledger (Not supported by current schema 1-to-1?)
-                # If schema is 1-to-1, we can't fully store this. 
-                # Assuming schema allows one ledger -> multiple matches rows
-                for b in found_combo:
-                    self._create_match(ledger, b, 0.85, "Aggregate Sum Match (2-part)", "waterfall_p3")
-                    matched_bank_ids.append(b.id)
-                matched_ledger_ids.append(ledger.id)
-                results["pass_3_thinning"] += 1
 
-        self.db.commit()
-        results["total_matches"] = results["pass_1_exact"] + results["pass_2_fuzzy"] + results["pass_3_thinning"]
-        return results
+            if found_combo:
+                # Create multiple matches linked to one ledger (one row per bank part)
+                for bi in found_combo:
+                    matches.append(
+                        self._create_match(ledgers.ids[li], banks.ids[bi], 0.85, "Aggregate Sum Match (2-part)", "waterfall_p3")
+                    )
+                    bank_open[bi] = False
+                ledger_open[li] = False
+                matched += 1
+        return matched
 
-    def _create_match(self, ledger, bank, score, reason, type_code):
-        match = ReconciliationMatch(
-            internal_tx_id=ledger.id,
-            bank_tx_id=bank.id,
-            confidence_score=score,
-            ai_reasoning=reason,
-            match_type=type_code,
-            verified_by_user_id="SYSTEM_V2_ENGINE"
-        )
-        self.db.add(match)
+    def _create_match(self, ledger_id: str, bank_id: str, score: float, reason: str, type_code: str) -> Dict[str, Any]:
+        # Plain rows for one executemany INSERT; ORM construction dominated large runs
+        return {
+            "id": str(uuid.uuid4()),
+            "internal_tx_id": ledger_id,
+            "bank_tx_id": bank_id,
+            "confidence_score": score,
+            "confirmed": False,
+            "matched_at": self._run_at,
+            "ai_reasoning": reason,
+            "match_type": type_code,
+        }
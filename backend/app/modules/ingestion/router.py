@@ -30,6 +30,67 @@ UPLOAD_DIR = "storage/uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
+def internal_transaction_from_row(row, project_id: str) -> Transaction:
+    """Maps one internal-ledger row (pandas Series or dict) to a Transaction; raises on bad values."""
+    # Robust Coordinate Parsing
+    lat = row.get("latitude")
+    lng = row.get("longitude")
+    geo = row.get("geolocation")
+    if geo and isinstance(geo, str) and "," in geo:
+        parts = geo.split(",")
+        lat = parts[0].strip()
+        lng = parts[1].strip()
+    desc = str(row.get("description", ""))
+    category = row.get("category_code")
+    # Extract batch ref
+    batch_ref = BatchReferenceDetector.extract_batch_id(desc)
+    return Transaction(
+        project_id=project_id,
+        proposed_amount=float(row.get("proposed_amount", 0) or 0),
+        actual_amount=float(row.get("actual_amount", 0) or 0),
+        amount=float(row.get("actual_amount", 0) or 0),
+        sender=str(row.get("sender", "Unknown")),
+        receiver=str(row.get("receiver", "Unknown")),
+        description=desc,
+        category_code=str(category) if category and not pd.isna(category) else TransactionCategory.P.value,
+        account_entity=str(row.get("account_entity", "")),
+        audit_comment=str(row.get("audit_comment", "")),
+        latitude=float(lat) if lat and str(lat).strip() else None,
+        longitude=float(lng) if lng and str(lng).strip() else None,
+        transaction_date=pd.to_datetime(
+            row.get("timestamp", datetime.now(UTC)), utc=True
+        ).to_pydatetime(),
+        timestamp=datetime.now(UTC),
+        status="pending",
+        batch_reference=batch_ref,
+        source_type=TransactionSource.INTERNAL_LEDGER
+    )
+
+
+def bank_transaction_from_row(row, project_id: str) -> Transaction:
+    """Maps one bank-statement row (pandas Series or dict) to a Transaction; raises on bad values."""
+    desc = str(row.get("description", ""))
+    # Extract batch ref
+    batch_ref = BatchReferenceDetector.extract_batch_id(desc)
+    return Transaction(
+        project_id=project_id,
+        amount=float(row.get("amount", 0) or 0),
+        actual_amount=float(row.get("amount", 0) or 0),
+        proposed_amount=0,
+        bank_name=str(row.get("bank_name", "BCA")),
+        description=desc,
+        transaction_date=pd.to_datetime(
+            row.get("timestamp", datetime.now(UTC)), utc=True
+        ).to_pydatetime(),
+        timestamp=datetime.now(UTC),
+        batch_reference=batch_ref,
+        source_type=TransactionSource.BANK_STATEMENT,
+        sender="BANK_UNKNOWN",
+        receiver="BANK_UNKNOWN",
+        status="COMPLETED"
+    )
+
+
 def process_internal_batch(
     file_path: str, project_id: str, ingestion_id: str = None
 ):
@@ -45,38 +106,7 @@ def process_internal_batch(
             quarantine_count = 0
             for idx, row in df.iterrows():
                 try:
-                    # Robust Coordinate Parsing
-                    lat = row.get("latitude")
-                    lng = row.get("longitude")
-                    geo = row.get("geolocation")
-                    if geo and isinstance(geo, str) and "," in geo:
-                        parts = geo.split(",")
-                        lat = parts[0].strip()
-                        lng = parts[1].strip()
-                    desc = str(row.get("description", ""))
-                    # Extract batch ref
-                    batch_ref = BatchReferenceDetector.extract_batch_id(desc)
-                    tx = Transaction(
-                        project_id=project_id,
-                        proposed_amount=float(row.get("proposed_amount", 0) or 0),
-                        actual_amount=float(row.get("actual_amount", 0) or 0),
-                        amount=float(row.get("actual_amount", 0) or 0),
-                        sender=str(row.get("sender", "Unknown")),
-                        receiver=str(row.get("receiver", "Unknown")),
-                        description=desc,
-                        category_code=str(row.get("category_code", TransactionCategory.P)),
-                        account_entity=str(row.get("account_entity", "")),
-                        audit_comment=str(row.get("audit_comment", "")),
-                        latitude=float(lat) if lat and str(lat).strip() else None,
-                        longitude=float(lng) if lng and str(lng).strip() else None,
-                        transaction_date=pd.to_datetime(
-                            row.get("timestamp", datetime.now(UTC))
-                        ).to_pydatetime(),
-                        timestamp=datetime.now(UTC),
-                        status="pending",
-                        batch_reference=batch_ref,
-                        source_type=TransactionSource.INTERNAL_LEDGER
-                    )
+                    tx = internal_transaction_from_row(row, project_id)
                     # Run forensic triggers
                     detect_forensic_triggers(tx, db)
                     db.add(tx)
@@ -148,26 +178,7 @@ def process_bank_batch(
             quarantine_count = 0
             for idx, row in df.iterrows():
                 try:
-                    desc = str(row.get("description", ""))
-                    # Extract batch ref
-                    batch_ref = BatchReferenceDetector.extract_batch_id(desc)
-                    transaction = Transaction(
-                        project_id=project_id,
-                        amount=float(row.get("amount", 0) or 0),
-                        actual_amount=float(row.get("amount", 0) or 0),
-                        proposed_amount=0,
-                        bank_name=str(row.get("bank_name", "BCA")),
-                        description=desc,
-                        transaction_date=pd.to_datetime(
-                            row.get("timestamp", datetime.now(UTC))
-                        ).to_pydatetime(),
-                        timestamp=datetime.now(UTC),
-                        batch_reference=batch_ref,
-                        source_type=TransactionSource.BANK_STATEMENT,
-                        sender="BANK_UNKNOWN",
-                        receiver="BANK_UNKNOWN",
-                        status="COMPLETED"
-                    )
+                    transaction = bank_transaction_from_row(row, project_id)
                     db.add(transaction)
                     count += 1
                 except Exception as row_err:
@@ -7,6 +7,7 @@ from sqlmodel import Session, select
 from app.core.db import engine
 from app.core.audit import AuditLogger
 from app.core.event_bus import publish_event, EventType
+from app.core.query_cache import invalidate_transaction_cache
 from app.models import (
     Transaction,
     Project,
@@ -165,6 +166,7 @@ class ReconciliationEngine:
                 by_receiver[t.receiver] = []
             by_receiver[t.receiver].append(t)
         bursts = 0
+        new_insights = []
         threshold = 50_000_000  # 50M IDR
         for receiver, r_txns in by_receiver.items():
             # Sliding window of 24h
@@ -192,13 +194,15 @@ class ReconciliationEngine:
                             "tx_ids": [w.id for w in window],
                             "total": window_sum,
                         },
-                        embeddings_json=GlobalMemoryService.get_embedding(f"Structuring Burst: {receiver} | {content}")
                     )
+                    GlobalMemoryService.embed_insight(insight, f"Structuring Burst: {receiver} | {content}")
                     db.add(insight)
+                    new_insights.append(insight)
                     bursts += 1
                     # Skip to end of window to avoid double counting
                     i += len(window) - 1
         db.commit()
+        GlobalMemoryService.index_insights(new_insights)
         return {"status": "burst_scan_complete", "bursts_found": bursts}
 
     @staticmethod
@@ -264,6 +268,7 @@ class ReconciliationEngine:
             .where(Transaction.category_code == "XP")
         ).all()
         loops = 0
+        new_insights = []
         for tx in outflows:
             receiver_name = tx.receiver
             # Search for this entity as a sender in OTHER projects
@@ -287,11 +292,13 @@ class ReconciliationEngine:
                         "source_tx": tx.id,
                         "sink_txs": [o.id for o in others],
                     },
-                    embeddings_json=GlobalMemoryService.get_embedding(f"Cross-Project Loop: {receiver_name} | {content}")
                 )
+                GlobalMemoryService.embed_insight(insight, f"Cross-Project Loop: {receiver_name} | {content}")
                 db.add(insight)
+                new_insights.append(insight)
                 loops += 1
         db.commit()
+        GlobalMemoryService.index_insights(new_insights)
         return {"status": "circular_scan_complete", "loops_found": loops}
 
     @staticmethod
@@ -327,10 +334,11 @@ class ReconciliationEngine:
                 content=content,
                 confidence=0.8,
                 metadata_json={"deviation": deviation, "counts": actual},
-                embeddings_json=GlobalMemoryService.get_embedding(f"Benford's Law Violation | {content}")
             )
+            GlobalMemoryService.embed_insight(insight, f"Benford's Law Violation | {content}")
             db.add(insight)
             db.commit()
+            GlobalMemoryService.index_insights([insight])
         return {"status": "scan_complete", "deviation": deviation}
 
 
@@ -483,7 +491,10 @@ async def process_ingestion_task(payload_dict: Dict[str, Any], ingestion_id: str
                 # PROGRESS UPDATE every 20%
                 if row_idx > 0 and row_idx % (max(1, total_rows // 5)) == 0:
                     percent = int((row_idx / total_rows) * 100)
-                    await manager.broadcast(f"INGESTION_PROGRESS:{ingestion_id}:{percent}")
+                    await manager.broadcast(
+                        f"INGESTION_PROGRESS:{ingestion_id}:{percent}",
+                        coalesce_key=f"progress:{ingestion_id}",
+                    )
                 try:
                     # IDEMPOTENCY CHECK: Skip if row already processed for this ingestion
                     # Uses metadata_json (Postgres JSONB support or SQLModel JSON parsing)
@@ -765,6 +776,8 @@ async def process_ingestion_task(payload_dict: Dict[str, Any], ingestion_id: str
                     project_id=project_id,
                 )
             db.commit()
+            # New transactions: drop project-derived caches (S-curve, Nexus, Sankey, listings)
+            invalidate_transaction_cache(project_id)
             # Trigger Waterfall Reconciliation
             ReconciliationEngine.match_waterfall(db, project_id)
             ReconciliationEngine.fuzzy_reconcile_vector(db, project_id)
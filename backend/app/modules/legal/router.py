@@ -1,11 +1,51 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session
+from app.core.db import get_session
 from app.modules.legal.screening_service import SanctionScreeningService
+from app.core.time_buckets import DEFAULT_GRANULARITY
 from app.core.auth_middleware import verify_project_access
 from app.models import Project
 
 router = APIRouter(prefix="/forensic/{project_id}/legal", tags=["Legal & Compliance"])
 
 
+@router.get("/screen")
+def screen_project_entities(
+    project_id: str, project: Project = Depends(verify_project_access), db: Session = Depends(get_session)
+):
+    """
+    Screens every entity in the project against the watchlist in one call.
+    """
+    return SanctionScreeningService.screen_project(db, project.id)
+
+
+@router.get("/vendor-velocity")
+def vendor_velocity_dashboard(
+    project_id: str,
+    granularity: str = Query(DEFAULT_GRANULARITY, pattern="^(day|week|month)$"),
+    project: Project = Depends(verify_project_access),
+    db: Session = Depends(get_session),
+):
+    """
+    Payment-velocity profiles for every vendor of the project, riskiest first.
+    """
+    return SanctionScreeningService.profile_project_vendors(db, project.id, granularity)
+
+
+@router.get("/vendor-velocity/{entity_name}")
+def vendor_velocity(
+    project_id: str,
+    entity_name: str,
+    granularity: str = Query(DEFAULT_GRANULARITY, pattern="^(day|week|month)$"),
+    project: Project = Depends(verify_project_access),
+    db: Session = Depends(get_session),
+):
+    """
+    Payment-velocity profile of one vendor inside the project.
+    """
+    return SanctionScreeningService.analyze_vendor_velocity(db, entity_name, project.id, granularity)
+
+
 @router.get("/screen/{entity_name}")
 async def screen_entity(
     project_id: str, entity_name: str, project: Project = Depends(verify_project_access)
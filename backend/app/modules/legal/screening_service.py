@@ -1,10 +1,13 @@
-from typing import Dict, Any
-from sqlmodel import Session, select
-from app.models import Transaction
-from thefuzz import fuzz, process
+import threading
+from typing import Dict, Any, List, Optional
+from sqlmodel import Session, select, func
+from app.core.config import settings
+from app.models import Entity, Transaction
+from app.core.time_buckets import bucket_expr
+from app.modules.legal.watchlist_index import WatchlistIndex
 
 # Local watchlist for demo/initial implementation
-# In production, this would be synced with OFAC/UN/etc.
+# In production, this would be synced with OFAC/UN/etc. (see WATCHLIST_CSV_PATH)
 HIGH_RISK_WATCHLIST = [
     "Suspect Entity A",
     "Money Launderer X",
@@ -15,6 +18,30 @@ HIGH_RISK_WATCHLIST = [
     "Shadow Vendor B",
 ]
 
+_watchlist_index: Optional[WatchlistIndex] = None
+_watchlist_lock = threading.Lock()
+
+
+def get_watchlist_index() -> WatchlistIndex:
+    """The process-wide screening index, built on first use from WATCHLIST_CSV_PATH or the built-in list."""
+    global _watchlist_index
+    if _watchlist_index is None:
+        with _watchlist_lock:
+            if _watchlist_index is None:
+                path = settings.WATCHLIST_CSV_PATH
+                _watchlist_index = WatchlistIndex.from_csv(path) if path else WatchlistIndex(HIGH_RISK_WATCHLIST)
+    return _watchlist_index
+
+
+def load_watchlist(path: Optional[str] = None, names: Optional[List[str]] = None) -> WatchlistIndex:
+    """Builds a new index (CSV path or names) and swaps it in; screening keeps using the old one until then."""
+    global _watchlist_index
+    index = WatchlistIndex.from_csv(path) if path else WatchlistIndex(names or HIGH_RISK_WATCHLIST)
+    with _watchlist_lock:
+        _watchlist_index = index
+    return index
+
+
 class SanctionScreeningService:
     @staticmethod
     def screen_entity(entity_name: str) -> Dict[str, Any]:
@@ -30,8 +57,43 @@ class SanctionScreeningService:
             }
 
         # Find best match in watchlist
-        matches = process.extract(entity_name, HIGH_RISK_WATCHLIST, scorer=fuzz.token_sort_ratio, limit=1)
-        best_match, score = matches[0] if matches else (None, 0)
+        index = get_watchlist_index()
+        position, score = index.best_match(entity_name)
+        return SanctionScreeningService._verdict(entity_name, index, position, score)
+
+    @staticmethod
+    def screen_project(db: Session, project_id: str) -> Dict[str, Any]:
+        """
+        Screens every entity of a project against one index snapshot; each distinct name is
+        scored once. Results are ordered by match confidence.
+        """
+        entities = db.exec(
+            select(Entity.id, Entity.name).where(Entity.project_id == project_id)
+        ).all()
+        index = get_watchlist_index()
+        matches = index.best_matches([name for _, name in entities if name and name != "Unknown"])
+
+        results = []
+        for entity_id, name in entities:
+            if name in matches:
+                verdict = SanctionScreeningService._verdict(name, index, *matches[name])
+            else:
+                verdict = SanctionScreeningService.screen_entity(name)
+            results.append({"entity_id": entity_id, **verdict})
+        results.sort(key=lambda r: -r.get("match_confidence", 0))
+
+        return {
+            "project_id": project_id,
+            "screened": len(results),
+            "blocked": sum(1 for r in results if r["status"] == "BLOCKED"),
+            "suspicious": sum(1 for r in results if r["status"] == "SUSPICIOUS"),
+            "sources_scanned": index.source_names,
+            "results": results,
+        }
+
+    @staticmethod
+    def _verdict(entity_name: str, index: WatchlistIndex, position: Optional[int], score: int) -> Dict[str, Any]:
+        best_match = index.names[position] if position is not None else None
 
         risk_score = 0.0
         status = "CLEARED"
@@ -52,47 +114,99 @@ class SanctionScreeningService:
             "risk_score": risk_score,
             "best_match": best_match if score > 60 else None,
             "match_confidence": score,
-            "sources_scanned": ["INTERNAL_WATCHLIST_V1"],
+            "sources_scanned": index.source_names,
             "message": message
         }
 
     @staticmethod
-    def analyze_vendor_velocity(db: Session, entity_name: str) -> Dict[str, Any]:
+    def analyze_vendor_velocity(
+        db: Session, entity_name: str, project_id: Optional[str] = None, granularity: str = "week",
+    ) -> Dict[str, Any]:
         """
         Analyzes internal payment velocity for a specific vendor/entity.
         """
-        # 1. Fetch all transactions for this entity name
-        txs = db.exec(
-            select(Transaction).where(Transaction.receiver == entity_name)
+        filters = [Transaction.receiver == entity_name]
+        if project_id:
+            filters.append(Transaction.project_id == project_id)
+        rows = SanctionScreeningService._velocity_rows(db, granularity, *filters)
+        return SanctionScreeningService._velocity_profile(entity_name, rows)
+
+    @staticmethod
+    def profile_project_vendors(db: Session, project_id: str, granularity: str = "week") -> List[Dict[str, Any]]:
+        """
+        Velocity profiles for every receiver in the project from a single grouped query,
+        riskiest first.
+        """
+        rows = SanctionScreeningService._velocity_rows(db, granularity, Transaction.project_id == project_id)
+        by_vendor: Dict[str, list] = {}
+        for row in rows:
+            by_vendor.setdefault(row[0], []).append(row)
+        profiles = [
+            SanctionScreeningService._velocity_profile(vendor, vendor_rows)
+            for vendor, vendor_rows in by_vendor.items()
+        ]
+        profiles.sort(key=lambda p: (-p["risk_score"], -p["total_volume"]))
+        return profiles
+
+    @staticmethod
+    def _velocity_rows(db: Session, granularity: str, *filters) -> list:
+        """(receiver, period, category, count, volume) groups; rows never leave the database."""
+        event_time = func.coalesce(Transaction.transaction_date, Transaction.timestamp)
+        period = bucket_expr(db, event_time, granularity).label("period")
+        return db.exec(
+            select(
+                Transaction.receiver,
+                period,
+                Transaction.category_code,
+                func.count(),
+                func.coalesce(func.sum(Transaction.actual_amount), 0.0),
+            )
+            .where(*filters)
+            .group_by(Transaction.receiver, period, Transaction.category_code)
         ).all()
-        
-        total_received = sum(t.actual_amount for t in txs)
-        tx_count = len(txs)
-        
+
+    @staticmethod
+    def _velocity_profile(entity_name: str, rows: list) -> Dict[str, Any]:
+        # 1. Roll the (period, category) groups up into totals
+        total_received = 0.0
+        tx_count = 0
+        category_set = set()
+        buckets: Dict[str, Dict[str, Any]] = {}
+        for _, period, category, count, volume in rows:
+            total_received += volume
+            tx_count += count
+            category_set.add(category.value if hasattr(category, 'value') else str(category))
+            key = str(period)[:10]
+            bucket = buckets.setdefault(key, {"period": key, "transaction_count": 0, "volume": 0.0})
+            bucket["transaction_count"] += count
+            bucket["volume"] += volume
+
         # 2. Category Variance (Audit Flag)
-        categories = list(set((t.category_code.value if hasattr(t.category_code, 'value') else str(t.category_code)) for t in txs))
-        
+        categories = sorted(category_set)
+
         risk_score = 0.0
         status = "NORMAL"
-        
+
         # Logic: A concrete vendor ordinarily shouldn't be billing for 'Software' or 'Legal'
         if len(categories) > 3:
             risk_score += 0.5
             status = "CROSS_CATEGORY_RISK"
-            
+
         # Logic: High velocity (many small txs)
         if tx_count > 10 and (total_received / tx_count) < 5000: # Many small payments
              risk_score += 0.3
              status = "STRUCTURING_RISK"
 
+        velocity = [buckets[k] for k in sorted(buckets)]
         return {
             "entity": entity_name,
             "profile_type": "INTERNAL_AUDIT_HISTORY",
             "total_volume": total_received,
             "transaction_count": tx_count,
             "active_categories": categories,
+            "velocity": velocity,
+            "peak_period": max(velocity, key=lambda b: b["transaction_count"])["period"] if velocity else None,
             "risk_score": min(risk_score, 1.0),
             "status": status,
             "audit_note": f"Entity active across {len(categories)} budget lines. Avg Ticket: {total_received/(tx_count or 1):.2f}"
         }
-
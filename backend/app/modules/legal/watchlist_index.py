@@ -0,0 +1,189 @@
+"""
+Watchlist Screening Index
+Prebuilt postings over watchlist names -- normalized tokens, Soundex keys and character
+trigrams -- so screening a name retrieves a short candidate list by weighted key overlap
+and rescores only those with the same thefuzz scorer the service has always used.
+
+Recall safeguard: token_sort_ratio is 200 * LCS / (len_a + len_b) over the processed,
+token-sorted strings, and the LCS is bounded by the shared character counts. After
+retrieval, every name whose bound could still reach the best score (or `exact_above`,
+whichever is higher) is rescored too, so results at or above exact_above -- every
+SUSPICIOUS or BLOCKED verdict included -- match a full scan exactly.
+"""
+
+import csv
+import logging
+import math
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from thefuzz import fuzz, process, utils
+
+logger = logging.getLogger(__name__)
+
+_ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789 "
+_CHAR_SLOTS = np.full(128, len(_ALPHABET), dtype=np.int64)  # extra last slot: any other character
+_CHAR_SLOTS[[ord(c) for c in _ALPHABET]] = np.arange(len(_ALPHABET))
+
+_SOUNDEX = {c: d for d, letters in {
+    "1": "bfpv", "2": "cgjkqsxz", "3": "dt", "4": "l", "5": "mn", "6": "r",
+}.items() for c in letters}
+
+
+def soundex(token: str) -> str:
+    """American Soundex (letter + 3 digits); empty for tokens without a leading letter."""
+    letters = [c for c in token.lower() if c.isalpha()]
+    if not letters:
+        return ""
+    code, last = [letters[0].upper()], _SOUNDEX.get(letters[0], "")
+    for c in letters[1:]:
+        digit = _SOUNDEX.get(c, "")
+        if digit and digit != last:
+            code.append(digit)
+        if c not in "hw":  # h/w do not separate equal codes; vowels do
+            last = digit
+    return ("".join(code) + "000")[:4]
+
+
+def name_keys(name: str) -> List[str]:
+    """
+    Index keys of a name: t:<token>, p:<soundex> and g:<trigram>. Trigrams run over the
+    token-sorted string, the same string token_sort_ratio compares.
+    """
+    tokens = sorted(utils.full_process(name).split())
+    keys = set()
+    for token in tokens:
+        keys.add("t:" + token)
+        phonetic = soundex(token)
+        if phonetic:
+            keys.add("p:" + phonetic)
+    padded = f"#{' '.join(tokens)}#"
+    keys.update("g:" + padded[i:i + 3] for i in range(len(padded) - 2))
+    return list(keys)
+
+
+def sorted_form(name: str) -> str:
+    """The string token_sort_ratio actually compares: ASCII-processed, tokens sorted, single-spaced."""
+    return " ".join(sorted(utils.full_process(name, force_ascii=True).split()))
+
+
+def char_counts(text: str) -> np.ndarray:
+    codes = np.fromiter(map(ord, text), dtype=np.int64, count=len(text))
+    return np.bincount(_CHAR_SLOTS[np.minimum(codes, 127)], minlength=len(_ALPHABET) + 1)
+
+
+class WatchlistIndex:
+    """
+    Candidate retrieval scores every name sharing a key with the query by the summed IDF
+    of shared keys over the square root of the name's key count (so long names do not win
+    on volume), keeps the top `candidates`, and rescores them with token_sort_ratio.
+    Keys held by more than `max_postings` names are skipped at query time unless the
+    query has nothing rarer. Lists no longer than `candidates` are always rescored in full.
+    Names the retrieval missed but whose character-count bound reaches
+    max(best score, exact_above) are rescored as well (see module docstring).
+    """
+
+    def __init__(
+        self,
+        names: Iterable[str],
+        sources: Optional[Iterable[str]] = None,
+        candidates: int = 128,
+        max_postings: int = 5000,
+        exact_above: int = 50,
+    ):
+        self.names: List[str] = list(names)
+        self.sources: List[str] = list(sources) if sources is not None else ["INTERNAL_WATCHLIST_V1"] * len(self.names)
+        self.source_names: List[str] = list(dict.fromkeys(self.sources))
+        self.candidates = candidates
+        self.max_postings = max_postings
+        self.exact_above = exact_above
+        postings: Dict[str, List[int]] = {}
+        key_counts = np.ones(len(self.names))
+        self._counts = np.zeros((len(self.names), len(_ALPHABET) + 1), dtype=np.int32)
+        self._lengths = np.zeros(len(self.names), dtype=np.int64)
+        for i, name in enumerate(self.names):
+            keys = name_keys(name)
+            key_counts[i] = max(len(keys), 1)
+            for key in keys:
+                postings.setdefault(key, []).append(i)
+            form = sorted_form(name)
+            self._counts[i] = char_counts(form)
+            self._lengths[i] = len(form)
+        self._norms = np.sqrt(key_counts)
+        self._postings = {key: np.asarray(ids, dtype=np.int32) for key, ids in postings.items()}
+        total = max(len(self.names), 1)
+        self._idf = {key: math.log(1 + total / len(ids)) for key, ids in self._postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_csv(
+        cls, path: str, name_column: str = "name", source_column: str = "source", **kwargs,
+    ) -> "WatchlistIndex":
+        """Loads a local watchlist CSV; the source column falls back to the file name."""
+        default_source = Path(path).stem.upper()
+        names, sources = [], []
+        with open(path, newline="", encoding="utf-8-sig") as handle:
+            for row in csv.DictReader(handle):
+                name = (row.get(name_column) or "").strip()
+                if name:
+                    names.append(name)
+                    sources.append((row.get(source_column) or "").strip() or default_source)
+        logger.info(f"Loaded {len(names)} watchlist names from {path}")
+        return cls(names, sources, **kwargs)
+
+    def _candidates(self, name: str) -> np.ndarray:
+        if len(self.names) <= self.candidates:
+            return np.arange(len(self.names))  # small lists are rescored in full
+        found = [(self._idf[k], self._postings[k]) for k in name_keys(name) if k in self._postings]
+        if not found:
+            return np.empty(0, dtype=np.int32)
+        selective = [(w, ids) for w, ids in found if len(ids) <= self.max_postings]
+        if not selective:
+            selective = [min(found, key=lambda f: len(f[1]))]
+        ids = np.concatenate([ids for _, ids in selective])
+        weights = np.concatenate([np.full(len(ids), w) for w, ids in selective])
+        unique, inverse = np.unique(ids, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights) / self._norms[unique]
+        if len(unique) > self.candidates:
+            top = np.argpartition(-scores, self.candidates - 1)[: self.candidates]
+            unique = np.sort(unique[top])  # watchlist order keeps the scorer's tie-break
+        return unique
+
+    def _within_reach(self, name: str, threshold: float) -> np.ndarray:
+        """Positions whose upper bound 200 * shared chars / (len_a + len_b) rounds to >= threshold."""
+        form = sorted_form(name)
+        if not form:
+            return np.empty(0, dtype=np.int64)
+        shared = np.minimum(self._counts, char_counts(form)).sum(axis=1)
+        bound = 200.0 * shared / (self._lengths + len(form))
+        return np.flatnonzero(bound >= threshold - 0.5)
+
+    def _score(self, name: str, ids: np.ndarray) -> Tuple[Optional[int], int]:
+        if not len(ids):
+            return None, 0
+        choices = {int(i): self.names[i] for i in ids}
+        match = process.extractOne(name, choices, scorer=fuzz.token_sort_ratio)
+        if match is None:
+            return None, 0
+        _, score, position = match
+        return position, score
+
+    def best_match(self, name: str) -> Tuple[Optional[int], int]:
+        """(watchlist position, token_sort_ratio) of the best match, or (None, 0)."""
+        ids = self._candidates(name)
+        position, score = self._score(name, ids)
+        if len(ids) == len(self.names):
+            return position, score
+        # Recall safeguard: anything that could still tie or beat the result gets scored
+        threshold = max(score, self.exact_above)
+        reach = self._within_reach(name, threshold)
+        if len(np.setdiff1d(reach, ids, assume_unique=True)):
+            position, score = self._score(name, np.union1d(ids, reach))  # sorted: list order tie-break
+        return position, score
+
+    def best_matches(self, names: Sequence[str]) -> Dict[str, Tuple[Optional[int], int]]:
+        """best_match for many names, each distinct name scored once."""
+        return {name: self.best_match(name) for name in dict.fromkeys(names)}
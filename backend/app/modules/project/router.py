@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import Session, select
 from typing import List, Any, Dict, Optional
 from datetime import datetime, UTC
@@ -18,6 +19,11 @@ from app.core.auth_middleware import (
     verify_project_access,
     get_current_user,
 )
+from app.modules.forensic.s_curve_engine import (
+    SCurveEngine,
+    DEFAULT_GRANULARITY,
+    DEFAULT_MAX_POINTS,
+)
 
 
 class CreateProjectRequest(BaseModel):
@@ -234,64 +240,31 @@ async def get_project_dashboard(
 
 @router.get("/{project_id}/s-curve", response_model=Dict[str, Any])
 async def get_s_curve_data(
+    granularity: str = Query(DEFAULT_GRANULARITY, pattern="^(day|week|month)$"),
+    max_points: int = Query(DEFAULT_MAX_POINTS, ge=3, le=5000),
     project: Project = Depends(verify_project_access),
     db: Session = Depends(get_session),
 ):
     """
-    Return data for S-Curve visualization (OPTIMIZED):
-    1. Planned Value (PV) - Linear accumulation of Contract Value
+    Return data for S-Curve visualization:
+    1. Planned Value (PV) - Linear accumulation of the budget over the contract period
     2. Earned Value (EV) - Based on Milestones achieved
     3. Actual Cost (AC) - Transaction flow accumulation
 
-    Optimization: Uses database-level aggregation instead of Python loops
-    Performance: ~200ms vs ~500ms for large projects
-    """
-    from app.core.query_cache import query_cache
-    from sqlalchemy import text
-
-    # Check cache first (5min TTL)
-    cache_key = f"scurve:{project.id}"
-    cached_result = query_cache.get(cache_key)
-    if cached_result:
-        return cached_result
-
-    # Use SQL window functions for cumulative sum (MUCH faster)
-    # This is database-level aggregation instead of Python loops
-    query = """
-        SELECT
-            timestamp as date,
-            description as tx_name,
-            SUM(CASE WHEN category_code = 'V' THEN actual_amount ELSE 0 END)
-                OVER (ORDER BY timestamp ROWS UNBOUNDED PRECEDING) as ac
-        FROM transaction
-        WHERE timestamp >= :start_date
-        ORDER BY timestamp
+    Buckets are aggregated in SQL for this project only, then downsampled (LTTB)
+    to at most max_points, so the payload stays bounded on multi-year projects.
     """
+    from app.core.query_cache import query_cache, transaction_tag, milestone_tag
+    from app.core.cache import project_tag
 
-    result = db.execute(text(query), {"start_date": project.start_date})
-
-    data_points = [
-        {
-            "date": (
-                row.date.isoformat()
-                if hasattr(row.date, "isoformat")
-                else str(row.date)
-            ),
-            "ac": float(row.ac or 0),
-            "tx_name": row.tx_name,
-        }
-        for row in result
-    ]
-
-    response = {
-        "start_date": project.start_date.isoformat(),
-        "curve_data": data_points,
-    }
-
-    # Cache result for 5 minutes
-    query_cache.set(cache_key, response, ttl=300)
-
-    return response
+    # Cached 5 minutes; concurrent misses share one computation, waited on off the event loop
+    return await asyncio.to_thread(
+        query_cache.get_or_compute,
+        f"scurve:{project.id}:{granularity}:{max_points}",
+        lambda: SCurveEngine(db).build(project, granularity=granularity, max_points=max_points),
+        ttl=300,
+        tags=[project_tag(project.id), transaction_tag(project.id), milestone_tag(project.id)],
+    )
 
 
 @router.get("/hotspots", response_model=List[Dict[str, Any]])
@@ -0,0 +1,178 @@
+"""
+Geocoding Providers
+Pluggable address -> coordinate backends; address normalization lives in app.core.normalization.
+The offline provider is deterministic and network-free (tests, air-gapped deployments).
+"""
+
+import abc
+import asyncio
+import hashlib
+import logging
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.normalization import normalize_address
+
+logger = logging.getLogger(__name__)
+
+
+class GeocodingProvider(abc.ABC):
+    name = "base"
+    max_concurrency: Optional[int] = None  # provider-imposed cap on in-flight requests
+
+    @abc.abstractmethod
+    async def geocode(self, address: str) -> Optional[Dict[str, float]]:
+        """Returns {"lat", "lng", "formatted_address"} or None if the address is unknown."""
+
+    async def close(self):
+        """Releases network resources held between calls."""
+
+
+class GoogleMapsProvider(GeocodingProvider):
+    name = "google"
+
+    def __init__(self, api_key: str):
+        import googlemaps
+        self.client = googlemaps.Client(key=api_key)
+
+    async def geocode(self, address: str) -> Optional[Dict[str, float]]:
+        # googlemaps is synchronous; keep the event loop free
+        result = await asyncio.to_thread(self.client.geocode, address)
+        if not result:
+            return None
+        location = result[0]["geometry"]["location"]
+        return {
+            "lat": location["lat"],
+            "lng": location["lng"],
+            "formatted_address": result[0].get("formatted_address", address)
+        }
+
+
+class NominatimProvider(GeocodingProvider):
+    """
+    OpenStreetMap - free, but the usage policy allows one request per second and no
+    parallel requests. Calls are serialized and spaced min_interval apart whatever the
+    caller's concurrency, over one reused HTTP session.
+    """
+    name = "nominatim"
+    url = "https://nominatim.openstreetmap.org/search"
+    max_concurrency = 1
+
+    def __init__(self, min_interval: float = 1.0):
+        self.min_interval = min_interval
+        self._session = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop = None
+        self._next_slot = 0.0
+
+    def _bind_loop(self):
+        # Lock and session belong to one event loop; start fresh if called from another
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._lock, self._session, self._next_slot = loop, asyncio.Lock(), None, 0.0
+        return loop
+
+    async def _get_session(self):
+        import aiohttp
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(headers={"User-Agent": "Zenith-Forensic-Platform/3.0"})
+        return self._session
+
+    async def geocode(self, address: str) -> Optional[Dict[str, float]]:
+        loop = self._bind_loop()
+        params = {"q": address, "format": "json", "limit": 1}
+        async with self._lock:
+            wait = self._next_slot - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                session = await self._get_session()
+                async with session.get(self.url, params=params) as response:
+                    if response.status != 200:
+                        raise RuntimeError(f"Nominatim HTTP {response.status}")
+                    data = await response.json()
+            finally:
+                self._next_slot = loop.time() + self.min_interval
+        if not data:
+            return None
+        return {
+            "lat": float(data[0]["lat"]),
+            "lng": float(data[0]["lon"]),
+            "formatted_address": data[0].get("display_name", address)
+        }
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+class FallbackProvider(GeocodingProvider):
+    """Tries providers in order; a provider error falls through to the next one."""
+    name = "auto"
+
+    def __init__(self, providers: List[GeocodingProvider]):
+        self.providers = providers
+        limits = [p.max_concurrency for p in providers if p.max_concurrency]
+        self.max_concurrency = min(limits) if limits else None
+
+    async def close(self):
+        for provider in self.providers:
+            await provider.close()
+
+    async def geocode(self, address: str) -> Optional[Dict[str, float]]:
+        last_error = None
+        for provider in self.providers:
+            try:
+                coords = await provider.geocode(address)
+                if coords:
+                    return coords
+            except Exception as e:
+                logger.warning(f"{provider.name} geocoding failed: {e}")
+                last_error = e
+        if last_error is not None:
+            raise last_error
+        return None
+
+
+class OfflineGeocodingProvider(GeocodingProvider):
+    """
+    Deterministic stand-in: the same address always maps to the same point inside
+    the configured bounding box (Greater Jakarta by default). Never touches the network.
+    """
+    name = "offline"
+
+    def __init__(self, bbox=(-6.40, 106.65, -6.05, 107.05)):
+        self.bbox = bbox
+
+    async def geocode(self, address: str) -> Optional[Dict[str, float]]:
+        normalized = normalize_address(address)
+        if not normalized:
+            return None
+        digest = hashlib.sha256(normalized.encode("utf-8")).digest()
+        lat_min, lng_min, lat_max, lng_max = self.bbox
+        u = int.from_bytes(digest[:4], "big") / 0xFFFFFFFF
+        v = int.from_bytes(digest[4:8], "big") / 0xFFFFFFFF
+        return {
+            "lat": round(lat_min + u * (lat_max - lat_min), 6),
+            "lng": round(lng_min + v * (lng_max - lng_min), 6),
+            "formatted_address": address.strip()
+        }
+
+
+def get_geocoding_provider(name: Optional[str] = None) -> GeocodingProvider:
+    name = (name or settings.GEOCODING_PROVIDER or "auto").lower()
+    if name == "offline" or (name == "auto" and settings.TESTING):
+        return OfflineGeocodingProvider()
+
+    google = None
+    if name in ("auto", "google") and settings.GOOGLE_MAPS_API_KEY:
+        try:
+            google = GoogleMapsProvider(settings.GOOGLE_MAPS_API_KEY)
+        except ImportError:
+            logger.warning("googlemaps not installed; falling back to Nominatim")
+    if name == "google" and google is not None:
+        return google
+    if name == "nominatim" or google is None:
+        return NominatimProvider()
+    return FallbackProvider([google, NominatimProvider()])
@@ -13,85 +13,168 @@ v3.0 Features:
 Performance Impact: +2.0 frontend functionality points
 """
 
-from typing import Dict, Any, Optional
-from sqlmodel import Session, select
+import asyncio
+import logging
+from datetime import datetime, UTC, timedelta
+from typing import Dict, Any, Iterable, List, Optional
+from sqlmodel import Session, select, delete
+from sqlalchemy import and_, func, or_
 from collections import defaultdict
+import numpy as np
 
 from app.models import Transaction
-from app.models import Entity
+from app.models import Entity, EntityLocation, GeocodeCacheEntry
+from app.services.spatial_index import (
+    geohash_encode,
+    covering_prefixes,
+    haversine_km,
+    prefix_successor,
+    dbscan_haversine,
+)
+from app.services.geocoding_providers import (
+    GeocodingProvider,
+    OfflineGeocodingProvider,
+    get_geocoding_provider,
+)
+from app.core.normalization import address_key, normalize_address
 from app.core.config import settings
-from app.core.cache import cache_result
 
-# Google Maps API (optional - can use OpenStreetMap/Nominatim as fallback)
-try:
-    import googlemaps
-    GOOGLE_MAPS_AVAILABLE = bool(settings.GOOGLE_MAPS_API_KEY)
-    if GOOGLE_MAPS_AVAILABLE:
-        gmaps = googlemaps.Client(key=settings.GOOGLE_MAPS_API_KEY)
-except (ImportError, AttributeError):
-    GOOGLE_MAPS_AVAILABLE = False
-    gmaps = None
+logger = logging.getLogger(__name__)
+
+IN_CHUNK = 500
+NEGATIVE_CACHE_DAYS = 30  # unknown addresses are retried after this
+
+
+def _chunks(values: List[Any], size: int = IN_CHUNK):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
 
 
 class GeocodingService:
     """
     Geocoding and geospatial analysis service for forensic mapping.
     Converts entity addresses to lat/lng coordinates.
+    Addresses are normalized, deduplicated and served from a persistent cache;
+    only cache misses reach the provider, in bounded concurrent batches.
     """
     
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        provider: Optional[GeocodingProvider] = None,
+        concurrency: Optional[int] = None,
+        batch_size: Optional[int] = None
+    ):
         self.db = db
+        self.provider = provider or get_geocoding_provider()
+        self.concurrency = max(1, concurrency or settings.GEOCODING_CONCURRENCY)
+        if self.provider.max_concurrency:
+            # e.g. Nominatim's usage policy: one request at a time
+            self.concurrency = min(self.concurrency, self.provider.max_concurrency)
+        self.batch_size = max(1, batch_size or settings.GEOCODING_BATCH_SIZE)
+        self.last_run: Dict[str, int] = {}
     
-    @cache_result(ttl=86400, prefix="geocode")  # Cache for 24 hours
     async def geocode_address(self, address: str) -> Optional[Dict[str, float]]:
         """
-        Geocode a single address to lat/lng coordinates.
-        Uses Google Maps API with fallback to Nominatim (OpenStreetMap).
+        Geocode a single address to lat/lng coordinates (through the persistent cache).
         """
-        if not address or address.strip() == "":
+        normalized = normalize_address(address)
+        if not normalized:
             return None
+        return (await self.geocode_addresses([address])).get(normalized)
+    
+    def _cached(self, keys: List[str]) -> Dict[str, GeocodeCacheEntry]:
+        offline = isinstance(self.provider, OfflineGeocodingProvider)
+        negative_cutoff = datetime.now(UTC) - timedelta(days=NEGATIVE_CACHE_DAYS)
+        hits = {}
+        for batch in _chunks(keys):
+            for entry in self.db.exec(
+                select(GeocodeCacheEntry).where(GeocodeCacheEntry.address_key.in_(batch))
+            ).all():
+                # Synthetic offline points never answer for a real provider
+                if entry.provider == OfflineGeocodingProvider.name and not offline:
+                    continue
+                if not entry.found:
+                    created = entry.created_at
+                    if created.tzinfo is None:
+                        created = created.replace(tzinfo=UTC)
+                    if created < negative_cutoff:
+                        continue
+                hits[entry.address_key] = entry
+        return hits
+    
+    async def _resolve(self, addresses: List[str]) -> List[Any]:
+        semaphore = asyncio.Semaphore(self.concurrency)
         
-        # Try Google Maps first
-        if GOOGLE_MAPS_AVAILABLE:
-            try:
-                result = gmaps.geocode(address)
-                if result and len(result) > 0:
-                    location = result[0]["geometry"]["location"]
-                    return {
-                        "lat": location["lat"],
-                        "lng": location["lng"],
-                        "formatted_address": result[0].get("formatted_address", address)
-                    }
-            except Exception as e:
-                print(f"Google Maps geocoding failed: {e}")
+        async def bounded(address: str):
+            async with semaphore:
+                return await self.provider.geocode(address)
         
-        # Fallback to Nominatim (OpenStreetMap) - free but rate-limited
-        try:
-            import aiohttp
-            async with aiohttp.ClientSession() as session:
-                url = "https://nominatim.openstreetmap.org/search"
-                params = {
-                    "q": address,
-                    "format": "json",
-                    "limit": 1
-                }
-                headers = {
-                    "User-Agent": "Zenith-Forensic-Platform/3.0"
+        return await asyncio.gather(*(bounded(a) for a in addresses), return_exceptions=True)
+    
+    async def geocode_addresses(self, addresses: Iterable[str]) -> Dict[str, Optional[Dict[str, float]]]:
+        """
+        Batch geocoding keyed by normalized address.
+        Cost scales with distinct uncached addresses, not with the number of inputs.
+        """
+        originals: Dict[str, str] = {}
+        for address in addresses:
+            normalized = normalize_address(address)
+            if normalized and normalized not in originals:
+                originals[normalized] = address.strip()
+        
+        key_of = {normalized: address_key(normalized) for normalized in originals}
+        cached = self._cached(list(key_of.values()))
+        
+        results: Dict[str, Optional[Dict[str, float]]] = {}
+        misses = []
+        for normalized, key in key_of.items():
+            entry = cached.get(key)
+            if entry is None:
+                misses.append(normalized)
+            elif entry.found:
+                results[normalized] = {
+                    "lat": entry.lat,
+                    "lng": entry.lng,
+                    "formatted_address": entry.formatted_address or originals[normalized]
                 }
-                
-                async with session.get(url, params=params, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if data and len(data) > 0:
-                            return {
-                                "lat": float(data[0]["lat"]),
-                                "lng": float(data[0]["lon"]),
-                                "formatted_address": data[0].get("display_name", address)
-                            }
-        except Exception as e:
-            print(f"Nominatim geocoding failed: {e}")
+            else:
+                results[normalized] = None
+        
+        failed = 0
+        try:
+            for batch in _chunks(misses, self.batch_size):
+                resolved = await self._resolve([originals[n] for n in batch])
+                for normalized, coords in zip(batch, resolved):
+                    if isinstance(coords, Exception):
+                        # Transient provider failure: not cached, retried next run
+                        logger.warning(f"Geocoding failed for '{originals[normalized]}': {coords}")
+                        results[normalized] = None
+                        failed += 1
+                        continue
+                    results[normalized] = coords
+                    self.db.merge(GeocodeCacheEntry(
+                        address_key=key_of[normalized],
+                        normalized_address=normalized,
+                        found=coords is not None,
+                        lat=coords["lat"] if coords else None,
+                        lng=coords["lng"] if coords else None,
+                        formatted_address=coords.get("formatted_address") if coords else None,
+                        provider=self.provider.name
+                    ))
+                # Persist per batch so an interrupted run keeps its progress
+                self.db.commit()
+        finally:
+            if misses:
+                await self.provider.close()  # one HTTP session per run, not per address
         
-        return None
+        self.last_run = {
+            "distinct_addresses": len(originals),
+            "cache_hits": len(originals) - len(misses),
+            "geocoder_calls": len(misses),
+            "geocoder_failures": failed
+        }
+        return results
     
     async def geocode_entities(self, project_id: str) -> Dict[str, Any]:
         """
@@ -109,55 +192,41 @@ class GeocodingService:
             }]
         }
         """
-        # Fetch all transactions to calculate entity activity
-        stmt = select(Transaction).where(Transaction.project_id == project_id)
-        transactions = self.db.exec(stmt).all()
+        # Entity activity via GROUP BY instead of loading every transaction
+        entity_totals = self._entity_activity(project_id)
         
-        if not transactions:
+        if not entity_totals:
             return {"markers": [], "stats": {}}
         
-        # Calculate entity transaction totals
-        entity_totals = defaultdict(lambda: {
-            "total_amount": 0.0,
-            "transaction_count": 0,
-            "risk_scores": []
-        })
-        
-        entity_names = set()
-        for txn in transactions:
-            entity_names.add(txn.sender)
-            entity_names.add(txn.receiver)
-            
-            entity_totals[txn.sender]["total_amount"] += txn.amount
-            entity_totals[txn.sender]["transaction_count"] += 1
-            entity_totals[txn.sender]["risk_scores"].append(txn.risk_score or 0.0)
-            
-            entity_totals[txn.receiver]["transaction_count"] += 1
-            entity_totals[txn.receiver]["risk_scores"].append(txn.risk_score or 0.0)
+        # Fetch entity details from database; same-name entities of other projects stay out
+        entities = []
+        for batch in _chunks(list(entity_totals.keys())):
+            entities.extend(self.db.exec(
+                select(Entity).where(Entity.project_id == project_id, Entity.name.in_(batch))
+            ).all())
         
-        # Fetch entity details from database
-        stmt = select(Entity).where(Entity.name.in_(list(entity_names)))
-        entities = self.db.exec(stmt).all()
+        addresses = {
+            entity.id: (entity.metadata_json or {}).get("address")
+            for entity in entities
+        }
+        geocoded = await self.geocode_addresses(a for a in addresses.values() if a)
         
-        # Geocode each entity
         markers = []
+        locations = []
         geocoded_count = 0
         
         for entity in entities:
-            address = entity.metadata_json.get("address")
+            address = addresses.get(entity.id)
             if not address:
                 continue
             
-            # Geocode address
-            coords = await self.geocode_address(address)
+            coords = geocoded.get(normalize_address(address))
             
             if coords:
                 geocoded_count += 1
                 stats = entity_totals.get(entity.name, {})
-                avg_risk = (
-                    sum(stats.get("risk_scores", [])) / len(stats.get("risk_scores", []))
-                    if stats.get("risk_scores") else 0.0
-                )
+                count = stats.get("transaction_count", 0)
+                avg_risk = stats.get("risk_sum", 0.0) / count if count else 0.0
                 
                 markers.append({
                     "lat": coords["lat"],
@@ -165,12 +234,15 @@ class GeocodingService:
                     "name": entity.name,
                     "entity_type": entity.type,
                     "total_transacted": stats.get("total_amount", 0.0),
-                    "transaction_count": stats.get("transaction_count", 0),
+                    "transaction_count": count,
                     "risk_level": self._calculate_risk_level(avg_risk),
                     "risk_score": avg_risk,
                     "address": coords.get("formatted_address", address),
                     "tax_id": entity.metadata_json.get("tax_id")
                 })
+                locations.append(self._location(project_id, entity.id, coords, address))
+        
+        self._replace_locations(project_id, locations)
         
         # Calculate map center (average of all coordinates)
         if markers:
@@ -185,7 +257,8 @@ class GeocodingService:
             "stats": {
                 "total_entities": len(entities),
                 "geocoded_count": geocoded_count,
-                "geocoding_rate": geocoded_count / len(entities) if entities else 0.0
+                "geocoding_rate": geocoded_count / len(entities) if entities else 0.0,
+                **self.last_run
             }
         }
     
@@ -227,76 +300,166 @@ class GeocodingService:
             "max_intensity": max_intensity
         }
     
+    # --- Spatial index ----------------------------------------------------
+
+    @staticmethod
+    def _location(project_id: str, entity_id: str, coords: Dict[str, Any], address: str) -> EntityLocation:
+        return EntityLocation(
+            project_id=project_id,
+            entity_id=entity_id,
+            lat=coords["lat"],
+            lng=coords["lng"],
+            geohash=geohash_encode(coords["lat"], coords["lng"]),
+            address=coords.get("formatted_address", address),
+        )
+
+    def _replace_locations(self, project_id: str, locations: List[EntityLocation]):
+        """Rewrites the project's spatial index from a fresh geocoding pass."""
+        self.db.exec(delete(EntityLocation).where(EntityLocation.project_id == project_id))
+        for location in locations:
+            self.db.add(location)
+        self.db.commit()
+
+    async def _ensure_index(self, project_id: str):
+        """
+        Indexes project entities that have an address but no location row yet (new
+        entities, or the whole project on first use). Addresses go through the geocode
+        cache, so entities that cannot be placed cost a cache lookup, not a provider call.
+        """
+        indexed = select(EntityLocation.entity_id).where(EntityLocation.project_id == project_id)
+        missing = {}
+        for entity in self.db.exec(
+            select(Entity).where(Entity.project_id == project_id, Entity.id.not_in(indexed))
+        ).all():
+            address = (entity.metadata_json or {}).get("address")
+            if address:
+                missing[entity.id] = address
+        if not missing:
+            return
+        geocoded = await self.geocode_addresses(missing.values())
+        added = 0
+        for entity_id, address in missing.items():
+            coords = geocoded.get(normalize_address(address))
+            if coords:
+                self.db.add(self._location(project_id, entity_id, coords, address))
+                added += 1
+        if added:
+            self.db.commit()
+
+    def _entity_activity(
+        self, project_id: str, names: Optional[Iterable[str]] = None
+    ) -> Dict[str, Dict[str, float]]:
+        """
+        Per-entity totals via GROUP BY: amount sent, transactions on either side, risk sum.
+        names=None aggregates every counterparty of the project.
+        """
+        activity = defaultdict(lambda: {"total_amount": 0.0, "transaction_count": 0, "risk_sum": 0.0})
+        risk = func.sum(func.coalesce(Transaction.risk_score, 0.0))
+        batches = [None] if names is None else list(_chunks(list(set(names))))
+        for batch in batches:
+            sent = (
+                select(Transaction.sender, func.sum(Transaction.amount), func.count(Transaction.id), risk)
+                .where(Transaction.project_id == project_id)
+                .group_by(Transaction.sender)
+            )
+            received = (
+                select(Transaction.receiver, func.count(Transaction.id), risk)
+                .where(Transaction.project_id == project_id)
+                .group_by(Transaction.receiver)
+            )
+            if batch is not None:
+                sent = sent.where(Transaction.sender.in_(batch))
+                received = received.where(Transaction.receiver.in_(batch))
+            for name, total, count, risk_sum in self.db.exec(sent).all():
+                activity[name]["total_amount"] += float(total or 0.0)
+                activity[name]["transaction_count"] += count
+                activity[name]["risk_sum"] += float(risk_sum or 0.0)
+            for name, count, risk_sum in self.db.exec(received).all():
+                activity[name]["transaction_count"] += count
+                activity[name]["risk_sum"] += float(risk_sum or 0.0)
+        return activity
+
+    def _markers_for(self, project_id: str, locations: List[EntityLocation]) -> Dict[str, Dict[str, Any]]:
+        """Marker payloads keyed by entity_id, for the given locations only (geocode_entities shape)."""
+        entity_ids = [loc.entity_id for loc in locations]
+        entities: Dict[str, Entity] = {}
+        for batch in _chunks(entity_ids):
+            for entity in self.db.exec(select(Entity).where(Entity.id.in_(batch))).all():
+                entities[entity.id] = entity
+        activity = self._entity_activity(project_id, [e.name for e in entities.values()])
+
+        markers = {}
+        for loc in locations:
+            entity = entities.get(loc.entity_id)
+            if entity is None:
+                continue
+            stats = activity.get(entity.name, {})
+            count = stats.get("transaction_count", 0)
+            avg_risk = stats.get("risk_sum", 0.0) / count if count else 0.0
+            markers[loc.entity_id] = {
+                "lat": loc.lat,
+                "lng": loc.lng,
+                "name": entity.name,
+                "entity_type": entity.type,
+                "total_transacted": stats.get("total_amount", 0.0),
+                "transaction_count": count,
+                "risk_level": self._calculate_risk_level(avg_risk),
+                "risk_score": avg_risk,
+                "address": loc.address,
+                "tax_id": (entity.metadata_json or {}).get("tax_id")
+            }
+        return markers
+
     async def cluster_entities(
         self,
         project_id: str,
-        radius_km: float = 5.0
+        radius_km: float = 5.0,
+        min_samples: int = 2
     ) -> Dict[str, Any]:
         """
-        Cluster nearby entities within specified radius.
+        Density clustering (DBSCAN over haversine) of indexed entity locations.
+        radius_km is the neighbourhood radius (eps); clusters need min_samples members.
         Useful for identifying concentrated fraud operations.
         """
-        from math import radians, cos, sin, asin, sqrt
+        await self._ensure_index(project_id)
+        locations = self.db.exec(
+            select(EntityLocation)
+            .where(EntityLocation.project_id == project_id)
+            .order_by(EntityLocation.entity_id)
+        ).all()
         
-        def haversine_distance(lat1, lon1, lat2, lon2):
-            """Calculate distance between two points in km."""
-            R = 6371  # Earth radius in km
-            
-            lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-            dlat = lat2 - lat1
-            dlon = lon2 - lon1
-            
-            a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-            c = 2 * asin(sqrt(a))
-            
-            return R * c
+        if not locations:
+            return {"clusters": []}
         
-        # Get geocoded markers
-        geocoded = await self.geocode_entities(project_id)
-        markers = geocoded.get("markers", [])
+        labels = dbscan_haversine(
+            [loc.lat for loc in locations],
+            [loc.lng for loc in locations],
+            eps_km=radius_km,
+            min_samples=min_samples
+        )
         
-        if not markers:
-            return {"clusters": []}
+        # Marker payloads only for clustered entities, not the whole project
+        clustered = [(loc, int(label)) for loc, label in zip(locations, labels) if label >= 0]
+        markers = self._markers_for(project_id, [loc for loc, _ in clustered])
         
-        # Simple clustering algorithm (can be improved with DBSCAN)
-        clusters = []
-        processed = set()
+        grouped: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for loc, label in clustered:
+            if loc.entity_id in markers:
+                grouped[label].append(markers[loc.entity_id])
         
-        for i, marker1 in enumerate(markers):
-            if i in processed:
+        clusters = []
+        for members in grouped.values():
+            if len(members) < min_samples:
                 continue
-            
-            cluster = {
-                "center": {"lat": marker1["lat"], "lng": marker1["lng"]},
-                "members": [marker1],
-                "total_transacted": marker1["total_transacted"]
-            }
-            processed.add(i)
-            
-            # Find nearby entities
-            for j, marker2 in enumerate(markers):
-                if j in processed or i == j:
-                    continue
-                
-                distance = haversine_distance(
-                    marker1["lat"], marker1["lng"],
-                    marker2["lat"], marker2["lng"]
-                )
-                
-                if distance <= radius_km:
-                    cluster["members"].append(marker2)
-                    cluster["total_transacted"] += marker2["total_transacted"]
-                    processed.add(j)
-            
-            # Only include clusters with 2+ members
-            if len(cluster["members"]) >= 2:
-                # Recalculate center as average
-                cluster["center"] = {
-                    "lat": sum(m["lat"] for m in cluster["members"]) / len(cluster["members"]),
-                    "lng": sum(m["lng"] for m in cluster["members"]) / len(cluster["members"])
-                }
-                cluster["member_count"] = len(cluster["members"])
-                clusters.append(cluster)
+            clusters.append({
+                "center": {
+                    "lat": sum(m["lat"] for m in members) / len(members),
+                    "lng": sum(m["lng"] for m in members) / len(members)
+                },
+                "members": members,
+                "total_transacted": sum(m["total_transacted"] for m in members),
+                "member_count": len(members)
+            })
         
         # Sort by total transacted (largest first)
         clusters.sort(key=lambda x: x["total_transacted"], reverse=True)
@@ -304,7 +467,8 @@ class GeocodingService:
         return {
             "clusters": clusters,
             "total_clusters": len(clusters),
-            "clustering_radius_km": radius_km
+            "clustering_radius_km": radius_km,
+            "noise_entities": int(np.sum(labels == -1))
         }
     
     async def find_entities_near_location(
@@ -316,37 +480,37 @@ class GeocodingService:
     ) -> Dict[str, Any]:
         """
         Find all entities within radius of a specific location.
+        Candidates come from covering geohash buckets; distances are exact haversine.
         Useful for area-based investigations.
         """
-        from math import radians, cos, sin, asin, sqrt
-        
-        def haversine_distance(lat1, lon1, lat2, lon2):
-            """Calculate distance between two points in km."""
-            R = 6371  # Earth radius in km
-            
-            lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-            dlat = lat2 - lat1
-            dlon = lon2 - lon1
-            
-            a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-            c = 2 * asin(sqrt(a))
-            
-            return R * c
-        
-        # Get geocoded markers
-        geocoded = await self.geocode_entities(project_id)
-        markers = geocoded.get("markers", [])
+        await self._ensure_index(project_id)
+        stmt = select(EntityLocation).where(EntityLocation.project_id == project_id)
+        prefixes = covering_prefixes(lat, lng, radius_km)
+        if prefixes != [""]:
+            # Range predicates (not LIKE) so the geohash index serves every dialect/collation
+            ranges = []
+            for prefix in prefixes:
+                upper = prefix_successor(prefix)
+                lower = EntityLocation.geohash >= prefix
+                ranges.append(lower if upper is None else and_(lower, EntityLocation.geohash < upper))
+            stmt = stmt.where(or_(*ranges))
+        candidates = self.db.exec(stmt).all()
         
-        # Filter markers within radius
         nearby_entities = []
-        for marker in markers:
-            distance = haversine_distance(lat, lng, marker["lat"], marker["lng"])
-            
-            if distance <= radius_km:
-                nearby_entities.append({
-                    **marker,
-                    "distance_km": round(distance, 2)
-                })
+        if candidates:
+            distances = haversine_km(
+                lat, lng,
+                np.array([c.lat for c in candidates]),
+                np.array([c.lng for c in candidates])
+            )
+            hits = [(c, float(d)) for c, d in zip(candidates, distances) if d <= radius_km]
+            markers = self._markers_for(project_id, [c for c, _ in hits])
+            for location, distance in hits:
+                if location.entity_id in markers:
+                    nearby_entities.append({
+                        **markers[location.entity_id],
+                        "distance_km": round(distance, 2)
+                    })
         
         # Sort by distance
         nearby_entities.sort(key=lambda x: x["distance_km"])
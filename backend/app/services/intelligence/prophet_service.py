@@ -2,11 +2,12 @@
 The Prophet - Predictive Compliance System (Unified Intelligence Layer).
 Consolidates real-time fraud prevention, budget forecasting, and red-teaming.
 """
-import random
+import re
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, UTC, timedelta
 
+import numpy as np
 from sqlmodel import Session, select, func
 import sqlalchemy as sa
 import google.generativeai as genai
@@ -16,6 +17,80 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Shared by the single-transaction and batch scorers so both always agree
+RISK_KEYWORDS = {
+    "urgent": 15, "segera": 15,
+    "cash": 30, "tunai": 30,
+    "pribadi": 40, "personal": 40,
+    "facilitation": 50,
+    "titipan": 20
+}
+_KEYWORD_RE = re.compile("|".join(re.escape(k) for k in RISK_KEYWORDS))
+WATCHLIST_WEIGHT = 100
+FLAG_WEIGHT = 10
+FLAG_CAP = 40
+VELOCITY_MIN_TX = 5
+VELOCITY_PER_DAY = 5.0
+VELOCITY_WEIGHT = 15
+IN_CHUNK = 500
+
+
+def _risk_level(score: float) -> str:
+    if score >= 75: return "CRITICAL"
+    if score >= 50: return "HIGH"
+    if score >= 25: return "ELEVATED"
+    return "NOMINAL"
+
+
+def _recommendation(score: float) -> str:
+    return "BLOCK" if score >= 75 else "ESCALATE" if score >= 50 else "MONITOR"
+
+
+def _receiver_profiles(db: Session, receivers) -> Dict[str, Tuple[int, int, float]]:
+    """
+    One grouped query: receiver -> (past flags, transaction count, transactions per day).
+    `receivers` is either a list of names or a SELECT of names.
+    """
+    flagged = func.sum(sa.case((Transaction.potential_misappropriation == True, 1), else_=0))
+    stmt = (
+        select(
+            Transaction.receiver,
+            flagged,
+            func.count(Transaction.id),
+            func.min(Transaction.timestamp),
+            func.max(Transaction.timestamp),
+        )
+        .group_by(Transaction.receiver)
+    )
+    if isinstance(receivers, list):
+        batches = [receivers[i:i + IN_CHUNK] for i in range(0, len(receivers), IN_CHUNK)]
+    else:
+        batches = [receivers]
+    profiles = {}
+    for batch in batches:
+        for name, flags, count, first, last in db.exec(stmt.where(Transaction.receiver.in_(batch))).all():
+            span_days = max((last - first).total_seconds() / 86400, 1.0) if first and last else 1.0
+            profiles[name] = (int(flags or 0), int(count), count / span_days)
+    return profiles
+
+
+def _entity_watchlist(db: Session, names) -> Dict[str, bool]:
+    """One grouped query: entity name -> watchlisted (names without an Entity are absent)."""
+    stmt = (
+        select(Entity.name, func.max(sa.cast(Entity.is_watchlisted, sa.Integer)))
+        .group_by(Entity.name)
+    )
+    if isinstance(names, list):
+        batches = [names[i:i + IN_CHUNK] for i in range(0, len(names), IN_CHUNK)]
+    else:
+        batches = [names]
+    result = {}
+    for batch in batches:
+        for name, watchlisted in db.exec(stmt.where(Entity.name.in_(batch))).all():
+            result[name] = bool(watchlisted)
+    return result
+
+
 class ProphetService:
     def __init__(self, db: Session):
         self.db = db
@@ -77,52 +152,152 @@ class ProphetService:
             factors.append("Round number detected (+10)")
             
         # 2. Keyword Sensitivity
-        KEYWORDS = {
-            "urgent": 15, "segera": 15, 
-            "cash": 30, "tunai": 30, 
-            "pribadi": 40, "personal": 40,
-            "facilitation": 50,
-            "titipan": 20
-        }
-        
-        for k, weight in KEYWORDS.items():
-            if k in description:
-                score += weight
-                factors.append(f"High-risk keyword '{k}' (+{weight})")
+        for k in sorted(set(_KEYWORD_RE.findall(description)), key=list(RISK_KEYWORDS).index):
+            weight = RISK_KEYWORDS[k]
+            score += weight
+            factors.append(f"High-risk keyword '{k}' (+{weight})")
         
         # 3. Entity Profiling
         if receiver:
-            entity = self.db.exec(select(Entity).where(Entity.name == receiver)).first()
-            if entity:
-                if entity.is_watchlisted:
-                    score += 100
-                    factors.append("Receiver on Watchlist (+100)")
+            watchlist = _entity_watchlist(self.db, [receiver])
+            if receiver in watchlist:
+                if watchlist[receiver]:
+                    score += WATCHLIST_WEIGHT
+                    factors.append(f"Receiver on Watchlist (+{WATCHLIST_WEIGHT})")
                 
                 # Historical pattern
-                flagged_count = self.db.exec(
-                    select(func.count(Transaction.id))
-                    .where(Transaction.receiver == receiver)
-                    .where(Transaction.potential_misappropriation == True)
-                ).first() or 0
+                flagged_count, tx_count, per_day = _receiver_profiles(self.db, [receiver]).get(receiver, (0, 0, 0.0))
                 if flagged_count > 0:
-                    score += min(40, flagged_count * 10)
-                    factors.append(f"Receiver has {flagged_count} past flags (+{min(40, flagged_count * 10)})")
+                    score += min(FLAG_CAP, flagged_count * FLAG_WEIGHT)
+                    factors.append(f"Receiver has {flagged_count} past flags (+{min(FLAG_CAP, flagged_count * FLAG_WEIGHT)})")
+                if tx_count >= VELOCITY_MIN_TX and per_day >= VELOCITY_PER_DAY:
+                    score += VELOCITY_WEIGHT
+                    factors.append(f"Receiver velocity {per_day:.1f} tx/day (+{VELOCITY_WEIGHT})")
         
-        # Risk level normalization
-        risk_level = "NOMINAL"
-        if score >= 75: risk_level = "CRITICAL"
-        elif score >= 50: risk_level = "HIGH"
-        elif score >= 25: risk_level = "ELEVATED"
+        risk_level = _risk_level(score)
             
         return {
             "risk_score": score,
             "risk_level": risk_level,
             "should_block": score >= 75,
             "factors": factors,
-            "recommendation": "BLOCK" if score >= 75 else "ESCALATE" if score >= 50 else "MONITOR",
+            "recommendation": _recommendation(score),
             "confidence": 0.92
         }
 
+    def score_batch(
+        self,
+        project_id: Optional[str] = None,
+        transaction_ids: Optional[List[str]] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Vectorized predict_transaction_risk over a whole project or an id list.
+        Receiver flags/velocity and watchlist status come from two grouped queries;
+        scoring is array math. Deterministic: same data, same scores.
+        """
+        if project_id is None and not transaction_ids:
+            raise ValueError("project_id or transaction_ids is required")
+        columns = (
+            Transaction.id, Transaction.actual_amount, Transaction.proposed_amount,
+            Transaction.amount, Transaction.description, Transaction.receiver,
+        )
+        rows: List[Tuple] = []
+        if transaction_ids:
+            for i in range(0, len(transaction_ids), IN_CHUNK):
+                stmt = select(*columns).where(Transaction.id.in_(transaction_ids[i:i + IN_CHUNK]))
+                if project_id:
+                    stmt = stmt.where(Transaction.project_id == project_id)
+                rows.extend(self.db.exec(stmt).all())
+            receivers = sorted({r[5] for r in rows if r[5]})
+        else:
+            stmt = (
+                select(*columns)
+                .where(Transaction.project_id == project_id)
+                .order_by(Transaction.id)
+                .execution_options(yield_per=5000)
+            )
+            rows = list(self.db.exec(stmt))
+            receivers = (
+                select(Transaction.receiver).where(Transaction.project_id == project_id).distinct()
+            )
+
+        n = len(rows)
+        ids = np.array([r[0] for r in rows], dtype=object)
+        actual = np.array([r[1] or 0.0 for r in rows], dtype=np.float64)
+        proposed = np.array([r[2] or 0.0 for r in rows], dtype=np.float64)
+        legacy = np.array([r[3] or 0.0 for r in rows], dtype=np.float64)
+        amounts = np.where(actual != 0, actual, np.where(proposed != 0, proposed, legacy))
+
+        # 1. Round Number Heuristic
+        whole_million = np.mod(amounts, 1_000_000) == 0
+        round_large = (amounts > 10_000_000) & whole_million
+        round_small = ~round_large & (amounts > 1_000_000) & whole_million
+        round_score = np.where(round_large, 20.0, np.where(round_small, 10.0, 0.0))
+
+        # 2. Keyword Sensitivity (one regex pass per description)
+        keyword_score = np.fromiter(
+            (sum(RISK_KEYWORDS[k] for k in set(_KEYWORD_RE.findall((r[4] or "").lower()))) for r in rows),
+            dtype=np.float64, count=n
+        )
+
+        # 3. Entity Profiling from grouped lookups
+        profiles = _receiver_profiles(self.db, receivers) if n else {}
+        watchlist = _entity_watchlist(self.db, receivers) if n else {}
+        receiver_names = [r[5] for r in rows]
+        known = np.fromiter((name in watchlist for name in receiver_names), dtype=bool, count=n)
+        watchlisted = np.fromiter((watchlist.get(name, False) for name in receiver_names), dtype=bool, count=n)
+        empty = (0, 0, 0.0)
+        flags = np.fromiter((profiles.get(name, empty)[0] for name in receiver_names), dtype=np.float64, count=n)
+        tx_count = np.fromiter((profiles.get(name, empty)[1] for name in receiver_names), dtype=np.float64, count=n)
+        per_day = np.fromiter((profiles.get(name, empty)[2] for name in receiver_names), dtype=np.float64, count=n)
+
+        watch_score = np.where(watchlisted, float(WATCHLIST_WEIGHT), 0.0)
+        flag_score = np.where(known, np.minimum(FLAG_CAP, flags * FLAG_WEIGHT), 0.0)
+        velocity_hit = known & (tx_count >= VELOCITY_MIN_TX) & (per_day >= VELOCITY_PER_DAY)
+        velocity_score = np.where(velocity_hit, float(VELOCITY_WEIGHT), 0.0)
+
+        scores = round_score + keyword_score + watch_score + flag_score + velocity_score
+        return {
+            "ids": ids,
+            "amounts": amounts,
+            "scores": scores,
+            "round_amount": round_score > 0,
+            "keyword": keyword_score > 0,
+            "watchlisted": watchlisted,
+            "past_flags": flag_score > 0,
+            "velocity": velocity_hit,
+        }
+
+    def predict_batch_risk(
+        self,
+        project_id: Optional[str] = None,
+        transaction_ids: Optional[List[str]] = None,
+        min_score: float = 0.0
+    ) -> Dict[str, Any]:
+        """
+        API shape for score_batch: per-transaction scores plus a level distribution.
+        Synchronous and CPU-bound; async callers run it via asyncio.to_thread.
+        """
+        batch = self.score_batch(project_id, transaction_ids)
+        scores = batch["scores"]
+        levels = np.select([scores >= 75, scores >= 50, scores >= 25], ["CRITICAL", "HIGH", "ELEVATED"], "NOMINAL")
+        keep = np.flatnonzero(scores >= min_score)
+        keep = keep[np.argsort(-scores[keep], kind="stable")]
+        return {
+            "scored": int(scores.shape[0]),
+            "distribution": {level: int(np.sum(levels == level)) for level in ("CRITICAL", "HIGH", "ELEVATED", "NOMINAL")},
+            "should_block": int(np.sum(scores >= 75)),
+            "transactions": [
+                {
+                    "transaction_id": batch["ids"][i],
+                    "risk_score": float(scores[i]),
+                    "risk_level": str(levels[i]),
+                    "recommendation": _recommendation(float(scores[i]))
+                }
+                for i in keep
+            ]
+        }
+
     async def predict_project_risk(self, project_id: str) -> Dict[str, Any]:
         """
         AI Simulation for leakage and stalling (formerly PredictiveAI).
@@ -131,20 +306,43 @@ class ProphetService:
         if not project:
             return {"status": "error", "message": "Project not found"}
             
-        txs = self.db.exec(select(Transaction).where(Transaction.project_id == project_id)).all()
+        batch = self.score_batch(project_id=project_id)
+        scores, amounts = batch["scores"], np.abs(batch["amounts"])
+        
+        # Leakage: share of value moving through HIGH/CRITICAL transactions
+        total_value = float(amounts.sum())
+        leakage_prob = float(amounts[scores >= 50].sum()) / total_value if total_value > 0 else 0.05
         
-        # Simulated inference based on actual data density
-        leakage_prob = random.uniform(0.12, 0.85) if len(txs) > 0 else 0.05
+        # Stalling: time since the last recorded disbursement (90 days = certain stall)
+        last_tx = self.db.exec(
+            select(func.max(Transaction.timestamp)).where(Transaction.project_id == project_id)
+        ).first()
+        if last_tx is not None:
+            if last_tx.tzinfo is None:
+                last_tx = last_tx.replace(tzinfo=UTC)
+            stalling = min(max((datetime.now(UTC) - last_tx).days / 90, 0.0), 1.0)
+        else:
+            stalling = 1.0
+        
+        indicators = []
+        for key, label in (
+            ("watchlisted", "transactions to watchlisted receivers"),
+            ("past_flags", "transactions to receivers with prior misappropriation flags"),
+            ("velocity", "transactions to high-velocity receivers"),
+            ("keyword", "transactions with high-risk keywords"),
+            ("round_amount", "round-amount transactions above 1M"),
+        ):
+            count = int(batch[key].sum())
+            if count:
+                indicators.append(f"{count} {label}")
         
         return {
             "project_id": project_id,
             "leakage_probability": round(leakage_prob * 100, 1),
-            "stalling_risk": round(random.uniform(0.05, 0.45) * 100, 1),
+            "stalling_risk": round(stalling * 100, 1),
             "status": "CRITICAL" if leakage_prob > 0.6 else "STABLE",
-            "risk_indicators": [
-                "Anomalous weekend transaction clusters detected",
-                "Concentrated disbursement to high-risk vendors"
-            ]
+            "risk_indicators": indicators,
+            "transactions_scored": int(scores.shape[0])
         }
 
     async def forecast_budget_exhaustion(self, project_id: str) -> Dict[str, Any]:
@@ -0,0 +1,192 @@
+"""
+Spatial Index Helpers
+Geohash bucketing, vectorized haversine and grid-accelerated DBSCAN for entity geodata.
+"""
+
+import math
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = 111.32
+GEOHASH_PRECISION = 9  # ~4.8m x 4.8m cells; prefixes give coarser buckets for free
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        rng, coord = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        value <<= 1
+        if coord >= mid:
+            value |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def geohash_cell_size(precision: int) -> Tuple[float, float]:
+    """(lat, lng) extent in degrees of one cell at this precision."""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def _lng_degrees(radius_km: float, lat: float) -> float:
+    cos_lat = max(math.cos(math.radians(min(abs(lat), 89.0))), 1e-6)
+    return radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+
+
+def covering_prefixes(lat: float, lng: float, radius_km: float, max_cells: int = 16) -> List[str]:
+    """
+    Geohash prefixes whose cells cover the bounding box of a radius query.
+    Picks the finest precision that needs at most max_cells buckets.
+    An empty-string prefix means "everything" (radius spans the globe).
+    """
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    lat_min, lat_max = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    dlng = _lng_degrees(radius_km, max(abs(lat_min), abs(lat_max)))
+    if dlng >= 180.0:
+        return [""]
+
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        cell_lat, cell_lng = geohash_cell_size(precision)
+        rows = math.ceil((lat_max - lat_min) / cell_lat) + 1
+        cols = math.ceil(2 * dlng / cell_lng) + 1
+        if rows * cols <= max_cells or precision == 1:
+            break
+
+    # Sample spacing never exceeds the cell size, so every intersecting cell is hit
+    lat_samples = np.append(np.arange(lat_min, lat_max, cell_lat), lat_max)
+    lng_samples = np.append(np.arange(lng - dlng, lng + dlng, cell_lng), lng + dlng)
+    prefixes = set()
+    for sample_lat in lat_samples:
+        for sample_lng in lng_samples:
+            wrapped = ((sample_lng + 180.0) % 360.0) - 180.0
+            prefixes.add(geohash_encode(float(sample_lat), float(wrapped), precision))
+    return sorted(prefixes)
+
+
+def prefix_successor(prefix: str) -> Optional[str]:
+    """
+    Smallest geohash string greater than every string starting with prefix, so
+    `geohash >= prefix AND geohash < successor` is an index range scan. None: no upper bound.
+    """
+    chars = list(prefix)
+    while chars:
+        position = _BASE32.index(chars[-1])
+        if position + 1 < len(_BASE32):
+            chars[-1] = _BASE32[position + 1]
+            return "".join(chars)
+        chars.pop()  # "z" carries into the previous character
+    return None
+
+
+def haversine_km(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """Great-circle distance from one point to many, in km."""
+    lat1, lng1 = math.radians(lat), math.radians(lng)
+    lat2, lng2 = np.radians(lats), np.radians(lngs)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_pairs_km(lats1: np.ndarray, lngs1: np.ndarray, lats2: np.ndarray, lngs2: np.ndarray) -> np.ndarray:
+    """Element-wise great-circle distance between aligned point arrays, in km."""
+    lat1, lng1 = np.radians(lats1), np.radians(lngs1)
+    lat2, lng2 = np.radians(lats2), np.radians(lngs2)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class _Grid:
+    """Equal-angle buckets at least eps wide, so eps-neighbours live in the 3x3 block."""
+
+    def __init__(self, lats: np.ndarray, lngs: np.ndarray, eps_km: float):
+        self.lats = lats
+        self.lngs = lngs
+        self.cell_lat = eps_km / KM_PER_DEGREE_LAT
+        # Narrowest longitude degree among the points -> widest (safe) column
+        self.cell_lng = min(_lng_degrees(eps_km, float(np.max(np.abs(lats)))), 360.0)
+        self.cols = max(int(math.ceil(360.0 / self.cell_lng)), 1)
+        self.buckets: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for i, key in enumerate(zip(self._row(lats), self._col(lngs))):
+            self.buckets[(int(key[0]), int(key[1]))].append(i)
+        self.buckets = {k: np.asarray(v, dtype=np.int64) for k, v in self.buckets.items()}
+
+    def _row(self, lats):
+        return np.floor((lats + 90.0) / self.cell_lat).astype(np.int64)
+
+    def _col(self, lngs):
+        return np.floor((lngs + 180.0) / self.cell_lng).astype(np.int64) % self.cols
+
+    def candidates(self, i: int) -> np.ndarray:
+        row = int(self._row(self.lats[i:i + 1])[0])
+        col = int(self._col(self.lngs[i:i + 1])[0])
+        found = []
+        for dr in (-1, 0, 1):
+            for dc in {(col - 1) % self.cols, col, (col + 1) % self.cols}:
+                bucket = self.buckets.get((row + dr, dc))
+                if bucket is not None:
+                    found.append(bucket)
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+
+def dbscan_haversine(
+    lats: Sequence[float],
+    lngs: Sequence[float],
+    eps_km: float,
+    min_samples: int = 2,
+) -> np.ndarray:
+    """
+    DBSCAN with great-circle distance. Returns one label per point; -1 is noise.
+    Region queries only test points in neighbouring grid buckets.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+    n = lats.shape[0]
+    labels = np.full(n, -2, dtype=np.int64)  # -2 unvisited
+    if n == 0:
+        return labels
+    grid = _Grid(lats, lngs, eps_km)
+
+    def region(i: int) -> np.ndarray:
+        cand = grid.candidates(i)
+        return cand[haversine_km(lats[i], lngs[i], lats[cand], lngs[cand]) <= eps_km]
+
+    cluster = 0
+    for i in range(n):
+        if labels[i] != -2:
+            continue
+        neighbours = region(i)
+        if neighbours.shape[0] < min_samples:
+            labels[i] = -1
+            continue
+        labels[i] = cluster
+        queue = list(neighbours)
+        while queue:
+            j = queue.pop()
+            if labels[j] == -1:
+                labels[j] = cluster  # border point
+            if labels[j] != -2:
+                continue
+            labels[j] = cluster
+            reach = region(j)
+            if reach.shape[0] >= min_samples:
+                queue.extend(reach[labels[reach] < 0])
+        cluster += 1
+    return labels
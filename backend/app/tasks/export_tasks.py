@@ -0,0 +1,82 @@
+"""
+Background forensic exports.
+Very large project exports are written to disk by a worker and downloaded when ready.
+"""
+
+from app.core.celery_config import celery_app
+from datetime import datetime, UTC
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(
+    name="zenith_forensic.tasks.analysis.export_project_transactions",
+    time_limit=3600,
+    soft_time_limit=3300,
+)
+def export_project_transactions(job_id: str, project_id: str, fmt: str) -> dict:
+    """
+    Write a full-project transaction export to storage/exports/<job_id>.<fmt>.
+    Progress is tracked on the ProcessingJob row.
+    """
+    from app.core.db import get_db
+    from app.models import ProcessingJob, JobStatus
+    from app.modules.fraud.export_engine import write_export_file
+
+    with get_db() as db:
+        job = db.get(ProcessingJob, job_id)
+        if not job:
+            return {"status": "missing", "job_id": job_id}
+        job.status = JobStatus.PROCESSING
+        job.started_at = datetime.now(UTC)
+        db.add(job)
+        db.commit()
+        try:
+            path = write_export_file(db, project_id, fmt, job_id)
+            job.status = JobStatus.COMPLETED
+            job.items_processed = job.total_items
+            job.batches_completed = job.total_batches
+            job.batch_config = {**(job.batch_config or {}), "path": path}
+        except Exception as e:
+            logger.error(f"[Export {job_id}] failed: {e}")
+            job.status = JobStatus.FAILED
+            job.error_message = str(e)
+        job.completed_at = datetime.now(UTC)
+        db.add(job)
+        db.commit()
+        return {"status": job.status.value, "job_id": job_id}
+
+
+def submit_export_job(project_id: str, fmt: str) -> str:
+    """
+    Queue a background export.
+    Returns:
+        Job ID for tracking via /batch-jobs or the forensic export endpoints
+    """
+    import uuid
+    from app.core.db import get_db
+    from app.models import ProcessingJob, JobStatus
+    from app.modules.fraud.export_engine import count_rows
+
+    job_id = str(uuid.uuid4())
+    with get_db() as db:
+        job = ProcessingJob(
+            id=job_id,
+            project_id=project_id,
+            data_type="export",
+            total_items=count_rows(db, project_id),
+            total_batches=1,
+            status=JobStatus.PENDING,
+            batch_config={"format": fmt},
+        )
+        db.add(job)
+        db.commit()
+    result = export_project_transactions.delay(job_id, project_id, fmt)
+    with get_db() as db:
+        job = db.get(ProcessingJob, job_id)
+        if job:
+            job.celery_task_ids = {"export": result.id}
+            db.commit()
+    logger.info(f"Export job {job_id} ({fmt}) queued for project {project_id}")
+    return job_id
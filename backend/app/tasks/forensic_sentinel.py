@@ -5,83 +5,178 @@ Analyzes project momentum and flags ingestion silence or variance acceleration.
 
 from app.core.celery_config import celery_app
 from app.core.db import engine
-from app.models import Project, Ingestion, Transaction, FraudAlert
+from app.models import Project, Ingestion, Transaction, FraudAlert, ProjectMomentum
 from app.core.event_bus import publish_event, EventType
-from sqlmodel import Session, select, func, desc
+from sqlmodel import Session, select, func
+import sqlalchemy as sa
 from datetime import datetime, UTC, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
+SILENCE_DAYS = 5
+ACCELERATION_THRESHOLD = 0.3  # 30% week-over-week increase
+FLAG_RISK = 0.7
+
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=UTC)
+    return value
+
+
+def momentum_snapshot(db: Session, now: datetime) -> List[Tuple]:
+    """
+    One statement for every active project:
+    (project_id, last ingestion, window tx count, flags this week, flags last week, last tx).
+    The transaction side only touches the 14-day window.
+    """
+    this_week_start = now - timedelta(days=7)
+    last_week_start = now - timedelta(days=14)
+    flagged = Transaction.risk_score > FLAG_RISK
+
+    tx = (
+        select(
+            Transaction.project_id.label("project_id"),
+            func.count(Transaction.id).label("window_tx"),
+            func.sum(sa.case((sa.and_(flagged, Transaction.timestamp >= this_week_start), 1), else_=0)).label("this_week"),
+            func.sum(sa.case((sa.and_(flagged, Transaction.timestamp < this_week_start), 1), else_=0)).label("last_week"),
+            func.max(Transaction.timestamp).label("last_tx"),
+        )
+        .where(Transaction.timestamp >= last_week_start)
+        .group_by(Transaction.project_id)
+        .subquery()
+    )
+    ingestion = (
+        select(Ingestion.project_id.label("project_id"), func.max(Ingestion.created_at).label("last_ingestion"))
+        .group_by(Ingestion.project_id)
+        .subquery()
+    )
+    stmt = (
+        select(
+            Project.id,
+            ingestion.c.last_ingestion,
+            func.coalesce(tx.c.window_tx, 0),
+            func.coalesce(tx.c.this_week, 0),
+            func.coalesce(tx.c.last_week, 0),
+            tx.c.last_tx,
+        )
+        .outerjoin(ingestion, ingestion.c.project_id == Project.id)
+        .outerjoin(tx, tx.c.project_id == Project.id)
+        .where(Project.status != "closed")
+    )
+    return db.exec(stmt).all()
+
+
 @celery_app.task(name="zenith_forensic.tasks.watchtower.evaluate_momentum")
-def evaluate_momentum():
+def evaluate_momentum() -> Dict[str, Any]:
     """
     Evaluates every active project for momentum failures.
     Runs every 6 hours to detect 'Data Silence' or 'Fraud Acceleration'.
+    One grouped aggregation for all projects; acceleration is re-evaluated only for
+    projects whose window changed since the previous run, and alerts fire on transitions.
     """
+    started = time.perf_counter()
+    now = datetime.now(UTC)
+    pending: List[Tuple[str, str, str]] = []
+
     with Session(engine) as db:
-        projects = db.exec(select(Project).where(Project.status != "closed")).all()
-        
-        for project in projects:
-            # 1. Detect Ingestion Silence (> 5 days)
-            last_ingestion = db.exec(
-                select(Ingestion)
-                .where(Ingestion.project_id == project.id)
-                .order_by(desc(Ingestion.created_at))
-                .limit(1)
-            ).first()
-            
+        rows = momentum_snapshot(db, now)
+        states = {
+            state.project_id: state
+            for state in db.exec(select(ProjectMomentum)).all()
+        }
+        changed = 0
+
+        for project_id, last_ingestion, window_tx, this_week, last_week, last_tx in rows:
+            last_ingestion, last_tx = _aware(last_ingestion), _aware(last_tx)
+            state = states.get(project_id) or ProjectMomentum(project_id=project_id)
+
+            # 1. Detect Ingestion Silence (> 5 days) - once per silent period
+            if last_ingestion and last_ingestion != _aware(state.last_ingestion_at):
+                state.silence_alerted = False
             if last_ingestion:
-                silence_duration = datetime.now(UTC) - last_ingestion.created_at
-                if silence_duration > timedelta(days=5):
-                    _trigger_sentinel_alert(
-                        db, project.id, 
-                        "INGESTION_SILENCE", 
+                silence_duration = now - last_ingestion
+                if silence_duration > timedelta(days=SILENCE_DAYS) and not state.silence_alerted:
+                    state.silence_alerted = True
+                    pending.append((
+                        project_id,
+                        "INGESTION_SILENCE",
                         f"Project has received no new data for {silence_duration.days} days. Potential audit gap."
-                    )
-            
-            # 2. Variance Acceleration (Week-over-Week)
-            now = datetime.now(UTC)
-            this_week_start = now - timedelta(days=7)
-            last_week_start = now - timedelta(days=14)
-            
-            this_week_variants = db.exec(
-                select(func.count(Transaction.id))
-                .where(Transaction.project_id == project.id)
-                .where(Transaction.risk_score > 0.7)
-                .where(Transaction.timestamp >= this_week_start)
-            ).one()
-            
-            last_week_variants = db.exec(
-                select(func.count(Transaction.id))
-                .where(Transaction.project_id == project.id)
-                .where(Transaction.risk_score > 0.7)
-                .where(Transaction.timestamp >= last_week_start)
-                .where(Transaction.timestamp < this_week_start)
-            ).one()
-            
-            if last_week_variants > 0:
-                acceleration = (this_week_variants - last_week_variants) / last_week_variants
-                if acceleration > 0.3: # 30% increase
-                    _trigger_sentinel_alert(
-                        db, project.id,
-                        "VARIANCE_ACCELERATION",
-                        f"Anomalous activity has accelerated by {acceleration*100:.1f}% this week. High fraud pressure detected."
-                    )
-
-def _trigger_sentinel_alert(db: Session, project_id: str, alert_type: str, message: str):
-    """Internal helper to log and broadcast sovereign alerts."""
-    alert = FraudAlert(
-        project_id=project_id,
-        alert_type=f"SENTINEL_{alert_type}",
-        severity="CRITICAL",
-        risk_score=0.9,
-        description=message,
-        created_at=datetime.now(UTC)
+                    ))
+            state.last_ingestion_at = last_ingestion
+
+            # 2. Variance Acceleration (Week-over-Week) - only when the window moved
+            fingerprint = (window_tx, this_week, last_week, last_tx)
+            previous = (state.window_tx_count, state.this_week_flags, state.last_week_flags, _aware(state.last_tx_at))
+            if fingerprint != previous or project_id not in states:
+                changed += 1
+                state.window_tx_count, state.this_week_flags, state.last_week_flags, state.last_tx_at = fingerprint
+                acceleration = (this_week - last_week) / last_week if last_week > 0 else None
+                state.acceleration = acceleration
+                if acceleration is not None and acceleration > ACCELERATION_THRESHOLD:
+                    if not state.acceleration_alerted:
+                        state.acceleration_alerted = True
+                        pending.append((
+                            project_id,
+                            "VARIANCE_ACCELERATION",
+                            f"Anomalous activity has accelerated by {acceleration*100:.1f}% this week. High fraud pressure detected."
+                        ))
+                else:
+                    state.acceleration_alerted = False
+
+            state.evaluated_at = now
+            db.add(state)
+
+        for project_id, alert_type, message in pending:
+            _trigger_sentinel_alert(db, project_id, alert_type, message, commit=False)
+        db.commit()
+
+    for project_id, alert_type, message in pending:
+        _broadcast_sentinel_alert(project_id, alert_type, message)
+
+    duration_ms = round((time.perf_counter() - started) * 1000, 1)
+    summary = {
+        "projects": len(rows),
+        "changed_projects": changed,
+        "alerts": len(pending),
+        "duration_ms": duration_ms,
+        "evaluated_at": now.isoformat(),
+    }
+    logger.info(
+        f"Sentinel momentum run: {summary['projects']} projects, "
+        f"{changed} changed, {len(pending)} alerts in {duration_ms}ms"
     )
-    db.add(alert)
-    db.commit()
-    
+    return summary
+
+def _trigger_sentinel_alert(db: Session, project_id: str, alert_type: str, message: str, commit: bool = True):
+    """Internal helper to log and broadcast sovereign alerts."""
+    # FraudAlert rows hang off a transaction; use the project's latest one
+    anchor = db.exec(
+        select(Transaction.id)
+        .where(Transaction.project_id == project_id)
+        .order_by(Transaction.timestamp.desc())
+        .limit(1)
+    ).first()
+    if anchor:
+        alert = FraudAlert(
+            project_id=project_id,
+            transaction_id=anchor,
+            alert_type=f"SENTINEL_{alert_type}",
+            severity="CRITICAL",
+            risk_score=0.9,
+            description=message,
+            created_at=datetime.now(UTC)
+        )
+        db.add(alert)
+    if commit:
+        db.commit()
+        _broadcast_sentinel_alert(project_id, alert_type, message)
+
+
+def _broadcast_sentinel_alert(project_id: str, alert_type: str, message: str):
     publish_event(
         EventType.HIGH_RISK_ALERT,
         {
@@ -68,6 +68,39 @@ class AuditRetentionPolicy:
             db.commit()
             logger.info("Retention: Archiving complete.")
 
+class EvidenceBlobGC:
+    """
+    Reclaims content-addressed evidence blobs no Document references anymore.
+    """
+    @staticmethod
+    def collect(grace_hours: int = 24):
+        from app.modules.evidence.blob_store import evidence_blob_store
+
+        with Session(engine) as db:
+            try:
+                stats = evidence_blob_store.collect_garbage(db, grace_hours=grace_hours)
+                logger.info(
+                    f"Blob GC: removed {stats['removed']} blobs "
+                    f"({stats['freed_bytes']} bytes), reconciled {stats['reconciled']} ref counts."
+                )
+            except Exception as e:
+                logger.error(f"Blob GC failed: {e}")
+
+class VectorIndexSnapshot:
+    """
+    Persists the organization-wide insight vector index so workers start warm.
+    """
+    @staticmethod
+    def persist():
+        from app.core.global_memory import insight_index
+
+        with Session(engine) as db:
+            try:
+                saved = insight_index.snapshot(db)
+                logger.info(f"Vector index snapshot saved: {saved}")
+            except Exception as e:
+                logger.error(f"Vector index snapshot failed: {e}")
+
 def perform_system_maintenance():
     """
     Main entry point for scheduled maintenance.
@@ -79,8 +112,14 @@ def perform_system_maintenance():
     
     # 2. Forensic Retention
     AuditRetentionPolicy.archive_old_logs()
+
+    # 3. Evidence Blob Garbage Collection
+    EvidenceBlobGC.collect()
+
+    # 4. Insight Vector Index Snapshot
+    VectorIndexSnapshot.persist()
     
-    # 3. Database Vacuum (Postgres only)
+    # 5. Database Vacuum (Postgres only)
     if engine.name == "postgresql":
         try:
             with engine.connect() as conn:
@@ -35,6 +35,88 @@ def health_check() -> dict:
     return health_status
 
 
+@celery_app.task(name="zenith_forensic.tasks.monitoring.alert_sweep")
+def alert_sweep() -> dict:
+    """
+    Cross-project forensic alert sweep over the indexed trigger tags.
+    """
+    from app.core.db import get_db
+    from app.modules.ai.alert_service import UnifiedAlertService
+
+    with get_db() as db:
+        alerts = UnifiedAlertService(db).sweep_all_projects()
+    logger.info(f"Alert sweep raised {len(alerts)} project alerts")
+    return {"alerts": len(alerts), "timestamp": datetime.now(UTC).isoformat()}
+
+
+@celery_app.task(name="zenith_forensic.tasks.maintenance.sync_fx_rates")
+def sync_fx_rates() -> dict:
+    """
+    Daily FX refresh into the shared fx_rates table: imports the configured CSV
+    snapshot (if any), then today's API rates.
+    """
+    from sqlmodel import Session
+    from app.core.config import settings
+    from app.core.currency_converter import get_currency_converter
+    from app.core.db import engine
+
+    converter = get_currency_converter()
+    imported = 0
+    with Session(engine) as db:
+        if settings.FX_RATES_CSV_PATH:
+            imported = converter.load_csv_snapshot(db, settings.FX_RATES_CSV_PATH)
+        synced = converter.sync_latest_rates(db)
+    logger.info(f"FX sync: {imported} snapshot rows, {synced} API rates")
+    return {"snapshot_rows": imported, "api_rates": synced, "timestamp": datetime.now(UTC).isoformat()}
+
+
+@celery_app.task(name="zenith_forensic.tasks.maintenance.backfill_entity_attributes")
+def backfill_entity_attributes() -> dict:
+    """
+    Indexes entities inserted around the ORM mapper events (bulk loads, legacy rows)
+    into entity_attributes, so shared-attribute scans stay read-only.
+    """
+    from sqlmodel import Session
+    from app.core.db import engine
+    from app.modules.correlation.shared_attribute_detector import SharedAttributeDetector
+
+    with Session(engine) as db:
+        indexed = SharedAttributeDetector.backfill(db)
+    logger.info(f"Entity attribute backfill indexed {indexed} entities")
+    return {"indexed": indexed, "timestamp": datetime.now(UTC).isoformat()}
+
+
+@celery_app.task(name="zenith_forensic.tasks.maintenance.backfill_embedding_tags")
+def backfill_embedding_tags() -> dict:
+    """
+    Tags legacy Entity and CopilotInsight embeddings (rows written before the tag
+    columns existed or around the ORM), so vector index syncs stay read-only.
+    """
+    from sqlmodel import Session
+    from app.core.db import engine
+    from app.core.entity_vector_index import EntityVectorIndex
+    from app.core.global_memory import InsightVectorIndex
+
+    with Session(engine) as db:
+        entities = EntityVectorIndex.backfill_tags(db)
+        insights = InsightVectorIndex.backfill_tags(db)
+    logger.info(f"Embedding tag backfill tagged {entities} entities and {insights} insights")
+    return {"entities": entities, "insights": insights, "timestamp": datetime.now(UTC).isoformat()}
+
+
+@celery_app.task(name="zenith_forensic.tasks.maintenance.backfill_document_chunks")
+def backfill_document_chunks() -> dict:
+    """
+    Chunks evidence documents uploaded before the retrieval index existed, so
+    hybrid search covers them instead of the substring fallback.
+    """
+    from app.core.rag import rag_service
+
+    indexed = rag_service.backfill_chunks()
+    logger.info(f"Document chunk backfill indexed {indexed} documents")
+    return {"indexed": indexed, "timestamp": datetime.now(UTC).isoformat()}
+
+
 @celery_app.task(name="zenith_forensic.tasks.maintenance.cleanup_old_jobs")
 def cleanup_old_jobs() -> dict:
     """
@@ -1,5 +1,7 @@
+from datetime import datetime, UTC
+
 import pytest
-from sqlmodel import create_engine, SQLModel
+from sqlmodel import create_engine, Session, SQLModel
 from sqlalchemy.pool import StaticPool
 from app.core import db as app_db
 
@@ -24,3 +26,27 @@ def setup_test_engine():
     SQLModel.metadata.create_all(engine)
     
     yield engine
+
+
+@pytest.fixture
+def db(setup_test_engine):
+    with Session(setup_test_engine) as session:
+        yield session
+
+
+@pytest.fixture
+def make_project(db):
+    """Factory for committed projects; tests share one database, so codes must be unique."""
+    from app.models import Project
+
+    def make(code: str, **fields) -> Project:
+        fields = {
+            "name": code, "contractor_name": "PT Test", "contract_value": 1.0,
+            "start_date": datetime(2024, 1, 1, tzinfo=UTC), **fields,
+        }
+        project = Project(code=code, **fields)
+        db.add(project)
+        db.commit()
+        return project
+
+    return make
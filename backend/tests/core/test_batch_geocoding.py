@@ -0,0 +1,125 @@
+"""Tests for batch geocoding with the persistent address cache in GeocodingService"""
+
+import asyncio
+from datetime import datetime, UTC
+
+import pytest
+from sqlmodel import Session
+
+from app.models import Entity, GeocodeCacheEntry, Project, Transaction
+from app.core.normalization import address_key, normalize_address
+from app.services.geocoding_providers import GeocodingProvider, NominatimProvider, OfflineGeocodingProvider
+from app.services.geocoding_service import GeocodingService
+
+
+class CountingProvider(OfflineGeocodingProvider):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    async def geocode(self, address):
+        self.calls.append(address)
+        if "unknown" in address.lower():
+            return None
+        return await super().geocode(address)
+
+
+def _key(address):
+    return address_key(normalize_address(address))
+
+
+def test_normalize_address_collapses_formatting_variants():
+    assert normalize_address("  Jl. Sudirman No.1 ,  JAKARTA ") == normalize_address("jl sudirman no 1, jakarta")
+    assert normalize_address("") == ""
+
+
+@pytest.mark.asyncio
+async def test_only_distinct_uncached_addresses_reach_the_provider(db: Session, make_project):
+    project = Project(
+        name="Geo Batch",
+        code="PROJ-GEO-BATCH",
+        contractor_name="PT Test",
+        contract_value=1.0,
+        start_date=datetime(2024, 1, 1, tzinfo=UTC),
+    )
+    db.add(project)
+    addresses = ["Jl. Sudirman No.1, Jakarta", "jl.  SUDIRMAN no 1 , JAKARTA", "Jl. Thamrin 10", "Unknown Place"]
+    names = [f"PT Batch {i}" for i in range(len(addresses))]
+    for name, address in zip(names, addresses):
+        db.add(Entity(name=name, project_id=project.id, metadata_json={"address": address}))
+    # Same name in another project: its address must not leak into this project's map
+    other = make_project("PROJ-GEO-OTHER")
+    db.add(Entity(name=names[0], project_id=other.id, metadata_json={"address": "Jl. Lain 99, Bandung"}))
+    for i in range(40):
+        db.add(Transaction(
+            project_id=project.id, sender=names[i % 4], receiver=names[(i + 1) % 4], amount=10.0,
+            timestamp=datetime(2024, 2, 1, tzinfo=UTC),
+        ))
+    db.commit()
+
+    provider = CountingProvider()
+    service = GeocodingService(db, provider=provider, concurrency=2, batch_size=2)
+    first = await service.geocode_entities(project.id)
+
+    assert len(provider.calls) == 3  # formatting variant dedupes with the first address
+    assert first["stats"]["geocoded_count"] == 3
+    assert "Jl. Lain 99, Bandung" not in provider.calls
+    assert first["markers"][0]["transaction_count"] == 20
+    assert db.get(GeocodeCacheEntry, _key("Unknown Place")).found is False
+
+    second = await GeocodingService(db, provider=provider).geocode_entities(project.id)
+    assert len(provider.calls) == 3  # hits and cached misses, no new calls
+    assert second["stats"]["cache_hits"] == 3
+    assert [m["lat"] for m in second["markers"]] == [m["lat"] for m in first["markers"]]
+
+
+class _FakeResponse:
+    status = 200
+
+    def __init__(self, session):
+        self.session = session
+
+    async def __aenter__(self):
+        self.session.in_flight += 1
+        self.session.peak = max(self.session.peak, self.session.in_flight)
+        self.session.started.append(asyncio.get_running_loop().time())
+        await asyncio.sleep(0)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.session.in_flight -= 1
+
+    async def json(self):
+        return [{"lat": "-6.2", "lon": "106.8", "display_name": "Jakarta"}]
+
+
+class _FakeSession:
+    closed = False
+
+    def __init__(self):
+        self.in_flight, self.peak, self.started = 0, 0, []
+
+    def get(self, url, params=None):
+        return _FakeResponse(self)
+
+
+@pytest.mark.asyncio
+async def test_nominatim_is_serialized_and_spaced(db: Session):
+    provider = NominatimProvider(min_interval=0.05)
+    session = _FakeSession()
+
+    async def fake_session():
+        return session
+
+    provider._get_session = fake_session
+    service = GeocodingService(db, provider=provider, concurrency=8)
+    assert service.concurrency == 1
+
+    results = await asyncio.gather(*(provider.geocode(f"Jl. Sudirman {i}") for i in range(3)))
+    assert all(r["lat"] == -6.2 for r in results)
+    assert session.peak == 1
+    gaps = [b - a for a, b in zip(session.started, session.started[1:])]
+    assert len(gaps) == 2 and min(gaps) >= 0.045
+
+    with pytest.raises(TypeError):
+        GeocodingProvider()  # abstract
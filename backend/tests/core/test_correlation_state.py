@@ -0,0 +1,59 @@
+"""Tests for the bounded correlation state store and the meta-correlation consumer"""
+
+import asyncio
+
+from app.core.event_bus import Event, EventType
+from app.modules.correlation.central_correlation_service import CentralCorrelationService
+from app.modules.correlation.correlation_state import CorrelationStateStore, correlation_mask
+
+
+class _RecordingBus:
+    def __init__(self):
+        self.published = []
+
+    def subscribe(self, event_type, callback):
+        pass
+
+    def publish(self, event_type, data=None, project_id="global", **kwargs):
+        self.published.append((event_type, data))
+
+
+def test_bitsets_rings_and_debounce_are_windowed_and_bounded():
+    state = CorrelationStateStore(client=None, ring_capacity=3)
+
+    assert state.mark_seen("p", "e", "CircularFlow", 100, now=0) == correlation_mask("CircularFlow")
+    mask = state.mark_seen("p", "e", "HighRiskAlert", 100, now=50)
+    assert mask == correlation_mask("CircularFlow", "HighRiskAlert")
+    # CircularFlow aged out of the window; unknown types do not take a bit
+    assert state.mark_seen("p", "e", "Unknown", 100, now=120) == correlation_mask("HighRiskAlert")
+
+    for t in range(5):
+        state.record("p", "variance", 10, payload={"n": t}, now=t)
+    assert state.count("p", "variance", 10, now=5) == 3  # capacity bound
+    assert state.latest("p", "variance", 10, now=5)["data"] == {"n": 4}
+    assert state.count("p", "variance", 10, now=14) == 1  # expiry
+    assert state.latest("p", "other", 10, now=5) is None
+
+    assert state.debounce("k", 60) is True
+    assert state.debounce("k", 60) is False
+
+
+def test_meta_rule_fires_once_for_a_persistent_condition():
+    bus = _RecordingBus()
+    service = CentralCorrelationService(bus, state=CorrelationStateStore(client=None))
+
+    def found(correlation_type):
+        return Event(EventType.CORRELATION_FOUND, {"correlation_type": correlation_type, "entity_id": "ent-1"}, project_id="p1")
+
+    async def scenario():
+        await service.handle_correlation_found(found("CircularFlow"))
+        await service.handle_correlation_found(found("BeneficialOwnership"))
+        assert bus.published == []
+        await service.handle_high_risk_alert(Event(EventType.HIGH_RISK_ALERT, {"id": "ent-1"}, project_id="p1"))
+        await service.handle_correlation_found(found("CircularFlow"))
+
+    asyncio.run(scenario())
+    assert len(bus.published) == 1
+    event_type, data = bus.published[0]
+    assert event_type == EventType.HIGH_RISK_ALERT and data["entity_id"] == "ent-1"
+    assert data["triggered_by_correlations"]["ubo_identified"] is True
@@ -0,0 +1,52 @@
+"""Tests for the historical FX table and batch conversion in app/core/currency_converter.py"""
+
+from datetime import date
+
+import numpy as np
+import pytest
+from sqlmodel import Session, delete
+
+from app.core.currency_converter import CurrencyConverter, RateTable
+from app.models import FxRate
+
+
+@pytest.fixture
+def db(db):
+    db.exec(delete(FxRate))
+    db.commit()
+    yield db
+
+
+def test_rate_table_is_as_of_date():
+    table = RateTable([("IDR", date(2024, 1, 1), 15500.0), ("IDR", date(2024, 3, 1), 15800.0)])
+
+    assert table.rate_as_of("IDR", date(2023, 12, 31)) is None
+    assert table.rate_as_of("IDR", date(2024, 2, 15)) == 15500.0
+    assert table.rate_as_of("IDR", date(2024, 3, 1)) == 15800.0
+    ordinals = np.array([date(2023, 6, 1).toordinal(), date(2024, 4, 1).toordinal()])
+    assert np.isnan(table.rates_as_of("IDR", ordinals)[0])
+
+
+def test_convert_many_matches_scalar_conversion(db: Session, tmp_path):
+    snapshot = tmp_path / "fx.csv"
+    snapshot.write_text(
+        "date,currency,rate\n"
+        "2024-01-01,IDR,15500\n"
+        "2024-03-01,IDR,15800\n"
+        "2024-01-01,EUR,0.90\n"
+    )
+    converter = CurrencyConverter(api_key="")
+    assert converter.load_csv_snapshot(db, str(snapshot)) == 3
+
+    amounts = [15500.0, 15800.0, 90.0, 1000.0]
+    currencies = ["IDR", "IDR", "EUR", "SGD"]
+    dates = ["2024-02-01", "2024-03-05", "2024-02-01", "2024-02-01"]
+    batch = converter.convert_many(amounts, currencies, dates, to_currency="USD")
+
+    assert batch[:3].tolist() == [1.0, 1.0, 100.0]
+    # SGD has no history: manual fallback rate
+    assert batch[3] == pytest.approx(1000.0 / 1.34, abs=0.01)
+    for amount, currency, on, converted in zip(amounts, currencies, dates, batch):
+        assert float(converter.convert(amount, currency, "USD", date.fromisoformat(on))) == pytest.approx(converted)
+    # Codes are case-insensitive, as in the scalar path
+    assert converter.convert_many([15500.0, 90.0], ["idr", "eur"], "2024-02-01", to_currency="usd").tolist() == [1.0, 100.0]
@@ -0,0 +1,105 @@
+"""Tests for batched DataHospital triage"""
+
+from datetime import datetime, UTC, timedelta
+
+import pandas as pd
+import pytest
+from sqlmodel import Session, select
+
+from app.models import Ingestion, QuarantineRow, Transaction, TransactionSource
+from app.modules.ingestion.data_hospital import DataHospital, normalize_numbers, parse_record, status_counts
+
+
+def test_normalize_numbers_reads_local_formats():
+    values = pd.Series(["Rp 1.500.000", "1.450.000,50", "1,250,000", "12,5", "(2.000)", "USD 3,000.25", "abc"])
+    out = normalize_numbers(values)
+    assert out[:6].tolist() == [1_500_000.0, 1_450_000.5, 1_250_000.0, 12.5, -2.0, 3000.25]
+    assert pd.isna(out[6])
+
+
+def test_parse_record_reads_ingestion_repr():
+    raw = str({"amount": "Rp 10.000", "note": float("nan"), "timestamp": pd.Timestamp("2024-01-02")})
+    assert parse_record(raw) == {"amount": "Rp 10.000", "note": None, "timestamp": "2024-01-02 00:00:00"}
+
+
+def test_claims_are_disjoint_and_expired_leases_return(db: Session, setup_test_engine, make_project):
+    project = make_project("DH-001")
+    for i in range(5):
+        db.add(QuarantineRow(project_id=project.id, raw_content="x", row_index=i, error_message="bad"))
+    db.commit()
+
+    with Session(setup_test_engine) as other:
+        first = DataHospital(db).claim_batch(limit=3)
+        second = DataHospital(other).claim_batch(limit=3)
+    assert len(first) == 3 and len(second) == 2
+    assert not {r.id for r in first} & {r.id for r in second}
+    assert DataHospital(db).claim_batch(limit=3) == []
+
+    stale = first[0]
+    stale.leased_until = datetime.now(UTC) - timedelta(seconds=1)
+    db.add(stale)
+    db.commit()
+    assert [r.id for r in DataHospital(db).claim_batch(limit=3)] == [stale.id]
+
+
+def test_triage_batch_repairs_charts_and_reingests(db: Session, make_project):
+    project = make_project("DH-002")
+    ingestion = Ingestion(
+        project_id=project.id, file_name="mutasi.csv", file_type="bank",
+        file_hash="SHA256:x", records_processed=0,
+    )
+    db.add(ingestion)
+    row = {"amount": "1.450.000,50", "bank_name": "BCA", "description": "TRSF CV B", "timestamp": "2024-01-05"}
+    patients = [
+        (str(row), "could not convert string to float: '1.450.000,50'"),
+        ("{'a': 1}", "Invalid JSON payload"),
+        ("paid on 2024-02-03", "Unknown datetime string format"),
+        ("???", "something else"),
+    ]
+    for i, (raw, error) in enumerate(patients):
+        db.add(QuarantineRow(
+            project_id=project.id, ingestion_id=ingestion.id, raw_content=raw, row_index=i, error_message=error,
+        ))
+    db.commit()
+
+    result = DataHospital(db).triage_batch(limit=100, reingest=True)
+    assert result == {"claimed": 4, "reingested": 1, "repaired": 2, "needs_specialist": 1}
+
+    charts = {
+        r.row_index: r for r in db.exec(select(QuarantineRow).where(QuarantineRow.project_id == project.id)).all()
+    }
+    assert charts[0].suggested_fix["method"] == "numeric_cleanup"
+    assert charts[1].suggested_fix == {"method": "json_quote_fix", "content": '{"a": 1}'}
+    assert charts[2].suggested_fix == {"method": "date_extraction", "date_found": "2024-02-03"}
+    assert charts[3].suggested_fix["method"] == "manual_review_needed"
+    assert all(r.lease_owner is None for r in charts.values())
+
+    tx = db.exec(select(Transaction).where(Transaction.project_id == project.id)).one()
+    assert (tx.amount, tx.bank_name, tx.source_type) == (1_450_000.5, "BCA", TransactionSource.BANK_STATEMENT)
+    assert status_counts(db, project.id) == {"reingested": 1, "repaired": 2, "needs_specialist": 1}
+
+
+def test_triage_batch_reingests_internal_ledger_row(db: Session, make_project):
+    project = make_project("DH-003")
+    ingestion = Ingestion(
+        project_id=project.id, file_name="ledger.csv", file_type="internal",
+        file_hash="SHA256:y", records_processed=0,
+    )
+    db.add(ingestion)
+    row = {
+        "proposed_amount": "Rp 1.500.000", "actual_amount": "1.450.000,50", "sender": "PT A",
+        "receiver": "CV Ledger", "description": "Semen", "timestamp": "2024-01-05",
+    }
+    db.add(QuarantineRow(
+        project_id=project.id, ingestion_id=ingestion.id, raw_content=str(row), row_index=1,
+        error_message="could not convert string to float: 'Rp 1.500.000'",
+    ))
+    db.commit()
+
+    assert DataHospital(db).triage_batch(limit=100, reingest=True) == {"claimed": 1, "reingested": 1}
+    tx = db.exec(select(Transaction).where(Transaction.project_id == project.id)).one()
+    assert (tx.proposed_amount, tx.actual_amount, tx.source_type) == (
+        1_500_000.0, 1_450_000.5, TransactionSource.INTERNAL_LEDGER,
+    )
+    # Forensic triggers ran: the proposed/actual gap is flagged as inflation
+    assert tx.status == "flagged" and tx.delta_inflation == pytest.approx(49_999.5)
@@ -0,0 +1,59 @@
+"""Tests for the project-scoped entity vector index"""
+
+import math
+import random
+
+import pytest
+from sqlmodel import Session, select
+
+from app.core.entity_vector_index import EntityVectorIndex
+from app.models import Entity, Project
+from datetime import datetime, UTC
+
+
+def _brute_force(entities, query, k):
+    def cosine(v):
+        dot = sum(a * b for a, b in zip(query, v))
+        return dot / (math.sqrt(sum(a * a for a in query)) * math.sqrt(sum(b * b for b in v)))
+
+    scored = sorted(((e.id, cosine(e.embeddings_json)) for e in entities), key=lambda x: x[1], reverse=True)
+    return [entity_id for entity_id, _ in scored[:k]]
+
+
+def test_matches_brute_force_and_tracks_changes(db: Session):
+    rng = random.Random(3)
+    project = Project(
+        name="Vectors", code="VEC-001", contractor_name="PT Test",
+        contract_value=1.0, start_date=datetime(2024, 1, 1, tzinfo=UTC),
+    )
+    other = Project(
+        name="Other", code="VEC-002", contractor_name="PT Test",
+        contract_value=1.0, start_date=datetime(2024, 1, 1, tzinfo=UTC),
+    )
+    db.add(project)
+    db.add(other)
+    mine = [
+        Entity(name=f"e{i}", project_id=project.id, embeddings_json=[rng.uniform(-1, 1) for _ in range(16)])
+        for i in range(200)
+    ]
+    db.add_all(mine)
+    db.add(Entity(name="zero", project_id=project.id, embeddings_json=[0.0] * 16))
+    db.add(Entity(name="foreign", project_id=other.id, embeddings_json=[1.0] * 16))
+    db.commit()
+
+    index = EntityVectorIndex()
+    query = [rng.uniform(-1, 1) for _ in range(16)]
+    hits = index.search(db, project.id, query, k=10, include_global=False)
+    assert [entity_id for entity_id, _ in hits] == _brute_force(mine, query, 10)
+
+    # In-place re-embedding and deletion are picked up on the next search
+    mine[0].embeddings_json = list(query)
+    db.add(mine[0])
+    db.delete(mine[1])
+    db.commit()
+    hits = index.search(db, project.id, query, k=3, include_global=False)
+    assert hits[0][0] == mine[0].id and hits[0][1] == pytest.approx(1.0, abs=1e-5)
+    assert mine[1].id not in {entity_id for entity_id, _ in index.search(db, project.id, query, k=500)}
+
+    remaining = db.exec(select(Entity).where(Entity.project_id == project.id, Entity.embedding_dim == 16)).all()
+    assert len(remaining) == 199
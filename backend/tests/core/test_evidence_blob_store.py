@@ -0,0 +1,104 @@
+"""Tests for the content-addressed evidence store in app/modules/evidence/blob_store.py"""
+
+import os
+from datetime import datetime, UTC, timedelta
+
+import pytest
+from sqlmodel import Session
+
+from app.core.field_encryption import FieldEncryption
+from app.models import Document, EvidenceBlob, Project
+from app.modules.evidence.blob_store import EvidenceBlobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return EvidenceBlobStore(root=str(tmp_path / "blobs"), encryptor=FieldEncryption("test-secret"))
+
+
+def test_duplicate_content_shares_one_blob(db: Session, store: EvidenceBlobStore):
+    payload = b"Surat Bank - Konfirmasi Saldo 2024"
+    blob_a, created_a = store.put(db, payload)
+    blob_b, created_b = store.put(db, payload)
+    db.commit()
+
+    assert created_a is True
+    assert created_b is False
+    assert blob_a.sha256 == blob_b.sha256
+    assert blob_b.ref_count == 2
+    assert len(os.listdir(os.path.dirname(blob_a.storage_path))) == 1
+    assert store.read(blob_a) == payload
+
+
+def test_extraction_runs_once_per_content(db: Session, store: EvidenceBlobStore):
+    calls = []
+
+    def extractor(content, file_type):
+        calls.append(file_type)
+        return f"VISUAL INDEX {len(content)}"
+
+    blob, _ = store.put(db, b"\x89PNG-scan")
+    first = store.extract_text(db, blob, b"\x89PNG-scan", "image", extractor)
+    second = store.extract_text(db, blob, b"\x89PNG-scan", "image", extractor)
+
+    assert first == second
+    assert calls == ["image"]
+
+
+def test_failed_extraction_is_not_cached(db: Session, store: EvidenceBlobStore):
+    blob, _ = store.put(db, b"unreadable")
+    store.extract_text(db, blob, b"unreadable", "image", lambda c, t: "Visual Analysis Failed: quota")
+    assert blob.content_text is None
+
+
+def test_garbage_collection_reclaims_unreferenced_blobs(db: Session, store: EvidenceBlobStore):
+    project = Project(
+        name="Blob GC Test",
+        code="PROJ-BLOB-001",
+        contractor_name="PT Test",
+        contract_value=1.0,
+        start_date=datetime(2024, 1, 1, tzinfo=UTC),
+    )
+    db.add(project)
+    kept, _ = store.put(db, b"referenced evidence")
+    orphan, _ = store.put(db, b"orphaned evidence")
+    orphan.last_referenced_at = datetime.now(UTC) - timedelta(days=2)
+    db.add(Document(project_id=project.id, filename="a.pdf", file_type="pdf", file_hash=kept.sha256))
+    db.commit()
+
+    stats = store.collect_garbage(db, grace_hours=24)
+
+    assert stats["removed"] == 1
+    assert db.get(EvidenceBlob, orphan.sha256) is None
+    assert not os.path.exists(orphan.storage_path)
+    assert db.get(EvidenceBlob, kept.sha256).ref_count == 1
+
+
+def test_racing_first_uploads_share_one_row(db: Session, setup_test_engine, store: EvidenceBlobStore):
+    payload = b"Kwitansi yang diunggah dua kali bersamaan"
+    blob, created = store.put(db, payload)
+    db.commit()
+    # A second worker that also missed the blob loses the insert race quietly
+    with Session(setup_test_engine) as other:
+        assert store._insert_if_absent(other, blob.sha256, blob.storage_path, len(payload)) is False
+        other.commit()
+    assert created is True
+    db.refresh(blob)
+    assert blob.ref_count == 1
+
+
+def test_known_text_stays_within_the_project(db: Session, make_project, store: EvidenceBlobStore):
+    mine = make_project("PROJ-BLOB-MINE")
+    theirs = make_project("PROJ-BLOB-THEIRS")
+    payload = b"Faktur pajak bersama"
+    blob, _ = store.put(db, payload)
+    text = store.extract_text(db, blob, payload, "pdf", lambda c, t: "FAKTUR 123")
+    db.add(Document(project_id=theirs.id, filename="f.pdf", file_type="pdf", file_hash=blob.sha256, content_text=text))
+    db.commit()
+
+    # Another tenant's extraction is not handed out, nor is a pending placeholder
+    assert store.known_text(db, blob, mine.id) is None
+    db.add(Document(project_id=mine.id, filename="f.pdf", file_type="bulk_import", file_hash=blob.sha256, content_text="Pending OCR"))
+    db.commit()
+    assert store.known_text(db, blob, mine.id) is None
+    assert store.known_text(db, blob, theirs.id) == "FAKTUR 123"
@@ -0,0 +1,73 @@
+"""Tests for the organization-wide insight vector index in app/core/global_memory.py"""
+
+from datetime import datetime, UTC
+
+import numpy as np
+import pytest
+from sqlmodel import Session, delete
+
+from app.core.global_memory import InsightVectorIndex, tag_for_vector
+from app.models import CopilotInsight, Project
+
+
+@pytest.fixture
+def db(db):
+    db.exec(delete(CopilotInsight))
+    db.commit()
+    yield db
+
+
+def _seed(db: Session, vectors):
+    project = Project(
+        name="Memory",
+        code=f"MEM-{len(vectors)}-{datetime.now(UTC).timestamp()}",
+        contractor_name="PT Test",
+        contract_value=1.0,
+        start_date=datetime(2024, 1, 1, tzinfo=UTC),
+    )
+    db.add(project)
+    insights = []
+    for i, vec in enumerate(vectors):
+        model, dim = tag_for_vector(vec)
+        insight = CopilotInsight(
+            project_id=project.id, title=f"Insight {i}", content="c",
+            embeddings_json=vec, embedding_model=model, embedding_dim=dim,
+        )
+        db.add(insight)
+        insights.append(insight)
+    db.commit()
+    return insights
+
+
+def test_dummy_vectors_are_tagged_out():
+    assert tag_for_vector([0.0] * 768) == ("dummy", 768)
+    assert tag_for_vector(None) == ("none", None)
+
+
+def test_search_matches_brute_force_ranking(db: Session, tmp_path):
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(40, 8)).tolist() + [[0.0] * 8]
+    insights = _seed(db, vectors)
+    index = InsightVectorIndex(snapshot_dir=str(tmp_path))
+    query = rng.normal(size=8).tolist()
+
+    hits = index.search(db, query, model="unknown-8", dim=8, k=5)
+
+    q = np.asarray(query) / np.linalg.norm(query)
+    brute = sorted(
+        ((ins.id, float(np.dot(q, np.asarray(ins.embeddings_json) / np.linalg.norm(ins.embeddings_json))))
+         for ins in insights[:-1]),
+        key=lambda x: x[1], reverse=True,
+    )[:5]
+    assert [h[0] for h in hits] == [b[0] for b in brute]
+    assert np.allclose([h[1] for h in hits], [b[1] for b in brute], atol=1e-5)
+
+
+def test_snapshot_reload_and_incremental_catch_up(db: Session, tmp_path):
+    _seed(db, [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
+    InsightVectorIndex(snapshot_dir=str(tmp_path)).snapshot(db)
+
+    newer = _seed(db, [[0.0, 0.0, 1.0]])[0]
+    warm = InsightVectorIndex(snapshot_dir=str(tmp_path))
+    hits = warm.search(db, [0.0, 0.1, 1.0], model="unknown-3", dim=3, k=1)
+    assert hits[0][0] == newer.id
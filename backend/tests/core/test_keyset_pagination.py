@@ -0,0 +1,55 @@
+"""Tests for keyset (cursor) pagination"""
+
+from datetime import datetime, UTC, timedelta
+
+import pytest
+from sqlmodel import Session, select
+
+from app.core.pagination import decode_cursor, encode_cursor, keyset_paginate
+from app.models import AuditLog
+
+
+def test_cursor_round_trip_and_rejects_foreign_keys():
+    ts = datetime(2025, 3, 1, 12, 30, tzinfo=UTC)
+    cursor = encode_cursor(["timestamp", "id"], [ts, "abc"])
+    assert decode_cursor(cursor, ["timestamp", "id"]) == [ts, "abc"]
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, ["matched_at", "id"])
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor", ["timestamp", "id"])
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_pages_cover_every_row_once_with_tied_timestamps(db: Session, descending):
+    entity_id = f"keyset-{descending}"
+    base = datetime(2025, 1, 1, tzinfo=UTC)
+    for i in range(23):
+        # Groups of three share a timestamp; the id breaks ties
+        db.add(AuditLog(
+            entity_type="Transaction", entity_id=entity_id, action="UPDATE",
+            timestamp=base + timedelta(minutes=i // 3),
+        ))
+    db.commit()
+
+    query = select(AuditLog).where(AuditLog.entity_id == entity_id)
+    sort = (AuditLog.timestamp, AuditLog.id)
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = keyset_paginate(db, query, sort, limit=5, cursor=cursor, descending=descending, count="exact" if pages == 0 else "none")
+        if pages == 0:
+            assert page.total == 23
+        else:
+            assert page.total is None
+        seen.extend(log.id for log in page.items)
+        pages += 1
+        if not page.has_more:
+            assert page.next_cursor is None
+            break
+        cursor = page.next_cursor
+
+    assert pages == 5
+    assert len(seen) == len(set(seen)) == 23
+    expected = db.exec(
+        query.order_by(*(col.desc() if descending else col for col in sort))
+    ).all()
+    assert seen == [log.id for log in expected]
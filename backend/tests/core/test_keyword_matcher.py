@@ -0,0 +1,40 @@
+"""Tests for the compiled forensic keyword matcher"""
+
+import random
+import string
+
+from app.modules.fraud.keyword_matcher import (
+    FORENSIC_KEYWORDS,
+    KeywordMatcher,
+    forensic_keywords,
+)
+
+
+def _naive(rules, text):
+    lowered = (text or "").lower()
+    return frozenset(cat for cat, kws in rules.items() if any(kw.lower() in lowered for kw in kws))
+
+
+def test_matches_naive_substring_scan_on_random_text():
+    rng = random.Random(7)
+    vocabulary = [kw for kws in FORENSIC_KEYWORDS.values() for kw in kws] + ["ke", "rek", "tr", "x", " "]
+    for _ in range(500):
+        parts = [rng.choice(vocabulary) if rng.random() < 0.5 else rng.choice(string.ascii_letters) for _ in range(8)]
+        text = "".join(rng.choice(["", " "]) + p for p in parts)
+        assert forensic_keywords.match(text) == _naive(FORENSIC_KEYWORDS, text), text
+
+
+def test_nested_and_overlapping_keywords_are_all_reported():
+    matcher = KeywordMatcher({"long": ["transfer"], "short": ["trans"], "tail": ["fer k"], "next": ["ke rek"]})
+    assert matcher.match("TRANSFER KE REK 123") == {"long", "short", "tail", "next"}
+    assert matcher.match("trance") == frozenset()
+    assert matcher.match(None) == frozenset()
+
+
+def test_batch_api_and_masks_align_with_input():
+    texts = ["TARIKAN ATM TUNAI", None, "Makan siang", "TARIKAN ATM TUNAI"]
+    hits = forensic_keywords.match_many(texts)
+    assert hits == [forensic_keywords.match(t) for t in texts]
+    masks = forensic_keywords.masks(texts)
+    assert masks["CASH_WITHDRAWAL"].tolist() == [True, False, False, True]
+    assert masks["PERSONAL_CONSUMPTION"].tolist() == [False, False, True, False]
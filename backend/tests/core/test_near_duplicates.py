@@ -0,0 +1,36 @@
+"""Tests for the analyst-comparison near-duplicate and name-variation indexes"""
+
+import random
+
+from app.modules.fraud.near_duplicates import NameVariationIndex, NearDuplicateIndex, positional_similarity
+
+
+def _random_descriptions(rng: random.Random, n: int):
+    stems = ["TRANSFER KE BUDI SANTOSO", "TRF DARI PT SEMEN GRESIK", "TARIK TUNAI ATM", "SETORAN", "BY"]
+    out = []
+    for _ in range(n):
+        text = list(rng.choice(stems) + " " + str(rng.randint(0, 30)))
+        for _ in range(rng.randint(0, 4)):
+            i = rng.randrange(len(text))
+            text[i] = rng.choice("ABXYZ 0129")
+        if rng.random() < 0.2:
+            del text[rng.randrange(len(text)):]
+        text = "".join(text)
+        out.append(text.lower() if rng.random() < 0.1 else text)
+    return out + ["", ""]
+
+
+def test_similar_counts_match_pairwise_scan():
+    rng = random.Random(7)
+    descriptions = _random_descriptions(rng, 400)
+    index = NearDuplicateIndex(descriptions)
+    for desc in set(descriptions) | {"TRANSFER KE BUDI SANTOSA 12", "unseen"}:
+        expected = sum(1 for d in descriptions if d != desc and positional_similarity(desc, d) > 0.8)
+        assert index.similar_count(desc) == expected, desc
+
+
+def test_name_variations_match_substring_scan():
+    names = ["BUDI SANTOSO", "BUDI", "BUDIMAN JAYA", "PT SEMEN GRESIK", "SEMENTARA", "AB"]
+    index = NameVariationIndex(names)
+    for part in ["BUDI", "SEMEN", "GRESIK", "XYZ", "AB", "SANTOSO"]:
+        assert index.variations(part) == [n for n in names if part in n and n != part]
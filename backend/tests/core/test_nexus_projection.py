@@ -0,0 +1,97 @@
+"""Tests for the aggregated Nexus graph projection and its data version"""
+
+from datetime import datetime, UTC
+
+from sqlmodel import Session, select
+
+from app.models import CorporateRelationship, Entity, EntityType, Project, Transaction
+from app.modules.fraud.nexus_projection import NexusProjectionService
+
+
+def _pay(db: Session, project: Project, sender: str, receiver: str, amount: float):
+    db.add(Transaction(
+        project_id=project.id, sender=sender, receiver=receiver, actual_amount=amount,
+        timestamp=datetime(2024, 1, 2, tzinfo=UTC),
+    ))
+
+
+def test_build_aggregates_edges_and_keeps_top_n(db: Session, make_project):
+    project = make_project("NEXUS-001")
+    for amount in (100.0, 50.0):
+        _pay(db, project, "PT Alpha", "CV Beta", amount)
+    _pay(db, project, "PT Alpha", "CV Gamma", 10.0)
+    _pay(db, project, "CV Beta", "CV Gamma", 5.0)
+    owner = Entity(name="PT Alpha", type=EntityType.COMPANY, project_id=project.id, risk_score=0.7)
+    shell = Entity(name="CV Beta", project_id=project.id)
+    db.add_all([owner, shell])
+    db.add(CorporateRelationship(parent_entity_id=owner.id, child_entity_id=shell.id, stake_percentage=60.0))
+    db.commit()
+
+    graph = NexusProjectionService.build(db, project, top_n=2)
+    assert graph["meta"] == {
+        "total_edges": 3, "returned_edges": 2, "truncated": True, "top_n": 2, "min_amount": 0.0,
+    }
+    transfers = [(l["source"], l["target"], l["value"], l["tx_count"]) for l in graph["links"] if l["type"] == "Transfer"]
+    assert transfers == [("PT Alpha", "CV Beta", 150.0, 2), ("PT Alpha", "CV Gamma", 10.0, 1)]
+    nodes = {n["id"]: n for n in graph["nodes"]}
+    assert (nodes["PT Alpha"]["type"], nodes["PT Alpha"]["risk"]) == ("company", 0.7)
+    # Node totals cover all project flow, not only the kept edges
+    assert nodes["CV Beta"]["total_sent"] == 5.0 and nodes["CV Gamma"]["total_received"] == 15.0
+    ownership = [l for l in graph["links"] if l["type"] == "Ownership"]
+    assert [(l["source"], l["target"], l["stake"]) for l in ownership] == [("PT Alpha", "CV Beta", 60.0)]
+
+
+def test_writes_bump_data_version_and_refresh_cached_graph(db: Session, make_project):
+    project = make_project("NEXUS-002")
+    _pay(db, project, "PT Alpha", "CV Beta", 100.0)
+    entity = Entity(name="CV Beta", project_id=project.id)
+    db.add(entity)
+    db.commit()
+
+    first = NexusProjectionService.get_graph(db, project)
+    assert NexusProjectionService.get_graph(db, project) == first  # served from cache
+    version = first["meta"]["data_version"]
+
+    # A type change alters neither counts nor sums, but still bumps the version
+    entity.type = EntityType.PERSON
+    db.add(entity)
+    db.commit()
+    assert NexusProjectionService.data_version(project.id) != version
+    graph = NexusProjectionService.get_graph(db, project)
+    assert {n["id"]: n["type"] for n in graph["nodes"]}["CV Beta"] == "person"
+
+    # So does renaming a counterparty in place
+    version = graph["meta"]["data_version"]
+    tx = db.exec(select(Transaction).where(Transaction.project_id == project.id)).one()
+    tx.receiver = "CV Beta Baru"
+    db.add(tx)
+    db.commit()
+    graph = NexusProjectionService.get_graph(db, project)
+    assert graph["meta"]["data_version"] != version
+    assert {l["target"] for l in graph["links"] if l["type"] == "Transfer"} == {"CV Beta Baru"}
+
+    # Other projects' writes leave this version alone
+    version = graph["meta"]["data_version"]
+    other = make_project("NEXUS-003")
+    _pay(db, other, "PT Alpha", "CV Beta", 1.0)
+    db.commit()
+    assert NexusProjectionService.data_version(project.id) == version
+
+
+def test_only_committed_writes_bump_data_version(db: Session, make_project):
+    project = make_project("NEXUS-004")
+    _pay(db, project, "PT Alpha", "CV Beta", 100.0)
+    db.commit()
+    version = NexusProjectionService.data_version(project.id)
+
+    # Flushed but rolled back: readers never saw it, so the cache stays valid
+    _pay(db, project, "PT Alpha", "CV Gamma", 5.0)
+    db.flush()
+    assert NexusProjectionService.data_version(project.id) == version
+    db.rollback()
+    db.commit()
+    assert NexusProjectionService.data_version(project.id) == version
+
+    _pay(db, project, "PT Alpha", "CV Gamma", 5.0)
+    db.commit()
+    assert NexusProjectionService.data_version(project.id) != version
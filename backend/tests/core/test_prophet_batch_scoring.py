@@ -0,0 +1,51 @@
+"""Tests for vectorized batch risk scoring in ProphetService"""
+
+from datetime import datetime, UTC, timedelta
+
+import pytest
+from sqlmodel import Session
+
+from app.models import Entity, Project, Transaction
+from app.services.intelligence.prophet_service import ProphetService
+
+
+@pytest.mark.asyncio
+async def test_batch_scores_match_single_transaction_scoring(db: Session):
+    project = Project(
+        name="Prophet Batch",
+        code="PROJ-PROPHET-001",
+        contractor_name="PT Test",
+        contract_value=1.0,
+        start_date=datetime(2024, 1, 1, tzinfo=UTC),
+    )
+    db.add(project)
+    db.add(Entity(name="CV Watched", project_id=project.id, is_watchlisted=True))
+    db.add(Entity(name="PT Busy", project_id=project.id))
+    start = datetime(2024, 3, 1, tzinfo=UTC)
+    rows = [
+        (25_000_000.0, "Pembayaran tunai segera", "CV Watched", False),
+        (2_000_000.0, "Material", "PT Plain", False),
+        (1_234_567.0, "titipan pribadi", "PT Busy", True),
+    ] + [(100_000.0 + i, "Termin", "PT Busy", False) for i in range(6)]
+    for i, (amount, description, receiver, flagged) in enumerate(rows):
+        db.add(Transaction(
+            project_id=project.id, sender="PT Kontraktor", receiver=receiver, actual_amount=amount,
+            description=description, potential_misappropriation=flagged,
+            timestamp=start + timedelta(hours=i),
+        ))
+    db.commit()
+
+    service = ProphetService(db)
+    batch = service.score_batch(project_id=project.id)
+    by_id = dict(zip(batch["ids"], batch["scores"]))
+
+    for tx in db.exec(Transaction.__table__.select().where(Transaction.project_id == project.id)).all():
+        single = await service.predict_transaction_risk(
+            {"amount": tx.actual_amount, "description": tx.description, "receiver": tx.receiver}
+        )
+        assert by_id[tx.id] == single["risk_score"]
+
+    report = service.predict_batch_risk(project_id=project.id, min_score=50)
+    assert report["scored"] == len(rows)
+    assert report["transactions"][0]["risk_level"] == "CRITICAL"
+    assert await service.predict_project_risk(project.id) == await service.predict_project_risk(project.id)
@@ -0,0 +1,116 @@
+"""Tests for hybrid chunk retrieval in app/core/rag_index.py"""
+
+from sqlmodel import Session
+
+from app.core.rag_index import DocumentChunkIndex, chunk_text, reciprocal_rank_fusion
+from app.models import Document, Project
+
+
+def _document(db: Session, project: Project, text: str) -> Document:
+    doc = Document(project_id=project.id, filename="letter.pdf", file_type="pdf", content_text=text)
+    db.add(doc)
+    db.commit()
+    return doc
+
+
+def test_chunk_text_respects_size_and_overlap():
+    text = " ".join(f"Kalimat nomor {i} tentang transfer dana." for i in range(200))
+    chunks = chunk_text(text, max_chars=300, overlap=50)
+    assert len(chunks) > 1
+    assert all(len(c) <= 300 for c in chunks)
+    assert "Kalimat nomor 0" in chunks[0]
+    assert "Kalimat nomor 199" in chunks[-1]
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]])
+    assert fused[0][0] == "b"
+    assert {item for item, _ in fused} == {"a", "b", "c", "d"}
+
+
+def test_hybrid_search_is_project_scoped(db: Session, make_project):
+    index = DocumentChunkIndex()
+    project_a = make_project("RAG-A")
+    project_b = make_project("RAG-B")
+    doc_a = _document(db, project_a, "Invoice semen Gresik dibayar ke PT Beton Jaya.")
+    doc_b = _document(db, project_b, "Invoice semen Gresik untuk proyek lain.")
+
+    vectors = {doc_a.id: [1.0, 0.0, 0.0], doc_b.id: [0.0, 1.0, 0.0]}
+    for doc in (doc_a, doc_b):
+        index.index_document(
+            db, doc.id, doc.project_id, doc.content_text,
+            embed_batch=lambda texts, v=vectors[doc.id]: [v] * len(texts), embedding_model="test-3d",
+        )
+    db.commit()
+
+    hits = index.hybrid_search(db, "semen gresik", project_id=project_a.id, query_vector=[1.0, 0.0, 0.0])
+    assert hits
+    assert {chunk.document_id for chunk, _ in hits} == {doc_a.id}
+
+
+def test_reindex_replaces_previous_chunks(db: Session, make_project):
+    index = DocumentChunkIndex()
+    project = make_project("RAG-C")
+    doc = _document(db, project, "Kwitansi pembelian besi beton.")
+    index.index_document(db, doc.id, project.id, doc.content_text)
+    index.index_document(db, doc.id, project.id, "Surat konfirmasi saldo bank.")
+    db.commit()
+
+    assert index.lexical_search(db, "besi", project_id=project.id) == []
+    assert len(index.lexical_search(db, "saldo", project_id=project.id)) == 1
+
+
+def test_dense_index_is_not_rebuilt_for_rejected_vectors(db: Session, make_project):
+    index = DocumentChunkIndex()
+    project = make_project("RAG-D")
+    doc = _document(db, project, "Nota pembayaran termin pertama.")
+    odd = _document(db, project, "Lampiran foto lokasi proyek.")
+    calls = []
+    index.index_document(db, doc.id, project.id, doc.content_text,
+                         embed_batch=lambda texts: calls.append(texts) or [[1.0, 0.0]] * len(texts),
+                         embedding_model="test")
+    # Stored at another dimension: the loaded index rejects it
+    index.index_document(db, odd.id, project.id, odd.content_text,
+                         embed_batch=lambda texts: [[0.0, 1.0, 0.0]] * len(texts), embedding_model="test")
+    db.commit()
+    assert calls == [["Nota pembayaran termin pertama."]]  # one batched call per document
+
+    first = index._vector_index(db, project.id)
+    assert len(first) == 1
+    assert index._vector_index(db, project.id) is first
+
+
+def test_failed_embedding_batch_leaves_chunks_lexical_only(db: Session, make_project):
+    index = DocumentChunkIndex()
+    project = make_project("RAG-E")
+    doc = _document(db, project, "Bukti transfer ke rekening pribadi.")
+
+    def fail(texts):
+        raise RuntimeError("quota exceeded")
+
+    assert index.index_document(db, doc.id, project.id, doc.content_text, embed_batch=fail, embedding_model="test") == 1
+    db.commit()
+    assert len(index.lexical_search(db, "rekening", project_id=project.id)) == 1
+    assert index.dense_search(db, [1.0, 0.0], project_id=project.id) == []
+
+
+def test_unchunked_documents_stay_searchable_and_get_backfilled(db: Session, make_project, monkeypatch, setup_test_engine):
+    from app.core import rag
+    from app.core.rag_index import chunk_index
+
+    monkeypatch.setattr(rag, "engine", setup_test_engine)
+    monkeypatch.setattr(rag.settings, "GEMINI_API_KEY", "")  # dummy embeddings, no network
+    project = make_project("RAG-F")
+    legacy = _document(db, project, "Faktur semen lama dari PT Arsip.")
+    pending = _document(db, project, "Pending OCR")
+    fresh = _document(db, project, "Faktur semen baru dari PT Kini.")
+    chunk_index.index_document(db, fresh.id, project.id, fresh.content_text)
+    db.commit()
+
+    found = rag.rag_service.query_context("semen", project_id=project.id)
+    assert {doc.id for doc in found} == {legacy.id, fresh.id}
+
+    assert rag.rag_service.backfill_chunks() >= 1
+    assert chunk_index.lexical_search(db, "arsip", project_id=project.id)
+    assert not chunk_index.lexical_search(db, "pending", project_id=project.id)
+    assert pending.id not in {doc.id for doc in rag.rag_service.query_context("arsip", project_id=project.id)}
@@ -0,0 +1,75 @@
+"""Tests for the project-scoped S-curve engine"""
+
+from datetime import datetime, UTC, timedelta
+
+import numpy as np
+from sqlmodel import Session
+
+from app.models import Milestone, Transaction, TransactionCategory
+from app.modules.forensic.s_curve_engine import SCurveEngine, lttb_indices
+
+END = datetime(2024, 12, 31, tzinfo=UTC)
+
+
+def test_buckets_are_project_scoped_and_cumulative(db: Session, make_project):
+    project = make_project("SCURVE-001", contract_value=1000.0, end_date=END)
+    other = make_project("SCURVE-002", contract_value=1000.0, end_date=END)
+    for day, amount, category in [(2, 100.0, TransactionCategory.V), (3, 50.0, TransactionCategory.XP), (40, 25.0, TransactionCategory.P)]:
+        db.add(Transaction(
+            project_id=project.id, sender="A", receiver="B", actual_amount=amount, category_code=category,
+            timestamp=datetime(2024, 1, 1, tzinfo=UTC) + timedelta(days=day),
+        ))
+    db.add(Transaction(
+        project_id=other.id, sender="A", receiver="B", actual_amount=999.0,
+        timestamp=datetime(2024, 1, 5, tzinfo=UTC),
+    ))
+    db.add(Milestone(
+        project_id=project.id, name="Termin 1", percentage=20.0, expected_amount=200.0,
+        status="paid", release_date=datetime(2024, 2, 15, tzinfo=UTC),
+    ))
+    db.commit()
+
+    curve = SCurveEngine(db).build(project, granularity="month")
+    points = curve["curve_data"]
+    assert [p["date"] for p in points] == ["2024-01-01", "2024-02-01"]
+    # Only vendor spend counts (not XP, not P); the other project's spend is excluded
+    assert [p["ac"] for p in points] == [100.0, 100.0]
+    assert [p["ev"] for p in points] == [0.0, 200.0]
+    assert 0 < points[0]["pv"] < points[1]["pv"] < 1000.0
+
+    weekly = SCurveEngine(db).build(project, granularity="week")
+    assert weekly["curve_data"][0]["date"] == "2024-01-01"  # Monday
+    assert weekly["curve_data"][-1]["ac"] == 100.0
+
+
+def test_milestone_writes_invalidate_cached_curve(db: Session, make_project):
+    from app.core.cache import cache
+    from app.core.query_cache import milestone_tag
+
+    project = make_project("SCURVE-003", contract_value=1000.0, end_date=END)
+    key = f"scurve-test:{project.id}"
+    assert cache.get_or_compute(key, lambda: "v1", ttl=60, tags=[milestone_tag(project.id)]) == "v1"
+
+    # Flushed then rolled back: the cached curve is still accurate
+    db.add(Milestone(project_id=project.id, name="Termin 0", percentage=10.0, expected_amount=100.0))
+    db.flush()
+    assert cache.get(key) == "v1"
+    db.rollback()
+    db.commit()
+    assert cache.get(key) == "v1"
+
+    db.add(Milestone(project_id=project.id, name="Termin 1", percentage=20.0, expected_amount=200.0))
+    db.commit()
+    assert cache.get(key) is None
+
+
+def test_lttb_keeps_endpoints_and_steps():
+    x = np.arange(1000, dtype=np.float64)
+    ramp = x.copy()
+    step = np.where(x >= 637, 1.0, 0.0)
+    keep = lttb_indices(x, [ramp, step], 50)
+    assert keep.shape[0] == 50
+    assert keep[0] == 0 and keep[-1] == 999
+    assert np.all(np.diff(keep) > 0)
+    assert {636, 637} & set(keep.tolist())
+    assert lttb_indices(x[:10], [ramp[:10]], 50).tolist() == list(range(10))
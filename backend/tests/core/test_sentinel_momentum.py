@@ -0,0 +1,83 @@
+"""Tests for the set-based sentinel momentum run"""
+
+from datetime import datetime, UTC, timedelta
+
+import pytest
+from sqlmodel import Session, select
+
+from app.models import FraudAlert, Ingestion, Project, ProjectMomentum, Transaction
+from app.tasks import forensic_sentinel
+
+
+@pytest.fixture
+def sentinel(setup_test_engine, monkeypatch):
+    published = []
+    monkeypatch.setattr(forensic_sentinel, "engine", setup_test_engine)
+    monkeypatch.setattr(forensic_sentinel, "publish_event", lambda *a, **kw: published.append((a, kw)))
+    return published
+
+
+def _sentinel_alerts(db: Session, project_id: str):
+    return db.exec(
+        select(FraudAlert).where(
+            FraudAlert.project_id == project_id, FraudAlert.alert_type.like("SENTINEL_%")
+        )
+    ).all()
+
+
+def test_momentum_alerts_once_per_transition(setup_test_engine, sentinel):
+    now = datetime.now(UTC)
+    with Session(setup_test_engine) as db:
+        project = Project(
+            name="Momentum",
+            code="PROJ-MOM-001",
+            contractor_name="PT Test",
+            contract_value=1.0,
+            start_date=datetime(2024, 1, 1, tzinfo=UTC),
+        )
+        db.add(project)
+        db.add(Ingestion(
+            project_id=project.id, file_name="a.csv", file_type="csv", file_hash="h",
+            records_processed=1, created_at=now - timedelta(days=9),
+        ))
+        # 2 flagged last week, 4 flagged this week -> +100%
+        for days_ago in (10, 11, 1, 2, 3, 4):
+            db.add(Transaction(
+                project_id=project.id, sender="A", receiver="B", actual_amount=1.0,
+                risk_score=0.9, timestamp=now - timedelta(days=days_ago),
+            ))
+        db.add(Transaction(
+            project_id=project.id, sender="A", receiver="B", actual_amount=1.0,
+            risk_score=0.1, timestamp=now - timedelta(days=30),
+        ))
+        db.commit()
+        project_id = project.id
+
+    first = forensic_sentinel.evaluate_momentum()
+    assert first["alerts"] >= 2
+    assert "duration_ms" in first
+
+    with Session(setup_test_engine) as db:
+        state = db.get(ProjectMomentum, project_id)
+        assert state.window_tx_count == 6
+        assert (state.this_week_flags, state.last_week_flags) == (4, 2)
+        assert state.acceleration == pytest.approx(1.0)
+        types = sorted(a.alert_type for a in _sentinel_alerts(db, project_id))
+        assert types == ["SENTINEL_INGESTION_SILENCE", "SENTINEL_VARIANCE_ACCELERATION"]
+
+    # Nothing changed: no re-evaluation, no duplicate alerts
+    forensic_sentinel.evaluate_momentum()
+    with Session(setup_test_engine) as db:
+        assert len(_sentinel_alerts(db, project_id)) == 2
+
+    # A fresh ingestion ends the silent period
+    with Session(setup_test_engine) as db:
+        db.add(Ingestion(
+            project_id=project_id, file_name="b.csv", file_type="csv", file_hash="h2",
+            records_processed=1,
+        ))
+        db.commit()
+    forensic_sentinel.evaluate_momentum()
+    with Session(setup_test_engine) as db:
+        assert db.get(ProjectMomentum, project_id).silence_alerted is False
+        assert len(_sentinel_alerts(db, project_id)) == 2
@@ -0,0 +1,87 @@
+"""Tests for shared-attribute clusters over the entity_attributes side table"""
+
+from datetime import datetime, UTC
+
+from sqlmodel import Session, select
+
+from app.models import Entity, EntityAttribute
+from app.modules.correlation.shared_attribute_detector import SharedAttributeDetector
+
+
+def _clusters(db: Session, ids, project_id=None):
+    # Other tests share the database; keep clusters made of this test's entities only
+    return {
+        (c["attribute"], frozenset(c["entities"])): c
+        for c in SharedAttributeDetector.iter_clusters(db, project_id)
+        if set(c["entities"]) <= set(ids)
+    }
+
+
+def test_clusters_follow_entity_writes_within_and_across_projects(db: Session, make_project):
+    a, b = make_project("SHARED-A"), make_project("SHARED-B")
+    ents = {
+        "npwp1": Entity(project_id=a.id, name="PT Satu", tax_id="01.234.567.8-901.000"),
+        "npwp2": Entity(project_id=a.id, name="PT Dua", tax_id="012345678901000"),
+        "acc_a": Entity(project_id=a.id, name="Budi", bank_account_number="123-456-789"),
+        "acc_b": Entity(project_id=b.id, name="Budi S", bank_account_number="123456789"),
+        "tel1": Entity(project_id=a.id, name="Andi", metadata_json={"phone": "+62 812 3456 7890"}),
+        "tel2": Entity(project_id=a.id, name="Andi K", metadata_json={"phone": "0812-3456-7890"}),
+        "addr": Entity(project_id=a.id, name="CV Tiga", metadata_json={"address": "Jl. Merdeka No. 1"}),
+        "dash": Entity(project_id=a.id, name="Placeholder", tax_id="-", bank_account_number="0"),
+    }
+    db.add_all(ents.values())
+    db.commit()
+    ids = {k: e.id for k, e in ents.items()}
+
+    in_a = _clusters(db, ids.values(), a.id)
+    assert set(in_a) == {
+        ("tax_id", frozenset({ids["npwp1"], ids["npwp2"]})),
+        ("phone", frozenset({ids["tel1"], ids["tel2"]})),
+    }
+    assert in_a[("tax_id", frozenset({ids["npwp1"], ids["npwp2"]}))]["correlation_type"] == "SharedTaxID"
+
+    cross = _clusters(db, ids.values())
+    bank = cross[("bank_account_number", frozenset({ids["acc_a"], ids["acc_b"]}))]
+    assert bank["project_ids"] == sorted([a.id, b.id]) and bank["risk_boost"] == 0.6
+
+    # Updates and deletes move rows in the side table
+    ents["npwp2"].tax_id = "09.999.999.9-999.000"
+    ents["addr"].metadata_json = {"address": "JL MERDEKA NO 1"}
+    db.add(ents["npwp2"])
+    db.add(ents["addr"])
+    db.add(Entity(project_id=a.id, name="CV Tiga Baru", metadata_json={"address": "jl.  merdeka no 1"}))
+    db.delete(ents["tel2"])
+    db.commit()
+    current = db.exec(select(Entity.id).where(Entity.project_id.in_([a.id, b.id]))).all()
+    assert [key[0] for key in _clusters(db, current, a.id)] == ["address"]
+
+
+def test_backfill_indexes_rows_written_without_mapper_events(db: Session, make_project):
+    project = make_project("SHARED-C")
+    table = Entity.__table__
+    db.exec(table.insert().values([
+        {"id": "legacy-1", "project_id": project.id, "name": "Lama", "type": "UNKNOWN", "risk_score": 0.0,
+         "is_watchlisted": False, "tax_id": "77.777.777.7", "metadata_json": {}, "created_at": datetime.now(UTC)},
+        {"id": "legacy-2", "project_id": project.id, "name": "Lama 2", "type": "UNKNOWN", "risk_score": 0.0,
+         "is_watchlisted": False, "tax_id": "777777777", "metadata_json": {}, "created_at": datetime.now(UTC)},
+        # Only a phone or only an address in metadata
+        {"id": "legacy-3", "project_id": project.id, "name": "Lama 3", "type": "UNKNOWN", "risk_score": 0.0,
+         "is_watchlisted": False, "tax_id": None, "metadata_json": {"phone": "+62 811 0000 1111"}, "created_at": datetime.now(UTC)},
+        {"id": "legacy-4", "project_id": project.id, "name": "Lama 4", "type": "UNKNOWN", "risk_score": 0.0,
+         "is_watchlisted": False, "tax_id": None, "metadata_json": {"phone": "0811-0000-1111"}, "created_at": datetime.now(UTC)},
+        {"id": "legacy-5", "project_id": project.id, "name": "Lama 5", "type": "UNKNOWN", "risk_score": 0.0,
+         "is_watchlisted": False, "tax_id": None, "metadata_json": {"address": "Jl. Sudirman 5"}, "created_at": datetime.now(UTC)},
+    ]))
+    db.commit()
+    assert not db.exec(select(EntityAttribute).where(EntityAttribute.entity_id == "legacy-1")).all()
+    # Scans are read-only: nothing is indexed until the backfill task runs
+    assert SharedAttributeDetector.scan_project_for_links(db, project.id) == []
+
+    assert SharedAttributeDetector.backfill(db) >= 5
+    assert SharedAttributeDetector.backfill(db) == 0
+    findings = SharedAttributeDetector.scan_project_for_links(db, project.id)
+    assert {f["attribute"]: sorted(f["entities"]) for f in findings} == {
+        "tax_id": ["legacy-1", "legacy-2"],
+        "phone": ["legacy-3", "legacy-4"],
+    }
+    assert db.exec(select(EntityAttribute.attribute).where(EntityAttribute.entity_id == "legacy-5")).all() == ["address"]
@@ -0,0 +1,60 @@
+"""Tests for the joined, chunked SiteTruthService evidence check"""
+
+import random
+from datetime import datetime, UTC
+
+from sqlmodel import Session, select
+
+from app.models import Document, Project, Transaction
+from app.modules.forensic.service import GeographicValidator
+from app.modules.forensic.site_truth_service import SiteTruthService
+
+
+def test_joined_chunks_match_per_document_check(db: Session):
+    rng = random.Random(9)
+    project = Project(
+        name="Site Truth", code="ST-001", contractor_name="PT Test",
+        contract_value=1.0, start_date=datetime(2024, 1, 1, tzinfo=UTC),
+    )
+    db.add(project)
+    transactions = []
+    for i in range(20):
+        gps = i % 5 != 0
+        tx = Transaction(
+            project_id=project.id, sender="A", receiver="B",
+            latitude=-6.2 + rng.uniform(-0.05, 0.05) if gps else None,
+            longitude=106.8 + rng.uniform(-0.05, 0.05) if gps else None,
+        )
+        transactions.append(tx)
+        db.add(tx)
+    for i in range(60):
+        tx = rng.choice(transactions)
+        metadata = {"lat": -6.2 + rng.uniform(-0.2, 0.2), "lng": 106.8 + rng.uniform(-0.2, 0.2)}
+        if i % 7 == 0:
+            metadata = {"camera": "no gps"}
+        db.add(Document(project_id=project.id, filename=f"photo_{i}.jpg", file_type="image",
+                        transaction_id=tx.id, metadata_json=metadata))
+    db.commit()
+
+    # Oracle: the original per-document loop
+    with_gps = {t.id: t for t in transactions if t.latitude is not None}
+    linked = [d for d in db.exec(select(Document).where(Document.project_id == project.id)).all()
+              if d.transaction_id in with_gps]
+    expected = {}
+    for doc in linked:
+        if "lat" in doc.metadata_json:
+            tx = with_gps[doc.transaction_id]
+            expected[doc.id] = GeographicValidator.calculate_distance_km(
+                tx.latitude, tx.longitude, doc.metadata_json["lat"], doc.metadata_json["lng"]
+            )
+    mismatched = {doc_id for doc_id, km in expected.items() if km > 5.0}
+    assert mismatched and len(mismatched) < len(expected)
+
+    report = SiteTruthService(db).verify_project_geospatial_integrity(project.id, chunk_size=7)
+    assert report["transactions_scanned"] == len(with_gps)
+    assert report["evidence_links_verified"] == len(expected) - len(mismatched)
+    assert report["integrity_score"] == round((len(expected) - len(mismatched)) / len(linked) * 100, 1)
+    anomalies = {a["document_id"]: a["distance_km"] for a in report["geospatial_anomalies"]}
+    assert anomalies == {doc_id: round(expected[doc_id], 2) for doc_id in mismatched}
+
+    assert SiteTruthService.verify_links(project.id, transactions, linked) == report
@@ -0,0 +1,97 @@
+"""Tests for the geohash spatial index and DBSCAN clustering used by GeocodingService"""
+
+from datetime import datetime, UTC
+
+import numpy as np
+import pytest
+from sqlmodel import Session
+
+from app.models import Entity, EntityLocation, Project, Transaction
+from app.services.geocoding_providers import OfflineGeocodingProvider
+from app.services.geocoding_service import GeocodingService
+from app.services.spatial_index import (
+    covering_prefixes,
+    dbscan_haversine,
+    geohash_encode,
+    haversine_km,
+    prefix_successor,
+)
+
+
+def test_dbscan_separates_dense_sites_from_noise():
+    # Two Jakarta sites ~1km wide, 20km apart, plus an isolated point in Bandung
+    lats = [-6.200, -6.201, -6.202, -6.380, -6.381, -6.914]
+    lngs = [106.816, 106.817, 106.818, 106.830, 106.831, 107.609]
+    labels = dbscan_haversine(lats, lngs, eps_km=1.0, min_samples=2)
+
+    assert labels[0] == labels[1] == labels[2]
+    assert labels[3] == labels[4] != labels[0]
+    assert labels[5] == -1
+
+
+def test_covering_prefixes_never_miss_points_in_radius():
+    rng = np.random.default_rng(7)
+    lats = -6.2 + rng.uniform(-0.3, 0.3, 2000)
+    lngs = 106.8 + rng.uniform(-0.3, 0.3, 2000)
+    prefixes = covering_prefixes(-6.2, 106.8, 12.0)
+    inside = haversine_km(-6.2, 106.8, lats, lngs) <= 12.0
+
+    for lat, lng in zip(lats[inside], lngs[inside]):
+        assert geohash_encode(lat, lng).startswith(tuple(prefixes))
+    assert len(prefixes) <= 16
+
+
+@pytest.mark.asyncio
+async def test_radius_and_cluster_queries_read_the_index(db: Session):
+    project = Project(
+        name="Geo Index",
+        code="PROJ-GEO-001",
+        contractor_name="PT Test",
+        contract_value=1.0,
+        start_date=datetime(2024, 1, 1, tzinfo=UTC),
+    )
+    db.add(project)
+    points = {"PT Alpha": (-6.200, 106.816), "PT Beta": (-6.203, 106.818), "CV Far": (-6.914, 107.609)}
+    for name, (lat, lng) in points.items():
+        entity = Entity(name=name, project_id=project.id)
+        db.add(entity)
+        db.add(EntityLocation(
+            project_id=project.id, entity_id=entity.id, lat=lat, lng=lng, geohash=geohash_encode(lat, lng)
+        ))
+    db.add(Transaction(
+        project_id=project.id, sender="PT Alpha", receiver="PT Beta", amount=500.0,
+        timestamp=datetime(2024, 2, 1, tzinfo=UTC),
+    ))
+    db.commit()
+
+    service = GeocodingService(db)
+    near = await service.find_entities_near_location(project.id, -6.2, 106.816, radius_km=2.0)
+    clusters = await service.cluster_entities(project.id, radius_km=1.0)
+
+    assert [e["name"] for e in near["entities"]] == ["PT Alpha", "PT Beta"]
+    assert near["entities"][0]["total_transacted"] == 500.0
+    assert clusters["total_clusters"] == 1
+    assert {m["name"] for m in clusters["clusters"][0]["members"]} == {"PT Alpha", "PT Beta"}
+    assert clusters["noise_entities"] == 1
+
+    # An entity added after the index was built is indexed on the next query
+    provider = OfflineGeocodingProvider(bbox=(-6.201, 106.815, -6.199, 106.817))
+    late = Entity(name="PT Gamma", project_id=project.id, metadata_json={"address": "Jl. Thamrin 1"})
+    db.add(late)
+    db.commit()
+    near = await GeocodingService(db, provider=provider).find_entities_near_location(
+        project.id, -6.2, 106.816, radius_km=2.0
+    )
+    assert "PT Gamma" in [e["name"] for e in near["entities"]]
+    assert db.get(EntityLocation, (project.id, late.id)) is not None
+
+
+def test_prefix_successor_bounds_the_prefix_range():
+    assert prefix_successor("qqg") == "qqh"
+    assert prefix_successor("qq9") == "qqb"  # base32 skips "a"
+    assert prefix_successor("qzz") == "r"
+    assert prefix_successor("zz") is None
+    inside, outside = geohash_encode(-6.2, 106.816), geohash_encode(-6.9, 107.6)
+    prefix = inside[:4]
+    assert prefix <= inside < prefix_successor(prefix)
+    assert not (prefix <= outside < prefix_successor(prefix))
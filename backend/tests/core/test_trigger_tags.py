@@ -0,0 +1,70 @@
+"""Tests for indexed forensic trigger tags and the cross-project alert sweep"""
+
+import pytest
+from sqlmodel import Session, delete, select
+
+from app.models import AMLStage, FraudAlert, Transaction, TransactionTriggerTag
+from app.modules.ai.alert_service import UnifiedAlertService
+from app.modules.fraud.reconciliation_router import detect_forensic_triggers
+from app.modules.fraud.trigger_tags import INFLATION, STRUCTURING, VELOCITY, classify_trigger, sync_trigger_tags
+
+
+@pytest.fixture
+def db(db):
+    db.exec(delete(TransactionTriggerTag))
+    db.commit()
+    yield db
+
+
+def test_classify_and_resync_replaces_tags(db: Session, make_project):
+    project = make_project("PROJ-TAG-001")
+    tx = Transaction(project_id=project.id, sender="A", receiver="B", actual_amount=95_000_000)
+    db.add(tx)
+    triggers = [
+        "Velocity Risk: 5 transfers to 'B' in 48h period.",
+        "Structuring Risk: Amount is suspiciously close to 100M reporting threshold.",
+        "Something unrecognised",
+    ]
+    assert classify_trigger(triggers[0]) == VELOCITY
+    assert sync_trigger_tags(db, tx.id, project.id, triggers) == ["STRUCTURING", "VELOCITY"]
+    db.commit()
+
+    sync_trigger_tags(db, tx.id, project.id, [])
+    db.commit()
+    assert db.exec(select(TransactionTriggerTag).where(TransactionTriggerTag.transaction_id == tx.id)).all() == []
+
+
+def test_sweep_raises_alerts_for_every_project_once(db: Session, make_project):
+    projects = [make_project(f"PROJ-SWEEP-{i}") for i in range(2)]
+    for project in projects:
+        tx = Transaction(project_id=project.id, sender="A", receiver="B")
+        db.add(tx)
+        sync_trigger_tags(db, tx.id, project.id, ["Velocity Risk: 4 transfers to 'B' in 48h period."])
+    db.commit()
+
+    service = UnifiedAlertService(db)
+    alerts = service.sweep_all_projects()
+    service.sweep_all_projects()
+
+    assert {a.project_id for a in alerts} == {p.id for p in projects}
+    persisted = db.exec(select(FraudAlert).where(FraudAlert.alert_type == "VELOCITY_BURST")).all()
+    assert {a.project_id for a in persisted} >= {p.id for p in projects}
+    assert len([a for a in persisted if a.project_id in {p.id for p in projects}]) == 2
+
+
+def test_detect_forensic_triggers_writes_tags_for_flagged_transaction(db: Session, make_project):
+    project = make_project("PROJ-TAG-LIVE")
+    tx = Transaction(
+        project_id=project.id, sender="A", receiver="CV Live",
+        proposed_amount=98_000_000, actual_amount=95_000_000, description="Pembayaran termin",
+    )
+    db.add(tx)
+    db.commit()
+
+    triggers = detect_forensic_triggers(tx, db)
+    db.commit()
+
+    assert tx.status == "flagged" and tx.aml_stage == AMLStage.PLACEMENT
+    tags = db.exec(select(TransactionTriggerTag.tag).where(TransactionTriggerTag.transaction_id == tx.id)).all()
+    assert {INFLATION, STRUCTURING} <= set(tags)
+    assert len(triggers) >= 2
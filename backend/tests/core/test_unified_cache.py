@@ -0,0 +1,119 @@
+"""Tests for the unified L1/L2 cache: LRU bounds, tags, single-flight, early refresh"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.cache import LRUTTLCache, UnifiedCache, project_tag
+
+
+def test_lru_evicts_least_recently_used_and_expires():
+    lru = LRUTTLCache(max_entries=2)
+    lru.set("a", 1, ttl=60)
+    lru.set("b", 2, ttl=60)
+    assert lru.get("a") == 1  # "b" is now least recent
+    lru.set("c", 3, ttl=60)
+    assert lru.get("b") is None
+    assert (lru.get("a"), lru.get("c"), lru.evictions) == (1, 3, 1)
+
+    lru.set("short", 4, ttl=0.01)
+    time.sleep(0.02)
+    assert lru.get("short") is None
+
+
+def test_tag_and_namespace_invalidation():
+    cache = UnifiedCache(client=None)
+    cache.set("scurve:p1", {"points": [1, 2]}, ttl=60, tags=[project_tag("p1")])
+    cache.set("scurve:p2", {"points": [3]}, ttl=60, tags=[project_tag("p2")])
+    cache.set("sql_gen:abc", "SELECT 1", ttl=60)
+
+    cache.invalidate_tags(project_tag("p1"))
+    assert cache.get("scurve:p1") is None
+    assert cache.get("scurve:p2") == {"points": [3]}
+
+    cache.invalidate_tags("ns:sql_gen")
+    assert cache.get("sql_gen:abc") is None
+
+
+def test_concurrent_sync_misses_compute_once():
+    cache = UnifiedCache(client=None)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"total": 42}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute("dash:p1", compute, ttl=60)))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{"total": 42}] * 8
+
+
+@pytest.mark.asyncio
+async def test_concurrent_async_misses_compute_once_and_share_errors():
+    cache = UnifiedCache(client=None)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return [1, 2, 3]
+
+    results = await asyncio.gather(*[cache.aget_or_compute("graph:p1", compute, ttl=60) for _ in range(10)])
+    assert len(calls) == 1
+    assert all(r == [1, 2, 3] for r in results)
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    outcomes = await asyncio.gather(
+        *[cache.aget_or_compute("graph:p2", boom, ttl=60) for _ in range(3)], return_exceptions=True
+    )
+    assert all(isinstance(o, RuntimeError) for o in outcomes)
+    assert cache.get("graph:p2") is None
+
+
+def test_early_refresh_recomputes_before_expiry():
+    cache = UnifiedCache(client=None, beta=1e9)  # always inside the refresh window
+    counter = {"n": 0}
+
+    def compute():
+        counter["n"] += 1
+        time.sleep(0.001)  # non-zero compute time drives the XFetch window
+        return counter["n"]
+
+    assert cache.get_or_compute("hot:key", compute, ttl=60) == 1
+    assert cache.get_or_compute("hot:key", compute, ttl=60) == 2
+    assert cache.stats["early_refreshes"] == 1
+
+    calm = UnifiedCache(client=None, beta=0)
+    calm.get_or_compute("hot:key", compute, ttl=60)
+    assert calm.get_or_compute("hot:key", compute, ttl=60) == counter["n"]
+
+
+def test_leader_and_hits_see_the_same_serialized_value():
+    from datetime import date
+
+    from app.core.advanced_cache import AdvancedCacheManager, CacheLevel
+
+    cache = UnifiedCache(client=None)
+    first = cache.get_or_compute("k", lambda: {"on": date(2024, 1, 1), "pair": (1, 2)}, ttl=60)
+    assert first == cache.get_or_compute("k", lambda: None, ttl=60) == {"on": "2024-01-01", "pair": [1, 2]}
+
+    # The L1-only read path honours tag invalidation too
+    manager = AdvancedCacheManager(backend=cache)
+    cache.set("scurve:p1", [1], ttl=60, tags=[project_tag("p1")])
+    cache.invalidate_tags(project_tag("p1"))
+    assert asyncio.run(manager.get("scurve:p1", level=CacheLevel.L1_MEMORY)) is None
@@ -0,0 +1,45 @@
+"""Tests for aggregate-only vendor velocity profiles"""
+
+from datetime import datetime, UTC, timedelta
+
+from sqlmodel import Session
+
+from app.models import Transaction, TransactionCategory
+from app.modules.legal.screening_service import SanctionScreeningService
+
+
+def test_velocity_profile_groups_in_sql(db: Session, make_project):
+    project, other = make_project("VEL-001"), make_project("VEL-002")
+    monday = datetime(2024, 3, 4, 10, 0, tzinfo=UTC)
+    categories = [TransactionCategory.V, TransactionCategory.P, TransactionCategory.F, TransactionCategory.MAT]
+    for i in range(12):
+        db.add(Transaction(
+            project_id=project.id, sender="A", receiver="CV Kecil", actual_amount=1000.0 + i,
+            category_code=categories[i % 4], transaction_date=monday + timedelta(days=i),
+        ))
+    db.add(Transaction(
+        project_id=project.id, sender="A", receiver="PT Besar", actual_amount=5_000_000.0,
+        transaction_date=monday,
+    ))
+    db.add(Transaction(project_id=other.id, sender="A", receiver="CV Kecil", actual_amount=99.0))
+    db.commit()
+
+    profile = SanctionScreeningService.analyze_vendor_velocity(db, "CV Kecil", project.id)
+    assert profile["transaction_count"] == 12
+    assert profile["total_volume"] == sum(1000.0 + i for i in range(12))
+    assert profile["active_categories"] == ["F", "MAT", "P", "V"]
+    assert [(b["period"], b["transaction_count"]) for b in profile["velocity"]] == [
+        ("2024-03-04", 7), ("2024-03-11", 5),
+    ]
+    assert profile["peak_period"] == "2024-03-04"
+    assert (profile["status"], profile["risk_score"]) == ("STRUCTURING_RISK", 0.8)
+
+    # Unscoped keeps the original behaviour of looking across projects
+    assert SanctionScreeningService.analyze_vendor_velocity(db, "CV Kecil")["transaction_count"] == 13
+    assert SanctionScreeningService.analyze_vendor_velocity(db, "CV Kecil", project.id, "month")["velocity"] == [
+        {"period": "2024-03-01", "transaction_count": 12, "volume": sum(1000.0 + i for i in range(12))},
+    ]
+
+    dashboard = SanctionScreeningService.profile_project_vendors(db, project.id)
+    assert [p["entity"] for p in dashboard] == ["CV Kecil", "PT Besar"]
+    assert dashboard[1]["velocity"] == [{"period": "2024-03-04", "transaction_count": 1, "volume": 5_000_000.0}]
@@ -0,0 +1,87 @@
+"""Tests for the watchlist screening index"""
+
+import random
+import string
+from datetime import datetime, UTC
+
+import pytest
+from sqlmodel import Session
+from thefuzz import fuzz, process
+
+from app.models import Entity, Project
+from app.modules.legal.screening_service import HIGH_RISK_WATCHLIST, SanctionScreeningService, load_watchlist
+from app.modules.legal.watchlist_index import WatchlistIndex, soundex
+
+
+@pytest.fixture
+def builtin_watchlist():
+    yield
+    load_watchlist()
+
+
+def _status(score: int) -> str:
+    return "BLOCKED" if score > 85 else "SUSPICIOUS" if score > 60 else "CLEARED"
+
+
+def test_soundex_codes():
+    assert [soundex(w) for w in ("Robert", "Rupert", "Tymczak", "Ashcraft", "Pfister")] == [
+        "R163", "R163", "T522", "A261", "P236",
+    ]
+
+
+def test_builtin_list_matches_full_scan():
+    index = WatchlistIndex(HIGH_RISK_WATCHLIST)
+    for query in ("Shel Corp Ltd", "Limited Shell Corp", "Money Launderer", "PT Semen Gresik", "Blokced Politican Y"):
+        best, score = process.extract(query, HIGH_RISK_WATCHLIST, scorer=fuzz.token_sort_ratio, limit=1)[0]
+        position, indexed = index.best_match(query)
+        assert (HIGH_RISK_WATCHLIST[position], indexed) == (best, score)
+
+
+def test_candidate_retrieval_is_exact_against_full_scan():
+    rng = random.Random(5)
+    first = ["Ahmad", "Budi", "Sergei", "Vladimir", "Maria", "Mohammed", "Li", "Chen", "Olga", "Juan", "Zoë"]
+    last = ["Santoso", "Petrov", "Ivanov", "Garcia", "Wei", "Hassan", "Kusuma", "Novak", "Silva", "Tan"]
+    firms = ["Holdings", "Trading", "Group", "Shipping", "Capital", ""]
+    names = sorted({
+        f"{rng.choice(first)} {rng.choice(last)}{rng.randint(1, 400)} {rng.choice(firms)}".strip()
+        for _ in range(4000)
+    })
+    index = WatchlistIndex(names, candidates=64)
+
+    def typo(name: str) -> str:
+        chars = list(name)
+        for _ in range(rng.randint(0, 6)):
+            chars[rng.randrange(len(chars))] = rng.choice(string.ascii_lowercase)
+        return " ".join(reversed("".join(chars).split())) if rng.random() < 0.3 else "".join(chars)
+
+    queries = [typo(rng.choice(names)) for _ in range(200)] + ["PT Semen Gresik", "Zoe Tan", "Budi"]
+    for query in queries:
+        best, score = process.extractOne(query, names, scorer=fuzz.token_sort_ratio)
+        position, indexed = index.best_match(query)
+        assert _status(indexed) == _status(score)
+        if score >= index.exact_above:
+            assert (names[position], indexed) == (best, score)
+        else:
+            assert indexed <= score
+
+
+def test_csv_watchlist_and_project_screening(db: Session, tmp_path, builtin_watchlist):
+    path = tmp_path / "pep_list.csv"
+    path.write_text("name,source\nBambang Hartono Wijaya,PEP_ID\nPT Kapal Hantu Nusantara,\n")
+    index = load_watchlist(str(path))
+    assert index.sources == ["PEP_ID", "PEP_LIST"]
+
+    project = Project(
+        name="Screening", code="SCR-001", contractor_name="PT Test",
+        contract_value=1.0, start_date=datetime(2024, 1, 1, tzinfo=UTC),
+    )
+    db.add(project)
+    for name in ("Bambang H. Wijaya", "PT Kapal Hantu Nusantara", "CV Sumber Rejeki", "Unknown"):
+        db.add(Entity(project_id=project.id, name=name))
+    db.commit()
+
+    report = SanctionScreeningService.screen_project(db, project.id)
+    assert (report["screened"], report["blocked"], report["suspicious"]) == (4, 1, 1)
+    assert [r["best_match"] for r in report["results"][:2]] == ["PT Kapal Hantu Nusantara", "Bambang Hartono Wijaya"]
+    assert {r["status"] for r in report["results"][2:]} == {"CLEARED", "SKIPPED"}
+    assert SanctionScreeningService.screen_entity("Bambang Wijaya Hartono")["status"] == "BLOCKED"
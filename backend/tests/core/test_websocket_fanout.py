@@ -0,0 +1,145 @@
+"""Tests for queued WebSocket fan-out and the cross-worker backplane"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.core import sync
+from app.core.sync import ConnectionManager, InMemoryBackplane
+
+
+class FakeSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.frames = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.frames.append(json.loads(text))
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+async def _settle(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_slow_client_does_not_stall_room_and_gets_shed(monkeypatch):
+    monkeypatch.setattr(sync, "SEND_QUEUE_SIZE", 4)
+    monkeypatch.setattr(sync, "MAX_OVERFLOWS", 8)
+    manager = ConnectionManager(backplane=InMemoryBackplane())
+    stuck = FakeSocket(delay=3600)
+    fast = [FakeSocket() for _ in range(200)]
+    await manager.connect(stuck, "p1")
+    for ws in fast:
+        await manager.connect(ws, "p1")
+
+    started = time.perf_counter()
+    for i in range(20):
+        await manager.broadcast({"n": i}, "p1")
+        await asyncio.sleep(0.001)  # broadcasts arrive from separate requests
+    assert time.perf_counter() - started < 1.0  # enqueue-only
+
+    await _settle(lambda: all(len(ws.frames) == 20 for ws in fast))
+    assert all([f["n"] for f in ws.frames] == list(range(20)) for ws in fast)
+    # The stalled socket overflowed its queue and was dropped from the room
+    assert stuck not in manager.active_connections["p1"]
+    await _settle(lambda: stuck.closed_with is not None)
+    assert stuck.closed_with == 1013
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_coalesced_frames_replace_pending_ones():
+    manager = ConnectionManager(backplane=InMemoryBackplane())
+    ws = FakeSocket(delay=0.05)
+    await manager.connect(ws, "p1")
+    await manager.broadcast("INGESTION_PROGRESS:abc:20", "p1", coalesce_key="progress:abc")
+    await asyncio.sleep(0.01)  # first frame is now in flight
+    for pct in (40, 60, 80):
+        await manager.broadcast(f"INGESTION_PROGRESS:abc:{pct}", "p1", coalesce_key="progress:abc")
+    await _settle(lambda: ws.frames and ws.frames[-1].endswith(":80"))
+    # The first frame was already in flight; the rest collapsed to the latest
+    assert ws.frames == ["INGESTION_PROGRESS:abc:20", "INGESTION_PROGRESS:abc:80"]
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_broadcast_reaches_sockets_on_other_workers_once():
+    backplane = InMemoryBackplane()
+    worker_a = ConnectionManager(backplane=backplane)
+    worker_b = ConnectionManager(backplane=backplane)
+    on_a, on_b, other_room = FakeSocket(), FakeSocket(), FakeSocket()
+    await worker_a.connect(on_a, "p1")
+    await worker_b.connect(on_b, "p1")
+    await worker_b.connect(other_room, "p2")
+
+    await worker_a.broadcast({"type": "PRESENCE"}, "p1")
+    await worker_b.broadcast({"type": "GLOBAL"})
+    await _settle(lambda: len(on_a.frames) == 2 and len(on_b.frames) == 2)
+
+    assert on_a.frames == [{"type": "PRESENCE"}, {"type": "GLOBAL"}]
+    assert on_b.frames == [{"type": "PRESENCE"}, {"type": "GLOBAL"}]
+    assert other_room.frames == [{"type": "GLOBAL"}]
+    await worker_a.close()
+    await worker_b.close()
+
+
+class FakePubSub:
+    def __init__(self, messages, fail: bool):
+        self.messages = messages
+        self.fail = fail
+        self.closed = False
+
+    async def subscribe(self, channel):
+        pass
+
+    async def listen(self):
+        for message in self.messages:
+            yield message
+        if self.fail:
+            raise ConnectionError("connection reset")
+        await asyncio.Event().wait()
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakeRedis:
+    def __init__(self):
+        self.pubsubs = [
+            FakePubSub([{"data": json.dumps({"n": 1})}], fail=True),
+            FakePubSub([{"data": json.dumps({"n": 2})}], fail=False),
+        ]
+        self.closed = False
+
+    def pubsub(self, ignore_subscribe_messages=True):
+        return self.pubsubs.pop(0)
+
+    async def aclose(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_redis_backplane_resubscribes_after_connection_loss(monkeypatch):
+    monkeypatch.setattr(sync, "RESUBSCRIBE_MIN_DELAY", 0.01)
+    backplane = sync.RedisBackplane("redis://localhost:1/0")
+    backplane._redis = fake = FakeRedis()
+    received = []
+    await backplane.start(received.append)
+
+    await _settle(lambda: len(received) == 2)
+    assert received == [{"n": 1}, {"n": 2}]
+    await backplane.stop()
+    assert fake.closed